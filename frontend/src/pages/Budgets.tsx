@@ -369,9 +369,14 @@ export default function Budgets() {
       key: 'client_name',
       width: 240,
       ellipsis: true,
-      render: (text: string) => (
-        <Space>
+      render: (text: string, record: BudgetSummary) => (
+        <Space direction="vertical" size={0}>
           <Text strong>{text}</Text>
+          {record.seller_name && (
+            <Text type="secondary" style={{ fontSize: '12px' }}>
+              {record.seller_name}
+            </Text>
+          )}
         </Space>
       ),
     },
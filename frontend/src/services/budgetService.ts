@@ -210,6 +210,8 @@ export interface BudgetSummary {
   profitability_percentage: number;
   items_count: number;
   origem?: string;
+  created_by?: string;
+  seller_name?: string | null;  // Nome do vendedor resolvido pelo budget_service
   created_at: string;
 }
 
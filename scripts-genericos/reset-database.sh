@@ -203,10 +203,9 @@ run_migrations() {
     fi
     
     # Run budget service migrations
-    if docker compose -f "$COMPOSE_FILE" ps budget_service | grep -q "Up"; then
-        docker compose -f "$COMPOSE_FILE" exec budget_service alembic upgrade head
-        log_success "Budget service migrations completed!"
-    fi
+    # One-off container: works even when budget_service is not running
+    docker compose -f "$COMPOSE_FILE" run --rm budget_service alembic upgrade head
+    log_success "Budget service migrations completed!"
     
     # Try to restore users if we have a backup from full reset
     if [[ -f "/tmp/last_users_backup_path" ]]; then
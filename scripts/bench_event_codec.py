@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark do codec binário de eventos (shared/messaging/codec.py) contra o
+caminho JSON anterior (model_dump + json.dumps(default=str)).
+
+Uso: python scripts/bench_event_codec.py [--number 20000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.messaging.event_bus import JsonEventCodec  # noqa: E402
+from shared.messaging.events import (  # noqa: E402
+    BUDGET_EVENT_TOTALS,
+    BudgetStatusChangedEvent,
+    BudgetUpdatedEvent,
+    UserCreatedEvent,
+    UserLoginEvent,
+    event_codec,
+)
+
+
+def sample_events():
+    totals = {field: 12345.67 + i for i, field in enumerate(BUDGET_EVENT_TOTALS)}
+    return {
+        "user.created": UserCreatedEvent(user_data={
+            "id": 1234,
+            "email": "maria.silva@ditual.com.br",
+            "username": "maria.silva",
+            "full_name": "Maria da Silva",
+            "role": "vendedor",
+            "is_active": True,
+            "created_by": "admin",
+        }).model_dump(),
+        "user.login": UserLoginEvent(user_data={
+            "id": 1234,
+            "email": "maria.silva@ditual.com.br",
+            "username": "maria.silva",
+            "role": "vendedor",
+        }).model_dump(),
+        "budget.updated": BudgetUpdatedEvent(budget_data={
+            "budget_id": 5678,
+            "order_number": "PED-2026-0042",
+            "created_by": "maria.silva",
+            "status": "draft",
+            "totals": {"total_sale_value": 15400.5, "total_commission": 231.01},
+            "previous": {"total_sale_value": 14900.0, "total_commission": 223.5},
+        }).model_dump(),
+        "budget.status_changed": BudgetStatusChangedEvent(budget_data={
+            "budget_id": 5678,
+            "order_number": "PED-2026-0042",
+            "created_by": "maria.silva",
+            "from_status": "pending",
+            "to_status": "approved",
+            "totals": totals,
+        }).model_dump(),
+    }
+
+
+def bench(number: int) -> None:
+    json_codec = JsonEventCodec()
+    header = f"{'evento':<22}{'codec':<8}{'bytes':>7}{'encode µs':>12}{'decode µs':>12}"
+    print(header)
+    print("-" * len(header))
+    for name, event in sample_events().items():
+        for label, codec in (("json", json_codec), ("binary", event_codec)):
+            payload = codec.encode(event)
+            encode = timeit.timeit(lambda: codec.encode(event), number=number) / number * 1e6
+            decode = timeit.timeit(lambda: codec.decode(payload), number=number) / number * 1e6
+            print(f"{name:<22}{label:<8}{len(payload):>7}{encode:>12.2f}{decode:>12.2f}")
+    print()
+    print(f"json: {json.__name__} (C accelerator: {json.encoder.c_make_encoder is not None})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--number", type=int, default=20000, help="iterações por medida")
+    bench(parser.parse_args().number)
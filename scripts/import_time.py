@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Mede o tempo de import (cold start) de um serviço com `python -X importtime`.
+
+Importa `app.main` em um processo novo, N vezes, e mostra a mediana do tempo
+total e os módulos de maior custo acumulado. Com --max-ms o script falha se
+a mediana passar do limite (útil em CI para pegar imports pesados que
+voltaram para o caminho do startup).
+
+Uso:
+    python scripts/import_time.py budget_service --runs 5 --top 20
+    python scripts/import_time.py user_service --max-ms 1500
+    python scripts/import_time.py budget_service --forbid reportlab
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVICES = os.path.join(ROOT, "services")
+
+PROBE = "import sys, app.main; print('\\n'.join(sorted(sys.modules)))"
+
+
+def measure(service: str) -> Tuple[float, Dict[str, float], List[str]]:
+    """(total em ms, custo acumulado por módulo em ms, módulos carregados)"""
+    env = {**os.environ, "LOG_LEVEL": "WARNING"}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        cwd=os.path.join(SERVICES, service), env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"falha ao importar {service}:\n{result.stderr[-2000:]}")
+    cumulative: Dict[str, float] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        if cumulative_us.isdigit():
+            cumulative[name] = int(cumulative_us) / 1000
+    return cumulative.get("app.main", 0.0), cumulative, result.stdout.split()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("service", choices=sorted(
+        name for name in os.listdir(SERVICES) if os.path.isdir(os.path.join(SERVICES, name, "app"))
+    ))
+    parser.add_argument("--runs", type=int, default=5, help="processos medidos (o primeiro aquece o cache de bytecode)")
+    parser.add_argument("--top", type=int, default=15, help="módulos de maior custo a listar")
+    parser.add_argument("--max-ms", type=float, help="falhar se a mediana passar deste tempo")
+    parser.add_argument("--forbid", action="append", default=[], help="pacote que não pode ser importado no startup")
+    args = parser.parse_args()
+
+    measure(args.service)
+    runs = [measure(args.service) for _ in range(args.runs)]
+    median_total = statistics.median(total for total, _, _ in runs)
+    _, cumulative, modules = runs[-1]
+
+    print(f"{args.service}: import de app.main em {median_total:.0f} ms (mediana de {args.runs})")
+    print(f"{'acumulado ms':>13}  módulo")
+    top_level = {name: ms for name, ms in cumulative.items() if name != "app.main"}
+    for name, ms in sorted(top_level.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"{ms:13.1f}  {name}")
+
+    failures = []
+    for package in args.forbid:
+        if any(module == package or module.startswith(package + ".") for module in modules):
+            failures.append(f"{package} é importado no startup")
+    if args.max_ms is not None and median_total > args.max_ms:
+        failures.append(f"mediana {median_total:.0f} ms acima do limite de {args.max_ms:.0f} ms")
+    if failures:
+        raise SystemExit("; ".join(failures))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,506 @@
+#!/usr/bin/env python3
+"""
+Teste de carga assíncrono com o tráfego típico do CRM (vendedores + admin).
+
+Cada usuário virtual faz login e repete uma mistura ponderada de ações com
+tempo de pensamento aleatório:
+
+- vendedores: listar orçamentos, abrir um orçamento, digitar itens no
+  formulário (rajada de /calculate-simplified, uma chamada por "tecla"),
+  criar e atualizar orçamentos simplificados, dashboard e exportar PDF;
+- admin: dashboard, listagem e exportação de PDF.
+
+Ao final, gera um relatório JSON com p50/p95/p99, vazão e taxa de erro por
+endpoint (rota com parâmetros, não a URL) para comparar execuções
+(--baseline mostra a variação em relação a um relatório anterior).
+
+Uso:
+    # sobe user_service e budget_service locais com SQLite temporário
+    python scripts/load_test.py --start-stack --sellers 10 --duration 60 --output run.json
+
+    # contra uma stack já em execução (ex.: Postgres local / docker-compose)
+    python scripts/load_test.py --user-url http://localhost:8001 --budget-url http://localhost:8002 \\
+        --admin-password admin102030 --duration 120 --baseline run.json
+
+Os vendedores (loadtest_seller_N) são criados pelo admin via API se ainda
+não existirem. Em stacks externas, desative o throttling de login
+(LOGIN_THROTTLE_ENABLED=false) ou use poucos vendedores, pois todos os
+logins partem do mesmo IP.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import secrets
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVICES = os.path.join(ROOT, "services")
+
+SELLER_MIX = {
+    "list": 20,
+    "detail": 20,
+    "keystrokes": 25,
+    "create": 8,
+    "update": 7,
+    "dashboard": 12,
+    "pdf": 8,
+}
+ADMIN_MIX = {"dashboard": 45, "list": 35, "pdf": 20}
+
+PRODUCTS = [
+    ("Chapa aço carbono 3mm", 2.11, 2.95),
+    ("Bobina galvanizada 0,5mm", 5.40, 7.10),
+    ("Tubo redondo 2\"", 8.90, 11.60),
+    ("Cantoneira 1/8\"", 6.20, 8.05),
+    ("Barra chata 1\"", 4.75, 6.30),
+]
+
+USER_BOOTSTRAP = """
+import asyncio, os
+from app.core.database import Base, AsyncSessionLocal, engine
+from app.models import outbox, user  # noqa: F401
+from app.schemas.user import UserCreate
+from app.services import user_service
+from app.services.auth import initialize_password_hasher
+
+async def main():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    await initialize_password_hasher()
+    async with AsyncSessionLocal() as db:
+        if await user_service.get_user_by_username(db, "admin") is None:
+            await user_service.create_user(db, UserCreate(
+                username="admin", email="admin@loadtest.example.com", full_name="Admin Load Test",
+                password=os.environ["ADMIN_PASSWORD"], role="admin",
+            ))
+    await engine.dispose()
+
+asyncio.run(main())
+"""
+
+
+# Estatísticas ----------------------------------------------------------------
+
+
+def percentile(sorted_values: List[float], fraction: float) -> Optional[float]:
+    """Percentil pelo método nearest-rank"""
+    if not sorted_values:
+        return None
+    rank = max(1, int(-(-fraction * len(sorted_values) // 1)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class Stats:
+    """Latências e status por endpoint"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.statuses: Dict[str, Dict[str, int]] = {}
+        self.recording = False
+
+    def record(self, endpoint: str, status: str, elapsed_ms: float) -> None:
+        if not self.recording:
+            return
+        self.latencies.setdefault(endpoint, []).append(elapsed_ms)
+        counts = self.statuses.setdefault(endpoint, {})
+        counts[status] = counts.get(status, 0) + 1
+
+    @staticmethod
+    def _summary(latencies: List[float], statuses: Dict[str, int], elapsed: float) -> Dict[str, Any]:
+        values = sorted(latencies)
+        errors = sum(count for status, count in statuses.items() if not status.startswith(("2", "3")))
+        return {
+            "requests": len(values),
+            "errors": errors,
+            "error_rate": round(errors / len(values), 4) if values else 0.0,
+            "throughput_rps": round(len(values) / elapsed, 2) if elapsed > 0 else 0.0,
+            "mean_ms": round(sum(values) / len(values), 2) if values else None,
+            "p50_ms": round(percentile(values, 0.50), 2) if values else None,
+            "p95_ms": round(percentile(values, 0.95), 2) if values else None,
+            "p99_ms": round(percentile(values, 0.99), 2) if values else None,
+            "max_ms": round(values[-1], 2) if values else None,
+            "statuses": dict(sorted(statuses.items())),
+        }
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        endpoints = {
+            endpoint: self._summary(self.latencies[endpoint], self.statuses[endpoint], elapsed)
+            for endpoint in sorted(self.latencies)
+        }
+        all_latencies = [value for values in self.latencies.values() for value in values]
+        all_statuses: Dict[str, int] = {}
+        for counts in self.statuses.values():
+            for status, count in counts.items():
+                all_statuses[status] = all_statuses.get(status, 0) + count
+        return {"totals": self._summary(all_latencies, all_statuses, elapsed), "endpoints": endpoints}
+
+
+# Usuários virtuais -------------------------------------------------------------
+
+
+def random_item(rng: random.Random) -> Dict[str, Any]:
+    description, purchase, sale = rng.choice(PRODUCTS)
+    weight = float(rng.choice([100, 250, 500, 1000, 2000]))
+    return {
+        "description": description,
+        "peso_compra": weight,
+        "peso_venda": round(weight * rng.uniform(1.0, 1.03), 1),
+        "valor_com_icms_compra": round(purchase * rng.uniform(0.95, 1.05), 2),
+        "percentual_icms_compra": rng.choice([0.12, 0.18]),
+        "outras_despesas_item": rng.choice([0.0, 0.0, 0.05]),
+        "valor_com_icms_venda": round(sale * rng.uniform(0.95, 1.1), 2),
+        "percentual_icms_venda": rng.choice([0.12, 0.18]),
+        "percentual_ipi": rng.choice([0.0, 0.0325, 0.05]),
+        "delivery_time": str(rng.choice([0, 7, 15, 30])),
+    }
+
+
+def random_budget(rng: random.Random, items: int) -> Dict[str, Any]:
+    return {
+        "client_name": f"Cliente Carga {rng.randint(1, 500)}",
+        "freight_type": rng.choice(["FOB", "CIF"]),
+        "freight_value_total": rng.choice([0.0, 350.0, 800.0]),
+        "payment_condition": rng.choice(["À vista", "30 dias", "30/60 dias"]),
+        "items": [random_item(rng) for _ in range(items)],
+    }
+
+
+class VirtualUser:
+    """Um vendedor ou o admin executando a mistura de ações"""
+
+    def __init__(self, name: str, password: str, mix: Dict[str, int], args: argparse.Namespace,
+                 stats: Stats, user_http: httpx.AsyncClient, budget_http: httpx.AsyncClient, seed: int):
+        self.name = name
+        self.password = password
+        self.actions = list(mix)
+        self.weights = list(mix.values())
+        self.args = args
+        self.stats = stats
+        self.user_http = user_http
+        self.budget_http = budget_http
+        self.rng = random.Random(seed)
+        self.headers: Dict[str, str] = {}
+        self.budget_ids: List[int] = []
+
+    async def request(self, endpoint: str, client: httpx.AsyncClient, method: str, url: str,
+                      **kwargs) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, headers=self.headers, **kwargs)
+        except httpx.HTTPError as e:
+            self.stats.record(endpoint, type(e).__name__, (time.perf_counter() - started) * 1000)
+            return None
+        self.stats.record(endpoint, str(response.status_code), (time.perf_counter() - started) * 1000)
+        return response
+
+    async def login(self) -> None:
+        response = await self.request("POST /api/v1/users/login", self.user_http, "POST", "/api/v1/users/login",
+                                      json={"username": self.name, "password": self.password})
+        if response is None or response.status_code != 200:
+            raise RuntimeError(f"login failed for {self.name}: {response.status_code if response else 'error'}")
+        self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    async def think(self) -> None:
+        if self.args.think > 0:
+            await asyncio.sleep(self.rng.expovariate(1 / self.args.think))
+
+    async def run(self, deadline: float) -> None:
+        await self.login()
+        while time.monotonic() < deadline:
+            action = self.rng.choices(self.actions, self.weights)[0]
+            await getattr(self, f"do_{action}")()
+            await self.think()
+
+    def _known_budget(self) -> Optional[int]:
+        return self.rng.choice(self.budget_ids) if self.budget_ids else None
+
+    async def do_list(self) -> None:
+        response = await self.request("GET /api/v1/budgets/", self.budget_http, "GET", "/api/v1/budgets/",
+                                      params={"limit": 50})
+        if response is not None and response.status_code == 200:
+            ids = [budget["id"] for budget in response.json()]
+            if ids:
+                self.budget_ids = ids[:50]
+
+    async def do_detail(self) -> None:
+        budget_id = self._known_budget()
+        if budget_id is None:
+            return await self.do_list()
+        await self.request("GET /api/v1/budgets/{budget_id}", self.budget_http, "GET", f"/api/v1/budgets/{budget_id}")
+
+    async def do_keystrokes(self) -> None:
+        """Preenchimento do formulário: recalcula a cada alteração de campo"""
+        budget = random_budget(self.rng, self.rng.randint(1, 4))
+        for _ in range(self.rng.randint(5, 15)):
+            item = self.rng.choice(budget["items"])
+            item["valor_com_icms_venda"] = round(item["valor_com_icms_venda"] * self.rng.uniform(0.98, 1.02), 2)
+            await self.request("POST /api/v1/budgets/calculate-simplified", self.budget_http, "POST",
+                               "/api/v1/budgets/calculate-simplified", json=budget)
+            await asyncio.sleep(self.rng.uniform(0.05, 0.2) * self.args.keystroke_scale)
+
+    async def do_create(self) -> None:
+        response = await self.request("POST /api/v1/budgets/simplified", self.budget_http, "POST",
+                                      "/api/v1/budgets/simplified",
+                                      json=random_budget(self.rng, self.rng.randint(1, self.args.max_items)))
+        if response is not None and response.status_code == 201:
+            self.budget_ids.append(response.json()["id"])
+
+    async def do_update(self) -> None:
+        """Como o frontend: abre o orçamento e salva com os itens editados"""
+        budget_id = self._known_budget()
+        if budget_id is None:
+            return await self.do_create()
+        current = await self.request("GET /api/v1/budgets/{budget_id}", self.budget_http, "GET",
+                                     f"/api/v1/budgets/{budget_id}")
+        if current is None or current.status_code != 200:
+            return
+        budget = random_budget(self.rng, self.rng.randint(1, self.args.max_items))
+        budget["order_number"] = current.json()["order_number"]
+        await self.request("PUT /api/v1/budgets/simplified/{budget_id}", self.budget_http, "PUT",
+                           f"/api/v1/budgets/simplified/{budget_id}", json=budget)
+
+    async def do_dashboard(self) -> None:
+        end = date.today()
+        start = end - timedelta(days=self.rng.choice([7, 30, 90]))
+        await self.request("GET /api/v1/dashboard/stats", self.budget_http, "GET", "/api/v1/dashboard/stats",
+                           params={"start_date": start.isoformat(), "end_date": end.isoformat()})
+
+    async def do_pdf(self) -> None:
+        budget_id = self._known_budget()
+        if budget_id is None:
+            return await self.do_list()
+        await self.request("GET /api/v1/budgets/{budget_id}/export-pdf", self.budget_http, "GET",
+                           f"/api/v1/budgets/{budget_id}/export-pdf")
+
+
+# Stack local -----------------------------------------------------------------
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _require_redis(host: str, port: int) -> None:
+    # O user_service não sobe sem Redis (eventos/outbox)
+    try:
+        socket.create_connection((host, port), timeout=2).close()
+    except OSError:
+        raise SystemExit(
+            f"Redis não encontrado em {host}:{port}. Suba um com "
+            "`docker compose up -d redis` ou `docker run -p 6379:6379 redis:7-alpine`."
+        )
+
+
+async def _wait_healthy(url: str, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=url, timeout=2.0) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/health")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.3)
+    raise RuntimeError(f"{url} did not become healthy in {timeout:.0f}s")
+
+
+@asynccontextmanager
+async def local_stack(args: argparse.Namespace):
+    """Sobe os dois serviços com uvicorn e SQLite em um diretório temporário"""
+    redis_host = os.getenv("REDIS_HOST", "127.0.0.1")
+    _require_redis(redis_host, int(os.getenv("REDIS_PORT", "6379")))
+    workdir = tempfile.mkdtemp(prefix="crm-loadtest-")
+    user_port, budget_port = _free_port(), _free_port()
+    env = {
+        **os.environ,
+        "SECRET_KEY": secrets.token_hex(32),
+        "ENVIRONMENT": "loadtest",
+        "LOG_LEVEL": "WARNING",
+        "DB_SCHEMA_MODE": "create",
+        "ADMIN_PASSWORD": args.admin_password,
+        "LOGIN_THROTTLE_ENABLED": "false",
+        "BCRYPT_ROUNDS": str(args.bcrypt_rounds),
+        "REDIS_HOST": redis_host,
+        "USER_SERVICE_DATABASE_URL": f"sqlite+aiosqlite:///{workdir}/users.db",
+        "DATABASE_URL": f"sqlite+aiosqlite:///{workdir}/budgets.db",
+        "USER_SERVICE_URL": f"http://127.0.0.1:{user_port}",
+    }
+    if args.database_url:
+        env["DATABASE_URL"] = args.database_url
+    user_dir = os.path.join(SERVICES, "user_service")
+    budget_dir = os.path.join(SERVICES, "budget_service")
+    subprocess.run([sys.executable, "-c", USER_BOOTSTRAP], cwd=user_dir, env=env, check=True,
+                   stdout=subprocess.DEVNULL)
+
+    processes = []
+    logs = []
+    try:
+        for name, cwd, port in (("user_service", user_dir, user_port), ("budget_service", budget_dir, budget_port)):
+            log = open(os.path.join(workdir, f"{name}.log"), "w")
+            logs.append(log)
+            processes.append(subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+                 "--workers", str(args.workers), "--no-access-log"],
+                cwd=cwd, env=env, stdout=log, stderr=subprocess.STDOUT,
+            ))
+        user_url, budget_url = f"http://127.0.0.1:{user_port}", f"http://127.0.0.1:{budget_port}"
+        await asyncio.gather(_wait_healthy(user_url), _wait_healthy(budget_url))
+        print(f"stack local em {workdir} (user {user_port}, budget {budget_port})", file=sys.stderr)
+        yield user_url, budget_url
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        for log in logs:
+            log.close()
+
+
+# Execução ----------------------------------------------------------------------
+
+
+async def ensure_sellers(user_http: httpx.AsyncClient, admin_token: str, count: int, password: str) -> List[str]:
+    names = [f"loadtest_seller_{i}" for i in range(1, count + 1)]
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    for name in names:
+        response = await user_http.post("/api/v1/users/", headers=headers, json={
+            "username": name, "email": f"{name}@loadtest.example.com", "full_name": name.replace("_", " ").title(),
+            "password": password, "role": "vendas",
+        })
+        # 400 = já existe (execuções anteriores)
+        if response.status_code not in (201, 400):
+            raise RuntimeError(f"could not create {name}: {response.status_code} {response.text}")
+    return names
+
+
+async def run_load(args: argparse.Namespace, user_url: str, budget_url: str) -> Dict[str, Any]:
+    stats = Stats()
+    limits = httpx.Limits(max_connections=args.sellers + 10, max_keepalive_connections=args.sellers + 10)
+    async with httpx.AsyncClient(base_url=user_url, timeout=args.timeout, limits=limits) as user_http, \
+            httpx.AsyncClient(base_url=budget_url, timeout=args.timeout, limits=limits) as budget_http:
+        admin = VirtualUser("admin", args.admin_password, ADMIN_MIX, args, stats, user_http, budget_http, args.seed)
+        await admin.login()
+        names = await ensure_sellers(user_http, admin.headers["Authorization"].split()[1], args.sellers,
+                                     args.seller_password)
+        users = [admin] + [
+            VirtualUser(name, args.seller_password, SELLER_MIX, args, stats, user_http, budget_http, args.seed + i)
+            for i, name in enumerate(names, start=1)
+        ]
+
+        stats.recording = args.warmup <= 0
+        started = time.monotonic()
+        deadline = started + args.warmup + args.duration
+
+        async def start_recording():
+            await asyncio.sleep(args.warmup)
+            stats.recording = True
+
+        recorder = asyncio.create_task(start_recording()) if args.warmup > 0 else None
+        results = await asyncio.gather(*(user.run(deadline) for user in users), return_exceptions=True)
+        if recorder is not None:
+            recorder.cancel()
+        elapsed = time.monotonic() - started - max(args.warmup, 0)
+
+    failures = [str(result) for result in results if isinstance(result, Exception)]
+    report = stats.report(elapsed)
+    report["meta"] = {
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "duration_s": round(elapsed, 2),
+        "warmup_s": args.warmup,
+        "sellers": args.sellers,
+        "think_s": args.think,
+        "seed": args.seed,
+        "user_url": user_url,
+        "budget_url": budget_url,
+        "stack": "local-sqlite" if args.start_stack and not args.database_url else ("local" if args.start_stack else "external"),
+        "seller_mix": SELLER_MIX,
+        "admin_mix": ADMIN_MIX,
+        "virtual_user_failures": failures,
+    }
+    return report
+
+
+def print_summary(report: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> None:
+    def delta(current: Optional[float], previous: Optional[float]) -> str:
+        if current is None or not previous:
+            return ""
+        return f"{(current - previous) / previous * 100:+.0f}%"
+
+    header = f"{'endpoint':<46}{'req':>7}{'rps':>8}{'err%':>7}{'p50':>9}{'p95':>9}{'p99':>9}"
+    if baseline:
+        header += f"{'Δp95':>8}{'Δrps':>8}"
+    print(header, file=sys.stderr)
+    print("-" * len(header), file=sys.stderr)
+    rows: List[Tuple[str, Dict[str, Any]]] = list(report["endpoints"].items()) + [("TOTAL", report["totals"])]
+    for endpoint, row in rows:
+        line = (f"{endpoint:<46}{row['requests']:>7}{row['throughput_rps']:>8.1f}{row['error_rate'] * 100:>7.1f}"
+                f"{row['p50_ms'] or 0:>9.1f}{row['p95_ms'] or 0:>9.1f}{row['p99_ms'] or 0:>9.1f}")
+        if baseline:
+            previous = baseline["totals"] if endpoint == "TOTAL" else baseline["endpoints"].get(endpoint, {})
+            line += f"{delta(row['p95_ms'], previous.get('p95_ms')):>8}"
+            line += f"{delta(row['throughput_rps'], previous.get('throughput_rps')):>8}"
+        print(line, file=sys.stderr)
+    if report["meta"]["virtual_user_failures"]:
+        print(f"falhas: {report['meta']['virtual_user_failures']}", file=sys.stderr)
+
+
+async def main(args: argparse.Namespace) -> int:
+    if args.start_stack:
+        async with local_stack(args) as (user_url, budget_url):
+            report = await run_load(args, user_url, budget_url)
+    else:
+        report = await run_load(args, args.user_url, args.budget_url)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_summary(report, baseline)
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return 1 if report["meta"]["virtual_user_failures"] else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--start-stack", action="store_true", help="subir os serviços localmente (SQLite)")
+    parser.add_argument("--database-url", help="com --start-stack: banco do budget_service (ex.: Postgres local)")
+    parser.add_argument("--workers", type=int, default=1, help="workers uvicorn por serviço (--start-stack)")
+    parser.add_argument("--bcrypt-rounds", type=int, default=10, help="custo bcrypt da stack local")
+    parser.add_argument("--user-url", default="http://localhost:8001")
+    parser.add_argument("--budget-url", default="http://localhost:8002")
+    parser.add_argument("--admin-password", default=os.getenv("ADMIN_PASSWORD", "admin102030"))
+    parser.add_argument("--seller-password", default="loadtest123")
+    parser.add_argument("--sellers", type=int, default=10, help="vendedores simultâneos")
+    parser.add_argument("--duration", type=float, default=60.0, help="segundos medidos")
+    parser.add_argument("--warmup", type=float, default=5.0, help="segundos iniciais fora das estatísticas")
+    parser.add_argument("--think", type=float, default=0.5, help="tempo médio de pensamento entre ações (s)")
+    parser.add_argument("--keystroke-scale", type=float, default=1.0, help="multiplica o intervalo entre teclas")
+    parser.add_argument("--max-items", type=int, default=8, help="itens máximos por orçamento criado")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="arquivo do relatório JSON (padrão: stdout)")
+    parser.add_argument("--baseline", help="relatório anterior para comparação")
+    sys.exit(asyncio.run(main(parser.parse_args())))
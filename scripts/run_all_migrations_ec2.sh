@@ -122,7 +122,7 @@ fi
 # Executar migrações do budget_service
 echo "💰 EXECUTANDO MIGRAÇÕES DO BUDGET_SERVICE"
 echo "========================================="
-${DOCKER_COMPOSE} -f docker-compose.prod.yml exec budget_service alembic upgrade head
+${DOCKER_COMPOSE} -f docker-compose.prod.yml run --rm budget_service alembic upgrade head
 
 if [ $? -eq 0 ]; then
     echo "✅ Migrações do budget_service executadas com sucesso!"
@@ -66,7 +66,7 @@ echo "✅ Banco de dados acessível!"
 
 # Executar migrações do budget_service
 echo "🚀 Executando migrações do budget_service..."
-docker-compose -f docker-compose.prod.yml exec budget_service alembic upgrade head
+docker-compose -f docker-compose.prod.yml run --rm budget_service alembic upgrade head
 
 if [ $? -eq 0 ]; then
     echo "✅ Migrações do budget_service executadas com sucesso!"
@@ -4,6 +4,8 @@ from sqlalchemy import pool
 from alembic import context
 from app.core.database import Base
 from app.models.budget import Budget, BudgetItem  # Import all models here
+from app.models.outbox import OutboxEvent
+from app.models.pricing_rules import PricingRuleSet
 import os
 from dotenv import load_dotenv
 import re
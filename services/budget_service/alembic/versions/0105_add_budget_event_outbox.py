@@ -0,0 +1,23 @@
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0105"
+down_revision = "0104"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "budget_event_outbox",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("stream", sa.String(length=100), nullable=False),
+        sa.Column("payload", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+    )
+    op.create_index("ix_budget_event_outbox_id", "budget_event_outbox", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_budget_event_outbox_id", table_name="budget_event_outbox")
+    op.drop_table("budget_event_outbox")
@@ -0,0 +1,51 @@
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0106"
+down_revision = "0105"
+branch_labels = None
+depends_on = None
+
+# Regras em vigor até esta migration (antes constantes no código)
+INITIAL_RULES = {
+    "commission_brackets": [
+        {"min_profitability": 0.0, "commission_rate": 0.0},
+        {"min_profitability": 0.20, "commission_rate": 0.01},
+        {"min_profitability": 0.30, "commission_rate": 0.015},
+        {"min_profitability": 0.40, "commission_rate": 0.025},
+        {"min_profitability": 0.50, "commission_rate": 0.03},
+        {"min_profitability": 0.60, "commission_rate": 0.04},
+        {"min_profitability": 0.80, "commission_rate": 0.05},
+    ],
+    "pis_cofins_percentage": 0.0925,
+    "icms_default_percentage": 0.18,
+    "ipi_valid_percentages": [0.0, 0.0325, 0.05],
+}
+
+
+def upgrade() -> None:
+    pricing_rule_sets = op.create_table(
+        "pricing_rule_sets",
+        sa.Column("version", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column("rules", sa.Text(), nullable=False),
+        sa.Column("created_by", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+    )
+    op.bulk_insert(pricing_rule_sets, [
+        {"version": 1, "rules": json.dumps(INITIAL_RULES), "created_by": "migration"},
+    ])
+
+    # Orçamentos existentes ficam sem versão (NULL): entram no recálculo de regras desatualizadas
+    op.add_column("budgets", sa.Column(
+        "pricing_rules_version", sa.Integer(), nullable=True,
+        comment="Versão das regras de preço usada no último cálculo",
+    ))
+    op.create_index("ix_budgets_pricing_rules_version", "budgets", ["pricing_rules_version"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_budgets_pricing_rules_version", table_name="budgets")
+    op.drop_column("budgets", "pricing_rules_version")
+    op.drop_table("pricing_rule_sets")
@@ -10,11 +10,13 @@ from app.core.security import get_current_active_user, get_user_filter, require_
 from app.models.budget import BudgetStatus
 from app.schemas.budget import (
     BudgetCreate, BudgetUpdate, BudgetResponse, BudgetSummary, BudgetCalculation,
-    BudgetSimplifiedCreate, BudgetItemCreate
+    BudgetSimplifiedCreate
 )
 from app.services.budget_service import BudgetService
-from app.services.budget_calculator import BudgetCalculatorService
+from app.services.budget_validation import BudgetValidationError, check_budget_items
+from app.services.calculator_input import to_calculator_input
 from app.services.pdf_export_service import pdf_export_service
+from app.services.user_directory import resolve_users
 from app.utils.rounding import round_currency, round_percent, round_percent_display
 import logging
 
@@ -82,6 +84,12 @@ async def create_budget(
         budget_with_items = await BudgetService.get_budget_by_id(db, budget.id)
         return budget_with_items
         
+    except BudgetValidationError as e:
+        # Todos os erros dos itens, no formato de validação do FastAPI
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=e.detail
+        )
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -100,7 +108,8 @@ async def get_budgets(
     custom_start: Optional[str] = Query(None, description="Data inicial customizada (YYYY-MM-DD)"),
     custom_end: Optional[str] = Query(None, description="Data final customizada (YYYY-MM-DD)"),
     db: AsyncSession = Depends(get_db),
-    user_filter: Optional[str] = Depends(get_user_filter)
+    user_filter: Optional[str] = Depends(get_user_filter),
+    credentials: HTTPAuthorizationCredentials = Depends(security)
 ):
     """Listar orçamentos com filtros baseados no perfil do usuário"""
     
@@ -114,9 +123,17 @@ async def get_budgets(
         days=days, custom_start=custom_start, custom_end=custom_end
     )
     
+    # Vendedores da página: diretório local e, para os ausentes, uma única chamada em lote
+    try:
+        sellers = await resolve_users([budget.created_by for budget in budgets], credentials.credentials)
+    except Exception as e:
+        logger.warning("Failed to resolve sellers for budget list: %s", e)
+        sellers = {}
+    
     # Convert to summary format
     summaries = []
     for budget in budgets:
+        seller = sellers.get(budget.created_by)
         summaries.append(BudgetSummary(
             id=budget.id,
             order_number=budget.order_number,
@@ -129,6 +146,8 @@ async def get_budgets(
             commission_percentage_actual=budget.commission_percentage_actual if budget.commission_percentage_actual is not None else 0.0,
             items_count=len(budget.items),
             origem=budget.origem,
+            created_by=budget.created_by,
+            seller_name=(seller.full_name or seller.username) if seller else None,
             created_at=budget.created_at
         ))
     
@@ -196,7 +215,7 @@ async def get_budget(
                 detail="Orçamento não encontrado"
             )
         
-        logger.debug(f"Budget {budget_id} retrieved successfully")
+        logger.debug("Budget %s retrieved successfully", budget_id)
         
         # Verificar se o usuário tem permissão para ver este orçamento
         if current_user.role != "admin" and budget.created_by != current_user.username:
@@ -205,15 +224,13 @@ async def get_budget(
                 detail="Acesso negado: você só pode visualizar seus próprios orçamentos"
             )
         
-        # DEBUG: Log delivery_time before returning
-        if budget.items:
-            print(f"🔍 DEBUG - GET endpoint returning budget {budget_id}:")
+        if budget.items and logger.isEnabledFor(logging.DEBUG):
             for i, item in enumerate(budget.items):
-                print(f"🔍 DEBUG - Item {i}: delivery_time before response = {repr(item.delivery_time)}")
+                logger.debug("Budget %s item %s: delivery_time=%r", budget_id, i, item.delivery_time)
         
         return budget
     except Exception as e:
-        logger.error(f"Error retrieving budget {budget_id}: {str(e)}")
+        logger.error("Error retrieving budget %s: %s", budget_id, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erro interno do servidor"
@@ -244,7 +261,7 @@ async def update_budget(
 ):
     """Atualizar orçamento"""
     try:
-        logger.debug(f"Updating budget {budget_id}")
+        logger.debug("Updating budget %s", budget_id)
         
         updated_budget = await BudgetService.update_budget(db, budget_id, budget_data)
         
@@ -254,10 +271,16 @@ async def update_budget(
                 detail="Orçamento não encontrado"
             )
         
-        logger.info(f"Budget {budget_id} updated successfully")
+        logger.info("Budget %s updated successfully", budget_id)
         return updated_budget
+    except BudgetValidationError as e:
+        # Todos os erros dos itens, no formato de validação do FastAPI
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=e.detail
+        )
     except Exception as e:
-        logger.error(f"Error updating budget {budget_id}: {str(e)}")
+        logger.error("Error updating budget %s: %s", budget_id, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erro interno do servidor"
@@ -302,86 +325,47 @@ async def calculate_budget(
 ):
     """Calcular orçamento sem salvar (preview)"""
     try:
-        from app.services.business_rules_calculator import BusinessRulesCalculator
-
-        # Validate data
-        budget_dict = budget_data.dict()
-        errors = BudgetCalculatorService.validate_budget_data(budget_dict)
-        if errors:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Dados inválidos: {'; '.join(errors)}"
-            )
-
         # Convert items to BusinessRulesCalculator format
-        items_data = []
-        total_peso_pedido = 0.0
-
-        for item in budget_data.items:
-            item_dict = item.dict()
-            # Convert field names to Portuguese format expected by BusinessRulesCalculator
-            converted_item = {
-                'description': item_dict.get('description', ''),
-                'peso_compra': item_dict.get('weight', 1.0),
-                'peso_venda': item_dict.get('sale_weight', item_dict.get('weight', 1.0)),
-                'valor_com_icms_compra': item_dict.get('purchase_value_with_icms', 0),
-                'percentual_icms_compra': item_dict.get('purchase_icms_percentage', 0.18),
-                'outras_despesas_item': item_dict.get('purchase_other_expenses', 0),
-                'valor_com_icms_venda': item_dict.get('sale_value_with_icms', 0),
-                'percentual_icms_venda': item_dict.get('sale_icms_percentage', 0.17),
-                'percentual_ipi': item_dict.get('ipi_percentage', 0.0),
-                'dunamis_cost': item_dict.get('dunamis_cost')
-            }
-            total_peso_pedido += converted_item['peso_compra']  # CORREÇÃO: Usar peso_compra para distribuição do frete
-            items_data.append(converted_item)
+        calculator_input = to_calculator_input(budget_data.items)
 
-        # Validate items using business rules
-        for i, item_data in enumerate(items_data):
-            errors = BusinessRulesCalculator.validate_item_data(item_data)
-            if errors:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Item {i+1}: {'; '.join(errors)}"
-                )
+        # Validar todos os itens de uma vez (inclui venda >= compra)
+        check_budget_items(calculator_input.items, sale_above_purchase=True)
 
         # Calculate using BusinessRulesCalculator
-        outras_despesas_totais = sum(item.get('purchase_other_expenses', 0) for item in items_data)
-
-        budget_result = BusinessRulesCalculator.calculate_complete_budget(
-            items_data, outras_despesas_totais, total_peso_pedido
-        )
+        budget_result = calculator_input.calculate()
 
-        calculated_items = budget_result['items']
-        total_purchase_value = budget_result['totals']['soma_total_compra']
-        total_sale_value = budget_result['totals']['soma_total_venda']
-        total_sale_with_icms = budget_result['totals']['soma_total_venda_com_icms']
-        total_commission = budget_result['totals']['total_comissao']
-        total_ipi_value = budget_result['totals']['total_ipi_orcamento']
-        total_final_value = budget_result['totals']['total_final_com_ipi']
+        totals = budget_result.totals
+        total_purchase_value = totals.soma_total_compra
+        total_sale_value = totals.soma_total_venda
+        total_sale_with_icms = totals.soma_total_venda_com_icms
+        total_commission = totals.total_comissao
+        total_ipi_value = totals.total_ipi_orcamento
+        total_final_value = totals.total_final_com_ipi
 
         # Calculate taxes
         total_net_revenue = total_sale_value
         total_taxes = total_sale_with_icms - total_net_revenue
 
         # Calcular rentabilidade para comissão (SEM ICMS)
-        profitability_percentage = budget_result['totals']['markup_pedido_sem_impostos']
+        profitability_percentage = totals.markup_pedido_sem_impostos
 
         # Prepare response
-        items_calculations = []
-        for item in calculated_items:
-            items_calculations.append({
-                'description': item['description'],
-                'weight': item['peso_compra'],
-                'total_purchase': item['total_compra_item'],
-                'total_sale': item['total_venda_item'],
-                'profitability': round_percent_display((item['rentabilidade_item'] or 0), 2),  # Conversão para % com HALF_UP
-                'rentabilidade_item_total': round_percent_display((item.get('rentabilidade_item_total', 0.0) or 0), 2),
-                'rentabilidade_comissao': round_percent_display((item.get('rentabilidade_comissao', 0.0) or 0), 2),
-                'commission_value': item['valor_comissao'],
-                'ipi_percentage': item['percentual_ipi'],
-                'ipi_value': item['valor_ipi_total'],
-                'total_value_with_ipi': item['total_final_com_ipi']
-            })
+        items_calculations = [
+            {
+                'description': item.description,
+                'weight': item.peso_compra,
+                'total_purchase': item.total_compra_item,
+                'total_sale': item.total_venda_item,
+                'profitability': round_percent_display((item.rentabilidade_item or 0), 2),  # Conversão para % com HALF_UP
+                'rentabilidade_item_total': round_percent_display((item.rentabilidade_item_total or 0), 2),
+                'rentabilidade_comissao': round_percent_display((item.rentabilidade_comissao or 0), 2),
+                'commission_value': item.valor_comissao,
+                'ipi_percentage': item.percentual_ipi,
+                'ipi_value': item.valor_ipi_total,
+                'total_value_with_ipi': item.total_final_com_ipi
+            }
+            for item in budget_result.items
+        ]
 
         return BudgetCalculation(
             total_purchase_value=round_currency(total_purchase_value),
@@ -390,12 +374,18 @@ async def calculate_budget(
             total_taxes=round_currency(total_taxes),
             total_commission=round_currency(total_commission),
             profitability_percentage=round_percent_display(profitability_percentage, 2),  # SEM ICMS
-            rentabilidade_comissao_total=round_percent_display(budget_result['totals']['markup_pedido_sem_impostos'], 2),
+            rentabilidade_comissao_total=round_percent_display(totals.markup_pedido_sem_impostos, 2),
             items_calculations=items_calculations,
             total_ipi_value=round_currency(total_ipi_value),
             total_final_value=round_currency(total_final_value)
         )
 
+    except BudgetValidationError as e:
+        # Todos os erros dos itens, no formato de validação do FastAPI
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=e.detail
+        )
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -417,51 +407,30 @@ async def calculate_simplified_budget(
 ):
     """Calcular orçamento simplificado usando business rules calculator"""
     try:
-        from app.services.business_rules_calculator import BusinessRulesCalculator
-        
         # Converter dados para formato esperado pelo BusinessRulesCalculator
-        items_data = []
-        total_peso_pedido = 0.0
-        
-        for item in budget_data.items:
-            item_dict = item.dict()
-            # CORREÇÃO: Usar peso_compra para distribuição do frete, pois frete é custo de compra
-            total_peso_pedido += item_dict.get('peso_compra', 1.0)
-            items_data.append(item_dict)
-        
-        # Validar dados usando business rules
-        for i, item_data in enumerate(items_data):
-            errors = BusinessRulesCalculator.validate_item_data(item_data)
-            if errors:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Item {i+1}: {'; '.join(errors)}"
-                )
+        # (frete distribuído por peso_compra, pois frete é custo de compra)
+        calculator_input = to_calculator_input(budget_data.items)
         
-        # Calcular usando BusinessRulesCalculator
-        # CORREÇÃO: Não somar outras_despesas_item como despesas totais
-        # pois cada item já tem suas próprias outras despesas definidas
-        outras_despesas_totais = 0.0  # Não há despesas adicionais a distribuir
+        # Validar todos os itens de uma vez
+        check_budget_items(calculator_input.items)
         
         # Calcular orçamento completo usando BusinessRulesCalculator
-        budget_result = BusinessRulesCalculator.calculate_complete_budget(
-            items_data, outras_despesas_totais, total_peso_pedido, budget_data.freight_value_total or 0.0
-        )
+        budget_result = calculator_input.calculate(budget_data.freight_value_total)
         
-        calculated_items = budget_result['items']
-        total_purchase_value = budget_result['totals']['soma_total_compra']
-        total_sale_value = budget_result['totals']['soma_total_venda']  # SEM impostos
-        total_sale_with_icms = budget_result['totals']['soma_total_venda_com_icms']  # COM ICMS
-        total_commission = budget_result['totals']['total_comissao']
-        total_ipi_value = budget_result['totals']['total_ipi_orcamento']  # Total IPI
-        total_final_value = budget_result['totals']['total_final_com_ipi']  # Valor final com IPI
+        totals = budget_result.totals
+        total_purchase_value = totals.soma_total_compra
+        total_sale_value = totals.soma_total_venda  # SEM impostos
+        total_sale_with_icms = totals.soma_total_venda_com_icms  # COM ICMS
+        total_commission = totals.total_comissao
+        total_ipi_value = totals.total_ipi_orcamento  # Total IPI
+        total_final_value = totals.total_final_com_ipi  # Valor final com IPI
         
         # Calcular impostos totais usando valores COM ICMS
         total_net_revenue = total_sale_value  # SEM impostos
         total_taxes = total_sale_with_icms - total_net_revenue
         
         # Calcular rentabilidade para comissão (SEM ICMS) em percentual
-        profitability_percentage = budget_result['totals']['markup_pedido_sem_impostos'] * 100  # SEM ICMS
+        profitability_percentage = totals.markup_pedido_sem_impostos * 100  # SEM ICMS
         
         # Calcular percentual de comissão real baseado no total de comissão e valor de venda
         commission_percentage_actual = 0.0
@@ -469,26 +438,27 @@ async def calculate_simplified_budget(
             commission_percentage_actual = (total_commission / total_sale_value) * 100
         
         # Preparar resposta
-        items_calculations = []
-        for item in calculated_items:
-            items_calculations.append({
-                'description': item['description'],
-                'peso_compra': item['peso_compra'],
-                'peso_venda': item['peso_venda'],
-                'total_purchase': item['total_compra_item'],
-                'total_sale': item['total_venda_item'],
-                'profitability': round_percent_display((item['rentabilidade_item'] or 0), 2),  # Converter para percentual com HALF_UP
-                'rentabilidade_item_total': round_percent_display((item.get('rentabilidade_item_total', 0.0) or 0), 2),
-                'rentabilidade_comissao': round_percent_display((item.get('rentabilidade_comissao', 0.0) or 0), 2),
-                'commission_value': item['valor_comissao'],
-                'commission_percentage_actual': item.get('commission_percentage_actual', 0.0),  # Actual percentage used
+        items_calculations = [
+            {
+                'description': item.description,
+                'peso_compra': item.peso_compra,
+                'peso_venda': item.peso_venda,
+                'total_purchase': item.total_compra_item,
+                'total_sale': item.total_venda_item,
+                'profitability': round_percent_display((item.rentabilidade_item or 0), 2),  # Converter para percentual com HALF_UP
+                'rentabilidade_item_total': round_percent_display((item.rentabilidade_item_total or 0), 2),
+                'rentabilidade_comissao': round_percent_display((item.rentabilidade_comissao or 0), 2),
+                'commission_value': item.valor_comissao,
+                'commission_percentage_actual': item.commission_percentage_actual,  # Actual percentage used
                 # IPI fields
-                'ipi_percentage': item['percentual_ipi'],
-                'ipi_value': item['valor_ipi_total'],
-                'total_value_with_ipi': item['total_final_com_ipi'],
+                'ipi_percentage': item.percentual_ipi,
+                'ipi_value': item.valor_ipi_total,
+                'total_value_with_ipi': item.total_final_com_ipi,
                 # Weight difference display
-                'weight_difference_display': item.get('weight_difference_display')
-            })
+                'weight_difference_display': item.weight_difference_display
+            }
+            for item in budget_result.items
+        ]
         
         return BudgetCalculation(
             total_purchase_value=round_currency(total_purchase_value),
@@ -504,9 +474,15 @@ async def calculate_simplified_budget(
             total_ipi_value=round_currency(total_ipi_value),
             total_final_value=round_currency(total_final_value),
             # Weight difference
-            total_weight_difference_percentage=round_percent(budget_result['totals']['total_weight_difference_percentage'], 2)
+            total_weight_difference_percentage=round_percent(totals.total_weight_difference_percentage, 2)
         )
         
+    except BudgetValidationError as e:
+        # Todos os erros dos itens, no formato de validação do FastAPI
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=e.detail
+        )
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -528,84 +504,28 @@ async def update_simplified_budget(
 ):
     """Atualizar orçamento simplificado"""
     try:
-        logger.info(f"🔧 [UPDATE DEBUG] Starting update for budget {budget_id}")
-        logger.info(f"🔧 [UPDATE DEBUG] User: {current_user.username}")
-        
-        # Log incoming data
-        budget_dict = budget_data.dict()
-        logger.info(f"🔧 [UPDATE DEBUG] Received data keys: {list(budget_dict.keys())}")
-        logger.info(f"🔧 [UPDATE DEBUG] Items count: {len(budget_dict.get('items', []))}")
-        
-        # Log each item's critical fields
-        for i, item in enumerate(budget_dict.get('items', [])):
-            logger.info(f"🔧 [UPDATE DEBUG] Item {i}: description='{item.get('description', 'N/A')}', "
-                       f"peso_compra={item.get('peso_compra', 'N/A')}, "
-                       f"valor_com_icms_compra={item.get('valor_com_icms_compra', 'N/A')}, "
-                       f"valor_com_icms_venda={item.get('valor_com_icms_venda', 'N/A')}, "
-                       f"percentual_ipi={item.get('percentual_ipi', 'N/A')}")
-        
-        # Validar dados de entrada
-        logger.debug(f"🔧 [UPDATE DEBUG] Validating budget data...")
-        errors = BudgetCalculatorService.validate_simplified_budget_data(budget_dict)
-        if errors:
-            logger.error(f"🔧 [UPDATE DEBUG] Validation errors: {errors}")
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Dados inválidos: {'; '.join(errors)}"
-            )
-        logger.info(f"🔧 [UPDATE DEBUG] Validation passed successfully")
-        
-        # Verificar se o orçamento existe
-        logger.debug(f"🔧 [UPDATE DEBUG] Checking if budget {budget_id} exists...")
-        existing_budget = await BudgetService.get_budget_by_id(db, budget_id)
-        if not existing_budget:
-            logger.error(f"🔧 [UPDATE DEBUG] Budget {budget_id} not found")
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Orçamento não encontrado"
-            )
-        
-        logger.info(f"🔧 [UPDATE DEBUG] Found existing budget: order_number={existing_budget.order_number}, "
-                   f"client_name='{existing_budget.client_name}', items_count={len(existing_budget.items)}")
-        
-        # Verificar se o número do pedido já existe em outro orçamento
-        if budget_data.order_number and budget_data.order_number != existing_budget.order_number:
-            logger.debug(f"🔧 [UPDATE DEBUG] Checking order number uniqueness: {budget_data.order_number}")
-            existing_order = await BudgetService.get_budget_by_order_number(db, budget_data.order_number)
-            if existing_order and existing_order.id != budget_id:
-                logger.error(f"🔧 [UPDATE DEBUG] Order number {budget_data.order_number} already exists in budget {existing_order.id}")
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Número do pedido já existe em outro orçamento"
-                )
-        
-        # Log data being sent to service
-        logger.info(f"🔧 [UPDATE DEBUG] Calling BudgetService.update_budget_simplified...")
-        logger.debug(f"🔧 [UPDATE DEBUG] Budget data summary: client_name='{budget_dict.get('client_name')}', "
-                    f"order_number='{budget_dict.get('order_number')}', "
-                    f"freight_type='{budget_dict.get('freight_type')}', "
-                    f"origem={budget_dict.get('origem')}")
-        
-        # Usar o método update_budget_simplified do BudgetService
-        updated_budget = await BudgetService.update_budget_simplified(db, budget_id, budget_dict)
+        # Existência e unicidade do número do pedido são conferidas pelo serviço
+        # (None -> 404, ValueError -> 400), sem consultas repetidas aqui
+        updated_budget = await BudgetService.update_budget_simplified(db, budget_id, budget_data)
         
         if not updated_budget:
-            logger.error(f"🔧 [UPDATE DEBUG] BudgetService returned None for budget {budget_id}")
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Orçamento não encontrado"
             )
         
-        logger.info(f"🔧 [UPDATE DEBUG] Budget {budget_id} updated successfully")
-        logger.info(f"🔧 [UPDATE DEBUG] Updated budget: order_number={updated_budget.order_number}, "
-                   f"client_name='{updated_budget.client_name}', "
-                   f"items_count={len(updated_budget.items)}, "
-                   f"total_sale_value={updated_budget.total_sale_value}")
+        logger.info("Budget %s updated by %s", budget_id, current_user.username)
         
         return updated_budget
         
+    except BudgetValidationError as e:
+        # Todos os erros dos itens, no formato de validação do FastAPI
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=e.detail
+        )
     except ValueError as e:
-        logger.error(f"🔧 [UPDATE DEBUG] ValueError in budget {budget_id}: {str(e)}")
+        logger.error("ValueError in budget %s: %s", budget_id, e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
@@ -614,7 +534,7 @@ async def update_simplified_budget(
         # Re-raise HTTP exceptions without modification
         raise
     except Exception as e:
-        logger.error(f"🔧 [UPDATE DEBUG] Unexpected error updating budget {budget_id}: {str(e)}", exc_info=True)
+        logger.error("Unexpected error updating budget %s: %s", budget_id, e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erro interno do servidor"
@@ -631,15 +551,6 @@ async def create_simplified_budget(
     try:
         # Campo PRAZO (delivery_time) corrigido - dados chegam corretamente
         
-        # Validar dados de entrada
-        budget_dict = budget_data.dict()
-        errors = BudgetCalculatorService.validate_simplified_budget_data(budget_dict)
-        if errors:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Dados inválidos: {'; '.join(errors)}"
-            )
-        
         # Gerar número do pedido se não fornecido
         order_number = budget_data.order_number
         if not order_number:
@@ -653,88 +564,19 @@ async def create_simplified_budget(
                     detail="Número do pedido já existe"
                 )
         
-        # Usar BusinessRulesCalculator para calcular valores corretos
-        from app.services.business_rules_calculator import BusinessRulesCalculator
-        
-        # Converter dados para formato do BusinessRulesCalculator
-        items_data = [item.dict() for item in budget_data.items]
-        
-        # 🔍 DEBUG: Log items_data após conversão
-        print(f"🔍 DEBUG - Items data após conversão:")
-        for i, item_data in enumerate(items_data):
-            print(f"🔍 DEBUG - Item {i}: delivery_time = {repr(item_data.get('delivery_time'))}")
-        
-        # CORREÇÃO: Usar peso_compra para distribuir frete (não peso_venda)
-        soma_pesos_pedido = sum(item.get('peso_compra', 0) for item in items_data)
-        # CORREÇÃO: outras_despesas_item é R$/kg; somatório deve ser R$/kg * peso_compra
-        outras_despesas_totais = sum(
-            (item.get('outras_despesas_item', 0) or 0.0) * (item.get('peso_compra', 0) or 0.0)
-            for item in items_data
-        )
-        
-        # Calcular usando BusinessRulesCalculator
-        budget_result = BusinessRulesCalculator.calculate_complete_budget(
-            items_data, outras_despesas_totais, soma_pesos_pedido
-        )
-        
-        # Converter resultados para formato BudgetItemCreate
-        items_for_creation = []
-        for i, calculated_item in enumerate(budget_result['items']):
-            # Obter delivery_time do item original
-            original_item = items_data[i] if i < len(items_data) else {}
-            delivery_time_value = original_item.get('delivery_time', '0')
-            
-            # 🔍 DEBUG: Log delivery_time antes de criar BudgetItemCreate
-            print(f"🔍 DEBUG - Item {i} antes de BudgetItemCreate:")
-            print(f"🔍 DEBUG - original_item: {original_item}")
-            print(f"🔍 DEBUG - delivery_time_value: {repr(delivery_time_value)}")
-            
-            budget_item = BudgetItemCreate(
-                description=calculated_item['description'],
-                weight=calculated_item['peso_compra'],
-                delivery_time=delivery_time_value,  # Usar delivery_time do item original
-                purchase_value_with_icms=calculated_item['valor_com_icms_compra'],
-                purchase_icms_percentage=calculated_item['percentual_icms_compra'],
-                purchase_other_expenses=calculated_item['outras_despesas_item'],
-                purchase_value_without_taxes=calculated_item['valor_sem_impostos_compra'],
-                purchase_value_with_weight_diff=calculated_item.get('valor_corrigido_peso'),
-                sale_weight=calculated_item['peso_venda'],
-                sale_value_with_icms=calculated_item['valor_com_icms_venda'],
-                sale_icms_percentage=calculated_item['percentual_icms_venda'],
-                sale_value_without_taxes=calculated_item['valor_sem_impostos_venda'],
-                weight_difference=calculated_item.get('diferenca_peso'),
-                ipi_percentage=calculated_item['percentual_ipi'],  # CORREÇÃO: Incluir IPI percentage
-                commission_percentage=0,  # Será calculado pela rentabilidade
-                # CORREÇÃO: Incluir weight_difference_display
-                weight_difference_display=calculated_item.get('weight_difference_display')
-            )
-            
-            # 🔍 DEBUG: Log BudgetItemCreate após criação
-            print(f"🔍 DEBUG - BudgetItemCreate {i}: delivery_time = {repr(budget_item.delivery_time)}")
-            
-            items_for_creation.append(budget_item)
-        
-        # Criar orçamento completo para salvar
-        complete_budget_data = BudgetCreate(
-            order_number=order_number,
-            client_name=budget_data.client_name,
-            status=budget_data.status,
-            notes=budget_data.notes,
-            expires_at=budget_data.expires_at,
-            origem=budget_data.origem,
-            outras_despesas_totais=budget_data.outras_despesas_totais,
-            freight_type=budget_data.freight_type,
-            freight_value_total=budget_data.freight_value_total,  # CORREÇÃO: Incluir freight_value_total
-            payment_condition=budget_data.payment_condition,
-            items=items_for_creation
-        )
-        
-        budget = await BudgetService.create_budget(db, complete_budget_data, current_user.username)
+        # Itens simplificados vão direto para o cálculo e persistência, sem conversão intermediária
+        budget = await BudgetService.create_budget(db, budget_data, current_user.username, order_number=order_number)
         
         # Retornar orçamento completo
         budget_with_items = await BudgetService.get_budget_by_id(db, budget.id)
         return budget_with_items
         
+    except BudgetValidationError as e:
+        # Todos os erros dos itens, no formato de validação do FastAPI
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=e.detail
+        )
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -28,7 +28,7 @@ async def get_dashboard_stats(
         start_dt = datetime.strptime(start_date, "%Y-%m-%d")
         end_dt = datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=1)
         
-        logger.debug(f"Dashboard stats period: {start_date} to {end_date}")
+        logger.debug("Dashboard stats period: %s to %s", start_date, end_date)
         
         # Contar orçamentos por status
         status_counts = {}
@@ -48,7 +48,7 @@ async def get_dashboard_stats(
                 status_counts[budget_status.value] = count
                 
             except Exception as status_error:
-                logger.error(f"Error fetching status {budget_status.value}: {status_error}")
+                logger.error("Error fetching status %s: %s", budget_status.value, status_error)
                 
                 # Tentar com cast para Integer
                 try:
@@ -66,10 +66,10 @@ async def get_dashboard_stats(
                     status_counts[budget_status.value] = count
                     
                 except Exception as cast_error:
-                    logger.error(f"Error even with cast: {cast_error}")
+                    logger.error("Error even with cast: %s", cast_error)
                     status_counts[budget_status.value] = 0
             
-            logger.debug(f"Status {budget_status.value}: {count}")
+            logger.debug("Status %s: %s", budget_status.value, count)
         
         # Total de orçamentos do período
         total_query = """
@@ -82,7 +82,7 @@ async def get_dashboard_stats(
         
         result = await db.execute(text(total_query), total_params)
         total_budgets = result.scalar() or 0
-        print(f"DEBUG - Total orçamentos: {total_budgets}")
+        logger.debug("Total budgets: %s", total_budgets)
         
         # Valor total dos orçamentos do período
         value_query = """
@@ -95,7 +95,7 @@ async def get_dashboard_stats(
         
         result = await db.execute(text(value_query), value_params)
         total_value = result.scalar() or 0
-        print(f"DEBUG - Valor total: {total_value}")
+        logger.debug("Total value: %s", total_value)
         
         # Orçamentos aprovados do período
         approved_query = """
@@ -111,16 +111,17 @@ async def get_dashboard_stats(
         approved_result = result.first()
         approved_count = approved_result[0] if approved_result else 0
         approved_value = approved_result[1] if approved_result else 0
-        print(f"DEBUG - Aprovados: {approved_count}, Valor aprovado: {approved_value}")
+        logger.debug("Approved: %s, approved value: %s", approved_count, approved_value)
         
         # Se não há orçamentos no período, vamos verificar se existem orçamentos de outros períodos
-        if total_budgets == 0:
+        # (apenas diagnóstico: a query extra só roda com DEBUG habilitado)
+        if total_budgets == 0 and logger.isEnabledFor(logging.DEBUG):
             check_query = "SELECT COUNT(*), MIN(created_at), MAX(created_at) FROM budgets"
             check_params = {}
             
             result = await db.execute(text(check_query), check_params)
             total_check = result.first()
-            print(f"DEBUG - Verificação geral: {total_check[0]} orçamentos, de {total_check[1]} até {total_check[2]}")
+            logger.debug("No budgets in period; %s overall, from %s to %s", total_check[0], total_check[1], total_check[2])
         
         # Buscar orçamentos recentes
         recent_query = """
@@ -141,7 +142,8 @@ async def get_dashboard_stats(
                 "client_name": row[1],
                 "total_sale_value": float(row[2] or 0),
                 "status": row[3],
-                "created_at": row[4].isoformat() if row[4] else None
+                # SQLite devolve texto em SQL puro; Postgres devolve datetime
+                "created_at": row[4].isoformat() if hasattr(row[4], "isoformat") else row[4]
             })
         
         return {
@@ -160,7 +162,7 @@ async def get_dashboard_stats(
         }
         
     except Exception as e:
-        logger.error(f"Error generating dashboard stats: {str(e)}")
+        logger.error("Error generating dashboard stats: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erro interno do servidor"
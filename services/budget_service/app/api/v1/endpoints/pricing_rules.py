@@ -0,0 +1,52 @@
+"""
+Regras de preço versionadas (consulta para todos, publicação e recálculo somente administradores)
+"""
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_db
+from app.core.security import get_current_active_user, require_admin, CurrentUser
+from app.schemas.pricing_rules import PricingRulesResponse, PricingRulesUpdate, StaleBudgetsRecalculation
+from app.services.budget_service import BudgetService
+from app.services.pricing_rules import pricing_rules
+
+router = APIRouter()
+
+
+@router.get("/", response_model=PricingRulesResponse)
+async def get_pricing_rules(current_user: CurrentUser = Depends(get_current_active_user)):
+    """Regras de preço em uso neste worker"""
+    rules = pricing_rules.current()
+    return {"version": rules.version, **rules.as_dict()}
+
+
+@router.put("/", response_model=PricingRulesResponse)
+async def publish_pricing_rules(
+    rules_data: PricingRulesUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(require_admin)
+):
+    """Publicar uma nova versão das regras (os demais workers recarregam em segundo plano)"""
+    try:
+        rules = await pricing_rules.publish(db, rules_data.dict(), created_by=current_user.username)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Outra versão das regras foi publicada ao mesmo tempo; tente novamente",
+        )
+    return {"version": rules.version, **rules.as_dict()}
+
+
+@router.post("/recalculate-stale", response_model=StaleBudgetsRecalculation)
+async def recalculate_stale_budgets(
+    limit: Optional[int] = Query(None, ge=1),
+    db: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(require_admin)
+):
+    """Recalcular rascunhos e pendentes calculados com uma versão anterior das regras (`failed`: ids que não passaram nas novas regras)"""
+    result = await BudgetService.recalculate_stale_budgets(db, limit=limit)
+    return {"version": pricing_rules.current().version, **result}
@@ -0,0 +1,35 @@
+"""
+Consulta dos perfis gravados pelo ProfilingMiddleware (somente administradores)
+"""
+import os
+import pstats
+from typing import Any, Dict, List
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import FileResponse, PlainTextResponse
+from app.core.profiling import list_profiles, profile_path, render_report
+from app.core.security import require_admin, CurrentUser
+
+router = APIRouter()
+
+
+# Rotas síncronas: a leitura dos arquivos roda no threadpool, fora do event loop
+@router.get("/", response_model=List[Dict[str, Any]])
+def get_profiles(current_user: CurrentUser = Depends(require_admin)):
+    """Listar perfis gravados (mais recentes primeiro)"""
+    return list_profiles()
+
+
+@router.get("/{profile_id}")
+def get_profile(
+    profile_id: str,
+    format: str = Query("text", pattern="^(text|prof)$", description="text (relatório) ou prof (pstats)"),
+    limit: int = Query(40, ge=1, le=500),
+    current_user: CurrentUser = Depends(require_admin)
+):
+    """Obter um perfil como relatório texto ou arquivo .prof (snakeviz/flameprof)"""
+    path = profile_path(profile_id)
+    if path is None or not os.path.exists(path):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    if format == "prof":
+        return FileResponse(path, media_type="application/octet-stream", filename=f"{profile_id}.prof")
+    return PlainTextResponse(render_report(pstats.Stats(path), limit))
@@ -0,0 +1,173 @@
+from enum import Enum
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Any, Dict
+from .codec import EventCodec
+
+
+class EventType(str, Enum):
+    USER_CREATED = "user.created"
+    USER_UPDATED = "user.updated"
+    USER_DELETED = "user.deleted"
+    USER_LOGIN = "user.login"
+    BUDGET_CREATED = "budget.created"
+    BUDGET_UPDATED = "budget.updated"
+    BUDGET_STATUS_CHANGED = "budget.status_changed"
+    BUDGET_DELETED = "budget.deleted"
+
+
+class BaseEvent(BaseModel):
+    event_type: EventType
+    timestamp: datetime
+    service: str
+    data: Dict[str, Any]
+
+
+class UserCreatedEvent(BaseEvent):
+    event_type: EventType = EventType.USER_CREATED
+    
+    def __init__(self, user_data: dict, **kwargs):
+        super().__init__(
+            timestamp=datetime.utcnow(),
+            service="user_service",
+            data=user_data,
+            **kwargs
+        )
+
+
+class UserUpdatedEvent(BaseEvent):
+    event_type: EventType = EventType.USER_UPDATED
+    
+    def __init__(self, user_data: dict, **kwargs):
+        super().__init__(
+            timestamp=datetime.utcnow(),
+            service="user_service",
+            data=user_data,
+            **kwargs
+        )
+
+
+class UserDeletedEvent(BaseEvent):
+    event_type: EventType = EventType.USER_DELETED
+    
+    def __init__(self, user_id: int, **kwargs):
+        super().__init__(
+            timestamp=datetime.utcnow(),
+            service="user_service",
+            data={"user_id": user_id},
+            **kwargs
+        )
+
+
+class UserLoginEvent(BaseEvent):
+    event_type: EventType = EventType.USER_LOGIN
+    
+    def __init__(self, user_data: dict, **kwargs):
+        super().__init__(
+            timestamp=datetime.utcnow(),
+            service="user_service",
+            data=user_data,
+            **kwargs
+        )
+
+
+class BudgetCreatedEvent(BaseEvent):
+    event_type: EventType = EventType.BUDGET_CREATED
+    
+    def __init__(self, budget_data: dict, **kwargs):
+        super().__init__(
+            timestamp=datetime.utcnow(),
+            service="budget_service",
+            data=budget_data,
+            **kwargs
+        )
+
+
+class BudgetUpdatedEvent(BaseEvent):
+    event_type: EventType = EventType.BUDGET_UPDATED
+    
+    def __init__(self, budget_data: dict, **kwargs):
+        super().__init__(
+            timestamp=datetime.utcnow(),
+            service="budget_service",
+            data=budget_data,
+            **kwargs
+        )
+
+
+class BudgetStatusChangedEvent(BaseEvent):
+    event_type: EventType = EventType.BUDGET_STATUS_CHANGED
+    
+    def __init__(self, budget_data: dict, **kwargs):
+        super().__init__(
+            timestamp=datetime.utcnow(),
+            service="budget_service",
+            data=budget_data,
+            **kwargs
+        )
+
+
+class BudgetDeletedEvent(BaseEvent):
+    event_type: EventType = EventType.BUDGET_DELETED
+    
+    def __init__(self, budget_data: dict, **kwargs):
+        super().__init__(
+            timestamp=datetime.utcnow(),
+            service="budget_service",
+            data=budget_data,
+            **kwargs
+        )
+
+
+# Totals carried by budget events
+BUDGET_EVENT_TOTALS = (
+    "total_purchase_value",
+    "total_sale_value",
+    "total_sale_with_icms",
+    "total_commission",
+    "commission_percentage_actual",
+    "profitability_percentage",
+    "total_ipi_value",
+    "total_final_value",
+)
+
+_USER_FIELDS = (
+    "id", "email", "username", "full_name", "role", "is_active",
+    "created_by", "updated_by", "self_update", "public_registration",
+)
+_BUDGET_IDENTITY = ("budget_id", "order_number", "created_by")
+
+# Binary codec registry. Type codes and published schema versions are part of
+# the wire format: never renumber or edit them, add a new version instead.
+EVENT_TYPE_CODES = {
+    EventType.USER_CREATED: 1,
+    EventType.USER_UPDATED: 2,
+    EventType.USER_DELETED: 3,
+    EventType.USER_LOGIN: 4,
+    EventType.BUDGET_CREATED: 5,
+    EventType.BUDGET_UPDATED: 6,
+    EventType.BUDGET_STATUS_CHANGED: 7,
+    EventType.BUDGET_DELETED: 8,
+}
+
+EVENT_SCHEMAS = {
+    EventType.USER_CREATED: {1: _USER_FIELDS},
+    EventType.USER_UPDATED: {1: _USER_FIELDS},
+    EventType.USER_DELETED: {1: ("user_id",)},
+    EventType.USER_LOGIN: {1: ("id", "email", "username", "role")},
+    EventType.BUDGET_CREATED: {
+        1: _BUDGET_IDENTITY + ("status", ("totals", BUDGET_EVENT_TOTALS)),
+    },
+    EventType.BUDGET_UPDATED: {
+        1: _BUDGET_IDENTITY + ("status", ("totals", BUDGET_EVENT_TOTALS), ("previous", BUDGET_EVENT_TOTALS)),
+    },
+    EventType.BUDGET_STATUS_CHANGED: {
+        1: _BUDGET_IDENTITY + ("from_status", "to_status", ("totals", BUDGET_EVENT_TOTALS)),
+    },
+    EventType.BUDGET_DELETED: {
+        1: _BUDGET_IDENTITY + ("status", ("totals", BUDGET_EVENT_TOTALS)),
+    },
+}
+
+# Codec used on the event streams
+event_codec = EventCodec(EVENT_SCHEMAS, EVENT_TYPE_CODES)
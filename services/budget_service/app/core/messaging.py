@@ -0,0 +1,95 @@
+import asyncio
+import redis.asyncio as redis
+from typing import Optional
+import json
+import logging
+import os
+from app.core.event_bus import EventBus, RedisStreamsBackend
+from app.core.events import event_codec
+
+logger = logging.getLogger(__name__)
+
+
+def _build_redis_url() -> str:
+    """REDIS_URL (dev) ou REDIS_HOST/REDIS_PORT/REDIS_PASSWORD (produção)"""
+    if os.getenv("REDIS_URL"):
+        return os.environ["REDIS_URL"]
+    host = os.getenv("REDIS_HOST", "localhost")
+    port = os.getenv("REDIS_PORT", "6379")
+    password = os.getenv("REDIS_PASSWORD", "")
+    if password:
+        from urllib.parse import quote_plus
+        return f"redis://:{quote_plus(password)}@{host}:{port}"
+    return f"redis://{host}:{port}"
+
+
+REDIS_URL = _build_redis_url()
+
+# Stream publicado pelo user_service (app/core/messaging.py)
+USER_EVENTS_STREAM = "user_events"
+
+# Stream de eventos de domínio de orçamentos (publicado via outbox)
+BUDGET_EVENTS_STREAM = "budget_events"
+
+
+class RedisClient:
+    def __init__(self, redis_url: str):
+        self.redis_url = redis_url
+        self.redis_client: Optional[redis.Redis] = None
+        self._connect_lock = asyncio.Lock()
+
+    async def ensure_connected(self):
+        """Connect once; safe to call from several background tasks"""
+        async with self._connect_lock:
+            if self.redis_client is None:
+                await self.connect()
+
+    async def connect(self):
+        """Connect to Redis"""
+        try:
+            self.redis_client = redis.from_url(self.redis_url)
+            await self.redis_client.ping()
+            logger.info("Connected to Redis successfully")
+        except Exception as e:
+            logger.error("Failed to connect to Redis: %s", e)
+            raise
+
+    async def disconnect(self):
+        """Disconnect from Redis"""
+        if self.redis_client:
+            await self.redis_client.close()
+            self.redis_client = None
+            logger.info("Disconnected from Redis")
+
+    async def publish(self, channel: str, message: dict):
+        """Publish message to a channel"""
+        if not self.redis_client:
+            raise RuntimeError("Redis client not connected")
+
+        try:
+            message_str = json.dumps(message, default=str)
+            await self.redis_client.publish(channel, message_str)
+            logger.info("Published message to channel %s", channel)
+        except Exception as e:
+            logger.error("Failed to publish message: %s", e)
+            raise
+
+    async def subscribe(self, channel: str):
+        """Subscribe to a channel"""
+        if not self.redis_client:
+            raise RuntimeError("Redis client not connected")
+
+        pubsub = self.redis_client.pubsub()
+        await pubsub.subscribe(channel)
+        return pubsub
+
+
+# Global Redis client instance
+redis_client = RedisClient(REDIS_URL)
+
+# Event bus (Redis Streams) sobre a conexão global
+event_bus = EventBus(
+    RedisStreamsBackend(lambda: redis_client.redis_client),
+    maxlen=int(os.getenv("EVENT_STREAM_MAXLEN", "100000")),
+    codec=event_codec,
+)
@@ -0,0 +1,207 @@
+"""
+Profiling sob demanda de uma única requisição (somente administradores)
+
+Ativado por `X-Profile: <modo>` ou `?profile=<modo>`:
+
+- `1` / `store`: a resposta segue normal; o perfil (formato pstats, aberto com
+  snakeviz/flameprof para flame graph) é gravado em PROFILE_DIR e o id volta
+  no header `X-Profile-Id` (consulta em /api/v1/profiles/{id}).
+- `text`: a resposta é substituída pelo relatório do cProfile (top por tempo
+  cumulativo); o status original vai em `X-Profile-Status`.
+
+O requisitante precisa passar por `require_admin` (token Bearer de admin),
+senão recebe 403. Sem a flag, o custo é uma busca no header/query string.
+Apenas um perfil roda por vez em cada worker, e o cProfile mede a thread do
+event loop inteira: requisições concorrentes no mesmo worker aparecem no
+perfil, então prefira usar em horários de pouco tráfego.
+"""
+
+import asyncio
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import re
+import time
+import uuid
+from typing import Any, List, Optional
+from urllib.parse import parse_qs
+from fastapi import HTTPException
+from app.core.security import authenticate_token, require_admin
+
+logger = logging.getLogger(__name__)
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "true").lower() == "true"
+PROFILE_DIR = os.getenv("PROFILE_DIR", "/tmp/budget_profiles")
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))
+PROFILE_TOP = int(os.getenv("PROFILE_TOP", "40"))
+
+PROFILE_MODES = {"1": "store", "true": "store", "store": "store", "text": "text"}
+_PROFILE_ID = re.compile(r"^[0-9]{8}T[0-9]{6}-[0-9a-f]{8}$")
+
+
+def profile_path(profile_id: str) -> Optional[str]:
+    """Caminho do arquivo .prof (None para ids inválidos)"""
+    if not _PROFILE_ID.match(profile_id):
+        return None
+    return os.path.join(PROFILE_DIR, f"{profile_id}.prof")
+
+
+def list_profiles() -> List[dict]:
+    """Perfis gravados, mais recentes primeiro"""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    profiles = []
+    for name in sorted(os.listdir(PROFILE_DIR), reverse=True):
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(PROFILE_DIR, name)) as f:
+                profiles.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return profiles
+
+
+def render_report(stats: pstats.Stats, limit: int = PROFILE_TOP) -> str:
+    """Relatório texto do pstats ordenado por tempo cumulativo"""
+    stream = io.StringIO()
+    stats.stream = stream
+    stats.sort_stats("cumulative").print_stats(limit)
+    return stream.getvalue()
+
+
+def _store(profile_id: str, profiler: cProfile.Profile, metadata: dict) -> None:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    profiler.dump_stats(os.path.join(PROFILE_DIR, f"{profile_id}.prof"))
+    with open(os.path.join(PROFILE_DIR, f"{profile_id}.json"), "w") as f:
+        json.dump(metadata, f)
+
+    # Manter apenas os PROFILE_KEEP mais recentes
+    ids = sorted(name[:-5] for name in os.listdir(PROFILE_DIR) if name.endswith(".json"))
+    for old_id in ids[:-PROFILE_KEEP] if PROFILE_KEEP > 0 else []:
+        for suffix in (".prof", ".json"):
+            try:
+                os.remove(os.path.join(PROFILE_DIR, old_id + suffix))
+            except OSError:
+                pass
+
+
+def _requested_mode(scope) -> Optional[str]:
+    for name, value in scope["headers"]:
+        if name == b"x-profile":
+            return PROFILE_MODES.get(value.decode("latin-1").strip().lower(), "store")
+    query_string = scope.get("query_string", b"")
+    if b"profile=" in query_string:
+        values = parse_qs(query_string.decode("latin-1")).get("profile")
+        if values:
+            return PROFILE_MODES.get(values[0].strip().lower(), "store")
+    return None
+
+
+def _bearer_token(scope) -> Optional[str]:
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            return token.strip() if scheme.lower() == "bearer" and token else None
+    return None
+
+
+async def _send_json(send, status_code: int, detail: str) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status_code,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class ProfilingMiddleware:
+    """ASGI middleware que perfila requisições marcadas por administradores"""
+
+    def __init__(self, app: Any):
+        self.app = app
+        self._active = False
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        mode = _requested_mode(scope)
+        if mode is None:
+            await self.app(scope, receive, send)
+            return
+
+        token = _bearer_token(scope)
+        user = authenticate_token(token) if token else None
+        if user is None:
+            await _send_json(send, 401, "Could not validate credentials")
+            return
+        try:
+            require_admin(user)
+        except HTTPException as e:
+            await _send_json(send, e.status_code, e.detail)
+            return
+        if self._active:
+            await _send_json(send, 409, "Another request is being profiled")
+            return
+
+        profile_id = f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}-{uuid.uuid4().hex[:8]}"
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if mode == "store":
+                    message["headers"] = [*message.get("headers", []), (b"x-profile-id", profile_id.encode())]
+            if mode == "text":
+                # A resposta original é descartada; só o status é preservado
+                return
+            await send(message)
+
+        profiler = cProfile.Profile()
+        self._active = True
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.disable()
+            self._active = False
+            elapsed = time.perf_counter() - started
+
+        metadata = {
+            "id": profile_id,
+            "method": scope["method"],
+            "path": scope["path"],
+            "status": status_code,
+            "duration_ms": round(elapsed * 1000, 1),
+            "user": user.username,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        }
+        logger.info("Profiled %s %s (%s ms) as %s", scope["method"], scope["path"], metadata["duration_ms"], profile_id)
+
+        if mode == "store":
+            try:
+                # Gravação e limpeza do diretório fora do event loop
+                await asyncio.to_thread(_store, profile_id, profiler, metadata)
+            except OSError as e:
+                logger.error("Failed to store profile %s: %s", profile_id, e)
+            return
+
+        report = render_report(pstats.Stats(profiler)).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/plain; charset=utf-8"),
+                (b"content-length", str(len(report)).encode()),
+                (b"x-profile-status", str(status_code).encode()),
+                (b"x-profile-duration-ms", str(metadata["duration_ms"]).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": report})
@@ -2,18 +2,29 @@
 Autenticação e segurança para o Budget Service
 """
 
+import hashlib
+import logging
 import os
+import time
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Dict, Optional
 from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
 
 # Configurações JWT (devem ser as mesmas do user_service)
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")  # Usar variável de ambiente
 ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 
+# Cache de tokens já verificados (chave = SHA-256 do token; o token em si não é armazenado)
+JWT_CACHE_ENABLED = os.getenv("JWT_CACHE_ENABLED", "true").lower() == "true"
+JWT_CACHE_MAXSIZE = int(os.getenv("JWT_CACHE_MAXSIZE", "4096"))
+JWT_CACHE_MAX_TTL = float(os.getenv("JWT_CACHE_MAX_TTL", "900"))
+
 security = HTTPBearer()
 
 
@@ -27,23 +38,87 @@ class CurrentUser(BaseModel):
     role: str
 
 
-def verify_token(token: str) -> Optional[TokenData]:
-    """Verificar e decodificar token JWT"""
+_verified_tokens: TTLCache[CurrentUser] = TTLCache(maxsize=JWT_CACHE_MAXSIZE, ttl=JWT_CACHE_MAX_TTL)
+
+
+def _token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode("utf-8")).digest()
+
+
+def _decode_token(token: str) -> Optional[Dict[str, Any]]:
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            return None
-        
-        # Obter role do payload
-        role = payload.get("role", "vendas")  # Default para vendas se não especificado
-        
-        return TokenData(username=username, role=role)
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
     except JWTError as e:
-        # Log do erro para debug
-        print(f"JWT Error: {e}")
+        logger.debug("JWT error: %s", e)
+        return None
+
+
+def create_service_token(username: str, expires_minutes: float = 10.0) -> str:
+    """
+    Token de curta duração para chamadas do budget_service ao user_service
+
+    Assinado com a mesma SECRET_KEY; `username` deve ser uma conta de
+    administrador existente no user_service (que confere a conta no banco).
+    """
+    expire = datetime.utcnow() + timedelta(minutes=expires_minutes)
+    return jwt.encode({"sub": username, "role": "admin", "exp": expire}, SECRET_KEY, algorithm=ALGORITHM)
+
+
+def verify_token(token: str) -> Optional[TokenData]:
+    """Verificar e decodificar token JWT"""
+    payload = _decode_token(token)
+    if payload is None:
         return None
 
+    username: str = payload.get("sub")
+    if username is None:
+        return None
+
+    # Obter role do payload
+    role = payload.get("role", "vendas")  # Default para vendas se não especificado
+
+    return TokenData(username=username, role=role)
+
+
+def authenticate_token(token: str) -> Optional[CurrentUser]:
+    """
+    Verificar token e retornar o usuário, usando o cache de tokens verificados
+
+    A entrada expira junto com o `exp` do token (limitado a JWT_CACHE_MAX_TTL),
+    então um token expirado nunca é aceito a partir do cache.
+    """
+    key = _token_digest(token) if JWT_CACHE_ENABLED else None
+    if key is not None:
+        cached = _verified_tokens.get(key)
+        if cached is not None:
+            return cached
+
+    payload = _decode_token(token)
+    if payload is None or payload.get("sub") is None:
+        return None
+
+    user = CurrentUser(username=payload["sub"], role=payload.get("role") or "vendas")
+
+    if key is not None:
+        ttl = JWT_CACHE_MAX_TTL
+        exp = payload.get("exp")
+        if isinstance(exp, (int, float)):
+            ttl = min(ttl, exp - time.time())
+        if ttl > 0:
+            _verified_tokens.set(key, user, ttl=ttl)
+
+    return user
+
+
+def clear_token_cache() -> None:
+    """Limpar o cache de tokens verificados"""
+    _verified_tokens.clear()
+
+
+def token_cache() -> TTLCache[CurrentUser]:
+    """Cache de tokens verificados (exposto para métricas de acerto)"""
+    return _verified_tokens
+
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security)
@@ -56,11 +131,11 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    token_data = verify_token(credentials.credentials)
-    if token_data is None or token_data.username is None:
+    current_user = authenticate_token(credentials.credentials)
+    if current_user is None:
         raise credentials_exception
     
-    return CurrentUser(username=token_data.username, role=token_data.role or "vendas")
+    return current_user
 
 
 async def get_current_active_user(
@@ -1,8 +1,36 @@
+import asyncio
+import logging
 import os
-from fastapi import FastAPI
+import time
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.v1.endpoints import budgets, dashboard
-from app.core.database import create_tables
+from app.api.v1.endpoints import budgets, dashboard, pricing_rules as pricing_rules_endpoints, profiles, slow_queries
+from app.core.database import METRICS_ENABLED, SLOW_QUERY_LOG_ENABLED, create_tables, verify_schema, warm_up_pool
+from app.core.logging_config import RequestIdMiddleware, setup_logging, shutdown_logging
+from app.core.messaging import redis_client
+from app.core.metrics import REGISTRY, MetricsMiddleware, metrics_response
+from app.core.tracing import TracingMiddleware, configure_tracing, shutdown_tracing
+from app.core.profiling import PROFILING_ENABLED, ProfilingMiddleware
+from app.core.slow_queries import SlowQueryMiddleware, slow_query_log
+from app.core.security import token_cache
+from app.services.outbox import outbox_relay
+from app.services.pdf_export_service import pdf_export_service
+from app.services.pricing_rules import pricing_rules
+from app.services.user_client import user_client
+from app.services.user_directory import start_user_directory, stop_user_directory
+
+logger = logging.getLogger(__name__)
+
+# Schema no startup: check (confere a head do Alembic, padrão), create
+# (create_all, para SQLite/desenvolvimento sem migrations) ou off
+DB_SCHEMA_MODE = os.getenv("DB_SCHEMA_MODE", "check").lower()
+# Com DB_SCHEMA_STRICT=true o check impede o serviço de subir fora da head.
+# Desligado por padrão: os scripts de deploy migram depois que o container sobe
+DB_SCHEMA_STRICT = os.getenv("DB_SCHEMA_STRICT", "false").lower() == "true"
+# Aquecimento por worker (ligado por `python -m app.server`): template do
+# PDF em uma thread e conexões do pool
+PDF_WARMUP = os.getenv("PDF_WARMUP", "false").lower() == "true"
+DB_POOL_WARMUP = int(os.getenv("DB_POOL_WARMUP", "0"))
 
 app = FastAPI(
     title="Budget Service API",
@@ -20,14 +48,76 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Profiling sob demanda (X-Profile / ?profile=) para administradores
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
+# Métricas Prometheus (latência por rota, queries por requisição, caches).
+# Fora de produção as requisições também recebem o header Server-Timing.
+ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING", str(ENVIRONMENT != "production")).lower() == "true"
+if METRICS_ENABLED:
+    app.add_middleware(
+        MetricsMiddleware,
+        server_timing=SERVER_TIMING_ENABLED,
+        repeated_statement_threshold=int(os.getenv("N_PLUS_ONE_THRESHOLD", "10")),
+    )
+    REGISTRY.add_cache_collector({"jwt": token_cache(), "user_client": user_client.cache})
+    REGISTRY.add_collector(
+        "db_slow_queries_total", "counter", "SQL statements slower than SLOW_QUERY_THRESHOLD_MS",
+        lambda: [({}, slow_query_log.total)]
+    )
+
+# Endpoint de origem das queries lentas (/api/v1/slow-queries)
+if SLOW_QUERY_LOG_ENABLED:
+    app.add_middleware(SlowQueryMiddleware)
+
+# Tracing W3C (traceparent); exportador definido por TRACING_EXPORTER
+app.add_middleware(TracingMiddleware)
+
+# Correlação de logs: X-Request-ID (adicionado por último para envolver os demais middlewares)
+app.add_middleware(RequestIdMiddleware)
+
 # Include routers
 app.include_router(budgets.router, prefix="/api/v1/budgets", tags=["budgets"])
 app.include_router(dashboard.router, prefix="/api/v1/dashboard", tags=["dashboard"])
+app.include_router(profiles.router, prefix="/api/v1/profiles", tags=["profiles"])
+app.include_router(slow_queries.router, prefix="/api/v1/slow-queries", tags=["slow-queries"])
+app.include_router(pricing_rules_endpoints.router, prefix="/api/v1/pricing-rules", tags=["pricing-rules"])
 
 
 @app.on_event("startup")
 async def startup_event():
-    await create_tables()
+    started = time.perf_counter()
+    setup_logging("budget_service", ENVIRONMENT)
+    configure_tracing("budget_service")
+    if DB_SCHEMA_MODE == "create":
+        await create_tables()
+    elif DB_SCHEMA_MODE == "check":
+        await verify_schema(strict=DB_SCHEMA_STRICT)
+    if DB_POOL_WARMUP:
+        await warm_up_pool(DB_POOL_WARMUP)
+    await pricing_rules.start()
+    await user_client.startup()
+    await start_user_directory()
+    outbox_relay.start()
+    slow_query_log.start()
+    if PDF_WARMUP:
+        asyncio.get_running_loop().run_in_executor(None, pdf_export_service.warm_up)
+    logger.info("budget_service startup finished in %.0f ms", (time.perf_counter() - started) * 1000)
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await slow_query_log.stop()
+    await pricing_rules.stop()
+    await outbox_relay.stop()
+    await stop_user_directory()
+    # Cliente Redis compartilhado pelo relay e pelo diretório: fechado depois de ambos
+    await redis_client.disconnect()
+    await user_client.close()
+    shutdown_tracing()
+    shutdown_logging()
 
 
 @app.get("/")
@@ -37,4 +127,11 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "service": "budget_service"}
\ No newline at end of file
+    return {"status": "healthy", "service": "budget_service"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return metrics_response()
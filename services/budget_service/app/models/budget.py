@@ -48,6 +48,7 @@ class Budget(Base):
     freight_value_total = Column(Float, nullable=True, comment='Valor total do frete')
     payment_condition = Column(String(50), nullable=True, comment='Condições de pagamento')
     valor_frete_compra = Column(Float, nullable=True, comment='Valor do frete por kg (Valor Frete Total / Peso Total)')
+    pricing_rules_version = Column(Integer, nullable=True, index=True, comment='Versão das regras de preço usada no último cálculo')
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class OutboxEvent(Base):
+    """Evento gravado na mesma transação da alteração que ele descreve"""
+    __tablename__ = "budget_event_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    stream = Column(String(100), nullable=False)
+    payload = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
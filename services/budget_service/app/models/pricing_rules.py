@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class PricingRuleSet(Base):
+    """Versão das regras de preço (comissão, PIS/COFINS, IPI, ICMS padrão); nunca alterada, só acrescentada"""
+    __tablename__ = "pricing_rule_sets"
+
+    version = Column(Integer, primary_key=True, autoincrement=False)
+    rules = Column(Text, nullable=False)  # JSON: ver app.services.pricing_rules.DEFAULT_RULES
+    created_by = Column(String, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
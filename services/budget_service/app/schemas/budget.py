@@ -27,31 +27,8 @@ class BudgetItemSimplified(BaseModel):
             return values.get('peso_compra', 1.0)
         return v
 
-    @validator('valor_com_icms_compra', 'valor_com_icms_venda')
-    def validate_positive_values(cls, v):
-        if v <= 0:
-            raise ValueError('Valores devem ser maiores que zero')
-        return v
-
-    @validator('percentual_icms_compra', 'percentual_icms_venda')
-    def validate_icms_percentage(cls, v):
-        if v < 0 or v > 1:
-            raise ValueError('Percentual de ICMS deve estar entre 0 e 1 (formato decimal)')
-        return v
-
-    @validator('percentual_ipi')
-    def validate_ipi_percentage(cls, v):
-        # IPI aceita apenas 0%, 3.25% ou 5% (em formato decimal)
-        valid_ipi_values = [0.0, 0.0325, 0.05]
-        if v not in valid_ipi_values:
-            raise ValueError('Percentual de IPI deve ser 0%, 3.25% ou 5% (formato decimal: 0.0, 0.0325, 0.05)')
-        return v
-
-    @validator('peso_compra')
-    def validate_peso_compra(cls, v):
-        if v is not None and v <= 0:
-            raise ValueError('Peso de compra deve ser maior que zero')
-        return v
+    # Valores, pesos e percentuais (ICMS, IPI) são validados para todos os itens
+    # de uma vez em app.services.budget_validation
 
 
 class BudgetSimplifiedCreate(BaseModel):
@@ -117,20 +94,8 @@ class BudgetItemBase(BaseModel):
     # Weight difference display info
     weight_difference_display: Optional[dict] = None
 
-
-    @validator('purchase_value_with_icms', 'sale_value_with_icms')
-    def validate_positive_values(cls, v):
-        if v < 0:
-            raise ValueError('Valores não podem ser negativos')
-        return v
-
-    @validator('ipi_percentage')
-    def validate_ipi_percentage(cls, v):
-        # IPI aceita apenas 0%, 3.25% ou 5% (em formato decimal)
-        valid_ipi_values = [0.0, 0.0325, 0.05]
-        if v not in valid_ipi_values:
-            raise ValueError('Percentual de IPI deve ser 0%, 3.25% ou 5% (formato decimal: 0.0, 0.0325, 0.05)')
-        return v
+    # Valores e percentuais dos itens são validados para todos os itens de uma
+    # vez em app.services.budget_validation (não na leitura de BudgetItemResponse)
 
 
 class BudgetItemCreate(BudgetItemBase):
@@ -253,6 +218,9 @@ class BudgetResponse(BudgetBase):
     # Weight difference
     total_weight_difference_percentage: Optional[float] = None  # Diferença total de peso em porcentagem
     
+    # Versão das regras de preço usada no último cálculo (None: calculado antes do versionamento)
+    pricing_rules_version: Optional[int] = None
+    
     created_by: str
     created_at: datetime
     updated_at: datetime
@@ -275,6 +243,8 @@ class BudgetSummary(BaseModel):
     profitability_percentage: float
     items_count: int
     origem: Optional[str] = None
+    created_by: Optional[str] = None
+    seller_name: Optional[str] = None  # Nome do vendedor (diretório de usuários; None se não resolvido)
     created_at: datetime
 
     class Config:
@@ -0,0 +1,26 @@
+from pydantic import BaseModel
+from typing import List
+
+
+class CommissionBracket(BaseModel):
+    """Faixa de comissão: vale a partir de min_profitability (formato decimal)"""
+    min_profitability: float
+    commission_rate: float
+
+
+class PricingRulesUpdate(BaseModel):
+    """Nova versão das regras de preço (percentuais em formato decimal, ex.: 0.0925)"""
+    commission_brackets: List[CommissionBracket]
+    pis_cofins_percentage: float
+    icms_default_percentage: float
+    ipi_valid_percentages: List[float]
+
+
+class PricingRulesResponse(PricingRulesUpdate):
+    version: int
+
+
+class StaleBudgetsRecalculation(BaseModel):
+    version: int
+    recalculated: int
+    failed: List[int] = []
@@ -0,0 +1,11 @@
+"""
+Entrada de produção do budget_service: `python -m app.server`
+
+Workers conforme as CPUs disponíveis, uvloop/httptools, reciclagem de
+workers e shutdown gracioso (ver app.core.server). Cada worker pré-carrega o
+template do PDF e abre conexões do pool no startup.
+"""
+from app.core.server import run
+
+if __name__ == "__main__":
+    run("app.main:app", default_port=8002, warmup_env={"PDF_WARMUP": "true", "DB_POOL_WARMUP": "2"})
@@ -1,6 +1,8 @@
 from typing import List, Dict, Any, Optional
 from app.schemas.budget import BudgetItemCreate, BudgetItemResponse, BudgetItemSimplified
 from app.services.commission_service import CommissionService
+from app.services.pricing_rules import pricing_rules
+from app.utils.rounding import round_currency, round_unit
 
 
 class BudgetCalculatorService:
@@ -12,7 +14,6 @@ class BudgetCalculatorService:
     # Configurações padrão do sistema
     DEFAULT_COMMISSION_PERCENTAGE = 1.5  # 1,5% conforme planilha
     DEFAULT_SALE_ICMS_PERCENTAGE = 17.0  # ICMS padrão para vendas
-    DEFAULT_PIS_COFINS_PERCENTAGE = 9.25  # PIS/COFINS fixo conforme regras (9,25%)
     DEFAULT_OTHER_EXPENSES = 0.0  # Outras despesas padrão
     DEFAULT_TARGET_MARGIN = 30.0   # 30% margem alvo
     
@@ -36,7 +37,7 @@ class BudgetCalculatorService:
         ipi_percentage = item_input.percentual_ipi  # Já em formato decimal
         
         # REGRA 1: Valor s/Impostos (Compra) = [Valor c/ICMS (Compra) * (1 - % ICMS (Compra))] * (1 - Taxa PIS/COFINS) + Outras Despesas
-        purchase_value_without_taxes_base = (purchase_value_with_icms * (1 - purchase_icms_percentage / 100)) * (1 - BudgetCalculatorService.DEFAULT_PIS_COFINS_PERCENTAGE / 100)
+        purchase_value_without_taxes_base = (purchase_value_with_icms * (1 - purchase_icms_percentage / 100)) * (1 - pricing_rules.current().pis_cofins_percentage)
         
         # Adicionar outras despesas por kg (R$/kg) diretamente
         purchase_value_without_taxes = purchase_value_without_taxes_base
@@ -50,7 +51,7 @@ class BudgetCalculatorService:
         purchase_value_with_weight_diff = purchase_value_without_taxes * (peso_compra / peso_venda)
         
         # REGRA 3: Valor s/Impostos (Venda) = [Valor c/ICMS (Venda) * (1 - % ICMS (Venda))] * (1 - Taxa PIS/COFINS)
-        sale_value_without_taxes = (sale_value_with_icms * (1 - sale_icms_percentage / 100)) * (1 - BudgetCalculatorService.DEFAULT_PIS_COFINS_PERCENTAGE / 100)
+        sale_value_without_taxes = (sale_value_with_icms * (1 - sale_icms_percentage / 100)) * (1 - pricing_rules.current().pis_cofins_percentage)
         
         # REGRA 4: Diferença de Peso = (Peso (Venda) - Peso (Compra)) / Peso (Compra)
         weight_difference = 0.0
@@ -94,30 +95,30 @@ class BudgetCalculatorService:
             'purchase_other_expenses': item_input.outras_despesas_item or 0,
             
             # Valores calculados
-            'purchase_value_without_taxes': round(purchase_value_without_taxes, 6),  # Regra 1
-            'purchase_value_with_weight_diff': round(purchase_value_with_weight_diff, 6),  # Regra 2
+            'purchase_value_without_taxes': round_unit(purchase_value_without_taxes),  # Regra 1
+            'purchase_value_with_weight_diff': round_unit(purchase_value_with_weight_diff),  # Regra 2
             'sale_weight': peso_venda,
             'sale_value_with_icms': sale_value_with_icms,
             'sale_icms_percentage': sale_icms_percentage,
-            'sale_value_without_taxes': round(sale_value_without_taxes, 6),  # Regra 3
-            'weight_difference': round(weight_difference, 6),  # Regra 4
+            'sale_value_without_taxes': round_unit(sale_value_without_taxes),  # Regra 3
+            'weight_difference': round_unit(weight_difference),  # Regra 4
             
             # Campos calculados finais
             'profitability': profitability,  # Manter em decimal para cálculos - conversão para % apenas na exibição
-            'total_purchase': round(total_purchase, 2),  # Regra 6
-            'total_sale': round(total_sale, 2),  # Regra 7
-            'unit_value': round(unit_value, 2),  # Regra 8
-            'total_value': round(total_value_with_icms, 2),  # Regra 8
+            'total_purchase': round_currency(total_purchase),  # Regra 6
+            'total_sale': round_currency(total_sale),  # Regra 7
+            'unit_value': round_currency(unit_value),  # Regra 8
+            'total_value': round_currency(total_value_with_icms),  # Regra 8
             
             # Comissão
-            'commission_value': round(commission_value, 2),  # Regra 9
+            'commission_value': round_currency(commission_value),  # Regra 9
             
             # IPI (Imposto sobre Produtos Industrializados)
             'ipi_percentage': ipi_percentage,  # Percentual de IPI
-            'ipi_value_per_unit': round(ipi_value_per_unit, 2),  # IPI por unidade
-            'total_ipi_value': round(total_ipi_value, 2),  # IPI total do item
-            'final_value_with_ipi': round(final_value_with_ipi, 2),  # Valor unitário final com IPI
-            'total_final_with_ipi': round(total_final_with_ipi, 2),  # Valor total final com IPI
+            'ipi_value_per_unit': round_currency(ipi_value_per_unit),  # IPI por unidade
+            'total_ipi_value': round_currency(total_ipi_value),  # IPI total do item
+            'final_value_with_ipi': round_currency(final_value_with_ipi),  # Valor unitário final com IPI
+            'total_final_with_ipi': round_currency(total_final_with_ipi),  # Valor total final com IPI
         }
     
     @staticmethod
@@ -154,69 +155,26 @@ class BudgetCalculatorService:
         return {
             'items': calculated_items,
             'totals': {
-                'total_purchase_value': round(total_purchase_value, 2),
-                'total_sale_value': round(total_sale_value, 2),
-                'total_commission': round(total_commission, 2),
+                'total_purchase_value': round_currency(total_purchase_value),
+                'total_sale_value': round_currency(total_sale_value),
+                'total_commission': round_currency(total_commission),
                 'profitability_percentage': profitability_percentage,  # Manter em decimal
                 # Totais de IPI
-                'total_ipi_value': round(total_ipi_value, 2),
-                'total_final_value': round(total_final_value, 2),  # Valor final que o cliente pagará
+                'total_ipi_value': round_currency(total_ipi_value),
+                'total_final_value': round_currency(total_final_value),  # Valor final que o cliente pagará
             }
         }
 
-    @staticmethod
-    def validate_simplified_budget_data(budget_data: dict) -> List[str]:
-        """
-        Valida dados do orçamento simplificado
-        Usa os nomes corretos dos campos em português
-        """
-        errors = []
-        
-        # Verificar se tem itens
-        if not budget_data.get('items'):
-            errors.append("Orçamento deve ter pelo menos um item")
-        
-        # Validar cada item
-        for i, item in enumerate(budget_data.get('items', [])):
-            item_prefix = f"Item {i+1}: "
-            
-            if not item.get('description'):
-                errors.append(f"{item_prefix}Descrição é obrigatória")
-            
-            # Usar os nomes corretos dos campos em português
-            valor_compra = item.get('valor_com_icms_compra', 0)
-            if valor_compra is None or valor_compra <= 0:
-                errors.append(f"{item_prefix}Valor de compra deve ser maior que zero")
-                
-            valor_venda = item.get('valor_com_icms_venda', 0)  
-            if valor_venda is None or valor_venda <= 0:
-                errors.append(f"{item_prefix}Valor de venda deve ser maior que zero")
-            
-            # Validar peso de compra
-            peso_compra = item.get('peso_compra', 0)
-            if peso_compra is None or peso_compra <= 0:
-                errors.append(f"{item_prefix}Peso de compra deve ser maior que zero")
-            
-            # Validar porcentagens usando nomes corretos
-            for field, name in [('percentual_icms_compra', 'ICMS compra'), ('percentual_icms_venda', 'ICMS venda')]:
-                if field in item:
-                    # As porcentagens vêm em formato decimal (0.18 = 18%)
-                    percentual = item[field]
-                    if percentual < 0 or percentual > 1:
-                        errors.append(f"{item_prefix}{name} deve estar entre 0 e 1 (formato decimal)")
-        
-        return errors
-
     @staticmethod
     def calculate_item_totals(item_data: dict) -> dict:
         """
         Calculate all financial values for a budget item following business rules
         """
         # REGRA 1: Cálculo do valor sem impostos de compra
-        purchase_value_without_taxes = (item_data['purchase_value_with_icms'] * (1 - item_data['purchase_icms_percentage'] / 100)) * (1 - BudgetCalculatorService.DEFAULT_PIS_COFINS_PERCENTAGE / 100)
+        purchase_value_without_taxes = (item_data['purchase_value_with_icms'] * (1 - item_data['purchase_icms_percentage'] / 100)) * (1 - pricing_rules.current().pis_cofins_percentage)
         
         # REGRA 3: Cálculo do valor sem impostos de venda  
-        sale_value_without_taxes = (item_data['sale_value_with_icms'] * (1 - item_data['sale_icms_percentage'] / 100)) * (1 - BudgetCalculatorService.DEFAULT_PIS_COFINS_PERCENTAGE / 100)
+        sale_value_without_taxes = (item_data['sale_value_with_icms'] * (1 - item_data['sale_icms_percentage'] / 100)) * (1 - pricing_rules.current().pis_cofins_percentage)
         
         # REGRA 6: Total purchase (including other expenses) - usar weight ao invés de quantity
         weight = item_data.get('weight', 1.0)
@@ -248,15 +206,15 @@ class BudgetCalculatorService:
             weight_difference = (item_data['sale_weight'] - item_data['weight']) / item_data['weight']
         
         return {
-            'purchase_value_without_taxes': round(purchase_value_without_taxes, 6),
-            'sale_value_without_taxes': round(sale_value_without_taxes, 6),
-            'total_purchase': round(total_purchase, 2),
-            'total_sale': round(total_sale, 2),
-            'unit_value': round(unit_value, 2),
-            'total_value': round(total_value, 2),
+            'purchase_value_without_taxes': round_unit(purchase_value_without_taxes),
+            'sale_value_without_taxes': round_unit(sale_value_without_taxes),
+            'total_purchase': round_currency(total_purchase),
+            'total_sale': round_currency(total_sale),
+            'unit_value': round_currency(unit_value),
+            'total_value': round_currency(total_value),
             'profitability': profitability,  # Manter em decimal - conversão para % apenas na exibição
-            'commission_value': round(commission_value, 2),
-            'weight_difference': round(weight_difference, 6)
+            'commission_value': round_currency(commission_value),
+            'weight_difference': round_unit(weight_difference)
         }
     
     @staticmethod
@@ -329,35 +287,3 @@ class BudgetCalculatorService:
             'total_commission': total_commission,
             'commission_by_profitability_range': commission_by_profitability_range
         }
-    
-    @staticmethod
-    def validate_budget_data(budget_data: dict) -> List[str]:
-        """
-        Validate budget data and return list of validation errors
-        """
-        errors = []
-        
-        # Check if budget has items
-        if not budget_data.get('items'):
-            errors.append("Orçamento deve ter pelo menos um item")
-        
-        # Validate each item
-        for i, item in enumerate(budget_data.get('items', [])):
-            item_prefix = f"Item {i+1}: "
-            
-            if not item.get('description'):
-                errors.append(f"{item_prefix}Descrição é obrigatória")
-            
-            # Validação removida: quantity não existe mais na tabela
-            
-            if not item.get('purchase_value_with_icms') or item['purchase_value_with_icms'] < 0:
-                errors.append(f"{item_prefix}Valor de compra deve ser informado")
-            
-            if not item.get('sale_value_with_icms') or item['sale_value_with_icms'] < 0:
-                errors.append(f"{item_prefix}Valor de venda deve ser informado")
-            
-            # Check if sale value is higher than purchase value
-            if (item.get('sale_value_with_icms', 0) < item.get('purchase_value_with_icms', 0)):
-                errors.append(f"{item_prefix}Valor de venda deve ser maior que o valor de compra")
-        
-        return errors
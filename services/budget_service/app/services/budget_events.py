@@ -0,0 +1,71 @@
+"""
+Eventos de domínio de orçamentos (budget.created / updated / status_changed / deleted)
+
+Os eventos são compactos: identificação do orçamento, status e apenas os
+totais necessários para read models (dashboards, relatórios de comissão)
+se atualizarem de forma incremental, sem reler a tabela `budgets`.
+"""
+
+from typing import Any, Dict
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.events import (
+    BUDGET_EVENT_TOTALS,
+    BudgetCreatedEvent,
+    BudgetDeletedEvent,
+    BudgetStatusChangedEvent,
+    BudgetUpdatedEvent,
+)
+from app.models.budget import Budget
+from app.services.outbox import add_event
+
+
+def budget_state(budget: Budget) -> Dict[str, Any]:
+    """Status e totais atuais do orçamento (capturar antes de alterar)"""
+    status = budget.status
+    return {
+        "status": getattr(status, "value", status),
+        "totals": {field: getattr(budget, field) for field in BUDGET_EVENT_TOTALS},
+    }
+
+
+def _identity(budget: Budget) -> Dict[str, Any]:
+    return {
+        "budget_id": budget.id,
+        "order_number": budget.order_number,
+        "created_by": budget.created_by,
+    }
+
+
+def stage_budget_created(db: AsyncSession, budget: Budget) -> None:
+    add_event(db, BudgetCreatedEvent(budget_data={**_identity(budget), **budget_state(budget)}))
+
+
+def stage_budget_changes(db: AsyncSession, budget: Budget, before: Dict[str, Any]) -> None:
+    """
+    Registrar budget.updated com os totais alterados (valor novo e anterior) e,
+    se o status mudou, budget.status_changed com os totais atuais
+
+    Sem totais nem status alterados (ex.: só observações) nada é registrado.
+    """
+    after = budget_state(budget)
+    changed = [field for field, value in after["totals"].items() if before["totals"].get(field) != value]
+    if not changed and after["status"] == before["status"]:
+        return
+    add_event(db, BudgetUpdatedEvent(budget_data={
+        **_identity(budget),
+        "status": after["status"],
+        "totals": {field: after["totals"][field] for field in changed},
+        "previous": {field: before["totals"][field] for field in changed},
+    }))
+
+    if after["status"] != before["status"]:
+        add_event(db, BudgetStatusChangedEvent(budget_data={
+            **_identity(budget),
+            "from_status": before["status"],
+            "to_status": after["status"],
+            "totals": after["totals"],
+        }))
+
+
+def stage_budget_deleted(db: AsyncSession, budget: Budget) -> None:
+    add_event(db, BudgetDeletedEvent(budget_data={**_identity(budget), **budget_state(budget)}))
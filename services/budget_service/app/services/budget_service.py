@@ -1,11 +1,14 @@
-from typing import List, Optional, cast
+from typing import Dict, List, Optional, Sequence, Union
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, or_
 from sqlalchemy.orm import selectinload
 from app.models.budget import Budget, BudgetItem, BudgetStatus
-from app.schemas.budget import BudgetCreate, BudgetUpdate, BudgetItemCreate, BudgetItemUpdate
-from app.services.business_rules_calculator import BusinessRulesCalculator
-from app.utils.json_utils import safe_json_dumps
+from app.schemas.budget import BudgetCreate, BudgetSimplifiedCreate, BudgetUpdate, BudgetItemCreate, BudgetItemUpdate
+from app.services.calculator_input import to_calculator_input
+from app.services.budget_validation import check_budget_items
+from app.services.budget_events import budget_state, stage_budget_changes, stage_budget_created, stage_budget_deleted
+from app.services.outbox import outbox_relay
+from app.services.pricing_rules import pricing_rules
 import logging
 
 # Configurar logger
@@ -27,154 +30,58 @@ class BudgetService:
         raise ValueError(f"Tipo inválido para status: {type(status)}")
     
     @staticmethod
-    async def create_budget(db: AsyncSession, budget_data: BudgetCreate, created_by: str) -> Budget:
-        """Create a new budget with items"""
+    async def create_budget(
+        db: AsyncSession,
+        budget_data: Union[BudgetCreate, BudgetSimplifiedCreate],
+        created_by: str,
+        order_number: Optional[str] = None,
+    ) -> Budget:
+        """Create a new budget with items (full or simplified item schema)"""
         
-        # Validate budget data
-        budget_dict = budget_data.dict()
-        items_data = [item.dict() for item in budget_data.items]
+        # Itens no formato da calculadora, com pesos e outras despesas do pedido
+        calculator_input = to_calculator_input(budget_data.items)
         
-        # Transform from English schema format to Portuguese BusinessRulesCalculator format if needed
-        transformed_items = []
-        for item_data in items_data:
-            # Check if already in Portuguese format (for backwards compatibility)
-            if 'peso_compra' in item_data:
-                transformed_items.append(item_data)
-            else:
-                # Transform from English to Portuguese format
-                transformed_item = {
-                    'description': item_data.get('description', ''),
-                    'delivery_time': item_data.get('delivery_time', '0'),  # 🔧 CORREÇÃO: Preservar delivery_time
-                    'peso_compra': item_data.get('weight', 1.0),
-                    'peso_venda': item_data.get('sale_weight') or item_data.get('weight', 1.0),
-                    'valor_com_icms_compra': item_data.get('purchase_value_with_icms', 0),
-                    'percentual_icms_compra': item_data.get('purchase_icms_percentage', 0.18),
-                    'outras_despesas_item': item_data.get('purchase_other_expenses', 0),
-                    'valor_com_icms_venda': item_data.get('sale_value_with_icms', 0),
-                    'percentual_icms_venda': item_data.get('sale_icms_percentage', 0.18),
-                    'percentual_ipi': item_data.get('ipi_percentage', 0.0),  # IPI percentage
-                    'dunamis_cost': item_data.get('dunamis_cost')
-                }
-                transformed_items.append(transformed_item)
-        
-        # Validate items using business rules
-        for item_data in transformed_items:
-            errors = BusinessRulesCalculator.validate_item_data(item_data)
-            if errors:
-                raise ValueError(f"Dados inválidos: {'; '.join(errors)}")
-        
-        # Calculate totals using business rules calculator
-        # CORREÇÃO: Usar peso_compra para distribuir frete (não peso_venda)
-        soma_pesos_pedido = sum(item.get('peso_compra', 0) for item in transformed_items)
-        # Correção: outras_despesas_item é R$/kg; somatório deve ser R$/kg * peso_compra
-        outras_despesas_totais = sum(
-            (item.get('outras_despesas_item', 0) or 0.0) * (item.get('peso_compra', 0) or 0.0)
-            for item in transformed_items
-        )
-        
-        budget_result = BusinessRulesCalculator.calculate_complete_budget(
-            transformed_items, outras_despesas_totais, soma_pesos_pedido, 
-            budget_data.freight_value_total or 0.0
-        )
+        # Validar todos os itens de uma vez (BudgetValidationError com todos os erros)
+        check_budget_items(calculator_input.items)
         
-        totals = {
-            'total_purchase_value': budget_result['totals']['soma_total_compra'],
-            'total_sale_value': budget_result['totals']['soma_total_venda'],
-            'total_commission': sum(item['valor_comissao'] for item in budget_result['items']),
-            'profitability_percentage': budget_result['totals'].get('markup_pedido_sem_impostos', budget_result['totals']['markup_pedido'])
-        }
+        budget_result = calculator_input.calculate(budget_data.freight_value_total)
         
         # Create budget
         budget = Budget(
-            order_number=budget_data.order_number,
+            order_number=order_number or budget_data.order_number,
             client_name=budget_data.client_name,
-            client_id=budget_data.client_id,
+            client_id=getattr(budget_data, "client_id", None),
             status=BudgetService._resolve_budget_status(getattr(budget_data, "status", None)),
             notes=budget_data.notes,
             expires_at=budget_data.expires_at,
             created_by=created_by,
-            total_purchase_value=totals['total_purchase_value'],
-            total_sale_value=totals['total_sale_value'],
-            total_sale_with_icms=budget_result['totals']['soma_total_venda_com_icms'],
-            total_commission=totals['total_commission'],
-            profitability_percentage=totals['profitability_percentage'],
-            # Calcular commission_percentage_actual médio ponderado
-            commission_percentage_actual=BudgetService._calculate_weighted_commission_percentage(budget_result['items']),
             # Add freight_type field
             freight_type=budget_data.freight_type,
             # Add payment_condition field - FIX: Campo estava faltando no mapeamento
             payment_condition=budget_data.payment_condition,
             # Add prazo_medio and outras_despesas_totais fields
             origem=budget_data.origem,
-            outras_despesas_totais=outras_despesas_totais,
+            outras_despesas_totais=calculator_input.outras_despesas_totais,
             # Add freight fields
             freight_value_total=budget_data.freight_value_total,
-            valor_frete_compra=budget_result['totals'].get('valor_frete_compra', 0.0),
-            # IPI totals - Fix the key names to match what's returned from BusinessRulesCalculator
-            total_ipi_value=budget_result['totals'].get('total_ipi_orcamento', 0.0),
-            total_final_value=budget_result['totals'].get('total_final_com_ipi', 0.0),
-            # Weight difference
-            total_weight_difference_percentage=budget_result['totals'].get('total_weight_difference_percentage', 0.0)
+            # Totais, comissão média ponderada, IPI e diferença de peso calculados
+            **budget_result.budget_fields()
         )
         
         db.add(budget)
         await db.flush()  # Get the budget ID
         
         # Create items with calculations from business rules
-        for i, item_data in enumerate(transformed_items):
-            calculated_item = budget_result['items'][i]
-            
-            # Ensure IPI values are properly calculated and set
-            ipi_percentage = calculated_item.get('percentual_ipi', 0.0)
-            sale_value_with_icms = calculated_item.get('valor_com_icms_venda', 0.0)
-            sale_weight = calculated_item.get('peso_venda', 1.0)
-            
-            # Calculate IPI value explicitly to ensure it's correct
-            ipi_value = BusinessRulesCalculator.calculate_total_ipi_item(
-                sale_weight, sale_value_with_icms, ipi_percentage
-            )
-            
-            # Use correct IPI field names from BusinessRulesCalculator
-            total_value_with_ipi = calculated_item.get('total_final_com_ipi', 0.0)
-            
-            # Weight difference display
-            weight_diff_raw = calculated_item.get('weight_difference_display')
-            weight_diff_json = safe_json_dumps(weight_diff_raw) if weight_diff_raw else None
-            
-            budget_item = BudgetItem(
+        for item_data, calculated_item in zip(calculator_input.items, budget_result.items):
+            # CORREÇÃO: Usar delivery_time do item_data original
+            db.add(BudgetItem(
                 budget_id=budget.id,
-                description=calculated_item['description'],
-                delivery_time=item_data.get('delivery_time', '0'),  # CORREÇÃO: Usar delivery_time do item_data original
-                weight=calculated_item['peso_compra'],
-                purchase_value_with_icms=calculated_item['valor_com_icms_compra'],
-                purchase_icms_percentage=calculated_item['percentual_icms_compra'],
-                purchase_other_expenses=calculated_item['outras_despesas_item'],
-                purchase_value_without_taxes=calculated_item['valor_sem_impostos_compra'],
-                purchase_value_with_weight_diff=calculated_item['valor_corrigido_peso'],
-                sale_weight=calculated_item['peso_venda'],
-                sale_value_with_icms=calculated_item['valor_com_icms_venda'],
-                sale_icms_percentage=calculated_item['percentual_icms_venda'],
-                sale_value_without_taxes=calculated_item['valor_sem_impostos_venda'],
-                weight_difference=calculated_item['diferenca_peso'],
-                profitability=(calculated_item['rentabilidade_item'] or 0) * 100,  # Convert to percentage
-                total_profitability=(calculated_item.get('rentabilidade_item_total') or 0) * 100,
-                total_purchase=calculated_item['total_compra_item'],
-                total_sale=calculated_item['total_venda_item'],
-                unit_value=calculated_item['valor_unitario_venda'],
-                total_value=calculated_item['total_venda_item'],
-                commission_value=calculated_item['valor_comissao'],
-                commission_percentage=calculated_item.get('percentual_comissao', 0.0),
-                commission_percentage_actual=calculated_item.get('commission_percentage_actual', 0.0),
-                # IPI fields - use values calculated by BusinessRulesCalculator
-                ipi_percentage=ipi_percentage,
-                ipi_value=calculated_item.get('valor_ipi_total', ipi_value),  # Use valor_ipi_total from calculator
-                total_value_with_ipi=total_value_with_ipi,
-                # Weight difference display
-                weight_difference_display=weight_diff_json
-            )
-            db.add(budget_item)
+                **calculated_item.budget_item_fields(item_data.get('delivery_time', '0'))
+            ))
         
+        stage_budget_created(db, budget)
         await db.commit()
+        outbox_relay.notify()
         await db.refresh(budget)
         
         return budget
@@ -254,7 +161,7 @@ class BudgetService:
     async def update_budget(db: AsyncSession, budget_id: int, budget_data: BudgetUpdate) -> Optional[Budget]:
         """Atualizar orçamento existente"""
         try:
-            logger.debug(f"Updating budget {budget_id}")
+            logger.debug("Updating budget %s", budget_id)
             
             # Buscar orçamento existente
             result = await db.execute(
@@ -263,82 +170,62 @@ class BudgetService:
             budget = result.scalar_one_or_none()
             
             if not budget:
-                logger.warning(f"Budget {budget_id} not found")
+                logger.warning("Budget %s not found", budget_id)
                 return None
             
+            state_before = budget_state(budget)
+            
             # Preservar freight_type original se não fornecido
             original_freight_type = budget.freight_type
-            logger.debug(f"Original freight_type: {original_freight_type}")
+            logger.debug("Original freight_type: %s", original_freight_type)
             
-            # Converter para dict e atualizar campos
-            budget_dict = budget_data.model_dump(exclude_unset=True)
-            logger.debug(f"Budget update data: {budget_dict}")
+            # Converter para dict e atualizar campos (itens seguem como schemas para o adaptador)
+            budget_dict = budget_data.model_dump(exclude_unset=True, exclude={'items'})
+            logger.debug("Budget update data: %s", budget_dict)
             
             # Verificar se freight_type está sendo atualizado
             freight_type_value = budget_dict.get('freight_type')
             if freight_type_value is not None:
-                logger.debug(f"Freight type in update data: {freight_type_value}")
+                logger.debug("Freight type in update data: %s", freight_type_value)
             
             # Atualizar campos do orçamento
             for field, value in budget_dict.items():
                 if hasattr(budget, field) and field != 'items':
-                    logger.debug(f"Setting {field} = {value}")
+                    logger.debug("Setting %s = %s", field, value)
                     setattr(budget, field, value)
             
             # Garantir que freight_type seja preservado se não fornecido
             if 'freight_type' not in budget_dict:
-                logger.debug(f"Explicitly set freight_type to {budget.freight_type}")
+                logger.debug("Explicitly set freight_type to %s", budget.freight_type)
                 budget.freight_type = original_freight_type
             
             # Handle items update separately if provided
-            items_data = budget_dict.pop('items', None)
+            items_data = budget_data.items if 'items' in budget_data.model_fields_set else None
             
             # Store freight_type value before processing items (if it exists in update data)
             freight_type_value = budget_dict.get('freight_type', None)
-            print(f"🔍 DEBUG - Freight type in update data: {freight_type_value}")
             
             # Update budget fields (excluding items)
             for field, value in budget_dict.items():
                 # Skip freight_type for now, we'll handle it after item processing
                 if field != 'freight_type':
-                    print(f"DEBUG: Setting {field} = {value}")
+                    logger.debug("Setting %s = %s", field, value)
                     setattr(budget, field, value)
             
             # Explicitly handle freight_type if it's in the update data
             if 'freight_type' in budget_dict:
                 budget.freight_type = budget_dict['freight_type']
-                print(f"DEBUG: Explicitly set freight_type to {budget.freight_type}")
+                logger.debug("Explicitly set freight_type to %s", budget.freight_type)
                 # Garantir que o valor seja salvo no banco de dados
                 await db.flush()
             
             # Update items if provided
             if items_data is not None:
-                # Convert items to list of dicts if needed
-                items_list = [item.dict() if hasattr(item, 'dict') else item for item in items_data]
+                # Itens no formato da calculadora, com pesos e outras despesas do pedido
+                calculator_input = to_calculator_input(items_data)
                 
-                # Transform from English schema format to Portuguese BusinessRulesCalculator format
-                transformed_items = []
-                for item_data in items_list:
-                    transformed_item = {
-                        'description': item_data.get('description', ''),
-                        'delivery_time': item_data.get('delivery_time', '0'),  # CORREÇÃO: Incluir delivery_time
-                        'peso_compra': item_data.get('weight', 1.0),
-                        'peso_venda': item_data.get('sale_weight') or item_data.get('weight', 1.0),
-                        'valor_com_icms_compra': item_data.get('purchase_value_with_icms', 0),
-                        'percentual_icms_compra': item_data.get('purchase_icms_percentage', 0.18),
-                        'outras_despesas_item': item_data.get('purchase_other_expenses', 0),
-                        'valor_com_icms_venda': item_data.get('sale_value_with_icms', 0),
-                        'percentual_icms_venda': item_data.get('sale_icms_percentage', 0.18),
-                        'percentual_ipi': item_data.get('ipi_percentage', 0.0),  # IPI percentage
-                        'dunamis_cost': item_data.get('dunamis_cost')
-                    }
-                    transformed_items.append(transformed_item)
-                
-                # Validate items using business rules
-                for item_data in transformed_items:
-                    errors = BusinessRulesCalculator.validate_item_data(item_data)
-                    if errors:
-                        raise ValueError(f"Dados inválidos: {'; '.join(errors)}")
+                # Validar todos os itens de uma vez (BudgetValidationError com todos os erros)
+                check_budget_items(calculator_input.items)
                 
                 # Remove existing items
                 for item in budget.items:
@@ -346,111 +233,46 @@ class BudgetService:
                 await db.flush()
                 
                 # Calculate totals using business rules calculator
-                soma_pesos_pedido = sum(item.get('peso_compra', 0) for item in transformed_items)
-                # Correção: somar outras despesas como R$/kg * peso_compra
-                outras_despesas_totais = sum(
-                    (item.get('outras_despesas_item', 0) or 0.0) * (item.get('peso_compra', 0) or 0.0)
-                    for item in transformed_items
-                )
-                
-                budget_result = BusinessRulesCalculator.calculate_complete_budget(
-                    transformed_items, outras_despesas_totais, soma_pesos_pedido,
-                    budget_dict.get('freight_value_total', 0.0)
-                )
+                budget_result = calculator_input.calculate(budget_dict.get('freight_value_total', 0.0))
                 
                 # Create new items with calculations from business rules
-                for i, item_data in enumerate(transformed_items):
-                    calculated_item = budget_result['items'][i]
-                    
-                    # DEBUG: Log delivery_time values
-                    print(f"🔍 DEBUG - Item {i}: delivery_time from item_data = {item_data.get('delivery_time')}")
-                    print(f"🔍 DEBUG - Item {i}: delivery_time from calculated_item = {calculated_item.get('delivery_time')}")
-                    
-                    # Ensure IPI values are properly calculated and set
-                    ipi_percentage = calculated_item.get('percentual_ipi', 0.0)
-                    sale_value_with_icms = calculated_item.get('valor_com_icms_venda', 0.0)
-                    sale_weight = calculated_item.get('peso_venda', 1.0)
-                    
-                    # Calculate IPI value explicitly to ensure it's correct
-                    ipi_value = BusinessRulesCalculator.calculate_total_ipi_item(
-                        sale_weight, sale_value_with_icms, ipi_percentage
-                    )
-                    
-                    # Use correct IPI field names from BusinessRulesCalculator
-                    total_value_with_ipi = calculated_item.get('total_final_com_ipi', 0.0)
-                    
-                    # Debug weight_difference_display
-                    weight_diff_display = calculated_item.get('weight_difference_display')
-                    logger.info(f"DEBUG - Item {item_data.get('description', 'N/A')}: weight_difference_display = {weight_diff_display}")
-                    
-                    budget_item = BudgetItem(
+                for item_data, calculated_item in zip(calculator_input.items, budget_result.items):
+                    # CORREÇÃO: Usar delivery_time do item_data original
+                    db.add(BudgetItem(
                         budget_id=budget.id,
-                        description=calculated_item['description'],
-                        delivery_time=item_data.get('delivery_time', '0'),  # CORREÇÃO: Usar delivery_time do item_data original
-                        weight=calculated_item['peso_compra'],
-                        purchase_value_with_icms=calculated_item['valor_com_icms_compra'],
-                        purchase_icms_percentage=calculated_item['percentual_icms_compra'],
-                        purchase_other_expenses=calculated_item['outras_despesas_item'],
-                        purchase_value_without_taxes=calculated_item['valor_sem_impostos_compra'],
-                        purchase_value_with_weight_diff=calculated_item['valor_corrigido_peso'],
-                        sale_weight=calculated_item['peso_venda'],
-                        sale_value_with_icms=calculated_item['valor_com_icms_venda'],
-                        sale_icms_percentage=calculated_item['percentual_icms_venda'],
-                        sale_value_without_taxes=calculated_item['valor_sem_impostos_venda'],
-                        weight_difference=calculated_item['diferenca_peso'],
-                        profitability=(calculated_item['rentabilidade_item'] or 0) * 100,  # Convert to percentage
-                        total_profitability=(calculated_item.get('rentabilidade_item_total') or 0) * 100,
-                        total_purchase=calculated_item['total_compra_item'],
-                        total_sale=calculated_item['total_venda_item'],
-                        unit_value=calculated_item['valor_unitario_venda'],
-                        total_value=calculated_item['total_venda_item'],
-                        commission_value=calculated_item['valor_comissao'],
-                        commission_percentage=calculated_item.get('percentual_comissao', 0.0),
-                        commission_percentage_actual=calculated_item.get('commission_percentage_actual', 0.0),
-                        # IPI fields - use values calculated by BusinessRulesCalculator
-                        ipi_percentage=ipi_percentage,
-                        ipi_value=calculated_item.get('valor_ipi_total', ipi_value),  # Use valor_ipi_total from calculator
-                        total_value_with_ipi=total_value_with_ipi,
-                        # Weight difference display
-                        weight_difference_display=safe_json_dumps(weight_diff_display) if weight_diff_display else None
-                    )
-                    db.add(budget_item)
+                        **calculated_item.budget_item_fields(item_data.get('delivery_time', '0'))
+                    ))
                 
                 # Update budget totals from business rules result
-                setattr(budget, 'total_purchase_value', budget_result['totals']['soma_total_compra'])
-                setattr(budget, 'total_sale_value', budget_result['totals']['soma_total_venda'])
-                setattr(budget, 'total_sale_with_icms', budget_result['totals']['soma_total_venda_com_icms'])
-                setattr(budget, 'total_commission', cast(float, sum(item['valor_comissao'] for item in budget_result['items'])))
-                setattr(budget, 'profitability_percentage', budget_result['totals'].get('markup_pedido_sem_impostos', budget_result['totals']['markup_pedido']))
-                # IPI totals - Fix the key names to match what's returned from BusinessRulesCalculator
-                setattr(budget, 'total_ipi_value', budget_result['totals'].get('total_ipi_orcamento', 0.0))
-                setattr(budget, 'total_final_value', budget_result['totals'].get('total_final_com_ipi', 0.0))
+                for field, value in budget_result.budget_fields().items():
+                    setattr(budget, field, value)
                 # Update freight fields
                 if 'freight_value_total' in budget_dict:
                     setattr(budget, 'freight_value_total', budget_dict['freight_value_total'])
-                setattr(budget, 'valor_frete_compra', budget_result['totals'].get('valor_frete_compra', 0.0))
             
             # CORREÇÃO: Garantir que o freight_type seja sempre definido corretamente
             # Se freight_type estiver nos dados de atualização, use-o
             # Caso contrário, mantenha o valor original
             if freight_type_value is not None:
                 budget.freight_type = freight_type_value
-                print(f"DEBUG: Final freight_type set to {budget.freight_type}")
+                logger.debug("Final freight_type set to %s", budget.freight_type)
             else:
                 # Garantir que o valor original seja mantido
                 budget.freight_type = original_freight_type
-                print(f"DEBUG: Preserving original freight_type: {original_freight_type}")
+                logger.debug("Preserving original freight_type: %s", original_freight_type)
             
             # Forçar a persistência imediata do freight_type
             await db.flush()
             
+            stage_budget_changes(db, budget, state_before)
             await db.commit()
+            outbox_relay.notify()
             await db.refresh(budget)
-            logger.info(f"Budget {budget_id} updated successfully")
+            logger.info("Budget %s updated successfully", budget_id)
             return budget
             
         except Exception as e:
-            logger.error(f"Error updating budget {budget_id}: {str(e)}")
+            logger.error("Error updating budget %s: %s", budget_id, e)
             raise
     
     @staticmethod
@@ -460,8 +282,10 @@ class BudgetService:
         if not budget:
             return False
         
+        stage_budget_deleted(db, budget)
         await db.delete(budget)
         await db.commit()
+        outbox_relay.notify()
         return True
     
     @staticmethod
@@ -471,188 +295,150 @@ class BudgetService:
         if not budget:
             return None
         
-        # Get items data in BusinessRulesCalculator format
-        items_data = []
-        for item in budget.items:
-            items_data.append({
-                'description': item.description,
-                'peso_compra': item.weight,
-                'valor_com_icms_compra': item.purchase_value_with_icms,
-                'percentual_icms_compra': item.purchase_icms_percentage,
-                'outras_despesas_item': item.purchase_other_expenses,
-                'peso_venda': item.sale_weight or item.weight,
-                'valor_com_icms_venda': item.sale_value_with_icms,
-                'percentual_icms_venda': item.sale_icms_percentage,
-                'percentual_ipi': item.ipi_percentage or 0.0  # IPI percentage
-            })
+        state_before = budget_state(budget)
         
-        # Recalculate using business rules
-        soma_pesos_pedido = sum(item.get('peso_compra', 0) for item in items_data)
-        # Correção: somar outras despesas do pedido como R$/kg * peso_compra
-        outras_despesas_totais = sum(
-            (item.get('outras_despesas_item', 0) or 0.0) * (item.get('peso_compra', 0) or 0.0)
-            for item in items_data
-        )
-        
-        budget_result = BusinessRulesCalculator.calculate_complete_budget(
-            items_data, outras_despesas_totais, soma_pesos_pedido,
-            budget.freight_value_total or 0.0
-        )
+        # Recalculate using business rules (itens lidos direto das linhas do banco)
+        budget_result = to_calculator_input(budget.items).calculate(budget.freight_value_total)
         
         # Update budget totals
-        setattr(budget, 'total_purchase_value', budget_result['totals']['soma_total_compra'])
-        setattr(budget, 'total_sale_value', budget_result['totals']['soma_total_venda'])
-        setattr(budget, 'total_sale_with_icms', budget_result['totals']['soma_total_venda_com_icms'])
-        setattr(budget, 'total_commission', cast(float, sum(item['valor_comissao'] for item in budget_result['items'])))
-        setattr(budget, 'profitability_percentage', budget_result['totals'].get('markup_pedido_sem_impostos', budget_result['totals']['markup_pedido']))
-        # IPI totals - Fix the key names to match what's returned from BusinessRulesCalculator
-        setattr(budget, 'total_ipi_value', budget_result['totals'].get('total_ipi_orcamento', 0.0))
-        setattr(budget, 'total_final_value', budget_result['totals'].get('total_final_com_ipi', 0.0))
-        # Update freight value per kg
-        setattr(budget, 'valor_frete_compra', budget_result['totals'].get('valor_frete_compra', 0.0))
+        for field, value in budget_result.budget_fields().items():
+            setattr(budget, field, value)
         
         # Recalculate each item
-        for i, item in enumerate(budget.items):
-            calculated_item = budget_result['items'][i]
-            
-            item.purchase_value_without_taxes = calculated_item['valor_sem_impostos_compra']
-            item.purchase_value_with_weight_diff = calculated_item['valor_corrigido_peso']
-            item.sale_value_without_taxes = calculated_item['valor_sem_impostos_venda']
-            item.weight_difference = calculated_item['diferenca_peso']
-            item.profitability = (calculated_item['rentabilidade_item'] or 0) * 100  # Convert to percentage
-            item.total_profitability = (calculated_item.get('rentabilidade_item_total') or 0) * 100
-            item.total_purchase = calculated_item['total_compra_item']
-            item.total_sale = calculated_item['total_venda_item']
-            item.unit_value = calculated_item['valor_unitario_venda']
-            item.total_value = calculated_item['total_venda_item']
-            item.commission_value = calculated_item['valor_comissao']
-            item.commission_percentage = calculated_item.get('percentual_comissao', 0.0)
-            item.commission_percentage_actual = calculated_item.get('commission_percentage_actual', 0.0)
-            # IPI fields - explicitly calculate to ensure correctness
-            ipi_percentage = calculated_item.get('percentual_ipi', 0.0)
-            sale_value_with_icms = calculated_item.get('valor_com_icms_venda', 0.0)
-            sale_weight = calculated_item.get('peso_venda', item.sale_weight or item.weight or 1.0)
-            
-            # Calculate IPI value explicitly to ensure it's correct
-            ipi_value = BusinessRulesCalculator.calculate_total_ipi_item(
-                sale_weight, sale_value_with_icms, ipi_percentage
-            )
-            
-            item.ipi_percentage = ipi_percentage
-            item.ipi_value = ipi_value
-            item.total_value_with_ipi = calculated_item.get('total_final_com_ipi', 0.0)
-            # Weight difference display
-            weight_diff_raw = calculated_item.get('weight_difference_display')
-            print(f"🔍 DEBUG - budget_service salvamento:")
-            print(f"🔍 DEBUG - weight_diff_raw: {weight_diff_raw}")
-            print(f"🔍 DEBUG - type(weight_diff_raw): {type(weight_diff_raw)}")
-            weight_diff_json = safe_json_dumps(weight_diff_raw) if weight_diff_raw else None
-            print(f"🔍 DEBUG - weight_diff_json: {weight_diff_json}")
-            print(f"🔍 DEBUG - type(weight_diff_json): {type(weight_diff_json)}")
-            item.weight_difference_display = weight_diff_json
+        for item, calculated_item in zip(budget.items, budget_result.items):
+            for field, value in calculated_item.budget_item_fields(item.delivery_time).items():
+                setattr(item, field, value)
         
+        stage_budget_changes(db, budget, state_before)
         await db.commit()
+        outbox_relay.notify()
         await db.refresh(budget)
         return budget
-    
+
     @staticmethod
-    def _calculate_weighted_commission_percentage(items: List[dict]) -> float:
-        """Calcula o percentual de comissão médio ponderado baseado nos itens do orçamento"""
-        total_sale_value = sum(item['total_venda_com_icms_item'] for item in items)
-        if total_sale_value > 0:
-            weighted_commission_percentage = sum(
-                item['commission_percentage_actual'] * item['total_venda_com_icms_item'] 
-                for item in items
-            ) / total_sale_value
-            return weighted_commission_percentage
-        return 0.0
+    async def recalculate_stale_budgets(
+        db: AsyncSession,
+        statuses: Sequence[BudgetStatus] = (BudgetStatus.DRAFT, BudgetStatus.PENDING),
+        limit: Optional[int] = None,
+    ) -> Dict[str, object]:
+        """
+        Recalcular orçamentos calculados com uma versão anterior das regras de preço
+
+        Apenas os status informados (padrão: rascunho e pendente); aprovados,
+        enviados e perdidos mantêm os valores combinados com o cliente. Cada
+        orçamento é gravado em sua própria transação: um orçamento que não
+        passa nas novas regras (ex.: IPI não mais aceito) é desfeito e listado
+        em `failed`, sem interromper os demais.
+        """
+        version = pricing_rules.current().version
+        query = (
+            select(Budget.id)
+            .where(
+                Budget.status.in_([BudgetStatus(s).value for s in statuses]),
+                or_(Budget.pricing_rules_version.is_(None), Budget.pricing_rules_version != version),
+            )
+            .order_by(Budget.id)
+        )
+        if limit is not None:
+            query = query.limit(limit)
+        budget_ids = (await db.execute(query)).scalars().all()
+
+        recalculated = 0
+        failed: List[int] = []
+        for budget_id in budget_ids:
+            try:
+                if await BudgetService.recalculate_budget(db, budget_id) is not None:
+                    recalculated += 1
+            except Exception:
+                await db.rollback()
+                failed.append(budget_id)
+                logger.exception("Could not recalculate budget %s with pricing rules version %s", budget_id, version)
+        logger.info(
+            "Recalculated %s budgets with pricing rules version %s (%s failed)", recalculated, version, len(failed)
+        )
+        return {"recalculated": recalculated, "failed": failed}
 
     @staticmethod
-    async def update_budget_simplified(db: AsyncSession, budget_id: int, budget_data: dict) -> Optional[Budget]:
+    async def update_budget_simplified(db: AsyncSession, budget_id: int, budget_data: BudgetSimplifiedCreate) -> Optional[Budget]:
         """Atualizar orçamento simplificado existente"""
         try:
-            logger.info(f"🔧 [SERVICE DEBUG] Starting update_budget_simplified for budget {budget_id}")
-            logger.info(f"🔧 [SERVICE DEBUG] Received data keys: {list(budget_data.keys())}")
+            # Campos do orçamento em dict; os itens seguem como schemas para o adaptador
+            budget_dict = budget_data.dict(exclude={'items'})
+            logger.debug("Starting update_budget_simplified for budget %s", budget_id)
+            logger.debug("Received data keys: %s", list(budget_dict.keys()))
             
             # Log critical budget fields
-            logger.info(f"🔧 [SERVICE DEBUG] Budget fields: client_name='{budget_data.get('client_name')}', "
-                       f"order_number='{budget_data.get('order_number')}', "
-                       f"freight_type='{budget_data.get('freight_type')}', "
-                       f"origem={budget_data.get('origem')}")
+            logger.debug(
+                "Budget fields: client_name='%s', order_number='%s', freight_type='%s', origem=%s",
+                budget_dict.get('client_name'),
+                budget_dict.get('order_number'),
+                budget_dict.get('freight_type'),
+                budget_dict.get('origem'),
+            )
             
             # Buscar orçamento existente
-            logger.debug(f"🔧 [SERVICE DEBUG] Fetching existing budget {budget_id}...")
+            logger.debug("Fetching existing budget %s...", budget_id)
             result = await db.execute(
                 select(Budget).options(selectinload(Budget.items)).where(Budget.id == budget_id)
             )
             budget = result.scalar_one_or_none()
             
             if not budget:
-                logger.error(f"🔧 [SERVICE DEBUG] Budget {budget_id} not found in database")
+                logger.error("Budget %s not found in database", budget_id)
                 return None
             
-            logger.info(f"🔧 [SERVICE DEBUG] Found existing budget: order_number={budget.order_number}, "
-                       f"client_name='{budget.client_name}', items_count={len(budget.items)}")
+            state_before = budget_state(budget)
+            
+            logger.debug(
+                "Found existing budget: order_number=%s, client_name='%s', items_count=%s",
+                budget.order_number,
+                budget.client_name,
+                len(budget.items),
+            )
             
             # Verificar se o número do pedido já existe (se fornecido e diferente do atual)
-            if 'order_number' in budget_data and budget_data['order_number'] != budget.order_number:
-                logger.debug(f"🔧 [SERVICE DEBUG] Checking order number uniqueness: {budget_data['order_number']}")
-                existing_budget = await BudgetService.get_budget_by_order_number(db, budget_data['order_number'])
+            if 'order_number' in budget_dict and budget_dict['order_number'] != budget.order_number:
+                logger.debug("Checking order number uniqueness: %s", budget_dict['order_number'])
+                existing_budget = await BudgetService.get_budget_by_order_number(db, budget_dict['order_number'])
                 if existing_budget and existing_budget.id != budget_id:
-                    logger.error(f"🔧 [SERVICE DEBUG] Order number conflict: {budget_data['order_number']} exists in budget {existing_budget.id}")
-                    raise ValueError(f"Número do pedido '{budget_data['order_number']}' já existe")
+                    logger.error(
+                        "Order number conflict: %s exists in budget %s",
+                        budget_dict['order_number'],
+                        existing_budget.id,
+                    )
+                    raise ValueError(f"Número do pedido '{budget_dict['order_number']}' já existe")
             
             # Preparar dados dos itens para cálculo
-            items_data = []
-            if 'items' in budget_data:
-                logger.info(f"🔧 [SERVICE DEBUG] Processing {len(budget_data['items'])} items...")
-                for i, item_data in enumerate(budget_data['items']):
-                    logger.debug(f"🔧 [SERVICE DEBUG] Item {i}: description='{item_data.get('description', 'N/A')}', "
-                                f"peso_compra={item_data.get('peso_compra', 'N/A')}, "
-                                f"valor_com_icms_compra={item_data.get('valor_com_icms_compra', 'N/A')}, "
-                                f"valor_com_icms_venda={item_data.get('valor_com_icms_venda', 'N/A')}, "
-                                f"percentual_ipi={item_data.get('percentual_ipi', 'N/A')}")
-                    
-                    processed_item = {
-                        'description': item_data.get('description', ''),
-                        'delivery_time': item_data.get('delivery_time', '0'),
-                        'peso_compra': item_data.get('peso_compra', 1.0),
-                        'peso_venda': item_data.get('peso_venda') or item_data.get('peso_compra', 1.0),
-                        'valor_com_icms_compra': item_data.get('valor_com_icms_compra', 0),
-                        'percentual_icms_compra': item_data.get('percentual_icms_compra', 0.18),
-                        'outras_despesas_item': item_data.get('outras_despesas_item', 0),
-                        'valor_com_icms_venda': item_data.get('valor_com_icms_venda', 0),
-                        'percentual_icms_venda': item_data.get('percentual_icms_venda', 0.18),
-                        'percentual_ipi': item_data.get('percentual_ipi', 0.0)
-                    }
-                    items_data.append(processed_item)
-                    logger.debug(f"🔧 [SERVICE DEBUG] Processed item {i}: {processed_item}")
+            logger.debug("Processing %s items...", len(budget_data.items))
+            calculator_input = to_calculator_input(budget_data.items)
+            items_data = calculator_input.items
+            check_budget_items(items_data)
             
             # Calcular valores usando BusinessRulesCalculator
             if items_data:
-                logger.info(f"🔧 [SERVICE DEBUG] Calculating budget with {len(items_data)} items...")
-                soma_pesos_pedido = sum(item.get('peso_compra', 0) for item in items_data)
-                # Correção: calcular outras despesas totais como R$/kg * peso_compra
-                outras_despesas_totais = sum(
-                    (item.get('outras_despesas_item', 0) or 0.0) * (item.get('peso_compra', 0) or 0.0)
-                    for item in items_data
+                logger.debug("Calculating budget with %s items...", len(items_data))
+                soma_pesos_pedido = calculator_input.soma_pesos_pedido
+                outras_despesas_totais = calculator_input.outras_despesas_totais
+                freight_value_total = budget_dict.get('freight_value_total') or 0.0
+                
+                logger.debug(
+                    "Calculation parameters: soma_pesos_pedido=%s, outras_despesas_totais=%s, freight_value_total=%s",
+                    soma_pesos_pedido,
+                    outras_despesas_totais,
+                    freight_value_total,
                 )
-                freight_value_total = budget_data.get('freight_value_total') or 0.0
                 
-                logger.debug(f"🔧 [SERVICE DEBUG] Calculation parameters: soma_pesos_pedido={soma_pesos_pedido}, "
-                            f"outras_despesas_totais={outras_despesas_totais}, freight_value_total={freight_value_total}")
+                budget_result = calculator_input.calculate(freight_value_total)
                 
-                budget_result = BusinessRulesCalculator.calculate_complete_budget(
-                    items_data, outras_despesas_totais, soma_pesos_pedido, freight_value_total
+                logger.debug(
+                    "Calculation completed. Totals: soma_total_compra=%s, soma_total_venda=%s, markup_pedido=%s",
+                    budget_result.totals.soma_total_compra,
+                    budget_result.totals.soma_total_venda,
+                    budget_result.totals.markup_pedido,
                 )
                 
-                logger.info(f"🔧 [SERVICE DEBUG] Calculation completed. Totals: "
-                           f"soma_total_compra={budget_result['totals']['soma_total_compra']}, "
-                           f"soma_total_venda={budget_result['totals']['soma_total_venda']}, "
-                           f"markup_pedido={budget_result['totals']['markup_pedido']}")
-                
                 # Atualizar campos do orçamento
-                logger.debug(f"🔧 [SERVICE DEBUG] Updating budget fields...")
+                logger.debug("Updating budget fields...")
                 original_values = {
                     'client_name': budget.client_name,
                     'freight_type': budget.freight_type,
@@ -660,136 +446,82 @@ class BudgetService:
                     'order_number': budget.order_number
                 }
                 
-                budget.client_name = budget_data.get('client_name', budget.client_name)
-                budget.status = budget_data.get('status', budget.status)
-                budget.expires_at = budget_data.get('expires_at', budget.expires_at)
-                budget.notes = budget_data.get('notes', budget.notes)
-                budget.origem = budget_data.get('origem', budget.origem)
+                budget.client_name = budget_dict.get('client_name', budget.client_name)
+                budget.status = budget_dict.get('status', budget.status)
+                budget.expires_at = budget_dict.get('expires_at', budget.expires_at)
+                budget.notes = budget_dict.get('notes', budget.notes)
+                budget.origem = budget_dict.get('origem', budget.origem)
                 budget.outras_despesas_totais = outras_despesas_totais
-                budget.freight_type = budget_data.get('freight_type', budget.freight_type)
-                budget.freight_value_total = budget_data.get('freight_value_total', budget.freight_value_total)
-                budget.payment_condition = budget_data.get('payment_condition', budget.payment_condition)
+                budget.freight_type = budget_dict.get('freight_type', budget.freight_type)
+                budget.freight_value_total = budget_dict.get('freight_value_total', budget.freight_value_total)
+                budget.payment_condition = budget_dict.get('payment_condition', budget.payment_condition)
                 
-                if 'order_number' in budget_data:
-                    budget.order_number = budget_data['order_number']
+                if 'order_number' in budget_dict:
+                    budget.order_number = budget_dict['order_number']
                 
-                logger.info(f"🔧 [SERVICE DEBUG] Field updates: "
-                           f"client_name: '{original_values['client_name']}' -> '{budget.client_name}', "
-                           f"freight_type: '{original_values['freight_type']}' -> '{budget.freight_type}', "
-                           f"origem: {original_values['origem']} -> {budget.origem}, "
-                           f"order_number: '{original_values['order_number']}' -> '{budget.order_number}'")
-                
-                # Atualizar totais calculados
-                budget.total_purchase_value = budget_result['totals']['soma_total_compra']
-                budget.total_sale_value = budget_result['totals']['soma_total_venda']
-                budget.total_sale_with_icms = budget_result['totals']['soma_total_venda_com_icms']
-                budget.total_commission = cast(float, sum(item['valor_comissao'] for item in budget_result['items']))
-                
-                # Calcular commission_percentage_actual médio ponderado
-                budget.commission_percentage_actual = BudgetService._calculate_weighted_commission_percentage(budget_result['items'])
+                logger.debug(
+                    "Field updates: client_name: '%s' -> '%s', freight_type: '%s' -> '%s', origem: %s -> %s, order_number: '%s' -> '%s'",
+                    original_values['client_name'],
+                    budget.client_name,
+                    original_values['freight_type'],
+                    budget.freight_type,
+                    original_values['origem'],
+                    budget.origem,
+                    original_values['order_number'],
+                    budget.order_number,
+                )
                 
-                budget.profitability_percentage = budget_result['totals'].get('markup_pedido_sem_impostos', budget_result['totals']['markup_pedido'])
-                budget.total_ipi_value = budget_result['totals'].get('total_ipi_orcamento', 0.0)
-                budget.total_final_value = budget_result['totals'].get('total_final_com_ipi', 0.0)
-                budget.valor_frete_compra = budget_result['totals'].get('valor_frete_compra', 0.0)
-                budget.total_weight_difference_percentage = budget_result['totals'].get('total_weight_difference_percentage', 0.0)
+                # Atualizar totais calculados (inclui comissão média ponderada)
+                for field, value in budget_result.budget_fields().items():
+                    setattr(budget, field, value)
                 
-                logger.debug(f"🔧 [SERVICE DEBUG] Updated calculated totals: "
-                            f"total_purchase_value={budget.total_purchase_value}, "
-                            f"total_sale_value={budget.total_sale_value}, "
-                            f"profitability_percentage={budget.profitability_percentage}")
+                logger.debug(
+                    "Updated calculated totals: total_purchase_value=%s, total_sale_value=%s, profitability_percentage=%s",
+                    budget.total_purchase_value,
+                    budget.total_sale_value,
+                    budget.profitability_percentage,
+                )
                 
                 # Remover itens existentes
-                logger.debug(f"🔧 [SERVICE DEBUG] Removing {len(budget.items)} existing items...")
+                logger.debug("Removing %s existing items...", len(budget.items))
                 for item in budget.items:
                     await db.delete(item)
                 
                 # Criar novos itens
-                logger.debug(f"🔧 [SERVICE DEBUG] Creating {len(budget_data['items'])} new items...")
-                for i, item_data in enumerate(budget_data['items']):
-                    calculated_item = budget_result['items'][i]
-                    
-                    # Calcular valores IPI
-                    ipi_percentage = calculated_item.get('percentual_ipi', 0.0)
-                    sale_value_with_icms = calculated_item.get('valor_com_icms_venda', 0.0)
-                    sale_weight = calculated_item.get('peso_venda', item_data.get('peso_venda', item_data.get('peso_compra', 1.0)))
-                    
-                    ipi_value = BusinessRulesCalculator.calculate_total_ipi_item(
-                        sale_weight, sale_value_with_icms, ipi_percentage
+                logger.debug("Creating %s new items...", len(items_data))
+                for i, (item_data, calculated_item) in enumerate(zip(items_data, budget_result.items)):
+                    logger.debug(
+                        "Creating item %s: description='%s', peso_compra=%s, ipi_percentage=%s, ipi_value=%s",
+                        i,
+                        calculated_item.description,
+                        calculated_item.peso_compra,
+                        calculated_item.percentual_ipi,
+                        calculated_item.valor_ipi_total,
                     )
-                    
-                    total_value_with_ipi = calculated_item.get('total_final_com_ipi', 0.0)
-                    
-                    logger.debug(f"🔧 [SERVICE DEBUG] Creating item {i}: description='{item_data.get('description', '')}', "
-                                f"peso_compra={item_data.get('peso_compra', 1.0)}, "
-                                f"ipi_percentage={ipi_percentage}, ipi_value={ipi_value}")
-                    
-                    budget_item = BudgetItem(
+                    db.add(BudgetItem(
                         budget_id=budget.id,
-                        description=item_data.get('description', ''),
-                        delivery_time=item_data.get('delivery_time', '0'),
-                        weight=item_data.get('peso_compra', 1.0),
-                        purchase_value_with_icms=item_data.get('valor_com_icms_compra', 0),
-                        purchase_icms_percentage=item_data.get('percentual_icms_compra', 0.18),
-                        purchase_other_expenses=item_data.get('outras_despesas_item', 0),
-                        purchase_value_without_taxes=calculated_item.get('valor_sem_impostos_compra', 0),
-                        purchase_value_with_weight_diff=calculated_item.get('valor_corrigido_peso', 0),
-                        sale_weight=item_data.get('peso_venda') or item_data.get('peso_compra', 1.0),
-                        sale_value_with_icms=item_data.get('valor_com_icms_venda', 0),
-                        sale_icms_percentage=item_data.get('percentual_icms_venda', 0.18),
-                        sale_value_without_taxes=calculated_item.get('valor_sem_impostos_venda', 0),
-                        weight_difference=calculated_item.get('diferenca_peso', 0),
-                        profitability=(calculated_item.get('rentabilidade_item') or 0) * 100,
-                        total_profitability=(calculated_item.get('rentabilidade_item_total') or 0) * 100,
-                        total_purchase=calculated_item.get('total_compra_item', 0),
-                        total_sale=calculated_item.get('total_venda_item', 0),
-                        unit_value=calculated_item.get('valor_unitario_venda', 0),
-                        total_value=calculated_item.get('total_venda_item', 0),
-                        commission_value=calculated_item.get('valor_comissao', 0),
-                        commission_percentage=calculated_item.get('percentual_comissao', 0.0),
-                        commission_percentage_actual=calculated_item.get('commission_percentage_actual', 0.0),
-                        ipi_percentage=ipi_percentage,
-                        ipi_value=ipi_value,
-                        total_value_with_ipi=total_value_with_ipi,
-                        # Weight difference display
-                        weight_difference_display=safe_json_dumps(calculated_item.get('weight_difference_display')) if calculated_item.get('weight_difference_display') else None
-                    )
-                    db.add(budget_item)
+                        **calculated_item.budget_item_fields(item_data['delivery_time'])
+                    ))
             
-            logger.debug(f"🔧 [SERVICE DEBUG] Committing changes to database...")
+            logger.debug("Committing changes to database...")
+            stage_budget_changes(db, budget, state_before)
             await db.commit()
+            outbox_relay.notify()
             await db.refresh(budget)
             
-            logger.info(f"🔧 [SERVICE DEBUG] Budget {budget_id} updated successfully")
-            logger.info(f"🔧 [SERVICE DEBUG] Final budget state: order_number={budget.order_number}, "
-                       f"client_name='{budget.client_name}', items_count={len(budget.items)}, "
-                       f"total_sale_value={budget.total_sale_value}")
+            logger.info("Budget %s updated successfully", budget_id)
+            logger.debug(
+                "Final budget state: order_number=%s, client_name='%s', items_count=%s, total_sale_value=%s",
+                budget.order_number,
+                budget.client_name,
+                len(budget.items),
+                budget.total_sale_value,
+            )
             
             return budget
             
         except Exception as e:
-            logger.error(f"🔧 [SERVICE DEBUG] Error updating simplified budget {budget_id}: {str(e)}", exc_info=True)
+            logger.error("Error updating simplified budget %s: %s", budget_id, e, exc_info=True)
             raise
     
     # Removida função de aplicação de markup; o sistema não utiliza mais ajuste por markup
-            item.profitability = (calculated_item['rentabilidade_item'] or 0) * 100  # Convert to percentage
-            item.commission_value = calculated_item['valor_comissao']
-            item.commission_percentage = calculated_item.get('percentual_comissao', 0.0)
-            item.commission_percentage_actual = calculated_item.get('commission_percentage_actual', 0.0)
-            # IPI fields - explicitly calculate to ensure correctness
-            ipi_percentage = calculated_item.get('percentual_ipi', 0.0)
-            sale_value_with_icms = calculated_item.get('valor_com_icms_venda', 0.0)
-            sale_weight = calculated_item.get('peso_venda', item.sale_weight or item.weight or 1.0)
-            
-            # Calculate IPI value explicitly to ensure it's correct
-            ipi_value = BusinessRulesCalculator.calculate_total_ipi_item(
-                sale_weight, sale_value_with_icms, ipi_percentage
-            )
-            
-            item.ipi_percentage = ipi_percentage
-            item.ipi_value = ipi_value
-            item.total_value_with_ipi = calculated_item.get('total_final_com_ipi', 0.0)
-        
-        await db.commit()
-        await db.refresh(budget)
-        return budget
@@ -0,0 +1,131 @@
+"""
+Validação dos itens de um orçamento em uma única passada
+
+Recebe os itens já no formato da calculadora (`to_calculator_input`) e
+confere cada regra sobre a coluna inteira (todos os valores de um campo de
+uma vez), em vez de item a item. Nenhuma regra para no primeiro erro: o
+resultado traz todos os erros, cada um com o índice do item e o campo, para
+que importações grandes sejam corrigidas de uma vez.
+
+Os schemas pydantic cuidam de tipo e formato de cada campo; aqui ficam as
+regras de negócio aplicadas antes do cálculo, com o IPI conferido contra as
+regras de preço vigentes. Os itens não são alterados.
+"""
+from dataclasses import dataclass
+from operator import itemgetter
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from app.services.pricing_rules import PricingRules, pricing_rules
+
+
+@dataclass(frozen=True, slots=True)
+class ItemError:
+    """Erro de validação; `index` None indica erro do orçamento como um todo"""
+
+    index: Optional[int]
+    field: Optional[str]
+    message: str
+
+    def __str__(self) -> str:
+        return self.message if self.index is None else f"Item {self.index + 1}: {self.message}"
+
+    def as_detail(self) -> Dict[str, Any]:
+        """Formato dos erros de validação do FastAPI (`loc`/`msg`/`type`)"""
+        loc: List[Any] = ["body", "items"]
+        if self.index is not None:
+            loc.append(self.index)
+            if self.field:
+                loc.append(self.field)
+        return {"loc": loc, "msg": str(self), "type": "value_error"}
+
+
+class BudgetValidationError(ValueError):
+    """Itens inválidos; `errors` traz todos os erros encontrados"""
+
+    def __init__(self, errors: List[ItemError]):
+        self.errors = errors
+        super().__init__(f"Dados inválidos: {'; '.join(map(str, errors))}")
+
+    @property
+    def detail(self) -> List[Dict[str, Any]]:
+        return [error.as_detail() for error in self.errors]
+
+
+def _positive(value: Any) -> bool:
+    return value is not None and value > 0  # NaN também é rejeitado
+
+
+def _fraction(value: Any) -> bool:
+    return value is not None and 0 <= value <= 1
+
+
+# (campo, regra, mensagem) conferidos coluna a coluna, na ordem das mensagens de cada item
+_COLUMN_RULES: Sequence[tuple] = (
+    ('description', bool, "Descrição é obrigatória"),
+    ('valor_com_icms_compra', _positive, "Valor de compra deve ser maior que zero"),
+    ('valor_com_icms_venda', _positive, "Valor de venda deve ser maior que zero"),
+    ('peso_compra', _positive, "Peso de compra deve ser maior que zero"),
+    ('percentual_icms_compra', _fraction, "Percentual de ICMS compra deve estar entre 0 e 1 (formato decimal)"),
+    ('percentual_icms_venda', _fraction, "Percentual de ICMS venda deve estar entre 0 e 1 (formato decimal)"),
+)
+_FIELDS = tuple(field for field, _, _ in _COLUMN_RULES) + ('percentual_ipi',)
+_ROW = itemgetter(*_FIELDS)
+
+
+def _failures(column: Sequence[Any], rule: Callable[[Any], bool]) -> List[int]:
+    return [index for index, value in enumerate(column) if not rule(value)]
+
+
+def validate_budget_items(
+    items: Sequence[Dict[str, Any]],
+    sale_above_purchase: bool = False,
+    rules: Optional[PricingRules] = None,
+) -> List[ItemError]:
+    """
+    Todos os erros dos itens, ordenados por item
+
+    Args:
+        items: itens no formato da calculadora
+        sale_above_purchase: exigir valor de venda c/ICMS >= valor de compra c/ICMS
+        rules: regras de preço (padrão: as vigentes)
+    """
+    if not items:
+        return [ItemError(None, None, "Orçamento deve ter pelo menos um item")]
+
+    rules = rules or pricing_rules.current()
+    columns = dict(zip(_FIELDS, zip(*(_ROW(item) for item in items))))
+
+    errors: List[ItemError] = []
+    for field, rule, message in _COLUMN_RULES:
+        errors.extend(ItemError(index, field, message) for index in _failures(columns[field], rule))
+
+    ipi_message = f"Percentual de IPI deve ser {rules.ipi_description()}"
+    errors.extend(
+        ItemError(index, 'percentual_ipi', ipi_message)
+        for index in _failures(columns['percentual_ipi'], rules.accepts_ipi)
+    )
+
+    if sale_above_purchase:
+        errors.extend(
+            ItemError(index, 'valor_com_icms_venda', "Valor de venda deve ser maior que o valor de compra")
+            for index, (compra, venda) in enumerate(zip(columns['valor_com_icms_compra'], columns['valor_com_icms_venda']))
+            if _positive(compra) and _positive(venda) and venda < compra
+        )
+
+    # Ordenação estável: por item, mantendo a ordem das regras dentro de cada item
+    errors.sort(key=lambda error: error.index)
+    return errors
+
+
+def check_budget_items(
+    items: Sequence[Dict[str, Any]],
+    sale_above_purchase: bool = False,
+    rules: Optional[PricingRules] = None,
+) -> None:
+    """
+    Raises:
+        BudgetValidationError: com todos os erros, se houver algum
+    """
+    errors = validate_budget_items(items, sale_above_purchase, rules)
+    if errors:
+        raise BudgetValidationError(errors)
@@ -2,13 +2,39 @@
 Calculadora de Regras de Negócio para Orçamentos
 Implementação completa baseada no documento REGRAS_NEGOCIO_ORCAMENTOS_SISTEMA.md
 """
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import logging
-from decimal import Decimal, ROUND_HALF_UP
+import time
+from app.core.metrics import REGISTRY
+from app.core.tracing import traced
+from app.services.calculated_budget import CalculatedBudget, CalculatedItem, CalculatedTotals
 from app.services.commission_service import CommissionService
+from app.services.pricing_rules import PricingRules, pricing_rules
+from app.utils.money import CENTS, MICRO, MICROS, div_half_up, from_units, relative_change, rescale, to_units
 
 logger = logging.getLogger(__name__)
 
+# Itens/segundo: rate(budget_calculation_items_total) / rate(budget_calculation_seconds_sum)
+CALCULATION_SECONDS = REGISTRY.histogram(
+    "budget_calculation_seconds", "Duração de calculate_complete_budget",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+CALCULATION_ITEMS = REGISTRY.counter(
+    "budget_calculation_items_total", "Itens calculados por calculate_complete_budget"
+)
+
+# Aritmética em inteiros de app.utils.money: entradas em micro-unidades (6 casas),
+# uma única divisão HALF_UP por regra até a escala do resultado
+_MICROS_PER_CENT = 10 ** (MICROS - CENTS)
+
+
+def _product(*factors: int) -> float:
+    """Produto de valores em micro-unidades, arredondado para 6 casas"""
+    total = 1
+    for factor in factors:
+        total *= factor
+    return from_units(rescale(total, MICROS * len(factors), MICROS))
+
 class BusinessRulesCalculator:
     @staticmethod
     def calculate_freight_value_per_kg(valor_frete_total: float, peso_total: float) -> float:
@@ -31,11 +57,8 @@ class BusinessRulesCalculator:
         if peso_total <= 0:
             raise ValueError("Peso total deve ser maior que zero para calcular valor frete por kg")
         
-        valor_frete_dec = BusinessRulesCalculator._to_decimal(valor_frete_total)
-        peso_total_dec = BusinessRulesCalculator._to_decimal(peso_total)
-        
-        valor_frete_por_kg = valor_frete_dec / peso_total_dec
-        return float(valor_frete_por_kg.quantize(Decimal('0.000001'), rounding=ROUND_HALF_UP))
+        valor_frete = to_units(valor_frete_total)
+        return from_units(div_half_up(valor_frete * MICRO, to_units(peso_total)))
 
     @staticmethod
     def calculate_purchase_value_with_weight_correction(valor_sem_impostos_compra: float, peso_compra: float, peso_venda: float) -> float:
@@ -51,34 +74,38 @@ class BusinessRulesCalculator:
         Returns:
             float: Valor corrigido por peso
         """
-        valor_compra_dec = BusinessRulesCalculator._to_decimal(valor_sem_impostos_compra)
-        peso_compra_dec = BusinessRulesCalculator._to_decimal(peso_compra)
-        peso_venda_dec = BusinessRulesCalculator._to_decimal(peso_venda)
-        
-        if peso_venda_dec == 0:
+        peso_venda_units = to_units(peso_venda)
+        if peso_venda_units == 0:
             return 0.0
-            
-        valor_corrigido = valor_compra_dec * (peso_compra_dec / peso_venda_dec)
-        return float(valor_corrigido.quantize(Decimal('0.000001'), rounding=ROUND_HALF_UP))
+
+        valor_corrigido = to_units(valor_sem_impostos_compra) * to_units(peso_compra)
+        return from_units(div_half_up(valor_corrigido, peso_venda_units))
     """
     Implementa todas as fórmulas e regras de negócio para cálculo de orçamentos
     Seguindo exatamente as especificações do documento de regras
     """
     
-    # Constantes do sistema conforme documento
-    PIS_COFINS_PERCENTAGE = Decimal('0.0925')  # 9.25% fixo
-    ICMS_DEFAULT_PERCENTAGE = Decimal('0.18')  # 18% padrão
-    
-    # Constantes IPI (Imposto sobre Produtos Industrializados)
-    IPI_VALID_PERCENTAGES = [Decimal('0.0'), Decimal('0.0325'), Decimal('0.05')]  # 0%, 3.25%, 5%
-    
+    # PIS/COFINS, percentuais de IPI aceitos e ICMS padrão vêm das regras de preço
+    # versionadas (app.services.pricing_rules); `rules=None` usa a versão corrente
+
     @staticmethod
-    def _to_decimal(value: Any) -> Decimal:
-        """Converte valor para Decimal para cálculos precisos"""
-        if value is None or value == "":
-            return Decimal('0')
-        return Decimal(str(value))
-    
+    def _ipi_units(percentual_ipi: Any, rules: Optional[PricingRules] = None) -> int:
+        """Percentual de IPI em micro-unidades, validado contra os percentuais aceitos"""
+        rules = rules or pricing_rules.current()
+        percentual_ipi_units = to_units(percentual_ipi)
+        if percentual_ipi_units not in rules.ipi_valid_units:
+            raise ValueError(f"Percentual de IPI inválido: {percentual_ipi}. Valores aceitos: {rules.ipi_description()}")
+        return percentual_ipi_units
+
+    @staticmethod
+    def _without_taxes_units(valor_com_icms: Any, percentual_icms: Any, rules: Optional[PricingRules] = None) -> int:
+        """valor_com_icms * (1 - ICMS) * (1 - PIS/COFINS), exato, em 18 casas"""
+        return (
+            to_units(valor_com_icms)
+            * (MICRO - to_units(percentual_icms))
+            * (MICRO - (rules or pricing_rules.current()).pis_cofins_units)
+        )
+
     @staticmethod
     def calculate_distributed_other_expenses(peso_item: float, soma_pesos_pedido: float, outras_despesas_totais: float) -> float:
         """
@@ -86,55 +113,43 @@ class BusinessRulesCalculator:
         Formula Excel: IF(B7="",0,F27/SUM(B7:B26))
         Formula Sistema: IF peso_item = 0 THEN 0 ELSE outras_despesas_totais / soma_pesos_todos_itens_pedido
         """
-        peso_item_dec = BusinessRulesCalculator._to_decimal(peso_item)
-        soma_pesos_dec = BusinessRulesCalculator._to_decimal(soma_pesos_pedido)
-        outras_despesas_dec = BusinessRulesCalculator._to_decimal(outras_despesas_totais)
-        
-        if peso_item_dec == 0 or soma_pesos_dec == 0:
+        peso_item_units = to_units(peso_item)
+        soma_pesos_units = to_units(soma_pesos_pedido)
+
+        if peso_item_units == 0 or soma_pesos_units == 0:
             return 0.0
-        
-        distribuicao = outras_despesas_dec * (peso_item_dec / soma_pesos_dec)
-        return float(distribuicao.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP))
+
+        distribuicao = to_units(outras_despesas_totais) * peso_item_units
+        return from_units(div_half_up(distribuicao, soma_pesos_units * _MICROS_PER_CENT), CENTS)
     
     @staticmethod
-    def calculate_purchase_value_without_taxes(valor_com_icms: float, percentual_icms: float, outras_despesas_distribuidas: float = 0.0) -> float:
+    def calculate_purchase_value_without_taxes(valor_com_icms: float, percentual_icms: float, outras_despesas_distribuidas: float = 0.0, rules: Optional[PricingRules] = None) -> float:
         """
         REGRA 3.2.2: Cálculo do Valor sem Impostos (Compra)
         Formula Excel: C7*(1-D7)*(1-9.25%)+E7
         Formula Sistema: valor_com_icms * (1 - percentual_icms) * (1 - 0.0925) + outras_despesas_distribuidas
         """
-        valor_com_icms_dec = BusinessRulesCalculator._to_decimal(valor_com_icms)
-        # Convert decimal format (0.18) to actual percentage calculation
-        percentual_icms_dec = BusinessRulesCalculator._to_decimal(percentual_icms)
-        outras_despesas_dec = BusinessRulesCalculator._to_decimal(outras_despesas_distribuidas)
-        
         # Aplicar descontos sequenciais: primeiro ICMS, depois PIS/COFINS
         # Note: percentual_icms is already in decimal format (0.18 for 18%)
-        valor_sem_icms = valor_com_icms_dec * (Decimal('1') - percentual_icms_dec)
-        valor_sem_impostos = valor_sem_icms * (Decimal('1') - BusinessRulesCalculator.PIS_COFINS_PERCENTAGE)
-        
-        # Somar outras despesas distribuídas
-        resultado = valor_sem_impostos + outras_despesas_dec
-        
-        return float(resultado.quantize(Decimal('0.000001'), rounding=ROUND_HALF_UP))
+        valor_sem_impostos = BusinessRulesCalculator._without_taxes_units(valor_com_icms, percentual_icms, rules)
+
+        # Somar outras despesas distribuídas (levadas para a mesma escala de 18 casas)
+        resultado = valor_sem_impostos + to_units(outras_despesas_distribuidas) * MICRO * MICRO
+
+        return from_units(rescale(resultado, 3 * MICROS, MICROS))
     
     @staticmethod
-    def calculate_sale_value_without_taxes(valor_com_icms: float, percentual_icms: float) -> float:
+    def calculate_sale_value_without_taxes(valor_com_icms: float, percentual_icms: float, rules: Optional[PricingRules] = None) -> float:
         """
         REGRA 4.2.1: Cálculo do Valor sem Impostos (Venda)
         Formula Excel: I7*(1-J7)*(1-9.25%)
         Formula Sistema: valor_com_icms * (1 - percentual_icms) * (1 - 0.0925)
         """
-        valor_com_icms_dec = BusinessRulesCalculator._to_decimal(valor_com_icms)
-        # Convert decimal format (0.18) to actual percentage calculation
-        percentual_icms_dec = BusinessRulesCalculator._to_decimal(percentual_icms)
-        
         # Aplicar descontos sequenciais
         # Note: percentual_icms is already in decimal format (0.18 for 18%)
-        valor_sem_icms = valor_com_icms_dec * (Decimal('1') - percentual_icms_dec)
-        valor_sem_impostos = valor_sem_icms * (Decimal('1') - BusinessRulesCalculator.PIS_COFINS_PERCENTAGE)
-        
-        return float(valor_sem_impostos.quantize(Decimal('0.000001'), rounding=ROUND_HALF_UP))
+        valor_sem_impostos = BusinessRulesCalculator._without_taxes_units(valor_com_icms, percentual_icms, rules)
+
+        return from_units(rescale(valor_sem_impostos, 3 * MICROS, MICROS))
     
     @staticmethod
     def calculate_total_weight_difference_percentage(total_sale_weight: float, total_purchase_weight: float) -> float:
@@ -163,13 +178,13 @@ class BusinessRulesCalculator:
         if total_purchase_weight == 0:
             return 0.0  # Retorna 0% se peso de compra for zero para evitar divisão por zero
         
-        total_sale_dec = BusinessRulesCalculator._to_decimal(total_sale_weight)
-        total_purchase_dec = BusinessRulesCalculator._to_decimal(total_purchase_weight)
+        total_sale_units = to_units(total_sale_weight)
+        total_purchase_units = to_units(total_purchase_weight)
         
-        # Fórmula correta: ((peso_venda - peso_compra) / peso_compra) * 100
-        difference = total_sale_dec - total_purchase_dec
-        percentage = (difference / total_purchase_dec) * 100
-        return float(percentage.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP))
+        # Fórmula correta: ((peso_venda - peso_compra) / peso_compra) * 100, em centésimos de %
+        difference = total_sale_units - total_purchase_units
+        percentage = div_half_up(difference * 100 * 10 ** CENTS, total_purchase_units)
+        return from_units(percentage, CENTS)
 
     @staticmethod
     def calculate_weight_difference(peso_venda: float, peso_compra: float) -> float:
@@ -201,11 +216,11 @@ class BusinessRulesCalculator:
             - percentage_difference (float): Diferença em porcentagem
             - formatted_display (str): String formatada para exibição
         """
-        peso_venda_dec = BusinessRulesCalculator._to_decimal(peso_venda)
-        peso_compra_dec = BusinessRulesCalculator._to_decimal(peso_compra)
+        peso_venda_units = to_units(peso_venda)
+        peso_compra_units = to_units(peso_compra)
         
         # Verifica se há diferença
-        has_difference = peso_venda_dec != peso_compra_dec
+        has_difference = peso_venda_units != peso_compra_units
         
         if not has_difference:
             return {
@@ -216,20 +231,21 @@ class BusinessRulesCalculator:
             }
         
         # Calcula diferença absoluta
-        absolute_difference = abs(peso_venda_dec - peso_compra_dec)
+        absolute_difference_units = abs(peso_venda_units - peso_compra_units)
+        absolute_difference = from_units(absolute_difference_units)
         
         # Calcula porcentagem da diferença (se peso_compra for zero, não calcula porcentagem)
-        if peso_compra_dec == 0:
+        if peso_compra_units == 0:
             percentage_difference = 0.0
-            formatted_display = f"{float(absolute_difference):.2f}"
+            formatted_display = f"{absolute_difference:.2f}"
         else:
-            percentage_difference = (absolute_difference / peso_compra_dec) * 100
-            formatted_display = f"{float(percentage_difference):.1f}%"
+            percentage_difference = absolute_difference_units * 100 / peso_compra_units
+            formatted_display = f"{percentage_difference:.1f}%"
 
         return {
             'has_difference': True,
-            'absolute_difference': float(absolute_difference),
-            'percentage_difference': float(percentage_difference),
+            'absolute_difference': absolute_difference,
+            'percentage_difference': percentage_difference,
             'formatted_display': formatted_display
         }
 
@@ -239,14 +255,12 @@ class BusinessRulesCalculator:
         REGRA 4.2.3: Valor Unitário de Venda
         Formula Sistema: IF peso_venda = 0 THEN 0 ELSE valor_sem_impostos_venda / peso_venda
         """
-        valor_sem_impostos_dec = BusinessRulesCalculator._to_decimal(valor_sem_impostos_venda)
-        peso_venda_dec = BusinessRulesCalculator._to_decimal(peso_venda)
+        peso_venda_units = to_units(peso_venda)
         
-        if peso_venda_dec == 0:
+        if peso_venda_units == 0:
             return 0.0
         
-        valor_unitario = valor_sem_impostos_dec / peso_venda_dec
-        return float(valor_unitario.quantize(Decimal('0.000001'), rounding=ROUND_HALF_UP))
+        return from_units(div_half_up(to_units(valor_sem_impostos_venda) * MICRO, peso_venda_units))
     
     @staticmethod
     def calculate_item_profitability(valor_venda: float, valor_compra: float) -> float:
@@ -261,15 +275,13 @@ class BusinessRulesCalculator:
         IMPORTANTE: Retorna valor em decimal (ex: 0.3077 = 30.77%), 
         sem arredondamento prematuro para manter precisão nos cálculos subsequentes.
         """
-        valor_venda_dec = BusinessRulesCalculator._to_decimal(valor_venda)
-        valor_compra_dec = BusinessRulesCalculator._to_decimal(valor_compra)
+        valor_compra_units = to_units(valor_compra)
         
-        if valor_compra_dec == 0:
+        if valor_compra_units == 0:
             return 0.0
         
-        rentabilidade = (valor_venda_dec / valor_compra_dec) - Decimal('1')
         # Manter alta precisão para cálculos subsequentes - arredondamento apenas na exibição
-        return float(rentabilidade)
+        return relative_change(to_units(valor_venda), valor_compra_units)
     
     @staticmethod
     def calculate_budget_markup(soma_total_venda_pedido: float, soma_total_compra_pedido: float) -> float:
@@ -281,15 +293,13 @@ class BusinessRulesCalculator:
         IMPORTANTE: Retorna valor em decimal (ex: 0.3077 = 30.77%), 
         sem arredondamento prematuro para manter precisão nos cálculos subsequentes.
         """
-        soma_venda_dec = BusinessRulesCalculator._to_decimal(soma_total_venda_pedido)
-        soma_compra_dec = BusinessRulesCalculator._to_decimal(soma_total_compra_pedido)
+        soma_compra_units = to_units(soma_total_compra_pedido)
         
-        if soma_compra_dec == 0:
+        if soma_compra_units == 0:
             return 0.0
         
-        markup = (soma_venda_dec / soma_compra_dec) - Decimal('1')
         # Manter alta precisão para cálculos subsequentes - arredondamento apenas na exibição
-        return float(markup)
+        return relative_change(to_units(soma_total_venda_pedido), soma_compra_units)
     
     @staticmethod
     def calculate_total_purchase_item(peso_compra: float, valor_sem_impostos_compra: float) -> float:
@@ -297,10 +307,7 @@ class BusinessRulesCalculator:
         REGRA 5.2.2: Total Compra do Item
         Formula Sistema: peso_compra * valor_sem_impostos_compra
         """
-        peso_compra_dec = BusinessRulesCalculator._to_decimal(peso_compra)
-        valor_compra_dec = BusinessRulesCalculator._to_decimal(valor_sem_impostos_compra)
-        total_compra = peso_compra_dec * valor_compra_dec
-        return float(total_compra.quantize(Decimal('0.000001'), rounding=ROUND_HALF_UP))
+        return _product(to_units(peso_compra), to_units(valor_sem_impostos_compra))
     
     @staticmethod
     def calculate_total_sale_item_with_icms(peso_venda: float, valor_com_icms_venda: float) -> float:
@@ -313,13 +320,10 @@ class BusinessRulesCalculator:
         - Base para cálculo de comissões
         - Reflete o faturamento real da empresa
         """
-        peso_venda_dec = BusinessRulesCalculator._to_decimal(peso_venda)
-        valor_venda_dec = BusinessRulesCalculator._to_decimal(valor_com_icms_venda)
-        total_venda = peso_venda_dec * valor_venda_dec
-        return float(total_venda.quantize(Decimal('0.000001'), rounding=ROUND_HALF_UP))
+        return _product(to_units(peso_venda), to_units(valor_com_icms_venda))
     
     @staticmethod
-    def calculate_ipi_value(valor_com_icms: float, percentual_ipi: float) -> float:
+    def calculate_ipi_value(valor_com_icms: float, percentual_ipi: float, rules: Optional[PricingRules] = None) -> float:
         """
         REGRA IPI.1: Cálculo do Valor do IPI
         Fórmula Sistema: valor_com_icms * percentual_ipi
@@ -334,18 +338,14 @@ class BusinessRulesCalculator:
         Returns:
             float: Valor do IPI calculado
         """
-        valor_base_dec = BusinessRulesCalculator._to_decimal(valor_com_icms)
-        percentual_ipi_dec = BusinessRulesCalculator._to_decimal(percentual_ipi)
-        
         # Validar se o percentual é um dos valores válidos
-        if percentual_ipi_dec not in BusinessRulesCalculator.IPI_VALID_PERCENTAGES:
-            raise ValueError(f"Percentual de IPI inválido: {percentual_ipi}. Valores aceitos: 0%, 3.25%, 5%")
+        percentual_ipi_units = BusinessRulesCalculator._ipi_units(percentual_ipi, rules)
         
-        valor_ipi = valor_base_dec * percentual_ipi_dec
-        return float(valor_ipi.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP))
+        valor_ipi = to_units(valor_com_icms) * percentual_ipi_units
+        return from_units(rescale(valor_ipi, 2 * MICROS, CENTS), CENTS)
     
     @staticmethod
-    def calculate_total_value_with_ipi(valor_com_icms: float, percentual_ipi: float) -> float:
+    def calculate_total_value_with_ipi(valor_com_icms: float, percentual_ipi: float, rules: Optional[PricingRules] = None) -> float:
         """
         REGRA IPI.2: Cálculo do Valor Final com IPI
         Fórmula Sistema: valor_com_icms + (valor_com_icms * percentual_ipi)
@@ -359,15 +359,13 @@ class BusinessRulesCalculator:
         Returns:
             float: Valor final incluindo IPI
         """
-        valor_base_dec = BusinessRulesCalculator._to_decimal(valor_com_icms)
-        valor_ipi = BusinessRulesCalculator.calculate_ipi_value(valor_com_icms, percentual_ipi)
-        valor_ipi_dec = BusinessRulesCalculator._to_decimal(valor_ipi)
+        valor_ipi = BusinessRulesCalculator.calculate_ipi_value(valor_com_icms, percentual_ipi, rules)
         
-        valor_final = valor_base_dec + valor_ipi_dec
-        return float(valor_final.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP))
+        valor_final = to_units(valor_com_icms) + to_units(valor_ipi)
+        return from_units(rescale(valor_final, MICROS, CENTS), CENTS)
     
     @staticmethod
-    def calculate_total_ipi_item(peso_venda: float, valor_com_icms_venda: float, percentual_ipi: float) -> float:
+    def calculate_total_ipi_item(peso_venda: float, valor_com_icms_venda: float, percentual_ipi: float, rules: Optional[PricingRules] = None) -> float:
         """
         REGRA IPI.3: Cálculo do IPI Total do Item
         Fórmula Sistema: peso_venda * valor_com_icms_venda * percentual_ipi
@@ -382,18 +380,18 @@ class BusinessRulesCalculator:
         Returns:
             float: Valor total do IPI para o item
         """
-        peso_venda_dec = BusinessRulesCalculator._to_decimal(peso_venda)
-        valor_base_total = peso_venda_dec * BusinessRulesCalculator._to_decimal(valor_com_icms_venda)
+        percentual_ipi_units = BusinessRulesCalculator._ipi_units(percentual_ipi, rules)
         
-        # Calcular IPI sobre o valor total com ICMS
-        valor_ipi_total = BusinessRulesCalculator.calculate_ipi_value(float(valor_base_total), percentual_ipi)
-        return valor_ipi_total
+        # Calcular IPI sobre o valor total com ICMS, sem arredondar o total intermediário
+        valor_ipi_total = to_units(peso_venda) * to_units(valor_com_icms_venda) * percentual_ipi_units
+        return from_units(rescale(valor_ipi_total, 3 * MICROS, CENTS), CENTS)
     
     @staticmethod
-    def calculate_complete_item(item_data: Dict, outras_despesas_totais: float, soma_pesos_pedido: float, freight_value_total: float = 0.0) -> Dict[str, Any]:
+    def calculate_complete_item(item_data: Dict, outras_despesas_totais: float, soma_pesos_pedido: float, freight_value_total: float = 0.0, rules: Optional[PricingRules] = None) -> CalculatedItem:
         """
         Calcula todos os valores de um item aplicando todas as regras de negócio sequencialmente
         """
+        rules = rules or pricing_rules.current()
         peso_compra = item_data.get('peso_compra') or 1.0
         peso_venda = item_data.get('peso_venda') or peso_compra
 
@@ -403,9 +401,9 @@ class BusinessRulesCalculator:
             raise ValueError("peso_venda deve ser maior que zero.")
 
         valor_com_icms_compra = item_data.get('valor_com_icms_compra', 0)
-        percentual_icms_compra = item_data.get('percentual_icms_compra', 0.18)
+        percentual_icms_compra = item_data.get('percentual_icms_compra', rules.icms_default_percentage)
         valor_com_icms_venda = item_data.get('valor_com_icms_venda', 0)
-        percentual_icms_venda = item_data.get('percentual_icms_venda', 0.18)
+        percentual_icms_venda = item_data.get('percentual_icms_venda', rules.icms_default_percentage)
         percentual_ipi = item_data.get('percentual_ipi', 0.0)  # IPI padrão 0%
 
         # CORREÇÃO: Usar outras_despesas_item diretamente do item, não distribuir
@@ -425,7 +423,7 @@ class BusinessRulesCalculator:
 
         # Incluir frete no cálculo do valor sem impostos de compra
         valor_sem_impostos_compra = BusinessRulesCalculator.calculate_purchase_value_without_taxes(
-            valor_com_icms_compra, percentual_icms_compra, outras_despesas_por_kg + frete_distribuido_por_kg
+            valor_com_icms_compra, percentual_icms_compra, outras_despesas_por_kg + frete_distribuido_por_kg, rules
         )
 
         valor_corrigido_peso = BusinessRulesCalculator.calculate_purchase_value_with_weight_correction(
@@ -433,7 +431,7 @@ class BusinessRulesCalculator:
         )
 
         valor_sem_impostos_venda = BusinessRulesCalculator.calculate_sale_value_without_taxes(
-            valor_com_icms_venda, percentual_icms_venda
+            valor_com_icms_venda, percentual_icms_venda, rules
         )
 
         diferenca_peso = BusinessRulesCalculator.calculate_weight_difference(peso_venda, peso_compra)
@@ -453,20 +451,17 @@ class BusinessRulesCalculator:
         
         total_compra_item = BusinessRulesCalculator.calculate_total_purchase_item(peso_compra, valor_sem_impostos_compra)
         
-        total_venda_item = peso_venda * valor_sem_impostos_venda
+        total_venda_item = _product(to_units(peso_venda), to_units(valor_sem_impostos_venda))
 
         # NOVO: Rentabilidade total por item baseada em totais SEM impostos
         rentabilidade_item_total = 0.0
-        try:
-            if total_compra_item > 0:
-                rentabilidade_item_total = (total_venda_item / total_compra_item) - 1
-            else:
-                rentabilidade_item_total = 0.0
-        except Exception:
-            rentabilidade_item_total = 0.0
+        if total_compra_item > 0:
+            rentabilidade_item_total = relative_change(to_units(total_venda_item), to_units(total_compra_item))
         
         # CORREÇÃO: Calcular total COM ICMS incluindo frete distribuído
-        total_compra_item_com_icms = peso_compra * valor_com_icms_compra_unitario_com_frete
+        total_compra_item_com_icms = _product(
+            to_units(peso_compra), to_units(valor_com_icms_compra) + to_units(frete_distribuido_por_kg)
+        )
         
         total_venda_item_com_icms = BusinessRulesCalculator.calculate_total_sale_item_with_icms(peso_venda, valor_com_icms_venda)
         
@@ -480,112 +475,51 @@ class BusinessRulesCalculator:
             rentabilidade_comissao = CommissionService._calculate_total_profitability(
                 total_venda_item, total_compra_item
             )
-        percentual_comissao = CommissionService.calculate_commission_percentage(rentabilidade_comissao)
+        percentual_comissao = CommissionService.calculate_commission_percentage(rentabilidade_comissao, rules)
         valor_comissao = CommissionService.calculate_commission_value(
-            total_venda_item_com_icms, rentabilidade_comissao
+            total_venda_item_com_icms, rentabilidade_comissao, rules
         )
         
         # Calcular IPI
-        valor_ipi_unitario = BusinessRulesCalculator.calculate_ipi_value(valor_com_icms_venda, percentual_ipi)
-        valor_ipi_total = BusinessRulesCalculator.calculate_total_ipi_item(peso_venda, valor_com_icms_venda, percentual_ipi)
-        valor_final_com_ipi = BusinessRulesCalculator.calculate_total_value_with_ipi(valor_com_icms_venda, percentual_ipi)
-        total_final_com_ipi = peso_venda * valor_final_com_ipi
+        valor_ipi_unitario = BusinessRulesCalculator.calculate_ipi_value(valor_com_icms_venda, percentual_ipi, rules)
+        valor_ipi_total = BusinessRulesCalculator.calculate_total_ipi_item(peso_venda, valor_com_icms_venda, percentual_ipi, rules)
+        valor_final_com_ipi = BusinessRulesCalculator.calculate_total_value_with_ipi(valor_com_icms_venda, percentual_ipi, rules)
+        total_final_com_ipi = _product(to_units(peso_venda), to_units(valor_final_com_ipi))
 
-        # Calcular weight_difference_display
-        weight_difference_display = BusinessRulesCalculator.calculate_weight_difference_display(peso_venda, peso_compra)
-
-        return {
-            'description': item_data.get('description', ''),
-            'peso_compra': peso_compra,
-            'peso_venda': peso_venda,
-            'valor_com_icms_compra': valor_com_icms_compra,
-            'percentual_icms_compra': percentual_icms_compra,
-            'valor_com_icms_venda': valor_com_icms_venda,
-            'percentual_icms_venda': percentual_icms_venda,
-            'percentual_ipi': percentual_ipi,
-            'outras_despesas_item': outras_despesas_item,
-            'valor_sem_impostos_compra': valor_sem_impostos_compra,
-            'valor_corrigido_peso': valor_corrigido_peso,
-            'valor_sem_impostos_venda': valor_sem_impostos_venda,
-            'diferenca_peso': diferenca_peso,
-            'valor_unitario_venda': valor_unitario_venda,
-            'rentabilidade_item': rentabilidade_item,
-            'rentabilidade_item_total': rentabilidade_item_total,
-            'rentabilidade_comissao': rentabilidade_comissao,
-            'total_compra_item': total_compra_item,
-            'total_venda_item': total_venda_item,
-            'total_compra_item_com_icms': total_compra_item_com_icms,
-            'total_venda_com_icms_item': total_venda_item_com_icms,
-            'valor_comissao': valor_comissao,
-            'percentual_comissao': percentual_comissao,
-            'commission_percentage_actual': percentual_comissao,  # Adicionar campo esperado
-            'valor_ipi_unitario': valor_ipi_unitario,
-            'valor_ipi_total': valor_ipi_total,
-            'valor_final_com_ipi': valor_final_com_ipi,
-            'total_final_com_ipi': total_final_com_ipi,
-            'frete_distribuido_por_kg': frete_distribuido_por_kg,
-            'weight_difference_display': weight_difference_display  # Adicionar campo de exibição da diferença de peso
-        }
-
-    @staticmethod
-    def validate_item_data(item_data: Dict) -> List[str]:
-        """
-        Valida dados de um item conforme regras de negócio
-        """
-        errors = []
-        
-        # Validações obrigatórias (8.1.1)
-        if not item_data.get('description'):
-            errors.append("Descrição não pode estar vazia")
-        
-        # Validar valores de compra e venda (usar nomes corretos dos campos)
-        valor_com_icms_compra = item_data.get('valor_com_icms_compra', 0)
-        if valor_com_icms_compra is None or valor_com_icms_compra <= 0:
-            errors.append("Valor de compra deve ser maior que zero")
-        
-        valor_com_icms_venda = item_data.get('valor_com_icms_venda', 0)
-        if valor_com_icms_venda is None or valor_com_icms_venda <= 0:
-            errors.append("Valor de venda deve ser maior que zero")
-        
-        # Validar peso de compra
-        peso_compra = item_data.get('peso_compra') or 0
-        if peso_compra is None or peso_compra <= 0:
-            errors.append("Peso de compra deve ser maior que zero")
-        
-        # Validar percentuais de ICMS (8.1.2)
-        for field_name, field_label in [('percentual_icms_compra', 'ICMS compra'), ('percentual_icms_venda', 'ICMS venda')]:
-            percentual = item_data.get(field_name, 0)
-            if percentual < 0 or percentual > 1:
-                errors.append(f"Percentual de {field_label} deve estar entre 0 e 1")
-        
-        # Sanitizar percentual_ipi com fallback e logs
-        raw_ipi = item_data.get('percentual_ipi', None)
-        if raw_ipi is None or raw_ipi == "":
-            # Ausente: padronizar para 0.0
-            item_data['percentual_ipi'] = 0.0
-            logger.debug("percentual_ipi ausente, aplicando fallback 0.0")
-        else:
-            try:
-                ipi_dec = BusinessRulesCalculator._to_decimal(raw_ipi)
-                # Se valor vier como percentual (ex.: 5 ou 3.25), normalizar para decimal (0.05/0.0325)
-                if ipi_dec > Decimal('1'):
-                    ipi_dec = (ipi_dec / Decimal('100')).quantize(Decimal('0.0001'), rounding=ROUND_HALF_UP)
-                    logger.warning(f"percentual_ipi recebido como percentual {raw_ipi}, normalizado para {ipi_dec}")
-                # Validar contra lista de percentuais válidos
-                if ipi_dec not in BusinessRulesCalculator.IPI_VALID_PERCENTAGES:
-                    logger.warning(f"percentual_ipi inválido: {raw_ipi}. Permitidos: 0.0, 0.0325, 0.05. Aplicando fallback 0.0")
-                    item_data['percentual_ipi'] = 0.0
-                else:
-                    item_data['percentual_ipi'] = float(ipi_dec)
-            except Exception:
-                # Parsing falhou: aplicar fallback
-                item_data['percentual_ipi'] = 0.0
-                logger.warning(f"Falha ao interpretar percentual_ipi '{raw_ipi}'. Aplicando fallback 0.0")
-        
-        return errors
+        return CalculatedItem(
+            description=item_data.get('description', ''),
+            peso_compra=peso_compra,
+            peso_venda=peso_venda,
+            valor_com_icms_compra=valor_com_icms_compra,
+            percentual_icms_compra=percentual_icms_compra,
+            valor_com_icms_venda=valor_com_icms_venda,
+            percentual_icms_venda=percentual_icms_venda,
+            percentual_ipi=percentual_ipi,
+            outras_despesas_item=outras_despesas_item,
+            valor_sem_impostos_compra=valor_sem_impostos_compra,
+            valor_corrigido_peso=valor_corrigido_peso,
+            valor_sem_impostos_venda=valor_sem_impostos_venda,
+            diferenca_peso=diferenca_peso,
+            valor_unitario_venda=valor_unitario_venda,
+            rentabilidade_item=rentabilidade_item,
+            rentabilidade_item_total=rentabilidade_item_total,
+            rentabilidade_comissao=rentabilidade_comissao,
+            total_compra_item=total_compra_item,
+            total_venda_item=total_venda_item,
+            total_compra_item_com_icms=total_compra_item_com_icms,
+            total_venda_com_icms_item=total_venda_item_com_icms,
+            valor_comissao=valor_comissao,
+            percentual_comissao=percentual_comissao,
+            valor_ipi_unitario=valor_ipi_unitario,
+            valor_ipi_total=valor_ipi_total,
+            valor_final_com_ipi=valor_final_com_ipi,
+            total_final_com_ipi=total_final_com_ipi,
+            frete_distribuido_por_kg=frete_distribuido_por_kg,
+        )
 
     @staticmethod
-    def calculate_complete_budget(items_data: List[Dict], outras_despesas_totais: float, soma_pesos_pedido: float, freight_value_total: float = 0.0) -> Dict[str, Any]:
+    @traced("calculator.complete_budget")
+    def calculate_complete_budget(items_data: List[Dict], outras_despesas_totais: float, soma_pesos_pedido: float, freight_value_total: float = 0.0, rules: Optional[PricingRules] = None) -> CalculatedBudget:
         """
         Calcula orçamento completo com todos os itens e totais
         
@@ -594,59 +528,60 @@ class BusinessRulesCalculator:
             outras_despesas_totais: Total de outras despesas
             soma_pesos_pedido: Soma total dos pesos do pedido
             freight_value_total: Valor total do frete
+            rules: Regras de preço (padrão: versão corrente, fixada para todo o orçamento)
             
         Returns:
-            Dict contendo itens calculados e totais do orçamento
+            CalculatedBudget com os itens calculados, os totais e a versão das regras usada
         """
         # Validar frete negativo
         if freight_value_total is not None and freight_value_total < 0:
             raise ValueError("Valor do frete não pode ser negativo")
 
+        started = time.perf_counter()
+        rules = rules or pricing_rules.current()
         calculated_items = []
         
-        # Totais do orçamento
-        soma_total_compra = 0.0
-        soma_total_venda = 0.0
-        soma_total_compra_com_icms = 0.0  # CORREÇÃO: Adicionar soma COM ICMS para compra
-        soma_total_venda_com_icms = 0.0
-        # Para cálculo de markup unitário (exibição)
-        soma_valores_unitarios_venda_com_icms = 0.0
-        soma_valores_unitarios_compra_com_icms = 0.0
-        total_comissao = 0.0
-        total_ipi_orcamento = 0.0
-        total_final_com_ipi = 0.0
-        total_peso_compra = 0.0
-        total_peso_venda = 0.0
+        # Totais do orçamento, somados em inteiros (micro-unidades; comissão e IPI em centavos)
+        soma_total_compra = 0
+        soma_total_venda = 0
+        soma_total_compra_com_icms = 0  # CORREÇÃO: Adicionar soma COM ICMS para compra
+        soma_total_venda_com_icms = 0
+        total_comissao = 0
+        total_ipi_orcamento = 0
+        total_final_com_ipi = 0
+        total_peso_compra = 0
+        total_peso_venda = 0
         
         # Calcular cada item
         for item_data in items_data:
             calculated_item = BusinessRulesCalculator.calculate_complete_item(
-                item_data, outras_despesas_totais, soma_pesos_pedido, freight_value_total
+                item_data, outras_despesas_totais, soma_pesos_pedido, freight_value_total, rules
             )
             calculated_items.append(calculated_item)
             
             # Somar totais
-            soma_total_compra += calculated_item['total_compra_item']
-            soma_total_venda += calculated_item['total_venda_item']
-            soma_total_compra_com_icms += calculated_item['total_compra_item_com_icms']  # CORREÇÃO: Somar compra COM ICMS
-            soma_total_venda_com_icms += calculated_item['total_venda_com_icms_item']
-            # Acumular valores unitários para markup de exibição
-            soma_valores_unitarios_venda_com_icms += calculated_item['valor_com_icms_venda']
-            soma_valores_unitarios_compra_com_icms += calculated_item['valor_com_icms_compra']
-            total_comissao += calculated_item['valor_comissao']
-            total_ipi_orcamento += calculated_item['valor_ipi_total']
-            total_final_com_ipi += calculated_item['total_final_com_ipi']
-            total_peso_compra += calculated_item['peso_compra']
-            total_peso_venda += calculated_item['peso_venda']
+            soma_total_compra += to_units(calculated_item.total_compra_item)
+            soma_total_venda += to_units(calculated_item.total_venda_item)
+            soma_total_compra_com_icms += to_units(calculated_item.total_compra_item_com_icms)  # CORREÇÃO: Somar compra COM ICMS
+            soma_total_venda_com_icms += to_units(calculated_item.total_venda_com_icms_item)
+            total_comissao += to_units(calculated_item.valor_comissao, CENTS)
+            total_ipi_orcamento += to_units(calculated_item.valor_ipi_total, CENTS)
+            total_final_com_ipi += to_units(calculated_item.total_final_com_ipi)
+            total_peso_compra += to_units(calculated_item.peso_compra)
+            total_peso_venda += to_units(calculated_item.peso_venda)
         
         # CORREÇÃO: Calcular markup do pedido usando totais reais (não valores unitários)
-        markup_pedido = BusinessRulesCalculator.calculate_budget_markup(soma_total_venda_com_icms, soma_total_compra_com_icms)
+        markup_pedido = 0.0
+        if soma_total_compra_com_icms != 0:
+            markup_pedido = relative_change(soma_total_venda_com_icms, soma_total_compra_com_icms)
         # NOVO: Calcular markup do pedido SEM impostos (SEM ICMS) para rentabilidade consistente com itens
-        markup_pedido_sem_impostos = BusinessRulesCalculator.calculate_budget_markup(soma_total_venda, soma_total_compra)
+        markup_pedido_sem_impostos = 0.0
+        if soma_total_compra != 0:
+            markup_pedido_sem_impostos = relative_change(soma_total_venda, soma_total_compra)
         
         # Calcular diferença total de peso
         total_weight_difference_percentage = BusinessRulesCalculator.calculate_total_weight_difference_percentage(
-            total_peso_venda, total_peso_compra
+            from_units(total_peso_venda), from_units(total_peso_compra)
         )
 
         # Calcular valor de frete por kg para o orçamento (totais)
@@ -656,20 +591,25 @@ class BusinessRulesCalculator:
                 freight_value_total, soma_pesos_pedido
             )
         
-        return {
-            'items': calculated_items,
-            'totals': {
-                'soma_total_compra': soma_total_compra,
-                'soma_total_venda': soma_total_venda,
-                'soma_total_venda_com_icms': soma_total_venda_com_icms,
-                'total_comissao': total_comissao,
-                'markup_pedido': markup_pedido,
-                'markup_pedido_sem_impostos': markup_pedido_sem_impostos,
-                'total_ipi_orcamento': total_ipi_orcamento,
-                'total_final_com_ipi': total_final_com_ipi,
-                'total_peso_compra': total_peso_compra,
-                'total_peso_venda': total_peso_venda,
-                'total_weight_difference_percentage': total_weight_difference_percentage,
-                'valor_frete_compra': valor_frete_compra
-            }
-        }
+        result = CalculatedBudget(
+            items=calculated_items,
+            totals=CalculatedTotals(
+                soma_total_compra=from_units(soma_total_compra),
+                soma_total_venda=from_units(soma_total_venda),
+                soma_total_venda_com_icms=from_units(soma_total_venda_com_icms),
+                total_comissao=from_units(total_comissao, CENTS),
+                markup_pedido=markup_pedido,
+                markup_pedido_sem_impostos=markup_pedido_sem_impostos,
+                total_ipi_orcamento=from_units(total_ipi_orcamento, CENTS),
+                total_final_com_ipi=from_units(total_final_com_ipi),
+                total_peso_compra=from_units(total_peso_compra),
+                total_peso_venda=from_units(total_peso_venda),
+                total_weight_difference_percentage=total_weight_difference_percentage,
+                valor_frete_compra=valor_frete_compra,
+            ),
+            pricing_rules_version=rules.version,
+        )
+
+        CALCULATION_SECONDS.observe(time.perf_counter() - started)
+        CALCULATION_ITEMS.inc(len(calculated_items))
+        return result
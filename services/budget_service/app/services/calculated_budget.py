@@ -0,0 +1,209 @@
+"""
+Resultados tipados da BusinessRulesCalculator
+
+`calculate_complete_item` devolve um `CalculatedItem` e `calculate_complete_budget`
+um `CalculatedBudget` (itens + `CalculatedTotals`). São dataclasses com
+`__slots__`: um item ocupa uma fração de um dict de 30 chaves e os campos são
+lidos por atributo (`item.valor_comissao`), sem hash de string a cada acesso.
+
+Para compatibilidade, item e totais também são `Mapping` somente leitura com
+as mesmas chaves em português de antes (`item['valor_comissao']`, `.get`, `in`,
+`dict(item)`, comparação com dict) e o orçamento aceita `result['items']` e
+`result['totals']` (`result.items` é a lista de itens, não o método de dict).
+`as_dict()` devolve a cópia em dicts puros.
+
+`commission_percentage_actual` e `weight_difference_display` não são
+armazenados: são derivados no acesso. Os campos de `BudgetItem` e `Budget`
+saem de `budget_item_fields()` e `budget_fields()`, usados igualmente na
+criação, atualização e recálculo do orçamento.
+"""
+from collections.abc import Mapping
+from dataclasses import dataclass, fields
+from typing import Any, Dict, FrozenSet, Iterator, List, Optional, Tuple
+
+from app.utils.json_utils import safe_json_dumps
+
+
+class _FieldMapping(Mapping):
+    """Visão de dict (somente leitura) sobre os campos de uma dataclass com slots"""
+
+    __slots__ = ()
+    _keys: Tuple[str, ...] = ()
+    _key_set: FrozenSet[str] = frozenset()
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._key_set:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {key: getattr(self, key) for key in self._keys}
+
+
+def _expose(cls, *derived: str):
+    """Define as chaves da visão de dict: os campos da dataclass e os derivados"""
+    cls._keys = tuple(field.name for field in fields(cls)) + derived
+    cls._key_set = frozenset(cls._keys)
+    return cls
+
+
+@dataclass(slots=True, eq=False)
+class CalculatedItem(_FieldMapping):
+    """Item calculado pelas regras de negócio (percentuais em fração, ex.: 0.18)"""
+
+    description: str
+    peso_compra: float
+    peso_venda: float
+    valor_com_icms_compra: float
+    percentual_icms_compra: float
+    valor_com_icms_venda: float
+    percentual_icms_venda: float
+    percentual_ipi: float
+    outras_despesas_item: float
+    valor_sem_impostos_compra: float
+    valor_corrigido_peso: float
+    valor_sem_impostos_venda: float
+    diferenca_peso: float
+    valor_unitario_venda: float
+    rentabilidade_item: float
+    rentabilidade_item_total: float
+    rentabilidade_comissao: float
+    total_compra_item: float
+    total_venda_item: float
+    total_compra_item_com_icms: float
+    total_venda_com_icms_item: float
+    valor_comissao: float
+    percentual_comissao: float
+    valor_ipi_unitario: float
+    valor_ipi_total: float
+    valor_final_com_ipi: float
+    total_final_com_ipi: float
+    frete_distribuido_por_kg: float
+
+    @property
+    def commission_percentage_actual(self) -> float:
+        """Percentual de comissão efetivamente aplicado (mesmo que percentual_comissao)"""
+        return self.percentual_comissao
+
+    @property
+    def weight_difference_display(self) -> Dict[str, Any]:
+        """Diferença de peso para exibição, calculada sob demanda"""
+        # Import tardio: business_rules_calculator importa este módulo
+        from app.services.business_rules_calculator import BusinessRulesCalculator
+        return BusinessRulesCalculator.calculate_weight_difference_display(self.peso_venda, self.peso_compra)
+
+    def budget_item_fields(self, delivery_time: Optional[str] = '0') -> Dict[str, Any]:
+        """Colunas de `BudgetItem` (rentabilidades em %, diferença de peso em JSON)"""
+        return {
+            'description': self.description,
+            'delivery_time': delivery_time,
+            'weight': self.peso_compra,
+            'purchase_value_with_icms': self.valor_com_icms_compra,
+            'purchase_icms_percentage': self.percentual_icms_compra,
+            'purchase_other_expenses': self.outras_despesas_item,
+            'purchase_value_without_taxes': self.valor_sem_impostos_compra,
+            'purchase_value_with_weight_diff': self.valor_corrigido_peso,
+            'sale_weight': self.peso_venda,
+            'sale_value_with_icms': self.valor_com_icms_venda,
+            'sale_icms_percentage': self.percentual_icms_venda,
+            'sale_value_without_taxes': self.valor_sem_impostos_venda,
+            'weight_difference': self.diferenca_peso,
+            'profitability': (self.rentabilidade_item or 0) * 100,
+            'total_profitability': (self.rentabilidade_item_total or 0) * 100,
+            'total_purchase': self.total_compra_item,
+            'total_sale': self.total_venda_item,
+            'unit_value': self.valor_unitario_venda,
+            'total_value': self.total_venda_item,
+            'commission_value': self.valor_comissao,
+            'commission_percentage': self.percentual_comissao,
+            'commission_percentage_actual': self.percentual_comissao,
+            'ipi_percentage': self.percentual_ipi,
+            'ipi_value': self.valor_ipi_total,
+            'total_value_with_ipi': self.total_final_com_ipi,
+            'weight_difference_display': safe_json_dumps(self.weight_difference_display),
+        }
+
+
+@dataclass(slots=True, eq=False)
+class CalculatedTotals(_FieldMapping):
+    """Totais do orçamento calculados a partir dos itens"""
+
+    soma_total_compra: float
+    soma_total_venda: float
+    soma_total_venda_com_icms: float
+    total_comissao: float
+    markup_pedido: float
+    markup_pedido_sem_impostos: float
+    total_ipi_orcamento: float
+    total_final_com_ipi: float
+    total_peso_compra: float
+    total_peso_venda: float
+    total_weight_difference_percentage: float
+    valor_frete_compra: float
+
+
+@dataclass(slots=True, eq=False)
+class CalculatedBudget:
+    """Resultado de `calculate_complete_budget`: itens na ordem de entrada e totais"""
+
+    items: List[CalculatedItem]
+    totals: CalculatedTotals
+    pricing_rules_version: int = 0  # Versão das regras de preço usada no cálculo
+
+    def __getitem__(self, key: str) -> Any:
+        if key in ('items', 'totals'):
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        return key in ('items', 'totals')
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self[key] if key in self else default
+
+    def keys(self) -> Tuple[str, ...]:
+        return ('items', 'totals')
+
+    @property
+    def commission_percentage_actual(self) -> float:
+        """Percentual de comissão médio ponderado pelo total de venda com ICMS"""
+        total_sale_value = sum(item.total_venda_com_icms_item for item in self.items)
+        if total_sale_value > 0:
+            return sum(
+                item.percentual_comissao * item.total_venda_com_icms_item for item in self.items
+            ) / total_sale_value
+        return 0.0
+
+    def budget_fields(self) -> Dict[str, Any]:
+        """Colunas calculadas de `Budget` (rentabilidade SEM impostos)"""
+        totals = self.totals
+        return {
+            'total_purchase_value': totals.soma_total_compra,
+            'total_sale_value': totals.soma_total_venda,
+            'total_sale_with_icms': totals.soma_total_venda_com_icms,
+            'total_commission': totals.total_comissao,
+            'profitability_percentage': totals.markup_pedido_sem_impostos,
+            'commission_percentage_actual': self.commission_percentage_actual,
+            'total_ipi_value': totals.total_ipi_orcamento,
+            'total_final_value': totals.total_final_com_ipi,
+            'valor_frete_compra': totals.valor_frete_compra,
+            'total_weight_difference_percentage': totals.total_weight_difference_percentage,
+            'pricing_rules_version': self.pricing_rules_version,
+        }
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'items': [item.as_dict() for item in self.items],
+            'totals': self.totals.as_dict(),
+            'pricing_rules_version': self.pricing_rules_version,
+        }
+
+
+_expose(CalculatedItem, 'commission_percentage_actual', 'weight_difference_display')
+_expose(CalculatedTotals)
@@ -0,0 +1,86 @@
+"""
+Adaptador entre os schemas de entrada e a BusinessRulesCalculator
+
+`to_calculator_input(items)` converte os itens recebidos no formato da
+calculadora (nomes em português) em uma única passada, já somando os
+agregados do pedido. Aceita, sem `.dict()` intermediário:
+
+- `BudgetItemCreate` e `BudgetItem` (ORM), com nomes em inglês
+- `BudgetItemSimplified`, que já usa os nomes da calculadora
+
+Os campos de cada origem são lidos por um `attrgetter` montado na importação.
+O caminho de volta (resultado calculado -> `BudgetItem`/`Budget`) fica em
+`CalculatedItem.budget_item_fields()` e `CalculatedBudget.budget_fields()`.
+"""
+from dataclasses import dataclass
+from operator import attrgetter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.models.budget import BudgetItem
+from app.schemas.budget import BudgetItemBase, BudgetItemSimplified
+from app.services.business_rules_calculator import BusinessRulesCalculator
+from app.services.calculated_budget import CalculatedBudget
+
+# Chaves da calculadora, na ordem lida de cada origem
+CALCULATOR_KEYS = (
+    'description', 'delivery_time', 'peso_compra', 'peso_venda',
+    'valor_com_icms_compra', 'percentual_icms_compra', 'outras_despesas_item',
+    'valor_com_icms_venda', 'percentual_icms_venda', 'percentual_ipi',
+)
+
+# BudgetItemCreate e BudgetItem: campo em inglês para cada chave acima
+ENGLISH_FIELDS = (
+    'description', 'delivery_time', 'weight', 'sale_weight',
+    'purchase_value_with_icms', 'purchase_icms_percentage', 'purchase_other_expenses',
+    'sale_value_with_icms', 'sale_icms_percentage', 'ipi_percentage',
+)
+
+_Getter = Callable[[Any], Tuple[Any, ...]]
+_GETTERS: Tuple[Tuple[type, _Getter], ...] = (
+    (BudgetItemSimplified, attrgetter(*CALCULATOR_KEYS)),
+    (BudgetItemBase, attrgetter(*ENGLISH_FIELDS)),
+    (BudgetItem, attrgetter(*ENGLISH_FIELDS)),
+)
+
+
+def _getter_for(item: Any) -> _Getter:
+    for source, getter in _GETTERS:
+        if isinstance(item, source):
+            return getter
+    raise TypeError(f"Item sem mapeamento para a calculadora: {type(item).__name__}")
+
+
+@dataclass(slots=True)
+class CalculatorInput:
+    """Itens no formato da calculadora e agregados do pedido"""
+
+    items: List[Dict[str, Any]]
+    soma_pesos_pedido: float  # Soma de peso_compra: base de distribuição do frete
+    outras_despesas_totais: float  # outras_despesas_item é R$/kg: soma de R$/kg * peso_compra
+
+    def calculate(self, freight_value_total: Optional[float] = 0.0) -> CalculatedBudget:
+        return BusinessRulesCalculator.calculate_complete_budget(
+            self.items, self.outras_despesas_totais, self.soma_pesos_pedido, freight_value_total or 0.0
+        )
+
+
+def to_calculator_input(items: Iterable[Any]) -> CalculatorInput:
+    """Converte os itens (schemas ou ORM) para a calculadora em uma passada"""
+    calculator_items = []
+    soma_pesos_pedido = 0.0
+    outras_despesas_totais = 0.0
+    getter = None
+    for item in items:
+        if getter is None:
+            getter = _getter_for(item)
+        item_data = dict(zip(CALCULATOR_KEYS, getter(item)))
+        peso_compra = item_data['peso_compra']
+        # Peso de venda não informado: usa o de compra
+        item_data['peso_venda'] = item_data['peso_venda'] or peso_compra
+        if item_data['percentual_ipi'] is None:
+            item_data['percentual_ipi'] = 0.0
+        calculator_items.append(item_data)
+        # Pesos inválidos ficam para a validação; aqui só não quebram a soma
+        soma_pesos_pedido += peso_compra or 0.0
+        outras_despesas_totais += (item_data['outras_despesas_item'] or 0.0) * (peso_compra or 0.0)
+    return CalculatorInput(calculator_items, soma_pesos_pedido, outras_despesas_totais)
@@ -2,7 +2,9 @@
 Sistema de Comissões por Faixas de Rentabilidade
 Baseado no documento REGRAS_NEGOCIO_ORCAMENTOS_SISTEMA.md
 """
-from typing import Dict, List
+from typing import Dict, List, Optional
+from app.services.pricing_rules import PricingRules, pricing_rules
+from app.utils.money import CENTS, MICROS, from_units, relative_change, rescale, to_units
 from app.utils.rounding import round_currency
 
 
@@ -12,19 +14,11 @@ class CommissionService:
     Conforme seção 6 do documento de regras de negócio
     """
     
-    # Tabela de faixas de comissão conforme documento - ATUALIZADA
-    COMMISSION_BRACKETS = [
-        {"min_profitability": 0.0, "max_profitability": 0.199999, "commission_rate": 0.00},    # < 19,99% = 0%
-        {"min_profitability": 0.20, "max_profitability": 0.299999, "commission_rate": 0.01},   # 20-29,99% = 1%
-        {"min_profitability": 0.30, "max_profitability": 0.399999, "commission_rate": 0.015},  # 30-39,99% = 1.5%
-        {"min_profitability": 0.40, "max_profitability": 0.499999, "commission_rate": 0.025},  # 40-49,99% = 2.5%
-        {"min_profitability": 0.50, "max_profitability": 0.599999, "commission_rate": 0.03},   # 50-59,99% = 3%
-        {"min_profitability": 0.60, "max_profitability": 0.799999, "commission_rate": 0.04},   # 60-79,99% = 4%
-        {"min_profitability": 0.80, "max_profitability": float('inf'), "commission_rate": 0.05}  # >=80% = 5%
-    ]
+    # Faixas de comissão: regras versionadas em app.services.pricing_rules
+    # (padrão em DEFAULT_RULES: < 20% = 0%, 20% = 1%, 30% = 1.5%, 40% = 2.5%, 50% = 3%, 60% = 4%, >= 80% = 5%)
     
     @staticmethod
-    def calculate_commission_percentage(rentabilidade: float) -> float:
+    def calculate_commission_percentage(rentabilidade: float, rules: Optional[PricingRules] = None) -> float:
         """
         Calcula o percentual de comissão baseado na rentabilidade do item
         
@@ -33,6 +27,7 @@ class CommissionService:
         
         Args:
             rentabilidade: Rentabilidade do item em decimal (ex: 0.25 = 25%)
+            rules: Regras de preço do cálculo (padrão: versão corrente)
             
         Returns:
             float: Percentual de comissão em decimal (ex: 0.015 = 1.5%)
@@ -47,16 +42,11 @@ class CommissionService:
         except (ValueError, TypeError):
             return 0.0
         
-        # Implementação da fórmula usando as faixas definidas
-        for bracket in CommissionService.COMMISSION_BRACKETS:
-            if rentabilidade >= bracket["min_profitability"] and rentabilidade <= bracket["max_profitability"]:
-                return bracket["commission_rate"]
-        
-        # Para rentabilidades muito altas (>=80%), usar comissão máxima
-        return 0.05
+        # Faixa pelo mínimo de rentabilidade (busca binária nas faixas compiladas)
+        return (rules or pricing_rules.current()).commission_rate(rentabilidade)
     
     @staticmethod
-    def calculate_commission_value_with_quantity_adjustment(total_venda_item_com_icms: float, total_compra_item_com_icms: float, peso_venda: float, peso_compra: float, valor_com_icms_venda: float, valor_com_icms_compra: float) -> float:
+    def calculate_commission_value_with_quantity_adjustment(total_venda_item_com_icms: float, total_compra_item_com_icms: float, peso_venda: float, peso_compra: float, valor_com_icms_venda: float, valor_com_icms_compra: float, rules: Optional[PricingRules] = None) -> float:
         """
         Calcula o valor da comissão considerando diferenças de quantidade entre venda e compra
         
@@ -72,6 +62,7 @@ class CommissionService:
             peso_compra: Quantidade/peso comprado
             valor_com_icms_venda: Valor unitário de venda COM ICMS
             valor_com_icms_compra: Valor unitário de compra COM ICMS
+            rules: Regras de preço do cálculo (padrão: versão corrente)
             
         Returns:
             float: Valor da comissão considerando ajuste de quantidade
@@ -80,17 +71,15 @@ class CommissionService:
         # Se não há diferença de peso, usar cálculo tradicional
         if peso_venda == peso_compra:
             rentabilidade_unitaria = CommissionService._calculate_unit_profitability_with_icms(valor_com_icms_venda, valor_com_icms_compra)
-            return CommissionService.calculate_commission_value(total_venda_item_com_icms, rentabilidade_unitaria)
+            return CommissionService.calculate_commission_value(total_venda_item_com_icms, rentabilidade_unitaria, rules)
         
         # Para casos com diferença de peso, usar rentabilidade TOTAL da operação
         # Conforme especificação e testes: (total_venda / total_compra - 1)
         rentabilidade_total = CommissionService._calculate_total_profitability(total_venda_item_com_icms, total_compra_item_com_icms)
 
         # Aplicar comissão sobre o valor total de venda COM ICMS usando a rentabilidade total
-        percentual_comissao = CommissionService.calculate_commission_percentage(rentabilidade_total)
-        valor_comissao = total_venda_item_com_icms * percentual_comissao
-        
-        return round_currency(valor_comissao)
+        percentual_comissao = CommissionService.calculate_commission_percentage(rentabilidade_total, rules)
+        return CommissionService._apply_commission_rate(total_venda_item_com_icms, percentual_comissao)
     
     @staticmethod
     def _calculate_unit_profitability_with_icms(valor_com_icms_venda: float, valor_com_icms_compra: float) -> float:
@@ -107,7 +96,7 @@ class CommissionService:
         if valor_com_icms_compra == 0:
             return 0.0
         
-        return (valor_com_icms_venda / valor_com_icms_compra) - 1
+        return relative_change(to_units(valor_com_icms_venda), to_units(valor_com_icms_compra))
     
     @staticmethod
     def _calculate_unit_profitability(valor_sem_impostos_venda: float, valor_sem_impostos_compra: float) -> float:
@@ -124,7 +113,7 @@ class CommissionService:
         if valor_sem_impostos_compra == 0:
             return 0.0
         
-        return (valor_sem_impostos_venda / valor_sem_impostos_compra) - 1
+        return relative_change(to_units(valor_sem_impostos_venda), to_units(valor_sem_impostos_compra))
     
     @staticmethod
     def _calculate_total_profitability(total_venda_item: float, total_compra_item: float) -> float:
@@ -144,10 +133,10 @@ class CommissionService:
         if total_compra_item == 0:
             return 0.0
         
-        return (total_venda_item / total_compra_item) - 1
+        return relative_change(to_units(total_venda_item), to_units(total_compra_item))
     
     @staticmethod
-    def calculate_commission_value(total_venda_item: float, rentabilidade: float) -> float:
+    def calculate_commission_value(total_venda_item: float, rentabilidade: float, rules: Optional[PricingRules] = None) -> float:
         """
         Calcula o valor da comissão para um item (método original)
         
@@ -157,16 +146,22 @@ class CommissionService:
         Args:
             total_venda_item: Valor total de venda do item
             rentabilidade: Rentabilidade do item em decimal
+            rules: Regras de preço do cálculo (padrão: versão corrente)
             
         Returns:
             float: Valor da comissão em R$
         """
-        percentual_comissao = CommissionService.calculate_commission_percentage(rentabilidade)
-        valor_comissao = total_venda_item * percentual_comissao
-        return round_currency(valor_comissao)
+        percentual_comissao = CommissionService.calculate_commission_percentage(rentabilidade, rules)
+        return CommissionService._apply_commission_rate(total_venda_item, percentual_comissao)
+
+    @staticmethod
+    def _apply_commission_rate(total_venda_item: float, percentual_comissao: float) -> float:
+        """total * percentual em inteiros, arredondado uma vez para centavos (HALF_UP)"""
+        valor_comissao = to_units(total_venda_item) * to_units(percentual_comissao)
+        return from_units(rescale(valor_comissao, 2 * MICROS, CENTS), CENTS)
     
     @staticmethod
-    def calculate_budget_total_commission(items_data: List[Dict]) -> Dict:
+    def calculate_budget_total_commission(items_data: List[Dict], rules: Optional[PricingRules] = None) -> Dict:
         """
         Calcula comissão total do pedido e resumo por faixas
         
@@ -175,6 +170,7 @@ class CommissionService:
         
         Args:
             items_data: Lista de dados dos itens do pedido
+            rules: Regras de preço do cálculo (padrão: versão corrente)
             
         Returns:
             dict: Resumo das comissões calculadas
@@ -189,8 +185,8 @@ class CommissionService:
             rentabilidade = item.get('rentabilidade_item', 0.0)
             
             # Calcular comissão do item
-            percentual_comissao = CommissionService.calculate_commission_percentage(rentabilidade)
-            valor_comissao = CommissionService.calculate_commission_value(total_venda_item, rentabilidade)
+            percentual_comissao = CommissionService.calculate_commission_percentage(rentabilidade, rules)
+            valor_comissao = CommissionService.calculate_commission_value(total_venda_item, rentabilidade, rules)
             
             # Somar ao total
             total_commission += valor_comissao
@@ -227,7 +223,7 @@ class CommissionService:
         """
         brackets_info = []
         
-        for i, bracket in enumerate(CommissionService.COMMISSION_BRACKETS):
+        for i, bracket in enumerate(pricing_rules.current().commission_brackets):
             min_perc = bracket["min_profitability"] * 100
             max_perc = bracket["max_profitability"] * 100 if bracket["max_profitability"] != float('inf') else None
             comm_perc = bracket["commission_rate"] * 100
@@ -277,23 +273,25 @@ class CommissionService:
         return examples
     
     @staticmethod
-    def validate_commission_calculation(rentabilidade: float, valor_total_venda: float) -> Dict:
+    def validate_commission_calculation(rentabilidade: float, valor_total_venda: float, rules: Optional[PricingRules] = None) -> Dict:
         """
         Valida e documenta o cálculo de comissão para auditoria
         
         Args:
             rentabilidade: Rentabilidade do item
             valor_total_venda: Valor total de venda do item
+            rules: Regras de preço do cálculo (padrão: versão corrente)
             
         Returns:
             dict: Detalhes da validação e cálculo
         """
-        percentual_comissao = CommissionService.calculate_commission_percentage(rentabilidade)
-        valor_comissao = CommissionService.calculate_commission_value(valor_total_venda, rentabilidade)
+        rules = rules or pricing_rules.current()
+        percentual_comissao = CommissionService.calculate_commission_percentage(rentabilidade, rules)
+        valor_comissao = CommissionService.calculate_commission_value(valor_total_venda, rentabilidade, rules)
         
         # Identificar a faixa aplicada
         faixa_aplicada = None
-        for bracket in CommissionService.COMMISSION_BRACKETS:
+        for bracket in rules.commission_brackets:
             if rentabilidade >= bracket["min_profitability"] and rentabilidade < bracket["max_profitability"]:
                 faixa_aplicada = bracket
                 break
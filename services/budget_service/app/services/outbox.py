@@ -0,0 +1,124 @@
+"""
+Outbox transacional de eventos do budget_service
+
+Eventos são gravados na tabela `budget_event_outbox` na mesma transação da
+alteração do orçamento e publicados depois, em lotes, por um relay em
+background. Assim as requisições não esperam o Redis e nenhum evento é perdido
+se o Redis estiver fora do ar.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import SessionLocal
+from app.core.events import BaseEvent
+from app.core.messaging import BUDGET_EVENTS_STREAM, event_bus, redis_client
+from app.models.outbox import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+
+def add_event(db: AsyncSession, event: BaseEvent, stream: str = BUDGET_EVENTS_STREAM) -> None:
+    """Registrar evento no outbox; é gravado junto com a transação do chamador"""
+    db.add(OutboxEvent(stream=stream, payload=json.dumps(event.model_dump(), default=str)))
+
+
+class OutboxRelay:
+    """
+    Publica o outbox no event bus em lotes (entrega at-least-once)
+
+    As linhas são travadas com SKIP LOCKED (vários workers podem publicar em
+    paralelo), publicadas e removidas na mesma transação. Se o processo cair
+    entre a publicação e o commit, o lote é publicado de novo; consumidores
+    devem tolerar duplicatas.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession] = SessionLocal,
+        batch_size: int = 100,
+        poll_interval: float = 1.0,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def notify(self) -> None:
+        """Acordar o relay após um commit que gravou eventos"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def drain_once(self) -> int:
+        """Publicar e remover um lote; retorna quantos eventos foram publicados"""
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(OutboxEvent)
+                .order_by(OutboxEvent.id)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            rows = result.scalars().all()
+            if not rows:
+                return 0
+
+            by_stream: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+            for row in rows:
+                by_stream[row.stream].append(json.loads(row.payload))
+            for stream, events in by_stream.items():
+                await event_bus.publish_many(stream, events)
+
+            await db.execute(delete(OutboxEvent).where(OutboxEvent.id.in_([row.id for row in rows])))
+            await db.commit()
+            return len(rows)
+
+    async def run(self) -> None:
+        self._wakeup = asyncio.Event()
+        backoff = 1.0
+        while True:
+            # Limpo antes de drenar para não perder um notify() durante o lote
+            self._wakeup.clear()
+            try:
+                await redis_client.ensure_connected()
+                relayed = await self.drain_once()
+                backoff = 1.0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Outbox relay error, retrying in %.0fs: %s", backoff, e)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 60.0)
+                continue
+
+            if relayed < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._wakeup = None
+
+
+# Instância global do relay
+outbox_relay = OutboxRelay(
+    batch_size=int(os.getenv("OUTBOX_BATCH_SIZE", "100")),
+    poll_interval=float(os.getenv("OUTBOX_POLL_INTERVAL", "1.0")),
+)
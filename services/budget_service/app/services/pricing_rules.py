@@ -0,0 +1,239 @@
+"""
+Regras de preço versionadas: faixas de comissão, PIS/COFINS, IPI válidos e ICMS padrão
+
+As regras ficam na tabela `pricing_rule_sets`, uma linha (JSON) por versão; uma
+alteração grava uma versão nova, nunca edita a anterior. Cada worker mantém a
+versão mais recente compilada em `PricingRules`:
+
+- faixas de comissão como dois arrays (mínimos e taxas) consultados com bisect
+- percentuais de IPI aceitos como frozenset de micro-unidades (app.utils.money)
+- PIS/COFINS em micro-unidades, pronto para a aritmética inteira
+
+`pricing_rules.current()` é uma leitura de atributo. A troca de versão é
+atômica (um novo objeto imutável); um cálculo de orçamento usa um único
+snapshot do início ao fim e grava a versão em `budgets.pricing_rules_version`.
+
+Hot reload: o worker que publica troca na hora; os demais consultam a versão
+mais recente a cada PRICING_RULES_REFRESH_SECONDS. Sem banco (testes, scripts)
+valem as regras embutidas (`DEFAULT_RULES`, versão 0).
+"""
+
+import asyncio
+import json
+import logging
+import os
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, List, Mapping, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import SessionLocal
+from app.models.pricing_rules import PricingRuleSet
+from app.utils.money import to_units
+
+logger = logging.getLogger(__name__)
+
+# Regras embutidas (versão 0), iguais à versão 1 semeada pela migration 0106
+DEFAULT_RULES: Dict[str, Any] = {
+    "commission_brackets": [
+        {"min_profitability": 0.0, "commission_rate": 0.0},    # < 20% = 0%
+        {"min_profitability": 0.20, "commission_rate": 0.01},  # 20-29,99% = 1%
+        {"min_profitability": 0.30, "commission_rate": 0.015},  # 30-39,99% = 1.5%
+        {"min_profitability": 0.40, "commission_rate": 0.025},  # 40-49,99% = 2.5%
+        {"min_profitability": 0.50, "commission_rate": 0.03},  # 50-59,99% = 3%
+        {"min_profitability": 0.60, "commission_rate": 0.04},  # 60-79,99% = 4%
+        {"min_profitability": 0.80, "commission_rate": 0.05},  # >= 80% = 5%
+    ],
+    "pis_cofins_percentage": 0.0925,  # 9.25%
+    "icms_default_percentage": 0.18,  # 18%
+    "ipi_valid_percentages": [0.0, 0.0325, 0.05],  # 0%, 3.25%, 5%
+}
+
+
+def _fraction(rules: Mapping[str, Any], key: str) -> float:
+    value = float(rules[key])
+    if not 0 <= value <= 1:
+        raise ValueError(f"{key} deve estar entre 0 e 1 (formato decimal)")
+    return value
+
+
+@dataclass(frozen=True, slots=True)
+class PricingRules:
+    """Versão compilada das regras (percentuais em fração, ex.: 0.0925)"""
+
+    version: int
+    commission_thresholds: Tuple[float, ...]  # mínimos de rentabilidade, crescentes
+    commission_rates: Tuple[float, ...]
+    pis_cofins_percentage: float
+    icms_default_percentage: float
+    ipi_valid_percentages: Tuple[float, ...]
+    pis_cofins_units: int
+    ipi_valid_units: FrozenSet[int]
+
+    @classmethod
+    def compile(cls, version: int, rules: Mapping[str, Any]) -> "PricingRules":
+        """
+        Valida e compila as regras
+
+        Raises:
+            ValueError: regra ausente ou fora do formato esperado
+        """
+        try:
+            brackets = sorted(
+                (float(bracket["min_profitability"]), float(bracket["commission_rate"]))
+                for bracket in rules["commission_brackets"]
+            )
+            ipi = sorted({float(value) for value in rules["ipi_valid_percentages"]})
+            pis_cofins = _fraction(rules, "pis_cofins_percentage")
+            icms_default = _fraction(rules, "icms_default_percentage")
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Regras de preço incompletas ou inválidas: {e}") from e
+
+        if not brackets:
+            raise ValueError("commission_brackets deve ter ao menos uma faixa")
+        thresholds = tuple(minimum for minimum, _ in brackets)
+        if len(set(thresholds)) != len(thresholds):
+            raise ValueError("commission_brackets não pode repetir min_profitability")
+        rates = tuple(rate for _, rate in brackets)
+        if any(not 0 <= rate <= 1 for rate in rates):
+            raise ValueError("commission_rate deve estar entre 0 e 1 (formato decimal)")
+        if not ipi or any(not 0 <= value <= 1 for value in ipi):
+            raise ValueError("ipi_valid_percentages deve ter percentuais entre 0 e 1 (formato decimal)")
+
+        return cls(
+            version=version,
+            commission_thresholds=thresholds,
+            commission_rates=rates,
+            pis_cofins_percentage=pis_cofins,
+            icms_default_percentage=icms_default,
+            ipi_valid_percentages=tuple(ipi),
+            pis_cofins_units=to_units(pis_cofins),
+            ipi_valid_units=frozenset(to_units(value) for value in ipi),
+        )
+
+    def commission_rate(self, rentabilidade: float) -> float:
+        """Taxa da faixa com o maior mínimo <= rentabilidade (abaixo da primeira faixa: 0)"""
+        index = bisect_right(self.commission_thresholds, rentabilidade) - 1
+        return self.commission_rates[index] if index >= 0 else 0.0
+
+    def accepts_ipi(self, percentual_ipi: Any) -> bool:
+        try:
+            return to_units(percentual_ipi) in self.ipi_valid_units
+        except (ValueError, TypeError):
+            return False
+
+    def ipi_description(self) -> str:
+        """Ex.: '0%, 3.25% ou 5%' para mensagens de validação"""
+        labels = [f"{value * 100:g}%" for value in self.ipi_valid_percentages]
+        return labels[0] if len(labels) == 1 else f"{', '.join(labels[:-1])} ou {labels[-1]}"
+
+    @property
+    def commission_brackets(self) -> List[Dict[str, float]]:
+        """Faixas com limite superior exclusivo (a última vai até infinito)"""
+        upper = self.commission_thresholds[1:] + (float("inf"),)
+        return [
+            {"min_profitability": minimum, "max_profitability": maximum, "commission_rate": rate}
+            for minimum, maximum, rate in zip(self.commission_thresholds, upper, self.commission_rates)
+        ]
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Regras no formato gravado em `pricing_rule_sets.rules`"""
+        return {
+            "commission_brackets": [
+                {"min_profitability": minimum, "commission_rate": rate}
+                for minimum, rate in zip(self.commission_thresholds, self.commission_rates)
+            ],
+            "pis_cofins_percentage": self.pis_cofins_percentage,
+            "icms_default_percentage": self.icms_default_percentage,
+            "ipi_valid_percentages": list(self.ipi_valid_percentages),
+        }
+
+
+class PricingRulesRegistry:
+    """Versão corrente das regras neste worker, recarregada do banco em background"""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession] = SessionLocal,
+        refresh_interval: float = 30.0,
+    ):
+        self.session_factory = session_factory
+        self.refresh_interval = refresh_interval
+        self._rules = PricingRules.compile(0, DEFAULT_RULES)
+        self._task: Optional[asyncio.Task] = None
+
+    def current(self) -> PricingRules:
+        return self._rules
+
+    def _install(self, row: PricingRuleSet) -> bool:
+        if row.version <= self._rules.version:
+            return False
+        self._rules = PricingRules.compile(row.version, json.loads(row.rules))
+        logger.info("Pricing rules version %s loaded", row.version)
+        return True
+
+    async def refresh(self) -> bool:
+        """Carregar a versão mais recente, se for mais nova que a atual"""
+        async with self.session_factory() as db:
+            row = (await db.execute(
+                select(PricingRuleSet).order_by(PricingRuleSet.version.desc()).limit(1)
+            )).scalar_one_or_none()
+        return row is not None and self._install(row)
+
+    async def publish(self, db: AsyncSession, rules: Mapping[str, Any], created_by: str) -> PricingRules:
+        """
+        Gravar uma nova versão e passar a usá-la neste worker
+
+        Publicações concorrentes disputam o mesmo número de versão (chave
+        primária): a segunda falha com IntegrityError no commit.
+
+        Raises:
+            ValueError: regras inválidas (nada é gravado)
+        """
+        compiled = PricingRules.compile(0, rules)
+        latest = (await db.execute(select(func.max(PricingRuleSet.version)))).scalar() or 0
+        row = PricingRuleSet(
+            version=latest + 1,
+            rules=json.dumps(compiled.as_dict()),
+            created_by=created_by,
+        )
+        db.add(row)
+        await db.commit()
+        self._install(row)
+        return self._rules
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Pricing rules refresh failed: %s", e)
+
+    async def start(self) -> None:
+        """Carregar as regras antes de atender requisições e iniciar o recarregamento"""
+        try:
+            await self.refresh()
+        except Exception as e:
+            logger.warning("Pricing rules not loaded, using version %s: %s", self._rules.version, e)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Instância global das regras
+pricing_rules = PricingRulesRegistry(
+    refresh_interval=float(os.getenv("PRICING_RULES_REFRESH_SECONDS", "30")),
+)
@@ -4,8 +4,11 @@ Cliente HTTP para comunicação com o User Service
 
 import httpx
 import os
-from typing import Optional, Dict, Any
+import time
+from typing import Optional, Dict, Any, List
 from pydantic import BaseModel
+from app.core.tracing import TracingTransport
+from app.utils.cache import TTLCache
 import logging
 
 logger = logging.getLogger(__name__)
@@ -21,65 +24,270 @@ class UserInfo(BaseModel):
     is_active: bool
 
 
+class CircuitBreaker:
+    """
+    Circuit breaker simples para chamadas ao User Service
+
+    - closed: chamadas passam normalmente
+    - open: após `failure_threshold` falhas seguidas, chamadas são recusadas
+      até `reset_timeout` segundos se passarem
+    - half-open: após o timeout, uma única chamada de teste é permitida (as
+      demais seguem recusadas e usam o cache); sucesso fecha o circuito, falha
+      o reabre. Uma chamada de teste sem resultado em `reset_timeout` segundos
+      é descartada e outra pode ser feita
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probe_started_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow_request(self) -> bool:
+        state = self.state
+        if state != "half-open":
+            return state == "closed"
+        now = time.monotonic()
+        if self.probe_started_at is not None and now - self.probe_started_at < self.reset_timeout:
+            return False
+        self.probe_started_at = now
+        return True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self.probe_started_at = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == "half-open" or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self.probe_started_at = None
+
+
 class UserClient:
     """Cliente para comunicação com o User Service"""
-    
+
     def __init__(self):
         # URL do user service - usar variável de ambiente ou padrão
         self.user_service_url = os.getenv("USER_SERVICE_URL", "http://user_service:8000")
-        self.timeout = 10.0
-    
+        self.timeout = float(os.getenv("USER_SERVICE_TIMEOUT", "2.0"))
+        self.retries = int(os.getenv("USER_SERVICE_RETRIES", "1"))
+        # Deve ser <= USER_BATCH_MAX_SIZE do user_service
+        self.batch_size = int(os.getenv("USER_BATCH_MAX_SIZE", "200"))
+        self.cache: TTLCache[UserInfo] = TTLCache(
+            maxsize=int(os.getenv("USER_CACHE_MAXSIZE", "1024")),
+            ttl=float(os.getenv("USER_CACHE_TTL", "300")),
+        )
+        self.circuit_breaker = CircuitBreaker(
+            failure_threshold=int(os.getenv("USER_SERVICE_CB_THRESHOLD", "3")),
+            reset_timeout=float(os.getenv("USER_SERVICE_CB_RESET", "30")),
+        )
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _build_client(self) -> httpx.AsyncClient:
+        """Cria cliente com pool de conexões keep-alive"""
+        return httpx.AsyncClient(
+            base_url=self.user_service_url,
+            timeout=httpx.Timeout(self.timeout, connect=min(self.timeout, 1.0)),
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=30.0),
+            transport=TracingTransport(httpx.AsyncHTTPTransport(retries=self.retries)),
+            headers={"Content-Type": "application/json"},
+        )
+
+    async def startup(self) -> None:
+        """Abrir o pool de conexões (chamado no startup da aplicação)"""
+        if self._client is None or self._client.is_closed:
+            self._client = self._build_client()
+
+    async def close(self) -> None:
+        """Fechar o pool de conexões (chamado no shutdown da aplicação)"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Criação preguiçosa para uso fora do ciclo de vida da aplicação (scripts)
+        if self._client is None or self._client.is_closed:
+            self._client = self._build_client()
+        return self._client
+
     async def get_user_by_username(self, username: str, auth_token: str) -> Optional[UserInfo]:
         """
         Obter informações do usuário pelo username
-        
+
+        Usa o cache local quando possível. Se o User Service estiver lento ou
+        indisponível (circuito aberto), retorna o último valor conhecido.
+
         Args:
             username: Nome do usuário
             auth_token: Token JWT para autenticação
-            
+
         Returns:
             UserInfo ou None se não encontrado
         """
+        cached = self.cache.get(username)
+        if cached is not None:
+            return cached
+
+        if not self.circuit_breaker.allow_request():
+            logger.warning("User service circuit open, using cached data for %s", username)
+            return self.cache.get_stale(username)
+
         try:
-            headers = {
-                "Authorization": f"Bearer {auth_token}",
-                "Content-Type": "application/json"
-            }
-            
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    f"{self.user_service_url}/api/v1/users/by-username/{username}",
-                    headers=headers
-                )
-                
-                if response.status_code == 200:
-                    user_data = response.json()
-                    return UserInfo(**user_data)
-                else:
-                    logger.warning(f"Failed to get user info for {username}: {response.status_code}")
-                    return None
-                    
+            response = await self.client.get(
+                f"/api/v1/users/by-username/{username}",
+                headers={"Authorization": f"Bearer {auth_token}"}
+            )
         except httpx.TimeoutException:
-            logger.error(f"Timeout when getting user info for {username}")
-            return None
+            logger.error("Timeout when getting user info for %s", username)
+            self.circuit_breaker.record_failure()
+            return self.cache.get_stale(username)
         except httpx.RequestError as e:
-            logger.error(f"Request error when getting user info for {username}: {e}")
-            return None
+            logger.error("Request error when getting user info for %s: %s", username, e)
+            self.circuit_breaker.record_failure()
+            return self.cache.get_stale(username)
         except Exception as e:
-            logger.error(f"Unexpected error when getting user info for {username}: {e}")
+            logger.error("Unexpected error when getting user info for %s: %s", username, e)
+            self.circuit_breaker.record_failure()
+            return self.cache.get_stale(username)
+
+        if response.status_code >= 500:
+            logger.warning("Failed to get user info for %s: %s", username, response.status_code)
+            self.circuit_breaker.record_failure()
+            return self.cache.get_stale(username)
+
+        self.circuit_breaker.record_success()
+        if response.status_code == 200:
+            user_info = UserInfo(**response.json())
+            self.cache.set(username, user_info)
+            return user_info
+
+        logger.warning("Failed to get user info for %s: %s", username, response.status_code)
+        return None
+
+    async def get_users_by_usernames(self, usernames: List[str], auth_token: str) -> Dict[str, UserInfo]:
+        """
+        Obter vários usuários em uma única chamada (POST /users/batch)
+
+        Usernames já presentes no cache não são consultados. Em caso de falha,
+        retorna o que houver em cache (inclusive expirado).
+
+        Returns:
+            Mapa username -> UserInfo (usernames não encontrados ficam de fora)
+        """
+        found: Dict[str, UserInfo] = {}
+        missing: List[str] = []
+        for username in dict.fromkeys(usernames):
+            cached = self.cache.get(username)
+            if cached is not None:
+                found[username] = cached
+            else:
+                missing.append(username)
+
+        if not missing:
+            return found
+
+        def _with_stale() -> Dict[str, UserInfo]:
+            for username in missing:
+                stale = self.cache.get_stale(username)
+                if stale is not None:
+                    found[username] = stale
+            return found
+
+        if not self.circuit_breaker.allow_request():
+            return _with_stale()
+
+        try:
+            for start in range(0, len(missing), self.batch_size):
+                response = await self.client.post(
+                    "/api/v1/users/batch",
+                    json={"usernames": missing[start:start + self.batch_size]},
+                    headers={"Authorization": f"Bearer {auth_token}"}
+                )
+                if response.status_code >= 500:
+                    self.circuit_breaker.record_failure()
+                    return _with_stale()
+                if response.status_code != 200:
+                    # O serviço respondeu: libera a chamada de teste do half-open
+                    self.circuit_breaker.record_success()
+                    logger.warning("Failed to get users in batch: %s", response.status_code)
+                    return _with_stale()
+                for username, user_data in response.json().get("users", {}).items():
+                    user_info = UserInfo(**user_data)
+                    self.cache.set(username, user_info)
+                    found[username] = user_info
+        except httpx.HTTPError as e:
+            logger.error("Request error when getting users in batch: %s", e)
+            self.circuit_breaker.record_failure()
+            return _with_stale()
+        except Exception as e:
+            # Corpo inválido (não JSON, UserInfo rejeitado): conta como falha e libera o half-open
+            logger.error("Unexpected error when getting users in batch: %s", e)
+            self.circuit_breaker.record_failure()
+            return _with_stale()
+
+        self.circuit_breaker.record_success()
+        return found
+
+    async def get_users(self, auth_token: str, page_size: int = 500) -> Optional[List[UserInfo]]:
+        """
+        Listar todos os usuários (requer token de administrador)
+
+        Returns:
+            Lista de UserInfo ou None se a listagem falhar
+        """
+        users: List[UserInfo] = []
+        skip = 0
+        try:
+            while True:
+                response = await self.client.get(
+                    "/api/v1/users/",
+                    params={"skip": skip, "limit": page_size},
+                    headers={"Authorization": f"Bearer {auth_token}"}
+                )
+                if response.status_code in (401, 403):
+                    logger.error("User service rejected the credentials when listing users: %s", response.status_code)
+                    return None
+                if response.status_code != 200:
+                    logger.warning("Failed to list users: %s", response.status_code)
+                    return None
+                page = [UserInfo(**user_data) for user_data in response.json()]
+                users.extend(page)
+                if len(page) < page_size:
+                    return users
+                skip += page_size
+        except httpx.HTTPError as e:
+            logger.error("Request error when listing users: %s", e)
             return None
-    
+
+    def invalidate(self, username: Optional[str] = None) -> None:
+        """Remover usuário (ou todos) do cache local"""
+        if username is None:
+            self.cache.clear()
+        else:
+            self.cache.pop(username)
+
     async def health_check(self) -> bool:
         """
         Verificar se o User Service está disponível
-        
+
         Returns:
             True se o serviço estiver disponível
         """
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                response = await client.get(f"{self.user_service_url}/health")
-                return response.status_code == 200
+            response = await self.client.get("/health", timeout=5.0)
+            return response.status_code == 200
         except Exception:
             return False
 
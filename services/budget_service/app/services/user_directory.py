@@ -0,0 +1,222 @@
+"""
+Diretório local de usuários (read model) alimentado por eventos do User Service
+
+O user_service publica `user.created`, `user.updated` e `user.deleted` no stream
+`user_events` (Redis Streams). Este módulo mantém em memória os dados necessários para exibição
+(id, username, full_name, email, role, is_active), evitando uma chamada HTTP ao
+user_service na exportação de PDF e em telas que mostram o nome do vendedor.
+
+O diretório é carregado por um snapshot na inicialização e reconciliado
+periodicamente. A listagem exige um administrador no user_service: com
+USER_SERVICE_ACCOUNT (username de uma conta de serviço admin) um token de curta
+duração é emitido a cada reconciliação; USER_SERVICE_TOKEN (token fixo) segue
+aceito, mas para de funcionar quando expira. Após uma reconexão o consumidor continua a partir
+do último id lido, então eventos publicados enquanto estava desconectado não
+são perdidos (desde que ainda estejam no stream).
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.core.messaging import USER_EVENTS_STREAM, event_bus, redis_client
+from app.core.security import create_service_token
+from app.services.user_client import UserInfo, user_client
+
+logger = logging.getLogger(__name__)
+
+
+class UserDirectory:
+    """Read model em memória dos usuários, indexado por username e por id"""
+
+    def __init__(self):
+        self._by_username: Dict[str, UserInfo] = {}
+        self._username_by_id: Dict[int, str] = {}
+        self.last_snapshot_at: Optional[float] = None
+        self.last_event_at: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._by_username)
+
+    def get(self, username: str) -> Optional[UserInfo]:
+        return self._by_username.get(username)
+
+    def get_by_id(self, user_id: int) -> Optional[UserInfo]:
+        username = self._username_by_id.get(user_id)
+        return self._by_username.get(username) if username is not None else None
+
+    def upsert(self, user: UserInfo) -> None:
+        """Inserir ou atualizar usuário (trata troca de username pelo id)"""
+        previous_username = self._username_by_id.get(user.id)
+        if previous_username is not None and previous_username != user.username:
+            self._by_username.pop(previous_username, None)
+        self._by_username[user.username] = user
+        self._username_by_id[user.id] = user.username
+
+    def load_snapshot(self, users: Iterable[UserInfo]) -> None:
+        """Substituir todo o conteúdo pelo snapshot fornecido"""
+        by_username: Dict[str, UserInfo] = {}
+        username_by_id: Dict[int, str] = {}
+        for user in users:
+            by_username[user.username] = user
+            username_by_id[user.id] = user.username
+        self._by_username = by_username
+        self._username_by_id = username_by_id
+        self.last_snapshot_at = time.time()
+        logger.info("User directory snapshot loaded with %s users", len(by_username))
+
+    def apply_event(self, event: Dict[str, Any]) -> bool:
+        """
+        Aplicar um evento do user_service
+
+        Returns:
+            True se o evento alterou o diretório
+        """
+        event_type = event.get("event_type")
+        data = event.get("data") or {}
+
+        if event_type in ("user.created", "user.updated"):
+            try:
+                user = UserInfo(**{field: data[field] for field in UserInfo.model_fields})
+            except (KeyError, ValueError) as e:
+                logger.warning("Ignoring malformed %s event: %s", event_type, e)
+                return False
+            self.upsert(user)
+        elif event_type == "user.deleted":
+            # Exclusão no user_service é lógica (is_active=False); manter o nome para
+            # exibição de orçamentos antigos
+            user = self.get_by_id(data.get("user_id"))
+            if user is None:
+                return False
+            self.upsert(user.model_copy(update={"is_active": False}))
+        else:
+            return False
+
+        self.last_event_at = time.time()
+        return True
+
+
+class UserDirectoryConsumer:
+    """Consome o stream `user_events` e mantém um UserDirectory atualizado"""
+
+    def __init__(self, directory: UserDirectory, reconcile_interval: float = 600.0):
+        self.directory = directory
+        self.reconcile_interval = reconcile_interval
+        self.service_account = os.getenv("USER_SERVICE_ACCOUNT")
+        self.service_token = os.getenv("USER_SERVICE_TOKEN")
+        self._task: Optional[asyncio.Task] = None
+
+    def auth_token(self) -> Optional[str]:
+        """Token novo da conta de serviço ou, sem ela, o token fixo configurado"""
+        if self.service_account:
+            return create_service_token(self.service_account)
+        return self.service_token
+
+    async def reconcile(self) -> bool:
+        """Recarregar o snapshot completo a partir do user_service"""
+        token = self.auth_token()
+        if not token:
+            return False
+        users = await user_client.get_users(token)
+        if users is None:
+            # Sem reconciliação o diretório depende só dos eventos: não falhar em silêncio
+            logger.error(
+                "User directory reconcile failed (last snapshot: %s); check USER_SERVICE_ACCOUNT/USER_SERVICE_TOKEN",
+                self.directory.last_snapshot_at,
+            )
+            return False
+        self.directory.load_snapshot(users)
+        return True
+
+    def handle_event(self, event: Any) -> bool:
+        if not isinstance(event, dict):
+            logger.warning("Ignoring malformed user event")
+            return False
+        return self.directory.apply_event(event)
+
+    async def run(self) -> None:
+        last_id: Optional[str] = None
+        backoff = 1.0
+        while True:
+            try:
+                await redis_client.ensure_connected()
+                if last_id is None:
+                    # Primeira leitura: snapshot completo e eventos a partir de agora
+                    last_id = await event_bus.latest_id(USER_EVENTS_STREAM)
+                    await self.reconcile()
+                next_reconcile = time.monotonic() + self.reconcile_interval
+                backoff = 1.0
+                while True:
+                    for message_id, event in await event_bus.read(USER_EVENTS_STREAM, last_id, block_ms=1000):
+                        last_id = message_id
+                        self.handle_event(event)
+                    if time.monotonic() >= next_reconcile:
+                        await self.reconcile()
+                        next_reconcile = time.monotonic() + self.reconcile_interval
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # O cliente Redis é compartilhado com o outbox relay: não fechar aqui
+                logger.warning("User directory consumer error, retrying in %.0fs: %s", backoff, e)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 60.0)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Instância global do diretório
+user_directory = UserDirectory()
+user_directory_consumer = UserDirectoryConsumer(
+    user_directory,
+    reconcile_interval=float(os.getenv("USER_DIRECTORY_RECONCILE_SECONDS", "600")),
+)
+
+
+async def resolve_users(usernames: List[str], auth_token: Optional[str] = None) -> Dict[str, UserInfo]:
+    """
+    Resolver vários usernames (ex.: vendedores de uma página de orçamentos)
+
+    Lê do diretório local e busca os ausentes com uma única chamada em lote
+    ao user_service.
+    """
+    found: Dict[str, UserInfo] = {}
+    missing: List[str] = []
+    for username in dict.fromkeys(u for u in usernames if u):
+        user = user_directory.get(username)
+        if user is not None:
+            found[username] = user
+        else:
+            missing.append(username)
+
+    if missing and auth_token:
+        fetched = await user_client.get_users_by_usernames(missing, auth_token)
+        for user in fetched.values():
+            user_directory.upsert(user)
+        found.update(fetched)
+    return found
+
+
+async def start_user_directory() -> None:
+    """Iniciar consumo de eventos de usuário (não bloqueia o startup)"""
+    if os.getenv("USER_DIRECTORY_ENABLED", "true").lower() != "true":
+        return
+    if not user_directory_consumer.auth_token():
+        logger.warning("USER_SERVICE_ACCOUNT not set: user directory will be kept by events only, without snapshots")
+    user_directory_consumer.start()
+
+
+async def stop_user_directory() -> None:
+    await user_directory_consumer.stop()
@@ -0,0 +1,131 @@
+"""
+Núcleo numérico de ponto fixo para os cálculos de orçamento
+
+Valores são inteiros escalados por 10**casas: centavos (`CENTS`, 2 casas) para
+valores monetários finais e micro-unidades (`MICROS`, 6 casas) para valores por
+kg, percentuais e intermediários. Somas e produtos de inteiros são exatos; cada
+regra arredonda uma única vez, com ROUND_HALF_UP (empate afasta do zero), a
+mesma semântica de `Decimal.quantize(..., ROUND_HALF_UP)`.
+
+A conversão de um float usa os mesmos dígitos de `Decimal(str(value))` (o
+`repr` mais curto), então `quantize(value, 2)` é idêntico ao antigo
+`round_currency`. O caminho rápido de `to_units` arredonda o próprio float
+escalado; só valores a menos de 0,001 unidade de um empate (x,5) passam pelo
+parse exato de `str(value)`.
+
+Uso típico (R$/kg * (1 - ICMS), arredondado em micro-unidades):
+
+    valor, icms = to_units(10.5), to_units(0.18)
+    from_units(rescale(valor * (MICRO - icms), 2 * MICROS, MICROS))  # 8.61
+"""
+from decimal import Decimal
+from math import floor
+from typing import Any, Tuple
+
+CENTS = 2  # R$ 0,01
+MICROS = 6  # R$/kg, percentuais e intermediários
+MICRO = 10 ** MICROS
+
+_POW10 = tuple(10 ** n for n in range(40))
+# Abaixo de 2**32 o ulp do float é < 1e-6: só um decimal de até 6 casas
+# arredonda para cada float, e ele é o mesmo que o repr produz
+_FAST_LIMIT = 1e9
+# Abaixo de 2**40, float escalado e dígitos do repr diferem em < 2**-11 unidade:
+# longe do empate, arredondar o float dá o mesmo resultado que o decimal
+_SCALED_LIMIT = 1e12
+_TIE_MARGIN = 1e-3
+
+
+def _pow10(n: int) -> int:
+    return _POW10[n] if n < 40 else 10 ** n
+
+
+def _parse(text: str) -> Tuple[int, int]:
+    mantissa, _, exponent = text.strip().lower().partition('e')
+    whole, _, fraction = mantissa.partition('.')
+    coefficient = int(whole + fraction)
+    places = len(fraction) - (int(exponent) if exponent else 0)
+    if places < 0:
+        return coefficient * _pow10(-places), 0
+    return coefficient, places
+
+
+def exact(value: Any) -> Tuple[int, int]:
+    """
+    Decompõe `value` em (coeficiente, casas), com value == coeficiente / 10**casas
+
+    Aceita float, int, Decimal e str numérica; None e "" valem 0.
+    Raises:
+        ValueError: valor não numérico ou não finito (NaN, infinito)
+    """
+    if type(value) is float:
+        if -_FAST_LIMIT < value < _FAST_LIMIT:
+            units = round(value * MICRO)
+            if units / MICRO == value:
+                return units, MICROS
+        return _parse(repr(value))
+    if value is None or value == "":
+        return 0, 0
+    if isinstance(value, int):
+        return int(value), 0
+    if isinstance(value, Decimal):
+        if not value.is_finite():
+            raise ValueError(f"Valor não finito: {value}")
+        sign, digits, exponent = value.as_tuple()
+        coefficient = int(''.join(map(str, digits)))
+        if sign:
+            coefficient = -coefficient
+        if exponent > 0:
+            return coefficient * _pow10(exponent), 0
+        return coefficient, -exponent
+    return _parse(str(value))
+
+
+def div_half_up(numerator: int, denominator: int) -> int:
+    """Divisão inteira arredondada ROUND_HALF_UP (empate afasta do zero)"""
+    if denominator < 0:
+        numerator, denominator = -numerator, -denominator
+    quotient, remainder = divmod(abs(numerator), denominator)
+    if remainder * 2 >= denominator:
+        quotient += 1
+    return quotient if numerator >= 0 else -quotient
+
+
+def rescale(units: int, places: int, to_places: int) -> int:
+    """Muda a escala de `units` de `places` para `to_places` casas (HALF_UP ao reduzir)"""
+    shift = to_places - places
+    if shift >= 0:
+        return units * (_POW10[shift] if shift < 40 else 10 ** shift)
+    divisor = _POW10[-shift] if shift > -40 else 10 ** -shift
+    quotient, remainder = divmod(abs(units), divisor)
+    if remainder * 2 >= divisor:
+        quotient += 1
+    return quotient if units >= 0 else -quotient
+
+
+def to_units(value: Any, places: int = MICROS) -> int:
+    """Valor em inteiros de 10**-places (ex.: centavos com places=2), arredondado HALF_UP"""
+    if type(value) is float and 0 <= places < 40:
+        scaled = value * _POW10[places]
+        if -_SCALED_LIMIT < scaled < _SCALED_LIMIT:
+            units = floor(scaled)
+            fraction = scaled - units
+            if abs(fraction - 0.5) > _TIE_MARGIN:
+                return units + 1 if fraction > 0.5 else units
+    coefficient, value_places = exact(value)
+    return rescale(coefficient, value_places, places)
+
+
+def from_units(units: int, places: int = MICROS) -> float:
+    """Float mais próximo de units / 10**places (divisão inteira corretamente arredondada)"""
+    return units / _POW10[places]
+
+
+def quantize(value: Any, places: int) -> float:
+    """Equivale a float(Decimal(str(value)).quantize(10**-places, ROUND_HALF_UP))"""
+    return from_units(to_units(value, places), places)
+
+
+def relative_change(new_units: int, base_units: int) -> float:
+    """(novo / base) - 1 calculado sem passar por float intermediário"""
+    return (new_units - base_units) / base_units
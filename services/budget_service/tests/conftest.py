@@ -0,0 +1,46 @@
+import asyncio
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.core.metrics import QueryCounter
+from app.models import outbox, pricing_rules  # noqa: F401  (registra as tabelas do outbox e das regras)
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    """Sessões em um SQLite temporário com todas as tabelas criadas"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'budgets.db'}")
+
+    async def _create_all():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    asyncio.run(_create_all())
+    yield sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    asyncio.run(engine.dispose())
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Orçamento de queries por operação/endpoint:
+
+        with query_budget(4):
+            client.get("/api/v1/budgets/1")
+
+    Falha (listando os statements) se o bloco executar mais SQL que o previsto,
+    para que regressões de N+1 quebrem os testes.
+    """
+    @contextmanager
+    def _budget(max_queries: int):
+        with QueryCounter() as queries:
+            yield queries
+        assert queries.count <= max_queries, (
+            f"{queries.count} queries (orçamento: {max_queries}):\n" + "\n".join(queries.statements)
+        )
+
+    return _budget
@@ -0,0 +1,98 @@
+"""
+Testes dos eventos de domínio de orçamentos (gravados via outbox)
+"""
+import asyncio
+import json
+
+from sqlalchemy import select
+
+from app.core.event_bus import EventBus, InMemoryStreamsBackend
+from app.models.budget import BudgetStatus
+from app.models.outbox import OutboxEvent
+from app.schemas.budget import BudgetCreate, BudgetItemCreate, BudgetUpdate
+from app.services import outbox
+from app.services.budget_service import BudgetService
+from app.services.outbox import OutboxRelay
+
+
+def _item(sale_value: float = 12.0) -> BudgetItemCreate:
+    return BudgetItemCreate(
+        description="Chapa de aço",
+        weight=100.0,
+        purchase_value_with_icms=10.0,
+        purchase_icms_percentage=0.18,
+        purchase_value_without_taxes=0.0,
+        sale_value_with_icms=sale_value,
+        sale_icms_percentage=0.18,
+        sale_value_without_taxes=0.0,
+    )
+
+
+def _budget() -> BudgetCreate:
+    return BudgetCreate(order_number="PED-EVT-001", client_name="Cliente Eventos", items=[_item()])
+
+
+async def _staged_events(session_factory) -> list:
+    async with session_factory() as db:
+        rows = (await db.execute(select(OutboxEvent).order_by(OutboxEvent.id))).scalars().all()
+        return [json.loads(row.payload) for row in rows]
+
+
+def test_budget_lifecycle_stages_compact_events(session_factory):
+    async def _run():
+        async with session_factory() as db:
+            budget = await BudgetService.create_budget(db, _budget(), "vendedor")
+            await BudgetService.update_budget(db, budget.id, BudgetUpdate(status=BudgetStatus.APPROVED))
+            await BudgetService.update_budget(db, budget.id, BudgetUpdate(notes="Sem alteração de totais"))
+            await BudgetService.delete_budget(db, budget.id)
+        return await _staged_events(session_factory)
+
+    events = asyncio.run(_run())
+    assert [e["event_type"] for e in events] == [
+        "budget.created",
+        "budget.updated",
+        "budget.status_changed",
+        "budget.deleted",
+    ]
+
+    created, status_only, status_changed, deleted = events
+    assert created["service"] == "budget_service"
+    assert created["data"]["created_by"] == "vendedor"
+    assert created["data"]["status"] == "draft"
+    assert created["data"]["totals"]["total_sale_value"] > 0
+    assert status_changed["data"]["from_status"] == "draft"
+    assert status_changed["data"]["to_status"] == "approved"
+    # Só observações alteradas: nenhum evento; só o status: budget.updated sem totais
+    assert status_only["data"]["totals"] == {}
+    assert deleted["data"]["status"] == "approved"
+    assert deleted["data"]["totals"] == created["data"]["totals"]
+
+
+def test_update_event_carries_changed_totals_only(session_factory):
+    async def _run():
+        async with session_factory() as db:
+            budget = await BudgetService.create_budget(db, _budget(), "vendedor")
+            await BudgetService.update_budget(db, budget.id, BudgetUpdate(items=[_item(sale_value=15.0)]))
+        return await _staged_events(session_factory)
+
+    updated = asyncio.run(_run())[1]
+    assert updated["event_type"] == "budget.updated"
+    assert "total_sale_value" in updated["data"]["totals"]
+    assert updated["data"]["totals"]["total_sale_value"] > updated["data"]["previous"]["total_sale_value"]
+    assert set(updated["data"]["totals"]) == set(updated["data"]["previous"])
+
+
+def test_relay_publishes_budget_events(session_factory, monkeypatch):
+    bus = EventBus(InMemoryStreamsBackend())
+    monkeypatch.setattr(outbox, "event_bus", bus)
+    relay = OutboxRelay(session_factory=session_factory)
+
+    async def _run():
+        async with session_factory() as db:
+            await BudgetService.create_budget(db, _budget(), "vendedor")
+        await relay.drain_once()
+        return await bus.replay("budget_events"), await _staged_events(session_factory)
+
+    published, remaining = asyncio.run(_run())
+    assert [event["event_type"] for _, event in published] == ["budget.created"]
+    assert remaining == []
@@ -0,0 +1,99 @@
+"""
+Testes da validação dos itens em uma passada (todos os erros, com o índice do item)
+"""
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+
+from app.main import app
+from app.models.budget import Budget
+from app.schemas.budget import BudgetCreate, BudgetItemCreate
+from app.services.budget_service import BudgetService
+from app.services.budget_validation import BudgetValidationError, validate_budget_items
+from app.services.pricing_rules import DEFAULT_RULES, PricingRules
+
+
+# Campos de BudgetItemCreate válidos, exceto os de cada teste
+VALUES = dict(
+    purchase_value_with_icms=10.0, purchase_icms_percentage=0.18, purchase_value_without_taxes=0.0,
+    sale_value_with_icms=15.0, sale_icms_percentage=0.18, sale_value_without_taxes=0.0,
+)
+
+
+def _item(**overrides) -> dict:
+    item = {
+        'description': 'Chapa de aço', 'valor_com_icms_compra': 10.0, 'valor_com_icms_venda': 15.0,
+        'peso_compra': 100.0, 'percentual_icms_compra': 0.18, 'percentual_icms_venda': 0.18,
+        'percentual_ipi': 0.0,
+    }
+    item.update(overrides)
+    return item
+
+
+def test_all_errors_are_reported_by_item():
+    items = [
+        _item(percentual_ipi=0.04, peso_compra=None),
+        _item(),
+        _item(description='', valor_com_icms_compra=0.0, percentual_icms_venda=18.0),
+        _item(valor_com_icms_venda=9.0, valor_com_icms_compra=float('nan')),
+    ]
+    errors = validate_budget_items(items)
+    assert [(e.index, e.field) for e in errors] == [
+        (0, 'peso_compra'),
+        (0, 'percentual_ipi'),
+        (2, 'description'),
+        (2, 'valor_com_icms_compra'),
+        (2, 'percentual_icms_venda'),
+        (3, 'valor_com_icms_compra'),
+    ]
+    assert str(errors[1]) == "Item 1: Percentual de IPI deve ser 0%, 3.25% ou 5%"
+    assert errors[2].as_detail()["loc"] == ["body", "items", 2, "description"]
+
+    # Venda abaixo da compra só é erro quando pedido (preview completo)
+    assert [(e.index, e.field) for e in validate_budget_items([_item(valor_com_icms_venda=9.0)], True)] == [
+        (0, 'valor_com_icms_venda'),
+    ]
+    # IPI conferido contra as regras informadas; os itens não são alterados
+    rules = PricingRules.compile(2, {**DEFAULT_RULES, "ipi_valid_percentages": [0.0, 0.04]})
+    assert [e.field for e in validate_budget_items(items[:1], rules=rules)] == ['peso_compra']
+    assert items[0]['percentual_ipi'] == 0.04
+    assert str(validate_budget_items([])[0]) == "Orçamento deve ter pelo menos um item"
+
+
+def test_invalid_items_are_rejected_before_saving(session_factory):
+    budget = BudgetCreate(
+        order_number="PED-VAL-001",
+        client_name="Cliente Validação",
+        items=[
+            BudgetItemCreate(description="", weight=100.0, ipi_percentage=0.05, **VALUES),
+            BudgetItemCreate(description="Chapa", weight=0.0, ipi_percentage=0.07, **VALUES),
+        ],
+    )
+
+    async def _run():
+        async with session_factory() as db:
+            with pytest.raises(BudgetValidationError) as raised:
+                await BudgetService.create_budget(db, budget, "vendedor")
+            return raised.value, (await db.execute(select(func.count(Budget.id)))).scalar()
+
+    error, saved = asyncio.run(_run())
+    assert saved == 0
+    assert [(e.index, e.field) for e in error.errors] == [(0, 'description'), (1, 'peso_compra'), (1, 'percentual_ipi')]
+    assert str(error).startswith("Dados inválidos: Item 1: Descrição é obrigatória; Item 2: ")
+
+
+def test_preview_returns_every_item_error():
+    items = [
+        {"description": "Chapa", "valor_com_icms_compra": 10.0, "valor_com_icms_venda": 15.0},
+        {"description": "", "valor_com_icms_compra": -1.0, "valor_com_icms_venda": 15.0, "percentual_ipi": 0.5},
+        {"description": "Tubo", "valor_com_icms_compra": 10.0, "valor_com_icms_venda": 15.0, "peso_compra": None},
+    ]
+    response = TestClient(app).post(
+        "/api/v1/budgets/calculate-simplified", json={"client_name": "Cliente", "items": items}
+    )
+    assert response.status_code == 400
+    assert [error["loc"][2:] for error in response.json()["detail"]] == [
+        [1, "description"], [1, "valor_com_icms_compra"], [1, "percentual_ipi"], [2, "peso_compra"],
+    ]
@@ -0,0 +1,63 @@
+"""
+Testes dos resultados tipados da calculadora (CalculatedItem / CalculatedBudget)
+"""
+import json
+
+import pytest
+
+from app.models.budget import BudgetItem
+from app.services.business_rules_calculator import BusinessRulesCalculator
+from app.services.calculated_budget import CalculatedBudget, CalculatedItem
+
+ITEM = {
+    'description': 'Chapa 2mm',
+    'peso_compra': 100.0,
+    'peso_venda': 110.0,
+    'valor_com_icms_compra': 10.0,
+    'percentual_icms_compra': 0.18,
+    'valor_com_icms_venda': 15.0,
+    'percentual_icms_venda': 0.18,
+    'percentual_ipi': 0.05,
+}
+
+
+def test_item_is_slotted_with_dict_view():
+    item = BusinessRulesCalculator.calculate_complete_item(dict(ITEM), 0.0, 100.0)
+    assert isinstance(item, CalculatedItem)
+    assert not hasattr(item, '__dict__')
+    with pytest.raises(AttributeError):
+        item.campo_inexistente = 1
+
+    assert item['valor_comissao'] == item.valor_comissao
+    assert item.get('campo_inexistente', 'x') == 'x'
+    assert 'commission_percentage_actual' in item and 'delivery_time' not in item
+    assert item['commission_percentage_actual'] == item.percentual_comissao
+    assert item['weight_difference_display']['formatted_display'] == '10.0%'
+
+    plain = item.as_dict()
+    assert len(plain) == len(item) == 30
+    assert item == plain and dict(item) == plain
+    json.dumps(plain)
+
+
+def test_budget_fields_feed_persistence():
+    result = BusinessRulesCalculator.calculate_complete_budget(
+        [dict(ITEM), dict(ITEM, peso_venda=100.0, valor_com_icms_venda=12.0)], 0.0, 200.0
+    )
+    assert isinstance(result, CalculatedBudget)
+    assert result['items'] is result.items and result['totals'] is result.totals
+    assert result['totals']['soma_total_venda'] == result.totals.soma_total_venda
+    assert result.as_dict()['totals'] == result.totals
+
+    fields = result.budget_fields()
+    assert fields['total_commission'] == pytest.approx(sum(item.valor_comissao for item in result.items))
+    assert fields['profitability_percentage'] == result.totals.markup_pedido_sem_impostos
+    weights = [item.total_venda_com_icms_item for item in result.items]
+    expected = sum(item.percentual_comissao * weight for item, weight in zip(result.items, weights)) / sum(weights)
+    assert fields['commission_percentage_actual'] == pytest.approx(expected)
+
+    budget_item = BudgetItem(**result.items[0].budget_item_fields('15'))
+    assert budget_item.delivery_time == '15'
+    assert budget_item.profitability == pytest.approx(result.items[0].rentabilidade_item * 100)
+    assert budget_item.ipi_value == result.items[0].valor_ipi_total
+    assert json.loads(budget_item.weight_difference_display)['has_difference'] is True
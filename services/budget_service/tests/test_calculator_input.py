@@ -0,0 +1,57 @@
+"""
+Testes do adaptador schema -> BusinessRulesCalculator
+"""
+import pytest
+
+from app.models.budget import BudgetItem
+from app.schemas.budget import BudgetItemCreate, BudgetItemSimplified
+from app.services.calculator_input import to_calculator_input
+
+EXPECTED = {
+    'description': 'Chapa',
+    'delivery_time': '7',
+    'peso_compra': 100.0,
+    'peso_venda': 100.0,
+    'valor_com_icms_compra': 10.0,
+    'percentual_icms_compra': 0.18,
+    'outras_despesas_item': 0.5,
+    'valor_com_icms_venda': 15.0,
+    'percentual_icms_venda': 0.12,
+    'percentual_ipi': 0.05,
+}
+
+ENGLISH = dict(
+    description='Chapa', delivery_time='7', weight=100.0, purchase_value_with_icms=10.0,
+    purchase_icms_percentage=0.18, purchase_other_expenses=0.5, sale_value_with_icms=15.0,
+    sale_icms_percentage=0.12, ipi_percentage=0.05,
+)
+
+
+def test_every_item_source_maps_to_the_same_calculator_input():
+    sources = [
+        [BudgetItemCreate(purchase_value_without_taxes=0.0, sale_value_without_taxes=0.0, **ENGLISH)],
+        [BudgetItem(**ENGLISH)],
+        [BudgetItemSimplified(**{key: value for key, value in EXPECTED.items() if key != 'peso_venda'})],
+    ]
+    for items in sources:
+        calculator_input = to_calculator_input(items)
+        assert calculator_input.items == [EXPECTED]
+        assert calculator_input.soma_pesos_pedido == 100.0
+        assert calculator_input.outras_despesas_totais == pytest.approx(50.0)
+
+
+def test_aggregates_and_calculation_in_one_pass():
+    calculator_input = to_calculator_input([
+        BudgetItem(**dict(ENGLISH, sale_weight=110.0, ipi_percentage=None)),
+        BudgetItem(**dict(ENGLISH, weight=None)),
+    ])
+    first, second = calculator_input.items
+    assert first['peso_venda'] == 110.0 and first['percentual_ipi'] == 0.0
+    assert second['peso_compra'] is None  # fica para check_budget_items rejeitar
+    assert calculator_input.soma_pesos_pedido == 100.0
+
+    result = to_calculator_input([BudgetItem(**ENGLISH)]).calculate(freight_value_total=200.0)
+    assert result.items[0].frete_distribuido_por_kg == pytest.approx(2.0)
+
+    with pytest.raises(TypeError):
+        to_calculator_input([dict(EXPECTED)])
@@ -125,7 +125,16 @@ class TestCommissionServiceWithQuantityAdjustment:
         for profitability, expected_rate in test_cases:
             result_rate = CommissionService.calculate_commission_percentage(profitability)
             assert abs(result_rate - expected_rate) < 0.001, f"Failed for profitability {profitability}"
-    
+
+    def test_loss_pays_no_commission(self):
+        """Negative profitability (selling at a loss) pays 0%, not the top bracket"""
+        # Before the versioned pricing rules these fell through the bracket table to 5%
+        for profitability in (-0.0001, -0.15, -0.5, -1.0):
+            assert CommissionService.calculate_commission_percentage(profitability) == 0.0
+        assert CommissionService.calculate_commission_value(1000.0, -0.2) == 0.0
+        # Values between the old bracket bounds fall in the lower bracket
+        assert CommissionService.calculate_commission_percentage(0.1999995) == 0.0
+
     def test_zero_purchase_cost_handling(self):
         """Test handling of edge case where purchase cost is zero"""
         result = CommissionService._calculate_total_profitability(1000.0, 0.0)
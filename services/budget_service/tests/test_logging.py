@@ -0,0 +1,101 @@
+"""
+Testes do logging estruturado (QueueHandler/QueueListener, request id, amostragem)
+"""
+import io
+import json
+import logging
+import threading
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.logging_config import (
+    RequestIdMiddleware,
+    get_request_id,
+    reset_request_id,
+    set_request_id,
+    setup_logging,
+    shutdown_logging,
+)
+
+logger = logging.getLogger("tests.logging")
+
+
+@pytest.fixture
+def log_stream():
+    root = logging.getLogger()
+    level = root.level
+    stream = io.StringIO()
+    yield stream
+    shutdown_logging()
+    root.setLevel(level)
+
+
+def _lines(stream):
+    shutdown_logging()  # esvazia a fila antes de ler
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_json_records_carry_service_request_id_and_extra(log_stream):
+    setup_logging("budget_service", "production", stream=log_stream)
+    token = set_request_id("req-123")
+    logger.info("Budget %s updated", 42, extra={"budget_id": 42})
+    reset_request_id(token)
+    logger.warning("outside request")
+
+    first, second = _lines(log_stream)
+    assert first["message"] == "Budget 42 updated"
+    assert first["service"] == "budget_service"
+    assert first["request_id"] == "req-123"
+    assert first["budget_id"] == 42
+    assert first["level"] == "INFO"
+    assert second["request_id"] == "-"
+
+
+def test_debug_is_skipped_without_formatting_and_formatted_off_the_loop(log_stream):
+    formatted_in = []
+
+    class Expensive:
+        def __str__(self):
+            formatted_in.append(threading.current_thread().name)
+            return "expensive"
+
+    setup_logging("budget_service", "production", stream=log_stream)
+    logger.debug("item %s", Expensive())
+    assert formatted_in == []
+
+    setup_logging("budget_service", "development", fmt="json", stream=log_stream)
+    logger.debug("item %s", Expensive())
+    assert [line["message"] for line in _lines(log_stream)] == ["item expensive"]
+    # (o handler de captura do pytest também formata na thread principal)
+    assert any(name != threading.current_thread().name for name in formatted_in)
+
+
+def test_debug_sampling_is_per_call_site_and_spares_info(log_stream):
+    setup_logging("budget_service", "development", fmt="json", debug_sample_rate=0.25, stream=log_stream)
+    for i in range(8):
+        logger.debug("per item %s", i)
+    for i in range(3):
+        logger.info("info %s", i)
+
+    messages = [line["message"] for line in _lines(log_stream)]
+    assert messages == ["per item 0", "per item 4", "info 0", "info 1", "info 2"]
+
+
+def test_request_id_middleware_reuses_or_generates_id():
+    app = FastAPI()
+    app.add_middleware(RequestIdMiddleware)
+
+    @app.get("/whoami")
+    async def whoami():
+        return {"request_id": get_request_id()}
+
+    client = TestClient(app)
+    response = client.get("/whoami", headers={"X-Request-ID": "abc-1"})
+    assert response.json() == {"request_id": "abc-1"}
+    assert response.headers["x-request-id"] == "abc-1"
+
+    generated = client.get("/whoami")
+    assert len(generated.headers["x-request-id"]) == 32
+    assert generated.json()["request_id"] == generated.headers["x-request-id"]
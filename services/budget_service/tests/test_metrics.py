@@ -0,0 +1,128 @@
+"""
+Testes das métricas Prometheus (registry, middleware e instrumentação do engine)
+"""
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core import metrics
+from app.core.metrics import MetricsMiddleware, Registry, instrument_engine, metrics_response
+from app.services.business_rules_calculator import BusinessRulesCalculator
+
+
+def _sample(body: str, line_prefix: str) -> float:
+    for line in body.splitlines():
+        if line.startswith(line_prefix + " "):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{line_prefix} not found in metrics output")
+
+
+def test_registry_renders_prometheus_text_format():
+    registry = Registry()
+    requests = registry.counter("requests_total", "Requests", ("route",))
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    requests.labels('/a"b').inc()
+    requests.labels('/a"b').inc(2)
+    for value in (0.05, 0.5, 3.0):
+        latency.observe(value)
+    registry.add_collector("cache_size", "gauge", "Entries", lambda: [({"cache": "jwt"}, 7)])
+
+    body = registry.render()
+    assert "# TYPE requests_total counter" in body
+    assert 'requests_total{route="/a\\"b"} 3' in body
+    assert 'latency_seconds_bucket{le="0.1"} 1' in body
+    assert 'latency_seconds_bucket{le="1"} 2' in body
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in body
+    assert "latency_seconds_sum 3.55" in body
+    assert "latency_seconds_count 3" in body
+    assert 'cache_size{cache="jwt"} 7' in body
+    # Registrar de novo devolve a mesma métrica
+    assert registry.counter("requests_total", "Requests", ("route",)) is requests
+
+
+def test_middleware_records_route_template_and_db_queries(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'metrics.db'}")
+    instrument_engine(engine)
+
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int):
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            await conn.execute(text("SELECT 2"))
+        return {"item_id": item_id}
+
+    @app.get("/metrics")
+    async def read_metrics():
+        return metrics_response()
+
+    client = TestClient(app)
+    route = 'method="GET",route="/items/{item_id}"'
+    before = metrics.REGISTRY.render()
+    count_before = _sample(before, f"http_request_duration_seconds_count{{{route}}}") if route in before else 0
+    queries_before = _sample(before, f"http_request_db_queries_sum{{{route}}}") if route in before else 0
+
+    assert client.get("/items/1").status_code == 200
+    assert client.get("/items/2").status_code == 200
+    assert client.get("/missing").status_code == 404
+
+    response = client.get("/metrics")
+    body = response.text
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert _sample(body, f"http_request_duration_seconds_count{{{route}}}") == count_before + 2
+    assert _sample(body, f"http_request_db_queries_sum{{{route}}}") == queries_before + 4
+    assert 'http_requests_total{method="GET",route="unmatched",status="404"}' in body
+    assert "http_requests_in_flight 0" in body
+    asyncio.run(engine.dispose())
+
+
+def test_calculator_records_duration_and_items():
+    items_before = metrics.REGISTRY.counter(
+        "budget_calculation_items_total", "Itens calculados por calculate_complete_budget"
+    )._children[()].value
+    item = {
+        "description": "Chapa",
+        "peso_compra": 100.0,
+        "peso_venda": 100.0,
+        "valor_com_icms_compra": 10.0,
+        "percentual_icms_compra": 0.18,
+        "valor_com_icms_venda": 12.0,
+        "percentual_icms_venda": 0.18,
+        "outras_despesas_item": 0.0,
+    }
+    BusinessRulesCalculator.calculate_complete_budget([item, dict(item)], 0.0, 200.0)
+
+    body = metrics.REGISTRY.render()
+    assert _sample(body, "budget_calculation_items_total") == items_before + 2
+    assert _sample(body, "budget_calculation_seconds_count") >= 1
+
+
+def test_server_timing_header_and_repeated_statement_warning(tmp_path, caplog):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'nplus1.db'}")
+    instrument_engine(engine)
+
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware, server_timing=True, repeated_statement_threshold=3)
+
+    @app.get("/orders")
+    async def list_orders():
+        async with engine.connect() as conn:
+            for order_id in range(4):
+                await conn.execute(text("SELECT :id"), {"id": order_id})
+        return []
+
+    client = TestClient(app)
+    with caplog.at_level("WARNING", logger=metrics.__name__):
+        response = client.get("/orders")
+
+    assert response.headers["server-timing"].startswith('db;dur=')
+    assert 'desc="4 queries"' in response.headers["server-timing"]
+    assert "Possible N+1 query in GET /orders: statement ran 4 times" in caplog.text
+    body = metrics.REGISTRY.render()
+    assert 'http_request_repeated_statements_total{method="GET",route="/orders"}' in body
+    asyncio.run(engine.dispose())
@@ -0,0 +1,53 @@
+"""
+Testes do núcleo de ponto fixo (app.utils.money) e do arredondamento sobre ele
+"""
+import random
+from decimal import Decimal, ROUND_HALF_UP
+
+from app.services.business_rules_calculator import BusinessRulesCalculator
+from app.services.commission_service import CommissionService
+from app.utils.money import CENTS, MICROS, exact, from_units, to_units
+from app.utils.rounding import round_currency, round_percent_display, round_unit
+
+
+def _decimal_round(value, places, multiplier=1):
+    pattern = Decimal(1).scaleb(-places)
+    return float((Decimal(str(value)) * multiplier).quantize(pattern, rounding=ROUND_HALF_UP))
+
+
+def test_rounding_matches_decimal_half_up():
+    rng = random.Random(48)
+    values = [0.125, -0.125, 1.005, 2.675, 0.285, -2.5, 5e-7, 123456.7850001, 0.0, 3, '2.675', Decimal('1.0050')]
+    for _ in range(20000):
+        # Empates (x,5) na casa arredondada e valores quaisquer
+        values.append((rng.randint(-10 ** 9, 10 ** 9) + 0.5) / 10 ** rng.randint(0, 8))
+        values.append(rng.uniform(-1e6, 1e6))
+    for value in values:
+        assert round_currency(value) == _decimal_round(value, 2)
+        assert round_unit(value) == _decimal_round(value, 6)
+        assert round_percent_display(value) == _decimal_round(value, 2, 100)
+
+    assert round_currency(None) == round_currency('') == round_currency('abc') == 0.0
+
+
+def test_units_round_trip():
+    assert exact(12.5) == (12500000, MICROS)
+    assert exact('1.2e3') == (1200, 0)
+    assert exact(Decimal('-0.0325')) == (-325, 4)
+    assert to_units(10.005, CENTS) == 1001
+    assert to_units(-10.005, CENTS) == -1001
+    assert to_units(0.1 + 0.2) == 300000
+    assert from_units(to_units(1234.56, CENTS), CENTS) == 1234.56
+
+
+def test_calculators_are_exact_where_float_drifted():
+    # 12 / 10 - 1 em float é 0.19999999999999996: caía fora de todas as faixas (-> 5%)
+    rentabilidade = CommissionService._calculate_unit_profitability(12.0, 10.0)
+    assert rentabilidade == 0.2
+    assert CommissionService.calculate_commission_percentage(rentabilidade) == 0.01
+
+    # 100.5 * 0.03 em float é 3.0149999999999997; o exato 3.015 arredonda para 3.02
+    assert CommissionService.calculate_commission_value(100.5, 0.5) == 3.02
+
+    assert BusinessRulesCalculator.calculate_total_ipi_item(1234.5, 45.67, 0.0325) == 1832.34
+    assert BusinessRulesCalculator.calculate_purchase_value_without_taxes(10.0, 0.18, 0.35) == 7.7915
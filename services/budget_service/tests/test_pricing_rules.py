@@ -0,0 +1,154 @@
+"""
+Testes das regras de preço versionadas (compilação, publicação/recarga e recálculo)
+"""
+import asyncio
+
+import pytest
+
+from app.models.budget import BudgetStatus
+from app.schemas.budget import BudgetCreate, BudgetItemCreate
+from app.services.budget_service import BudgetService
+from app.services.commission_service import CommissionService
+from app.services.pricing_rules import DEFAULT_RULES, PricingRules, PricingRulesRegistry, pricing_rules
+
+NEW_RULES = {
+    **DEFAULT_RULES,
+    "commission_brackets": [
+        {"min_profitability": 0.10, "commission_rate": 0.02},
+        {"min_profitability": 0.50, "commission_rate": 0.04},
+    ],
+    "pis_cofins_percentage": 0.0,
+}
+
+
+def _budget(order_number: str, status: BudgetStatus = BudgetStatus.DRAFT, ipi_percentage: float = 0.0) -> BudgetCreate:
+    return BudgetCreate(
+        order_number=order_number,
+        client_name="Cliente Regras",
+        status=status,
+        items=[BudgetItemCreate(
+            description="Chapa de aço",
+            weight=100.0,
+            purchase_value_with_icms=10.0,
+            purchase_icms_percentage=0.18,
+            purchase_value_without_taxes=0.0,
+            sale_value_with_icms=15.0,
+            sale_icms_percentage=0.18,
+            sale_value_without_taxes=0.0,
+            ipi_percentage=ipi_percentage,
+        )],
+    )
+
+
+def test_compiled_rules_lookup():
+    rules = PricingRules.compile(0, DEFAULT_RULES)
+    assert [rules.commission_rate(r) for r in (-0.3, 0.0, 0.1999, 0.2, 0.45, 0.7999, 0.8, 3.0)] == [
+        0.0, 0.0, 0.0, 0.01, 0.025, 0.04, 0.05, 0.05,
+    ]
+    assert rules.accepts_ipi(0.0325) and rules.accepts_ipi(0) and not rules.accepts_ipi(0.04)
+    assert not rules.accepts_ipi(float("nan"))
+    assert rules.ipi_description() == "0%, 3.25% ou 5%"
+    assert rules.commission_brackets[-1]["max_profitability"] == float("inf")
+
+    # Abaixo da primeira faixa (inclusive negativos) não há comissão
+    custom = PricingRules.compile(1, NEW_RULES)
+    assert custom.commission_rate(0.05) == 0.0
+    assert custom.commission_rate(0.3) == 0.02
+    assert PricingRules.compile(1, custom.as_dict()) == custom
+
+    with pytest.raises(ValueError):
+        PricingRules.compile(1, {**DEFAULT_RULES, "pis_cofins_percentage": 9.25})
+    with pytest.raises(ValueError):
+        PricingRules.compile(1, {"commission_brackets": []})
+
+
+def test_commission_helpers_use_the_given_rules():
+    custom = PricingRules.compile(1, NEW_RULES)
+    # Rentabilidade de 30%: 1.5% nas regras padrão, 2% nas novas
+    same_weight = (1000.0, 1000.0 / 1.3, 100.0, 100.0, 13.0, 10.0)
+    other_weight = (1300.0, 1000.0, 120.0, 100.0, 13.0, 10.0)
+    for args in (same_weight, other_weight):
+        assert CommissionService.calculate_commission_value_with_quantity_adjustment(*args) == 15.0 * args[0] / 1000.0
+        assert CommissionService.calculate_commission_value_with_quantity_adjustment(*args, rules=custom) == 20.0 * args[0] / 1000.0
+
+    summary = CommissionService.calculate_budget_total_commission(
+        [{"total_venda_item": 1000.0, "rentabilidade_item": 0.3}], rules=custom
+    )
+    assert summary["total_commission"] == 20.0
+    assert summary["commission_by_bracket"] == {"2.0%": 20.0}
+    assert CommissionService.validate_commission_calculation(0.3, 1000.0, custom)["faixa_aplicada"]["commission_rate"] == 2.0
+
+
+def test_publish_is_picked_up_by_other_workers(session_factory):
+    publisher = PricingRulesRegistry(session_factory)
+    other_worker = PricingRulesRegistry(session_factory)
+
+    async def _run():
+        async with session_factory() as db:
+            with pytest.raises(ValueError):
+                await publisher.publish(db, {**NEW_RULES, "ipi_valid_percentages": []}, "admin")
+            published = await publisher.publish(db, NEW_RULES, "admin")
+        assert published.version == 1 and publisher.current() is published
+        assert await other_worker.refresh() is True
+        assert await other_worker.refresh() is False
+        return other_worker.current()
+
+    reloaded = asyncio.run(_run())
+    assert reloaded.version == 1
+    assert reloaded.pis_cofins_percentage == 0.0
+    assert reloaded.commission_thresholds == (0.10, 0.50)
+
+
+def test_stale_budgets_are_recalculated_with_current_rules(session_factory, monkeypatch):
+    monkeypatch.setattr(pricing_rules, "session_factory", session_factory)
+    monkeypatch.setattr(pricing_rules, "_rules", pricing_rules.current())
+
+    async def _run():
+        async with session_factory() as db:
+            draft = await BudgetService.create_budget(db, _budget("PED-REGRAS-1"), "vendedor")
+            approved = await BudgetService.create_budget(
+                db, _budget("PED-REGRAS-2", BudgetStatus.APPROVED), "vendedor"
+            )
+            before = (draft.pricing_rules_version, draft.total_purchase_value)
+
+            await pricing_rules.publish(db, NEW_RULES, "admin")
+            recalculated = await BudgetService.recalculate_stale_budgets(db)
+            again = await BudgetService.recalculate_stale_budgets(db)
+
+            draft = await BudgetService.get_budget_by_id(db, draft.id)
+            approved = await BudgetService.get_budget_by_id(db, approved.id)
+            return before, recalculated, again, draft, approved
+
+    before, recalculated, again, draft, approved = asyncio.run(_run())
+    assert before[0] == 0
+    assert (recalculated, again) == ({"recalculated": 1, "failed": []}, {"recalculated": 0, "failed": []})
+    assert draft.pricing_rules_version == 1
+    # Sem PIS/COFINS o custo sobe de 10 * 0.82 * 0.9075 para 10 * 0.82 por kg
+    assert before[1] == 744.15 and draft.total_purchase_value == 820.0
+    # Rentabilidade 15 * 0.82 / (10 * 0.82) - 1 = 50%: segunda faixa das novas regras
+    assert draft.items[0].commission_percentage == 0.04
+    assert approved.pricing_rules_version == 0
+
+
+def test_budget_rejected_by_new_rules_does_not_stop_the_batch(session_factory, monkeypatch):
+    monkeypatch.setattr(pricing_rules, "session_factory", session_factory)
+    monkeypatch.setattr(pricing_rules, "_rules", pricing_rules.current())
+
+    async def _run():
+        async with session_factory() as db:
+            with_ipi = await BudgetService.create_budget(db, _budget("PED-IPI-1", ipi_percentage=0.0325), "vendedor")
+            without_ipi = await BudgetService.create_budget(db, _budget("PED-IPI-2"), "vendedor")
+            ids, total_before = (with_ipi.id, without_ipi.id), with_ipi.total_purchase_value
+
+            # As novas regras deixam de aceitar IPI de 3.25%
+            await pricing_rules.publish(db, {**NEW_RULES, "ipi_valid_percentages": [0.0, 0.05]}, "admin")
+            result = await BudgetService.recalculate_stale_budgets(db)
+
+            with_ipi, without_ipi = [await BudgetService.get_budget_by_id(db, budget_id) for budget_id in ids]
+            return result, total_before, with_ipi, without_ipi
+
+    result, total_before, with_ipi, without_ipi = asyncio.run(_run())
+    assert result == {"recalculated": 1, "failed": [with_ipi.id]}
+    # O orçamento rejeitado foi desfeito e mantém a versão e os valores anteriores
+    assert (with_ipi.pricing_rules_version, with_ipi.total_purchase_value) == (0, total_before)
+    assert without_ipi.pricing_rules_version == 1
@@ -0,0 +1,83 @@
+"""
+Testes do profiling sob demanda (ProfilingMiddleware + /api/v1/profiles)
+"""
+from datetime import datetime, timedelta
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from jose import jwt
+
+from app.api.v1.endpoints import profiles
+from app.core import profiling, security
+from app.core.profiling import ProfilingMiddleware
+
+
+def _headers(role: str, **extra) -> dict:
+    payload = {"sub": f"{role}.user", "role": role, "exp": datetime.utcnow() + timedelta(minutes=30)}
+    token = jwt.encode(payload, security.SECRET_KEY, algorithm=security.ALGORITHM)
+    return {"Authorization": f"Bearer {token}", **extra}
+
+
+def _client(tmp_path, monkeypatch) -> TestClient:
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path / "profiles"))
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware)
+
+    @app.get("/work")
+    async def work():
+        return {"total": sum(i * i for i in range(1000))}
+
+    app.include_router(profiles.router, prefix="/api/v1/profiles")
+    return TestClient(app)
+
+
+def test_requests_without_flag_are_not_profiled(tmp_path, monkeypatch):
+    client = _client(tmp_path, monkeypatch)
+    response = client.get("/work")
+    assert response.status_code == 200
+    assert "x-profile-id" not in response.headers
+    assert not (tmp_path / "profiles").exists()
+
+
+def test_non_admin_and_anonymous_cannot_profile(tmp_path, monkeypatch):
+    client = _client(tmp_path, monkeypatch)
+    assert client.get("/work", headers={"X-Profile": "1"}).status_code == 401
+    assert client.get("/work?profile=1", headers=_headers("vendas")).status_code == 403
+    assert client.get("/api/v1/profiles/", headers=_headers("vendas")).status_code == 403
+
+
+def test_admin_stores_profile_and_fetches_it(tmp_path, monkeypatch):
+    client = _client(tmp_path, monkeypatch)
+    response = client.get("/work", headers=_headers("admin", **{"X-Profile": "1"}))
+    assert response.status_code == 200
+    assert response.json()["total"] == 332833500
+    profile_id = response.headers["x-profile-id"]
+
+    listed = client.get("/api/v1/profiles/", headers=_headers("admin")).json()
+    assert listed[0]["id"] == profile_id
+    assert listed[0]["path"] == "/work"
+    assert listed[0]["user"] == "admin.user"
+
+    report = client.get(f"/api/v1/profiles/{profile_id}", headers=_headers("admin"))
+    assert "cumulative" in report.text
+    raw = client.get(f"/api/v1/profiles/{profile_id}?format=prof", headers=_headers("admin"))
+    assert raw.headers["content-type"] == "application/octet-stream"
+    assert client.get("/api/v1/profiles/../../etc", headers=_headers("admin")).status_code == 404
+
+
+def test_text_mode_returns_report_and_original_status(tmp_path, monkeypatch):
+    client = _client(tmp_path, monkeypatch)
+    response = client.get("/work?profile=text", headers=_headers("admin"))
+    assert response.status_code == 200
+    assert response.headers["x-profile-status"] == "200"
+    assert "work" in response.text
+    assert "function calls" in response.text
+
+
+def test_old_profiles_are_pruned(tmp_path, monkeypatch):
+    client = _client(tmp_path, monkeypatch)
+    monkeypatch.setattr(profiling, "PROFILE_KEEP", 2)
+    for _ in range(4):
+        client.get("/work", headers=_headers("admin", **{"X-Profile": "1"}))
+    assert len(profiling.list_profiles()) == 2
+    assert len(list((tmp_path / "profiles").glob("*.prof"))) == 2
@@ -0,0 +1,131 @@
+"""
+Orçamentos de queries das operações de orçamento (SQLite: cada item é um INSERT)
+
+Se um teste falhar, a mensagem lista os statements executados: verifique se
+não surgiu uma query por item/linha (N+1) antes de aumentar o orçamento.
+"""
+import asyncio
+
+from app.models.budget import BudgetStatus
+from app.schemas.budget import BudgetCreate, BudgetItemCreate, BudgetUpdate
+from app.services.budget_service import BudgetService
+
+
+def _item(sale_value: float) -> BudgetItemCreate:
+    return BudgetItemCreate(
+        description="Tubo",
+        weight=50.0,
+        purchase_value_with_icms=8.0,
+        purchase_icms_percentage=0.18,
+        purchase_value_without_taxes=0.0,
+        sale_value_with_icms=sale_value,
+        sale_icms_percentage=0.18,
+        sale_value_without_taxes=0.0,
+    )
+
+
+def _items():
+    return [_item(10.0), _item(11.0), _item(12.0)]
+
+
+def _create(session_factory) -> int:
+    async def _run():
+        async with session_factory() as db:
+            budget = await BudgetService.create_budget(
+                db, BudgetCreate(order_number="PED-QRY-001", client_name="Cliente", items=_items()), "vendedor"
+            )
+            return budget.id
+
+    return asyncio.run(_run())
+
+
+def _run_with_session(session_factory, operation):
+    async def _run():
+        async with session_factory() as db:
+            return await operation(db)
+
+    return asyncio.run(_run())
+
+
+def test_create_budget_query_budget(session_factory, query_budget):
+    # budget + 3 itens + outbox + refresh
+    with query_budget(6):
+        _create(session_factory)
+
+
+def test_get_budget_by_id_query_budget(session_factory, query_budget):
+    budget_id = _create(session_factory)
+    # orçamento + itens (selectinload)
+    with query_budget(2):
+        budget = _run_with_session(session_factory, lambda db: BudgetService.get_budget_by_id(db, budget_id))
+    assert len(budget.items) == 3
+
+
+def test_update_budget_items_query_budget(session_factory, query_budget):
+    budget_id = _create(session_factory)
+    with query_budget(10):
+        _run_with_session(
+            session_factory, lambda db: BudgetService.update_budget(db, budget_id, BudgetUpdate(items=_items()))
+        )
+
+
+def test_update_budget_status_query_budget(session_factory, query_budget):
+    budget_id = _create(session_factory)
+    with query_budget(7):
+        _run_with_session(
+            session_factory,
+            lambda db: BudgetService.update_budget(db, budget_id, BudgetUpdate(status=BudgetStatus.APPROVED)),
+        )
+
+
+def test_recalculate_and_delete_query_budgets(session_factory, query_budget):
+    budget_id = _create(session_factory)
+    with query_budget(5):
+        _run_with_session(session_factory, lambda db: BudgetService.recalculate_budget(db, budget_id))
+    # Os itens são removidos em um único DELETE (executemany)
+    with query_budget(5):
+        assert _run_with_session(session_factory, lambda db: BudgetService.delete_budget(db, budget_id))
+
+
+def test_update_simplified_endpoint_query_budget(session_factory, query_budget):
+    from fastapi.testclient import TestClient
+
+    from app.core.database import get_db
+    from app.core.security import create_service_token
+    from app.main import app
+
+    budget_id = _create(session_factory)
+    other_id = _run_with_session(
+        session_factory,
+        lambda db: BudgetService.create_budget(
+            db, BudgetCreate(order_number="PED-QRY-002", client_name="Cliente", items=_items()), "vendedor"
+        ),
+    ).id
+    item = {
+        "description": "Tubo", "peso_compra": 50.0, "valor_com_icms_compra": 8.0, "percentual_icms_compra": 0.18,
+        "valor_com_icms_venda": 12.0, "percentual_icms_venda": 0.18,
+    }
+
+    async def _db():
+        async with session_factory() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = _db
+    client = TestClient(app, headers={"Authorization": f"Bearer {create_service_token('admin')}"})
+    try:
+        payload = {"order_number": "PED-QRY-003", "client_name": "Cliente", "items": [item, item]}
+        # orçamento + itens, unicidade do pedido, gravação (orçamento, outbox, itens) e refresh;
+        # o endpoint não repete a busca do orçamento nem a checagem do número do pedido
+        with query_budget(10):
+            response = client.put(f"/api/v1/budgets/simplified/{budget_id}", json=payload)
+        assert response.status_code == 200
+
+        missing = client.put("/api/v1/budgets/simplified/999999", json=payload)
+        duplicate = client.put(
+            f"/api/v1/budgets/simplified/{other_id}", json={**payload, "order_number": "PED-QRY-003"}
+        )
+    finally:
+        app.dependency_overrides.pop(get_db)
+
+    assert missing.status_code == 404
+    assert duplicate.status_code == 400 and "PED-QRY-003" in duplicate.json()["detail"]
@@ -0,0 +1,83 @@
+"""
+Testes do cache de tokens JWT verificados
+"""
+import time
+from datetime import datetime, timedelta
+
+from jose import jwt
+
+from app.core import security
+
+
+def _token(username: str = "vendedor", role: str = "vendas", expires_in: timedelta = timedelta(minutes=30)) -> str:
+    payload = {"sub": username, "role": role, "exp": datetime.utcnow() + expires_in}
+    return jwt.encode(payload, security.SECRET_KEY, algorithm=security.ALGORITHM)
+
+
+def _count_decodes(monkeypatch) -> list:
+    calls = []
+    original = security._decode_token
+
+    def counting(token):
+        calls.append(token)
+        return original(token)
+
+    monkeypatch.setattr(security, "_decode_token", counting)
+    return calls
+
+
+def test_repeated_token_is_decoded_once(monkeypatch):
+    security.clear_token_cache()
+    calls = _count_decodes(monkeypatch)
+    token = _token(role="admin")
+
+    first = security.authenticate_token(token)
+    second = security.authenticate_token(token)
+
+    assert first.username == "vendedor"
+    assert first.role == "admin"
+    assert second == first
+    assert len(calls) == 1
+
+
+def test_cache_does_not_store_raw_token():
+    security.clear_token_cache()
+    token = _token()
+    security.authenticate_token(token)
+
+    assert token not in security._verified_tokens._data
+    assert security._token_digest(token) in security._verified_tokens._data
+
+
+def test_invalid_and_expired_tokens_are_rejected_and_not_cached():
+    security.clear_token_cache()
+    expired = _token(expires_in=timedelta(seconds=-5))
+
+    assert security.authenticate_token("not-a-jwt") is None
+    assert security.authenticate_token(expired) is None
+    assert len(security._verified_tokens) == 0
+
+
+def test_entry_expires_with_token(monkeypatch):
+    security.clear_token_cache()
+    calls = _count_decodes(monkeypatch)
+    token = _token(expires_in=timedelta(seconds=30))
+    security.authenticate_token(token)
+
+    # Entrada expira junto com o token, mesmo que JWT_CACHE_MAX_TTL seja maior
+    expires_at = security._verified_tokens._data[security._token_digest(token)][0]
+    assert expires_at - time.monotonic() <= 31
+    assert len(calls) == 1
+
+
+def test_cache_can_be_disabled(monkeypatch):
+    security.clear_token_cache()
+    monkeypatch.setattr(security, "JWT_CACHE_ENABLED", False)
+    calls = _count_decodes(monkeypatch)
+    token = _token()
+
+    security.authenticate_token(token)
+    security.authenticate_token(token)
+
+    assert len(calls) == 2
+    assert len(security._verified_tokens) == 0
@@ -0,0 +1,44 @@
+"""
+Testes do runner de produção (python -m app.server)
+"""
+import uvicorn
+
+from app.core import server
+from app.core.server import WorkerServer, available_cpus, default_workers, server_config
+
+
+def test_workers_follow_usable_cpus_and_env(monkeypatch):
+    monkeypatch.setattr(server, "available_cpus", lambda: 16)
+    monkeypatch.setenv("MAX_WORKERS", "4")
+    assert default_workers() == 4
+    monkeypatch.setattr(server, "_cgroup_cpu_limit", lambda: 1.5)
+    assert 1 <= available_cpus() <= 2
+
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    assert server_config("app.main:app", 8002).workers == 4
+    monkeypatch.setenv("WEB_CONCURRENCY", "3")
+    assert server_config("app.main:app", 8002).workers == 3
+
+
+def test_production_settings_from_env(monkeypatch):
+    monkeypatch.setenv("PORT", "9000")
+    monkeypatch.setenv("MAX_REQUESTS", "0")
+    monkeypatch.setenv("GRACEFUL_TIMEOUT", "10")
+    config = server_config("app.main:app", 8002)
+    assert config.port == 9000
+    assert config.limit_max_requests is None
+    assert config.timeout_graceful_shutdown == 10
+    assert config.timeout_keep_alive > 60  # acima do keepalive_timeout do nginx
+    assert config.loop == "uvloop" and config.http == "httptools"
+
+
+def test_each_worker_draws_its_request_limit(monkeypatch):
+    monkeypatch.setattr(uvicorn.Server, "run", lambda self, sockets=None: None)
+    monkeypatch.setenv("MAX_REQUESTS", "1000")
+    limits = set()
+    for _ in range(20):
+        worker = WorkerServer(server_config("app.main:app", 8002), max_requests_jitter=100)
+        worker.run()
+        limits.add(worker.config.limit_max_requests)
+    assert all(1000 <= limit <= 1100 for limit in limits)
+    assert len(limits) > 1
@@ -0,0 +1,28 @@
+"""
+As cópias em app/core devem ser idênticas às de shared/messaging e shared/utils
+"""
+import filecmp
+from pathlib import Path
+
+import pytest
+
+SERVICE_ROOT = Path(__file__).resolve().parents[1]
+SHARED_MESSAGING = SERVICE_ROOT.parents[1] / "shared" / "messaging"
+SHARED_UTILS = SERVICE_ROOT.parents[1] / "shared" / "utils"
+
+
+@pytest.mark.skipif(not SHARED_MESSAGING.is_dir(), reason="shared/ fora do contexto (imagem do serviço)")
+@pytest.mark.parametrize("module", ["codec.py", "events.py", "event_bus.py"])
+def test_event_modules_match_shared(module):
+    # Produtor e consumidor precisam do mesmo codec: qualquer divergência corrompe a decodificação
+    assert filecmp.cmp(SERVICE_ROOT / "app" / "core" / module, SHARED_MESSAGING / module, shallow=False), (
+        f"app/core/{module} difere de shared/messaging/{module}: copie a versão de shared/"
+    )
+
+
+@pytest.mark.skipif(not SHARED_UTILS.is_dir(), reason="shared/ fora do contexto (imagem do serviço)")
+@pytest.mark.parametrize("module", ["metrics.py", "logging_config.py", "tracing.py", "slow_queries.py", "server.py"])
+def test_core_modules_match_shared(module):
+    assert filecmp.cmp(SERVICE_ROOT / "app" / "core" / module, SHARED_UTILS / module, shallow=False), (
+        f"app/core/{module} difere de shared/utils/{module}: copie a versão de shared/"
+    )
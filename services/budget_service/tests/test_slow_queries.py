@@ -0,0 +1,111 @@
+"""
+Testes do log de queries lentas (SlowQueryLog + /api/v1/slow-queries)
+"""
+from datetime import datetime, timedelta
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from jose import jwt
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.api.v1.endpoints import slow_queries
+from app.core import security
+from app.core.slow_queries import (
+    SlowQueryLog,
+    SlowQueryMiddleware,
+    parameter_shape,
+    slow_query_log,
+    statement_fingerprint,
+)
+
+
+def _headers(role: str) -> dict:
+    payload = {"sub": f"{role}.user", "role": role, "exp": datetime.utcnow() + timedelta(minutes=30)}
+    token = jwt.encode(payload, security.SECRET_KEY, algorithm=security.ALGORITHM)
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_fingerprint_ignores_in_list_length_and_shape_hides_values():
+    assert statement_fingerprint("SELECT * FROM budgets WHERE id IN (?, ?)") == statement_fingerprint(
+        "SELECT *\n  FROM budgets WHERE id IN (?, ?, ?, ?)"
+    )
+    assert statement_fingerprint("SELECT 1") != statement_fingerprint("SELECT 2")
+    assert parameter_shape(("Cliente X", 10, None)) == ["str[9]", "int", "null"]
+    assert parameter_shape([{"id": 1}, {"id": 2}], executemany=True) == {"rows": 2, "row": {"id": "int"}}
+
+
+def test_slow_statements_are_recorded_with_endpoint_and_plan(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'slow.db'}")
+    log = SlowQueryLog(threshold_ms=0)
+    log.instrument(engine)
+
+    app = FastAPI()
+    app.add_middleware(SlowQueryMiddleware)
+
+    @app.on_event("startup")
+    async def startup():
+        async with engine.begin() as conn:
+            await conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)"))
+        log.clear()
+        log.start()
+
+    @app.on_event("shutdown")
+    async def shutdown():
+        await log.stop()
+        await engine.dispose()
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        async with engine.connect() as conn:
+            result = await conn.execute(text("SELECT name FROM items WHERE id = :id"), {"id": item_id})
+            return {"name": result.scalar()}
+
+    @app.get("/flush")
+    async def flush():
+        await log.wait_for_plans()
+        return {}
+
+    with TestClient(app) as client:
+        assert client.get("/items/1").status_code == 200
+        assert client.get("/items/2").status_code == 200
+        client.get("/flush")
+
+    entries = log.recent()
+    assert len(entries) == 2
+    assert entries[0]["endpoint"] == "GET /items/{item_id}"
+    assert entries[0]["parameters"] == ["int"]
+    assert entries[0]["fingerprint"] == entries[1]["fingerprint"]
+
+    detail = log.statement(entries[0]["fingerprint"])
+    assert detail["count"] == 2
+    assert detail["endpoints"] == {"GET /items/{item_id}": 2}
+    # Um único EXPLAIN por fingerprint, sem registrar as queries do próprio EXPLAIN
+    assert detail["plan"]["error"] is None
+    assert "items" in str(detail["plan"]["plan"])
+    assert all("EXPLAIN" not in row["statement"] for row in log.top())
+
+
+def test_slow_query_endpoints_are_admin_only():
+    app = FastAPI()
+    app.include_router(slow_queries.router, prefix="/api/v1/slow-queries")
+    client = TestClient(app)
+    slow_query_log.clear()
+    entry = slow_query_log.record("SELECT * FROM budgets WHERE client_name = ?", ("ACME",), 512.0)
+
+    assert client.get("/api/v1/slow-queries/").status_code == 403
+    assert client.get("/api/v1/slow-queries/top", headers=_headers("vendas")).status_code == 403
+
+    listed = client.get("/api/v1/slow-queries/?min_ms=500", headers=_headers("admin")).json()
+    assert listed["entries"][0]["fingerprint"] == entry["fingerprint"]
+    assert listed["entries"][0]["parameters"] == ["str[4]"]
+    assert listed["entries"][0]["endpoint"] is None
+
+    top = client.get("/api/v1/slow-queries/top", headers=_headers("admin")).json()
+    assert top[0]["max_ms"] == 512.0
+    detail = client.get(f"/api/v1/slow-queries/{entry['fingerprint']}", headers=_headers("admin")).json()
+    assert detail["plan"] is None and len(detail["samples"]) == 1
+    assert client.get("/api/v1/slow-queries/unknown", headers=_headers("admin")).status_code == 404
+
+    assert client.delete("/api/v1/slow-queries/", headers=_headers("admin")).status_code == 204
+    assert not slow_query_log.recent() and not slow_query_log.top()
@@ -0,0 +1,53 @@
+"""
+Testes do cold start: imports leves, template do PDF sob demanda e
+verificação do schema pela head do Alembic (sem DDL no startup)
+"""
+import asyncio
+import os
+import subprocess
+import sys
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.database import alembic_heads, verify_schema
+from app.services.pdf_export_service import PDFExportService
+
+SERVICE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_app_import_does_not_load_reportlab():
+    result = subprocess.run(
+        [sys.executable, "-c", "import sys, app.main; print(any(m.split('.')[0] == 'reportlab' for m in sys.modules))"],
+        cwd=SERVICE_ROOT, capture_output=True, text=True, check=True,
+    )
+    assert result.stdout.strip() == "False"
+
+
+def test_pdf_template_is_built_on_first_use():
+    service = PDFExportService()
+    assert service._template is None
+    service.warm_up()
+    template = service.template
+    assert template is service.template
+    assert "CompanyName" in template.styles
+
+
+def test_verify_schema_compares_alembic_head(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'schema.db'}")
+    heads = alembic_heads()
+    assert len(heads) == 1
+
+    async def _run():
+        assert await verify_schema(bind=engine) is False
+        with pytest.raises(RuntimeError, match="alembic upgrade head"):
+            await verify_schema(strict=True, bind=engine)
+
+        async with engine.begin() as conn:
+            await conn.execute(text("CREATE TABLE alembic_version (version_num VARCHAR(32) PRIMARY KEY)"))
+            await conn.execute(text("INSERT INTO alembic_version VALUES (:head)"), {"head": heads[0]})
+        assert await verify_schema(strict=True, bind=engine) is True
+        await engine.dispose()
+
+    asyncio.run(_run())
@@ -0,0 +1,164 @@
+"""
+Testes do tracing W3C (propagação, spans de SQL/cálculo/HTTP e exportadores)
+"""
+import asyncio
+import json
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.tracing import (
+    InMemoryExporter,
+    JsonFileExporter,
+    OtlpHttpExporter,
+    TracingMiddleware,
+    TracingTransport,
+    parse_traceparent,
+    start_span,
+    trace_engine,
+    tracer,
+)
+from app.services.business_rules_calculator import BusinessRulesCalculator
+
+PARENT_TRACE = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_SPAN = "00f067aa0ba902b7"
+
+ITEM = {
+    "description": "Chapa",
+    "peso_compra": 100.0,
+    "peso_venda": 100.0,
+    "valor_com_icms_compra": 10.0,
+    "percentual_icms_compra": 0.18,
+    "valor_com_icms_venda": 12.0,
+    "percentual_icms_venda": 0.18,
+    "outras_despesas_item": 0.0,
+}
+
+
+@pytest.fixture
+def exporter():
+    exporter = InMemoryExporter()
+    tracer.configure("budget_service", exporter, background=False)
+    yield exporter
+    tracer.shutdown()
+
+
+def _app(tmp_path, sent_headers):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'tracing.db'}")
+    trace_engine(engine)
+
+    def downstream(request: httpx.Request) -> httpx.Response:
+        sent_headers.append(dict(request.headers))
+        return httpx.Response(200, json={"username": "vendedor"})
+
+    http = httpx.AsyncClient(
+        base_url="http://user_service:8000",
+        transport=TracingTransport(httpx.MockTransport(downstream)),
+    )
+    app = FastAPI()
+    app.add_middleware(TracingMiddleware)
+
+    @app.get("/budgets/{budget_id}/export")
+    async def export(budget_id: int):
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+        await http.get("/api/v1/users/by-username/vendedor")
+        BusinessRulesCalculator.calculate_complete_budget([dict(ITEM)], 0.0, 100.0)
+        return {"ok": True}
+
+    return app, engine
+
+
+def test_traceparent_parsing():
+    context = parse_traceparent(f"00-{PARENT_TRACE}-{PARENT_SPAN}-01", "vendor=x")
+    assert (context.trace_id, context.span_id, context.sampled) == (PARENT_TRACE, PARENT_SPAN, True)
+    assert context.traceparent == f"00-{PARENT_TRACE}-{PARENT_SPAN}-01"
+    assert parse_traceparent(f"00-{PARENT_TRACE}-{PARENT_SPAN}-00").sampled is False
+    for invalid in ("", "garbage", f"ff-{PARENT_TRACE}-{PARENT_SPAN}-01",
+                    f"00-{'0' * 32}-{PARENT_SPAN}-01", f"00-{PARENT_TRACE}-{'0' * 16}-01"):
+        assert parse_traceparent(invalid) is None
+
+
+def test_request_spans_share_the_incoming_trace(tmp_path, exporter):
+    sent_headers = []
+    app, engine = _app(tmp_path, sent_headers)
+    response = TestClient(app).get(
+        "/budgets/7/export", headers={"traceparent": f"00-{PARENT_TRACE}-{PARENT_SPAN}-01"}
+    )
+    assert response.status_code == 200
+
+    (server,) = exporter.by_name("GET /budgets/{budget_id}/export")
+    (query,) = exporter.by_name("db.select")
+    (client,) = exporter.by_name("HTTP GET /api/v1/users/by-username/vendedor")
+    (calculation,) = exporter.by_name("calculator.complete_budget")
+
+    assert {span.trace_id for span in exporter.spans} == {PARENT_TRACE}
+    assert server.parent_id == PARENT_SPAN
+    assert server.kind == "server" and server.attributes["http.status_code"] == 200
+    assert query.parent_id == server.span_id
+    assert query.attributes["db.statement"] == "SELECT 1"
+    assert client.parent_id == server.span_id
+    assert calculation.parent_id == server.span_id
+    # O user_service recebe o contexto do span de cliente
+    assert sent_headers[0]["traceparent"] == f"00-{PARENT_TRACE}-{client.span_id}-01"
+    asyncio.run(engine.dispose())
+
+
+def test_unsampled_traces_propagate_without_exporting(tmp_path, exporter):
+    sent_headers = []
+    app, engine = _app(tmp_path, sent_headers)
+    TestClient(app).get("/budgets/7/export", headers={"traceparent": f"00-{PARENT_TRACE}-{PARENT_SPAN}-00"})
+
+    assert exporter.spans == []
+    assert sent_headers[0]["traceparent"].startswith(f"00-{PARENT_TRACE}-")
+    assert sent_headers[0]["traceparent"].endswith("-00")
+    asyncio.run(engine.dispose())
+
+
+def test_request_id_becomes_trace_id_and_tracing_off_is_noop(tmp_path, exporter):
+    sent_headers = []
+    app, engine = _app(tmp_path, sent_headers)
+    client = TestClient(app)
+    client.get("/budgets/1/export", headers={"X-Request-ID": "a" * 32})
+    assert exporter.by_name("GET /budgets/{budget_id}/export")[0].trace_id == "a" * 32
+
+    tracer.shutdown()
+    sent_headers.clear()
+    assert client.get("/budgets/1/export").status_code == 200
+    assert "traceparent" not in sent_headers[0]
+    with start_span("anything") as span:
+        assert span.sampled is False
+    asyncio.run(engine.dispose())
+
+
+def test_file_and_otlp_exporters(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    tracer.configure("budget_service", JsonFileExporter(str(path)))  # exportação em background
+    try:
+        with start_span("pdf.generate_proposal", attributes={"budget_id": 7}):
+            with start_span("pdf.build"):
+                pass
+    finally:
+        tracer.shutdown()  # esvazia a fila
+    spans = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [span["name"] for span in spans] == ["pdf.build", "pdf.generate_proposal"]
+    assert spans[0]["parent_id"] == spans[1]["span_id"]
+
+    exporter = InMemoryExporter()
+    tracer.configure("budget_service", exporter, background=False)
+    try:
+        with start_span("calculator.complete_budget", attributes={"items": 3, "ok": True}):
+            pass
+    finally:
+        tracer.shutdown()
+    payload = json.loads(OtlpHttpExporter("http://collector:4318").encode(exporter.spans))
+    resource = payload["resourceSpans"][0]
+    assert resource["resource"]["attributes"][0]["value"] == {"stringValue": "budget_service"}
+    span = resource["scopeSpans"][0]["spans"][0]
+    assert span["name"] == "calculator.complete_budget"
+    assert {"key": "items", "value": {"intValue": "3"}} in span["attributes"]
+    assert {"key": "ok", "value": {"boolValue": True}} in span["attributes"]
@@ -0,0 +1,171 @@
+"""
+Testes do cliente do User Service: pool, cache e circuit breaker
+"""
+import asyncio
+
+import httpx
+
+from app.services.user_client import UserClient
+
+USER_PAYLOAD = {
+    "id": 7,
+    "email": "vendedor@ditual.com.br",
+    "username": "vendedor",
+    "full_name": "Vendedor Teste",
+    "role": "vendas",
+    "is_active": True,
+}
+
+
+def _client_with(handler) -> UserClient:
+    client = UserClient()
+    client._client = httpx.AsyncClient(base_url="http://user_service", transport=httpx.MockTransport(handler))
+    return client
+
+
+def test_get_user_by_username_uses_cache():
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(200, json=USER_PAYLOAD)
+
+    client = _client_with(handler)
+
+    async def _run():
+        first = await client.get_user_by_username("vendedor", "token")
+        second = await client.get_user_by_username("vendedor", "token")
+        return first, second
+
+    first, second = asyncio.run(_run())
+    assert first.full_name == "Vendedor Teste"
+    assert second == first
+    assert len(calls) == 1
+    assert calls[0].headers["Authorization"] == "Bearer token"
+
+
+def test_not_found_is_not_cached():
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(404, json={"detail": "Usuário não encontrado"})
+
+    client = _client_with(handler)
+
+    async def _run():
+        await client.get_user_by_username("ninguem", "token")
+        return await client.get_user_by_username("ninguem", "token")
+
+    assert asyncio.run(_run()) is None
+    assert len(calls) == 2
+    assert client.circuit_breaker.state == "closed"
+
+
+def test_circuit_opens_and_serves_stale_data():
+    state = {"fail": False, "calls": 0}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        state["calls"] += 1
+        if state["fail"]:
+            raise httpx.ConnectError("connection refused", request=request)
+        return httpx.Response(200, json=USER_PAYLOAD)
+
+    client = _client_with(handler)
+    client.circuit_breaker.failure_threshold = 2
+    client.cache.ttl = 0  # força expiração imediata
+
+    async def _run():
+        await client.get_user_by_username("vendedor", "token")
+        state["fail"] = True
+        results = [await client.get_user_by_username("vendedor", "token") for _ in range(4)]
+        return results
+
+    results = asyncio.run(_run())
+    assert all(r is not None and r.username == "vendedor" for r in results)
+    # 1 chamada inicial + 2 falhas até abrir o circuito; depois nenhuma chamada
+    assert state["calls"] == 3
+    assert client.circuit_breaker.state == "open"
+
+
+def test_half_open_success_closes_circuit():
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json=USER_PAYLOAD)
+
+    client = _client_with(handler)
+    client.circuit_breaker.failure_threshold = 1
+    client.circuit_breaker.reset_timeout = 0
+    client.circuit_breaker.record_failure()
+    assert client.circuit_breaker.state == "half-open"
+
+    user = asyncio.run(client.get_user_by_username("vendedor", "token"))
+    assert user is not None
+    assert client.circuit_breaker.state == "closed"
+
+
+def test_half_open_allows_a_single_probe():
+    client = _client_with(lambda request: httpx.Response(200, json=USER_PAYLOAD))
+    breaker = client.circuit_breaker
+    breaker.failure_threshold = 1
+    breaker.record_failure()
+    breaker.opened_at -= breaker.reset_timeout
+    assert breaker.state == "half-open"
+
+    assert [breaker.allow_request() for _ in range(3)] == [True, False, False]
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow_request()
+
+
+def test_unexpected_error_counts_as_failure():
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise RuntimeError("transport broken")
+
+    client = _client_with(handler)
+    client.circuit_breaker.failure_threshold = 1
+    assert asyncio.run(client.get_user_by_username("vendedor", "token")) is None
+    assert client.circuit_breaker.state == "open"
+
+
+def test_invalid_batch_body_counts_as_failure_and_serves_stale_data():
+    responses = iter([
+        httpx.Response(200, json={"users": {"vendedor": USER_PAYLOAD}}),
+        httpx.Response(200, text="<html>proxy error</html>"),
+        httpx.Response(200, json={"users": {"vendedor": {"username": "vendedor"}}}),
+    ])
+    client = _client_with(lambda request: next(responses))
+    client.circuit_breaker.failure_threshold = 2
+    client.cache.ttl = 0  # força expiração imediata
+
+    async def _run():
+        return [await client.get_users_by_usernames(["vendedor"], "token") for _ in range(3)]
+
+    results = asyncio.run(_run())
+    # Corpo não JSON e UserInfo inválido: dados em cache, e o circuito abre após duas falhas
+    assert all(set(result) == {"vendedor"} for result in results)
+    assert client.circuit_breaker.state == "open"
+
+
+def test_get_users_by_usernames_single_batch_call():
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(200, json={
+            "users": {"vendedor": USER_PAYLOAD},
+            "missing_usernames": ["ninguem"],
+            "missing_ids": [],
+        })
+
+    client = _client_with(handler)
+
+    async def _run():
+        first = await client.get_users_by_usernames(["vendedor", "ninguem", "vendedor"], "token")
+        second = await client.get_users_by_usernames(["vendedor"], "token")
+        return first, second
+
+    first, second = asyncio.run(_run())
+    assert set(first) == {"vendedor"}
+    assert set(second) == {"vendedor"}
+    # Apenas uma chamada: a segunda consulta vem do cache
+    assert len(calls) == 1
+    assert calls[0].url.path == "/api/v1/users/batch"
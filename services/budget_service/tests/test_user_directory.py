@@ -0,0 +1,217 @@
+"""
+Testes do diretório local de usuários alimentado por eventos
+"""
+import asyncio
+
+from app.services.user_client import UserInfo
+from app.services.user_directory import UserDirectory, UserDirectoryConsumer
+
+
+def _user_event(event_type: str, **overrides) -> dict:
+    data = {
+        "id": 1,
+        "email": "ana@ditual.com.br",
+        "username": "ana",
+        "full_name": "Ana Souza",
+        "role": "vendas",
+        "is_active": True,
+        "created_by": "admin",
+    }
+    data.update(overrides)
+    return {"event_type": event_type, "timestamp": "2025-01-01T00:00:00", "service": "user_service", "data": data}
+
+
+def test_created_and_updated_events_upsert_user():
+    directory = UserDirectory()
+    assert directory.apply_event(_user_event("user.created"))
+    assert directory.get("ana").full_name == "Ana Souza"
+
+    assert directory.apply_event(_user_event("user.updated", full_name="Ana S. Lima"))
+    assert directory.get("ana").full_name == "Ana S. Lima"
+    assert len(directory) == 1
+
+
+def test_username_change_replaces_old_key():
+    directory = UserDirectory()
+    directory.apply_event(_user_event("user.created"))
+    directory.apply_event(_user_event("user.updated", username="ana.lima"))
+
+    assert directory.get("ana") is None
+    assert directory.get("ana.lima").id == 1
+    assert directory.get_by_id(1).username == "ana.lima"
+
+
+def test_deleted_event_marks_user_inactive():
+    directory = UserDirectory()
+    directory.apply_event(_user_event("user.created"))
+    assert directory.apply_event({"event_type": "user.deleted", "data": {"user_id": 1}})
+
+    user = directory.get("ana")
+    assert user is not None
+    assert user.is_active is False
+
+
+def test_unknown_and_malformed_events_are_ignored():
+    directory = UserDirectory()
+    assert not directory.apply_event({"event_type": "user.login", "data": {"id": 1}})
+    assert not directory.apply_event({"event_type": "user.created", "data": {"id": 1}})
+    assert not directory.apply_event({"event_type": "user.deleted", "data": {"user_id": 99}})
+    assert len(directory) == 0
+
+
+def test_snapshot_replaces_contents():
+    directory = UserDirectory()
+    directory.apply_event(_user_event("user.created", id=5, username="antigo"))
+    directory.load_snapshot([
+        UserInfo(id=1, email="ana@ditual.com.br", username="ana", full_name="Ana", role="vendas", is_active=True)
+    ])
+
+    assert directory.get("antigo") is None
+    assert directory.get("ana") is not None
+    assert directory.last_snapshot_at is not None
+
+
+def test_consumer_reads_events_from_stream():
+    from app.core.event_bus import EventBus, InMemoryStreamsBackend
+
+    directory = UserDirectory()
+    consumer = UserDirectoryConsumer(directory)
+    bus = EventBus(InMemoryStreamsBackend())
+
+    async def _run():
+        last_id = await bus.latest_id("user_events")
+        await bus.publish_many("user_events", [_user_event("user.created"), {"event_type": "user.login"}])
+        return [consumer.handle_event(event) for _, event in await bus.read("user_events", last_id)]
+
+    assert asyncio.run(_run()) == [True, False]
+    assert not consumer.handle_event("not-a-dict")
+    assert directory.get("ana") is not None
+
+
+def test_consumer_error_keeps_shared_redis_client(monkeypatch):
+    from app.services import user_directory as module
+
+    calls = []
+
+    class SharedRedis:
+        async def ensure_connected(self):
+            calls.append("connect")
+
+        async def disconnect(self):
+            calls.append("disconnect")
+
+    class FlakyBus:
+        reads = 0
+
+        async def latest_id(self, stream):
+            return "0-0"
+
+        async def read(self, stream, last_id, block_ms=None):
+            self.reads += 1
+            if self.reads == 1:
+                raise ConnectionError("XREAD falhou")
+            if self.reads == 2:
+                return [("1-0", _user_event("user.created"))]
+            raise asyncio.CancelledError
+
+    monkeypatch.setattr(module, "redis_client", SharedRedis())
+    monkeypatch.setattr(module, "event_bus", FlakyBus())
+    directory = UserDirectory()
+    consumer = UserDirectoryConsumer(directory)
+    consumer.service_account = consumer.service_token = None
+
+    async def _run():
+        consumer.start()
+        try:
+            await consumer._task
+        except asyncio.CancelledError:
+            pass
+        await consumer.stop()
+
+    asyncio.run(_run())
+    # Erro de leitura: nova tentativa sem fechar o cliente usado pelo outbox relay
+    assert calls == ["connect", "connect"]
+    assert directory.get("ana") is not None
+
+
+def test_reconcile_mints_service_token_and_reports_failures(monkeypatch, caplog):
+    from app.core.security import verify_token
+    from app.services import user_directory as module
+
+    data = _user_event("user.created")["data"]
+    tokens = []
+
+    async def get_users(token):
+        tokens.append(token)
+        # Primeira chamada responde; a segunda falha (ex.: credencial recusada)
+        return [UserInfo(**{field: data[field] for field in UserInfo.model_fields})] if len(tokens) == 1 else None
+
+    monkeypatch.setattr(module.user_client, "get_users", get_users)
+    directory = UserDirectory()
+    consumer = UserDirectoryConsumer(directory)
+    consumer.service_account, consumer.service_token = "servico", "token-expirado"
+
+    assert asyncio.run(consumer.reconcile()) is True
+    assert verify_token(tokens[0]).username == "servico"
+    assert directory.get("ana") is not None
+
+    with caplog.at_level("ERROR"):
+        assert asyncio.run(consumer.reconcile()) is False
+    assert "reconcile failed" in caplog.text
+
+
+def test_budget_list_resolves_sellers_in_one_batch(session_factory, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from app.core.database import get_db
+    from app.core.security import create_service_token
+    from app.main import app
+    from app.schemas.budget import BudgetCreate, BudgetItemCreate
+    from app.services import user_directory as module
+    from app.services.budget_service import BudgetService
+
+    item = BudgetItemCreate(
+        description="Chapa", weight=100.0, purchase_value_with_icms=10.0, purchase_icms_percentage=0.18,
+        purchase_value_without_taxes=0.0, sale_value_with_icms=15.0, sale_icms_percentage=0.18,
+        sale_value_without_taxes=0.0,
+    )
+
+    async def _seed():
+        async with session_factory() as db:
+            for number, seller in (("PED-1", "ana"), ("PED-2", "bia"), ("PED-3", "bia")):
+                await BudgetService.create_budget(
+                    db, BudgetCreate(order_number=number, client_name="Cliente", items=[item]), seller
+                )
+
+    asyncio.run(_seed())
+    data = _user_event("user.created")["data"]
+    monkeypatch.setattr(module, "user_directory", UserDirectory())
+    module.user_directory.upsert(UserInfo(**{field: data[field] for field in UserInfo.model_fields}))
+
+    batches = []
+
+    async def get_users_by_usernames(usernames, auth_token):
+        batches.append(usernames)
+        return {"bia": UserInfo(**{**{field: data[field] for field in UserInfo.model_fields},
+                                   "id": 2, "username": "bia", "full_name": "Bia Lima"})}
+
+    monkeypatch.setattr(module.user_client, "get_users_by_usernames", get_users_by_usernames)
+
+    async def _db():
+        async with session_factory() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = _db
+    try:
+        response = TestClient(app).get(
+            "/api/v1/budgets/", headers={"Authorization": f"Bearer {create_service_token('admin')}"}
+        )
+    finally:
+        app.dependency_overrides.pop(get_db)
+
+    assert response.status_code == 200
+    assert sorted((b["created_by"], b["seller_name"]) for b in response.json()) == [
+        ("ana", "Ana Souza"), ("bia", "Bia Lima"), ("bia", "Bia Lima"),
+    ]
+    # Só o ausente do diretório, uma vez, em uma única chamada
+    assert batches == [["bia"]]
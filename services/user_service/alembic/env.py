@@ -4,6 +4,7 @@ from sqlalchemy import pool
 from alembic import context
 from app.core.database import Base
 from app.models.user import User  # Import all models here
+from app.models.outbox import OutboxEvent
 import os
 import re
 
@@ -0,0 +1,28 @@
+"""add user event outbox
+
+Revision ID: 513
+Revises: 512
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "513"
+down_revision = "512"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_event_outbox",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("stream", sa.String(length=100), nullable=False),
+        sa.Column("payload", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+    )
+    op.create_index("ix_user_event_outbox_id", "user_event_outbox", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_user_event_outbox_id", table_name="user_event_outbox")
+    op.drop_table("user_event_outbox")
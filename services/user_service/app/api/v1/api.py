@@ -1,7 +1,8 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import users
+from app.api.v1.endpoints import slow_queries, users
 
 
 api_router = APIRouter()
 
-api_router.include_router(users.router, prefix="/users", tags=["users"])
\ No newline at end of file
+api_router.include_router(users.router, prefix="/users", tags=["users"])
+api_router.include_router(slow_queries.router, prefix="/slow-queries", tags=["slow-queries"])
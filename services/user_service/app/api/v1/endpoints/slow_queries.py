@@ -0,0 +1,49 @@
+from typing import Any, Dict, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from app.core.principal_cache import Principal
+from app.core.security import require_admin
+from app.core.slow_queries import slow_query_log
+
+
+router = APIRouter()
+
+
+@router.get("/", response_model=Dict[str, Any])
+async def get_slow_queries(
+    limit: int = Query(50, ge=1, le=500),
+    endpoint: Optional[str] = Query(None, description='e.g. "POST /api/v1/users/login"'),
+    min_ms: float = Query(0, ge=0),
+    current_user: Principal = Depends(require_admin)
+):
+    """Listar as execuções lentas mais recentes deste worker (apenas administradores)"""
+    return {
+        "threshold_ms": slow_query_log.threshold_ms,
+        "total": slow_query_log.total,
+        "entries": slow_query_log.recent(limit, endpoint, min_ms),
+    }
+
+
+@router.get("/top", response_model=List[Dict[str, Any]])
+async def get_top_slow_queries(
+    limit: int = Query(20, ge=1, le=200),
+    order: str = Query("total_ms", pattern="^(total_ms|max_ms|mean_ms|count)$"),
+    current_user: Principal = Depends(require_admin)
+):
+    """Queries lentas agrupadas por fingerprint, piores primeiro (apenas administradores)"""
+    return slow_query_log.top(limit, order)
+
+
+@router.delete("/", status_code=status.HTTP_204_NO_CONTENT)
+async def clear_slow_queries(current_user: Principal = Depends(require_admin)):
+    """Limpar o log de queries lentas deste worker (apenas administradores)"""
+    slow_query_log.clear()
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.get("/{fingerprint}", response_model=Dict[str, Any])
+async def get_slow_query(fingerprint: str, current_user: Principal = Depends(require_admin)):
+    """Obter uma query lenta com o plano capturado e as últimas execuções (apenas administradores)"""
+    detail = slow_query_log.statement(fingerprint)
+    if detail is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Slow query not found")
+    return detail
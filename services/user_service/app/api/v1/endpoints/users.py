@@ -1,5 +1,5 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
 from app.core.security import (
@@ -10,12 +10,17 @@ from app.core.security import (
     check_modify_permission,
     check_delete_permission
 )
-from app.schemas.user import UserCreate, UserResponse, UserUpdate, UserLogin, Token, UserSelfUpdate, UserMe, PasswordUpdate
+from app.schemas.user import (
+    UserCreate, UserResponse, UserUpdate, UserLogin, Token, UserSelfUpdate, UserMe, PasswordUpdate,
+    UserBatchRequest, UserBatchResponse
+)
 from app.services import user_service
 from app.services.auth import create_access_token
-from app.services.messaging import publish_user_created, publish_user_updated, publish_user_deleted, publish_user_login
+from app.services.messaging import UserLoginEvent
+from app.services.outbox import add_event, outbox_relay
 from app.core.config import settings
-from app.models.user import User
+from app.core.principal_cache import Principal
+from app.core.rate_limit import login_throttle
 from datetime import timedelta
 
 
@@ -26,7 +31,7 @@ router = APIRouter()
 async def create_user(
     user_data: UserCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """Criar um novo usuário (apenas administradores)"""
     # Verificar se usuário já existe
@@ -44,19 +49,8 @@ async def create_user(
             detail="Email já está em uso"
         )
     
-    user = await user_service.create_user(db, user_data)
-    
-    # Publicar evento de usuário criado
-    user_dict = {
-        "id": user.id,
-        "email": user.email,
-        "username": user.username,
-        "full_name": user.full_name,
-        "role": user.role.value,
-        "is_active": user.is_active,
-        "created_by": current_user.username
-    }
-    await publish_user_created(user_dict)
+    # Evento user.created gravado na mesma transação (outbox)
+    user = await user_service.create_user(db, user_data, {"created_by": current_user.username})
     
     return user
 
@@ -66,7 +60,7 @@ async def get_users(
     skip: int = 0,
     limit: int = 100,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """Listar usuários com paginação (apenas administradores)"""
     users = await user_service.get_users(db, skip=skip, limit=limit)
@@ -75,7 +69,7 @@ async def get_users(
 
 @router.get("/me", response_model=UserMe)
 async def get_current_user_profile(
-    current_user: User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """Obter perfil do usuário atual"""
     return current_user
@@ -85,7 +79,7 @@ async def get_current_user_profile(
 async def update_current_user_profile(
     user_data: UserSelfUpdate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """Atualizar perfil do usuário atual (campos limitados)"""
     # Verificar se username já existe (se fornecido)
@@ -113,26 +107,17 @@ async def update_current_user_profile(
         full_name=user_data.full_name
     )
     
-    user = await user_service.update_user(db, current_user.id, update_data)
+    # Evento user.updated gravado na mesma transação (outbox)
+    user = await user_service.update_user(
+        db, current_user.id, update_data,
+        {"updated_by": current_user.username, "self_update": True}
+    )
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Erro ao atualizar usuário"
         )
     
-    # Publicar evento de usuário atualizado
-    user_dict = {
-        "id": user.id,
-        "email": user.email,
-        "username": user.username,
-        "full_name": user.full_name,
-        "role": user.role.value,
-        "is_active": user.is_active,
-        "updated_by": current_user.username,
-        "self_update": True
-    }
-    await publish_user_updated(user_dict)
-    
     return user
 
 
@@ -140,20 +125,28 @@ async def update_current_user_profile(
 async def change_password(
     password_data: PasswordUpdate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """Alterar senha do usuário atual"""
-    from app.services.auth import verify_password, get_password_hash
+    from app.services.auth import verify_password_async, get_password_hash_async
+    
+    # O principal em cache não carrega o hash da senha
+    user = await user_service.get_user_by_id(db, current_user.id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Usuário não encontrado"
+        )
     
     # Verificar senha atual
-    if not verify_password(password_data.current_password, current_user.hashed_password):
+    if not await verify_password_async(password_data.current_password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Senha atual incorreta"
         )
     
     # Atualizar senha
-    new_password_hash = get_password_hash(password_data.new_password)
+    new_password_hash = await get_password_hash_async(password_data.new_password)
     
     # Criar uma versão especial de update apenas para senha
     from sqlalchemy import update
@@ -169,11 +162,28 @@ async def change_password(
     return {"message": "Senha alterada com sucesso"}
 
 
+@router.post("/batch", response_model=UserBatchResponse)
+async def get_users_batch(
+    batch: UserBatchRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user)
+):
+    """Obter vários usuários por username e/ou id em uma única consulta (dados públicos)"""
+    users = await user_service.get_users_by_usernames_or_ids(db, batch.usernames, batch.ids)
+    found_usernames = {user.username for user in users}
+    found_ids = {user.id for user in users}
+    return {
+        "users": {user.username: user for user in users},
+        "missing_usernames": [u for u in dict.fromkeys(batch.usernames) if u not in found_usernames],
+        "missing_ids": [i for i in dict.fromkeys(batch.ids) if i not in found_ids],
+    }
+
+
 @router.get("/by-username/{username}", response_model=UserResponse)
 async def get_user_by_username_endpoint(
     username: str,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """Obter usuário por username (dados públicos)"""
     user = await user_service.get_user_by_username(db, username)
@@ -189,7 +199,7 @@ async def get_user_by_username_endpoint(
 async def get_user(
     user_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """Obter usuário por ID (usuários podem ver apenas seu próprio perfil, admin pode ver todos)"""
     # Verificar permissão
@@ -214,7 +224,7 @@ async def update_user(
     user_id: int,
     user_data: UserUpdate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """Atualizar usuário (usuários podem atualizar apenas seu próprio perfil, admin pode atualizar todos)"""
     # Verificar permissão
@@ -225,25 +235,14 @@ async def update_user(
             detail="Você não tem permissão para modificar este usuário"
         )
     
-    user = await user_service.update_user(db, user_id, user_data)
+    # Evento user.updated gravado na mesma transação (outbox)
+    user = await user_service.update_user(db, user_id, user_data, {"updated_by": current_user.username})
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Usuário não encontrado"
         )
     
-    # Publicar evento de usuário atualizado
-    user_dict = {
-        "id": user.id,
-        "email": user.email,
-        "username": user.username,
-        "full_name": user.full_name,
-        "role": user.role.value,
-        "is_active": user.is_active,
-        "updated_by": current_user.username
-    }
-    await publish_user_updated(user_dict)
-    
     return user
 
 
@@ -251,7 +250,7 @@ async def update_user(
 async def delete_user(
     user_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """Deletar usuário (soft delete - apenas administradores)"""
     # Verificar permissão
@@ -262,26 +261,36 @@ async def delete_user(
             detail="Você não tem permissão para deletar este usuário"
         )
     
+    # Evento user.deleted gravado na mesma transação (outbox)
     success = await user_service.delete_user(db, user_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Usuário não encontrado"
         )
-    
-    # Publicar evento de usuário deletado
-    await publish_user_deleted(user_id)
 
 
 @router.post("/login", response_model=Token)
 async def login(
     user_credentials: UserLogin,
+    request: Request,
     db: AsyncSession = Depends(get_db)
 ):
     """Autenticar usuário e retornar token JWT"""
+    # Limitar tentativas antes do bcrypt (X-Real-IP é definido pelo nginx)
+    client_ip = request.headers.get("X-Real-IP") or (request.client.host if request.client else None)
+    allowed, retry_after = await login_throttle.acquire(user_credentials.username, client_ip)
+    if not allowed:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Muitas tentativas de login. Tente novamente mais tarde.",
+            headers={"Retry-After": str(max(1, int(retry_after + 0.999)))},
+        )
+    
     user = await user_service.authenticate_user(
         db, user_credentials.username, user_credentials.password
     )
+    login_throttle.record_result(user is not None)
     
     if not user:
         raise HTTPException(
@@ -296,19 +305,24 @@ async def login(
             detail="Usuário inativo"
         )
     
+    # Tentativas bem-sucedidas não contam para o limite
+    await login_throttle.release(user_credentials.username, client_ip)
+    
     access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
     access_token = create_access_token(
         data={"sub": user.username, "role": user.role.value}, expires_delta=access_token_expires
     )
     
-    # Publicar evento de login
+    # Registrar evento de login no outbox (publicado pelo relay)
     user_dict = {
         "id": user.id,
         "email": user.email,
         "username": user.username,
         "role": user.role.value
     }
-    await publish_user_login(user_dict)
+    add_event(db, UserLoginEvent(user_data=user_dict))
+    await db.commit()
+    outbox_relay.notify()
     
     return {"access_token": access_token, "token_type": "bearer"}
 
@@ -339,18 +353,7 @@ async def register_user(
             detail="Email já está em uso"
         )
     
-    user = await user_service.create_user(db, user_data)
-    
-    # Publicar evento de usuário criado
-    user_dict = {
-        "id": user.id,
-        "email": user.email,
-        "username": user.username,
-        "full_name": user.full_name,
-        "role": user.role.value,
-        "is_active": user.is_active,
-        "public_registration": True
-    }
-    await publish_user_created(user_dict)
+    # Evento user.created gravado na mesma transação (outbox)
+    user = await user_service.create_user(db, user_data, {"public_registration": True})
     
     return user
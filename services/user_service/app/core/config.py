@@ -42,6 +42,66 @@ class Settings(BaseSettings):
     
     # API
     api_v1_prefix: str = os.getenv("API_V1_PREFIX", "/api/v1")
+    user_batch_max_size: int = int(os.getenv("USER_BATCH_MAX_SIZE", "200"))
+
+    # bcrypt: BCRYPT_ROUNDS fixes the cost; otherwise it is calibrated at
+    # startup to BCRYPT_TARGET_MS within [BCRYPT_MIN_ROUNDS, BCRYPT_MAX_ROUNDS]
+    bcrypt_rounds: int = int(os.getenv("BCRYPT_ROUNDS", "0"))
+    bcrypt_target_ms: float = float(os.getenv("BCRYPT_TARGET_MS", "250"))
+    bcrypt_min_rounds: int = int(os.getenv("BCRYPT_MIN_ROUNDS", "10"))
+    bcrypt_max_rounds: int = int(os.getenv("BCRYPT_MAX_ROUNDS", "15"))
+    bcrypt_max_workers: int = int(os.getenv("BCRYPT_MAX_WORKERS", str(min(4, os.cpu_count() or 1))))
+    
+    # Pooled DB connections opened at worker startup (python -m app.server sets 2)
+    db_pool_warmup: int = int(os.getenv("DB_POOL_WARMUP", "0"))
+    
+    # Event streams (approximate MAXLEN per stream)
+    event_stream_maxlen: int = int(os.getenv("EVENT_STREAM_MAXLEN", "100000"))
+    
+    # Outbox relay
+    outbox_batch_size: int = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+    outbox_poll_interval: float = float(os.getenv("OUTBOX_POLL_INTERVAL", "1.0"))
+    
+    # Login throttling (token buckets per username and per client IP)
+    login_throttle_enabled: bool = os.getenv("LOGIN_THROTTLE_ENABLED", "true").lower() == "true"
+    login_username_burst: int = int(os.getenv("LOGIN_USERNAME_BURST", "5"))
+    login_username_per_minute: float = float(os.getenv("LOGIN_USERNAME_PER_MINUTE", "5"))
+    login_ip_burst: int = int(os.getenv("LOGIN_IP_BURST", "20"))
+    login_ip_per_minute: float = float(os.getenv("LOGIN_IP_PER_MINUTE", "20"))
+    
+    # Principal cache (get_current_user); 0 disables
+    principal_cache_ttl: float = float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+    principal_cache_maxsize: int = int(os.getenv("PRINCIPAL_CACHE_MAXSIZE", "4096"))
+    
+    # Prometheus metrics (/metrics and request middleware)
+    metrics_enabled: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    # Server-Timing header with SQL count/time (off by default in production)
+    server_timing_enabled: bool = os.getenv(
+        "SERVER_TIMING", str(os.getenv("ENVIRONMENT", "development") != "production")
+    ).lower() == "true"
+    # Log requests that run the same SQL statement this many times (likely N+1)
+    n_plus_one_threshold: int = int(os.getenv("N_PLUS_ONE_THRESHOLD", "10"))
+    
+    # Logging (defaults per environment in app.core.logging_config)
+    log_level: Optional[str] = os.getenv("LOG_LEVEL")
+    log_format: Optional[str] = os.getenv("LOG_FORMAT")
+    log_debug_sample_rate: Optional[float] = (
+        float(os.getenv("LOG_DEBUG_SAMPLE_RATE")) if os.getenv("LOG_DEBUG_SAMPLE_RATE") else None
+    )
+    
+    # Tracing: none | file | otlp | memory (see app.core.tracing)
+    tracing_exporter: str = os.getenv("TRACING_EXPORTER", "none")
+    tracing_sample_rate: float = float(os.getenv("TRACING_SAMPLE_RATE", "1.0"))
+    tracing_file: str = os.getenv("TRACING_FILE", "/tmp/user_service-spans.jsonl")
+    otlp_endpoint: str = os.getenv("OTLP_ENDPOINT", "http://otel-collector:4318")
+    
+    # Slow-query log (see app.core.slow_queries), served at /api/v1/slow-queries
+    slow_query_log_enabled: bool = os.getenv("SLOW_QUERY_LOG_ENABLED", "true").lower() == "true"
+    slow_query_threshold_ms: float = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "200"))
+    slow_query_keep: int = int(os.getenv("SLOW_QUERY_KEEP", "500"))
+    slow_query_explain: bool = os.getenv("SLOW_QUERY_EXPLAIN", "true").lower() == "true"
+    slow_query_explain_interval: float = float(os.getenv("SLOW_QUERY_EXPLAIN_INTERVAL", "300"))
+    slow_query_explain_timeout_ms: int = int(os.getenv("SLOW_QUERY_EXPLAIN_TIMEOUT_MS", "5000"))
     
     class Config:
         env_file = ".env"
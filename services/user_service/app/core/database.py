@@ -1,6 +1,14 @@
+import asyncio
+import logging
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
 from app.core.config import settings
+from app.core.metrics import instrument_engine
+from app.core.slow_queries import slow_query_log
+from app.core.tracing import trace_engine
+
+
+logger = logging.getLogger(__name__)
 
 
 class Base(DeclarativeBase):
@@ -13,6 +21,20 @@ engine = create_async_engine(
     echo=settings.debug,
     future=True
 )
+if settings.metrics_enabled:
+    instrument_engine(engine)
+# One span per query while tracing is configured
+trace_engine(engine)
+# Slow statements are logged and EXPLAINed off the request path
+if settings.slow_query_log_enabled:
+    slow_query_log.configure(
+        threshold_ms=settings.slow_query_threshold_ms,
+        keep=settings.slow_query_keep,
+        explain=settings.slow_query_explain,
+        explain_interval=settings.slow_query_explain_interval,
+        explain_timeout_ms=settings.slow_query_explain_timeout_ms,
+    )
+    slow_query_log.instrument(engine)
 
 # Create session maker
 AsyncSessionLocal = async_sessionmaker(
@@ -28,4 +50,16 @@ async def get_db() -> AsyncSession:
         try:
             yield session
         finally:
-            await session.close()
\ No newline at end of file
+            await session.close()
+
+
+async def warm_up_pool(connections: int) -> None:
+    """Open `connections` pooled connections before the first request"""
+    async def _connect():
+        async with engine.connect() as conn:
+            await conn.exec_driver_sql("SELECT 1")
+
+    try:
+        await asyncio.gather(*(_connect() for _ in range(connections)))
+    except Exception as e:
+        logger.warning("Database pool warm-up failed: %s", e)
@@ -0,0 +1,318 @@
+"""
+Event bus on Redis Streams
+
+Events are appended with XADD (pipelined for batches) to a stream trimmed to
+an approximate MAXLEN, so they survive consumers being offline. Two ways to
+read them:
+
+- `read`: plain XREAD from a given id, for per-process read models and caches
+  that must see every event (each worker keeps its own position).
+- `consume_once`: consumer groups (XREADGROUP + XACK) for work that must run
+  once per group. Messages whose handler fails stay pending and are retried
+  once they have been idle for `retry_idle_ms`; after `max_deliveries` they
+  are moved to `<stream>:dead` and acknowledged.
+
+`replay` returns past events from an id (XRANGE). The Redis client is reached
+through a getter so the bus can be created before the connection exists.
+Payloads are JSON unless a codec is given (see `codec.EventCodec`).
+`InMemoryStreamsBackend` implements the same operations in-process for tests.
+"""
+
+import inspect
+import json
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+Entry = Tuple[str, bytes]
+Handler = Callable[[Dict[str, Any]], Union[None, Awaitable[None]]]
+
+
+def _decode(value: Union[str, bytes]) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _payload(fields: Dict[Any, Any]) -> bytes:
+    value = fields.get(b"event", fields.get("event"))
+    return value.encode() if isinstance(value, str) else value
+
+
+class RedisStreamsBackend:
+    """Stream operations on a redis.asyncio client"""
+
+    def __init__(self, redis_getter: Callable[[], Any]):
+        self._redis_getter = redis_getter
+
+    @property
+    def redis(self):
+        client = self._redis_getter()
+        if client is None:
+            raise RuntimeError("Redis client not connected")
+        return client
+
+    async def add_many(self, stream: str, payloads: Sequence[bytes], maxlen: Optional[int]) -> List[str]:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for payload in payloads:
+                pipe.xadd(stream, {"event": payload}, maxlen=maxlen, approximate=True)
+            ids = await pipe.execute()
+        return [_decode(message_id) for message_id in ids]
+
+    async def read(self, stream: str, last_id: str, count: int, block_ms: Optional[int]) -> List[Entry]:
+        response = await self.redis.xread({stream: last_id}, count=count, block=block_ms)
+        return [(_decode(i), _payload(f)) for _, entries in response for i, f in entries]
+
+    async def range(self, stream: str, start: str, end: str, count: Optional[int]) -> List[Entry]:
+        entries = await self.redis.xrange(stream, min=start, max=end, count=count)
+        return [(_decode(i), _payload(f)) for i, f in entries]
+
+    async def latest_id(self, stream: str) -> str:
+        entries = await self.redis.xrevrange(stream, count=1)
+        return _decode(entries[0][0]) if entries else "0-0"
+
+    async def ensure_group(self, stream: str, group: str, start_id: str) -> None:
+        try:
+            await self.redis.xgroup_create(stream, group, id=start_id, mkstream=True)
+        except Exception as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def read_group(self, stream: str, group: str, consumer: str, count: int, block_ms: Optional[int]) -> List[Entry]:
+        response = await self.redis.xreadgroup(group, consumer, {stream: ">"}, count=count, block=block_ms)
+        return [(_decode(i), _payload(f)) for _, entries in response for i, f in entries if f]
+
+    async def pending(self, stream: str, group: str, min_idle_ms: int, count: int) -> List[Tuple[str, int]]:
+        entries = await self.redis.xpending_range(stream, group, min="-", max="+", count=count, idle=min_idle_ms)
+        return [(_decode(e["message_id"]), int(e["times_delivered"])) for e in entries]
+
+    async def claim(self, stream: str, group: str, consumer: str, min_idle_ms: int, ids: Sequence[str]) -> List[Entry]:
+        entries = await self.redis.xclaim(stream, group, consumer, min_idle_time=min_idle_ms, message_ids=list(ids))
+        return [(_decode(i), _payload(f)) for i, f in entries if f]
+
+    async def ack(self, stream: str, group: str, ids: Sequence[str]) -> None:
+        if ids:
+            await self.redis.xack(stream, group, *ids)
+
+
+class InMemoryStreamsBackend:
+    """In-process stand-in for Redis Streams (tests and local runs without Redis)"""
+
+    def __init__(self):
+        self.streams: Dict[str, List[Entry]] = {}
+        # (stream, group) -> {"last_id": id, "pending": {id: [consumer, delivered_at, deliveries]}}
+        self.groups: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._last_ms = 0
+        self._seq = 0
+
+    @staticmethod
+    def _key(message_id: str) -> Tuple[int, int]:
+        if message_id in ("-", "0"):
+            return (0, 0)
+        if message_id == "+":
+            return (2 ** 63, 0)
+        ms, _, seq = message_id.partition("-")
+        return (int(ms), int(seq or 0))
+
+    def _next_id(self) -> str:
+        now_ms = int(time.time() * 1000)
+        if now_ms <= self._last_ms:
+            self._seq += 1
+        else:
+            self._last_ms, self._seq = now_ms, 0
+        return f"{self._last_ms}-{self._seq}"
+
+    def _last_id(self, stream: str) -> str:
+        entries = self.streams.get(stream)
+        return entries[-1][0] if entries else "0-0"
+
+    async def latest_id(self, stream: str) -> str:
+        return self._last_id(stream)
+
+    async def add_many(self, stream: str, payloads: Sequence[bytes], maxlen: Optional[int]) -> List[str]:
+        entries = self.streams.setdefault(stream, [])
+        ids = []
+        for payload in payloads:
+            message_id = self._next_id()
+            entries.append((message_id, payload))
+            ids.append(message_id)
+        if maxlen is not None and len(entries) > maxlen:
+            del entries[:len(entries) - maxlen]
+        return ids
+
+    async def read(self, stream: str, last_id: str, count: int, block_ms: Optional[int]) -> List[Entry]:
+        after = self._key(last_id)
+        return [e for e in self.streams.get(stream, []) if self._key(e[0]) > after][:count]
+
+    async def range(self, stream: str, start: str, end: str, count: Optional[int]) -> List[Entry]:
+        low, high = self._key(start), self._key(end)
+        entries = [e for e in self.streams.get(stream, []) if low <= self._key(e[0]) <= high]
+        return entries[:count] if count is not None else entries
+
+    async def ensure_group(self, stream: str, group: str, start_id: str) -> None:
+        self.streams.setdefault(stream, [])
+        if (stream, group) not in self.groups:
+            last_id = self._last_id(stream) if start_id == "$" else start_id
+            self.groups[(stream, group)] = {"last_id": last_id, "pending": {}}
+
+    async def read_group(self, stream: str, group: str, consumer: str, count: int, block_ms: Optional[int]) -> List[Entry]:
+        state = self.groups[(stream, group)]
+        entries = await self.read(stream, state["last_id"], count, None)
+        now = time.monotonic()
+        for message_id, _ in entries:
+            state["pending"][message_id] = [consumer, now, 1]
+            state["last_id"] = message_id
+        return entries
+
+    async def pending(self, stream: str, group: str, min_idle_ms: int, count: int) -> List[Tuple[str, int]]:
+        now = time.monotonic()
+        state = self.groups[(stream, group)]
+        return [
+            (message_id, deliveries)
+            for message_id, (_, delivered_at, deliveries) in state["pending"].items()
+            if (now - delivered_at) * 1000 >= min_idle_ms
+        ][:count]
+
+    async def claim(self, stream: str, group: str, consumer: str, min_idle_ms: int, ids: Sequence[str]) -> List[Entry]:
+        state = self.groups[(stream, group)]
+        payloads = dict(self.streams.get(stream, []))
+        now = time.monotonic()
+        claimed = []
+        for message_id in ids:
+            entry = state["pending"].get(message_id)
+            if entry is None or (now - entry[1]) * 1000 < min_idle_ms:
+                continue
+            state["pending"][message_id] = [consumer, now, entry[2] + 1]
+            if message_id in payloads:
+                claimed.append((message_id, payloads[message_id]))
+        return claimed
+
+    async def ack(self, stream: str, group: str, ids: Sequence[str]) -> None:
+        pending = self.groups[(stream, group)]["pending"]
+        for message_id in ids:
+            pending.pop(message_id, None)
+
+
+class JsonEventCodec:
+    """Default payload encoding"""
+
+    @staticmethod
+    def encode(event: Dict[str, Any]) -> bytes:
+        return json.dumps(event, default=str, separators=(",", ":")).encode()
+
+    @staticmethod
+    def decode(payload: bytes) -> Dict[str, Any]:
+        return json.loads(payload)
+
+
+class EventBus:
+    """Publish and consume events on streams"""
+
+    def __init__(
+        self,
+        backend: Union[RedisStreamsBackend, InMemoryStreamsBackend],
+        maxlen: Optional[int] = 100_000,
+        max_deliveries: int = 5,
+        retry_idle_ms: int = 30_000,
+        codec: Any = None,
+    ):
+        self.backend = backend
+        self.maxlen = maxlen
+        self.max_deliveries = max_deliveries
+        self.retry_idle_ms = retry_idle_ms
+        self.codec = codec or JsonEventCodec()
+
+    def encode(self, event: Dict[str, Any]) -> bytes:
+        return self.codec.encode(event)
+
+    def decode(self, payload: bytes) -> Dict[str, Any]:
+        return self.codec.decode(payload)
+
+    async def publish(self, stream: str, event: Dict[str, Any]) -> str:
+        """Append one event; returns its stream id"""
+        return (await self.publish_many(stream, [event]))[0]
+
+    async def publish_many(self, stream: str, events: Sequence[Dict[str, Any]]) -> List[str]:
+        """Append several events in a single round trip"""
+        if not events:
+            return []
+        return await self.backend.add_many(stream, [self.encode(e) for e in events], self.maxlen)
+
+    async def read(
+        self, stream: str, last_id: str, count: int = 100, block_ms: Optional[int] = None
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Events after `last_id`, without a consumer group. Start from
+        `latest_id()` and pass the last id returned on the next call so no
+        event is missed between reads.
+        """
+        return self._decode_entries(stream, await self.backend.read(stream, last_id, count, block_ms))
+
+    async def latest_id(self, stream: str) -> str:
+        """Id of the newest event in the stream ("0-0" if empty)"""
+        return await self.backend.latest_id(stream)
+
+    async def replay(
+        self, stream: str, from_id: str = "-", to_id: str = "+", count: Optional[int] = None
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        """Past events between two ids (inclusive), oldest first"""
+        return self._decode_entries(stream, await self.backend.range(stream, from_id, to_id, count))
+
+    async def ensure_group(self, stream: str, group: str, start_id: str = "0") -> None:
+        """Create the consumer group if missing ("0" = from the start, "$" = only new events)"""
+        await self.backend.ensure_group(stream, group, start_id)
+
+    async def consume_once(
+        self,
+        stream: str,
+        group: str,
+        consumer: str,
+        handler: Handler,
+        count: int = 100,
+        block_ms: Optional[int] = None,
+    ) -> int:
+        """
+        Retry stale pending messages, then read new ones, acking each message
+        whose handler succeeds. Returns the number of messages handled.
+        """
+        entries = await self._reclaim(stream, group, consumer, count)
+        entries += await self.backend.read_group(stream, group, consumer, count, block_ms)
+
+        acked = []
+        for message_id, payload in entries:
+            try:
+                result = handler(self.decode(payload))
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.warning("Handler failed for %s %s, will retry: %s", stream, message_id, e)
+                continue
+            acked.append(message_id)
+        await self.backend.ack(stream, group, acked)
+        return len(acked)
+
+    async def _reclaim(self, stream: str, group: str, consumer: str, count: int) -> List[Entry]:
+        pending = await self.backend.pending(stream, group, self.retry_idle_ms, count)
+        if not pending:
+            return []
+
+        exhausted = [message_id for message_id, deliveries in pending if deliveries >= self.max_deliveries]
+        retry = [message_id for message_id, deliveries in pending if deliveries < self.max_deliveries]
+
+        if exhausted:
+            dead = await self.backend.claim(stream, group, consumer, self.retry_idle_ms, exhausted)
+            if dead:
+                await self.backend.add_many(f"{stream}:dead", [payload for _, payload in dead], self.maxlen)
+                logger.error("Moved %s message(s) from %s to %s:dead", len(dead), stream, stream)
+            await self.backend.ack(stream, group, exhausted)
+
+        return await self.backend.claim(stream, group, consumer, self.retry_idle_ms, retry) if retry else []
+
+    def _decode_entries(self, stream: str, entries: List[Entry]) -> List[Tuple[str, Dict[str, Any]]]:
+        decoded = []
+        for message_id, payload in entries:
+            try:
+                decoded.append((message_id, self.decode(payload)))
+            except (TypeError, ValueError):
+                logger.warning("Skipping undecodable event %s %s", stream, message_id)
+        return decoded
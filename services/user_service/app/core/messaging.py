@@ -1,78 +1,23 @@
+import asyncio
 import redis.asyncio as redis
-from typing import Optional, Any
+from typing import Optional, Any, Callable
 import json
 import logging
-from enum import Enum
-from pydantic import BaseModel
-from datetime import datetime
-from typing import Dict
 from app.core.config import settings
+from app.core.event_bus import EventBus, RedisStreamsBackend
+from app.core.events import (
+    BaseEvent,
+    EventType,
+    UserCreatedEvent,
+    UserUpdatedEvent,
+    UserDeletedEvent,
+    UserLoginEvent,
+    event_codec,
+)
 
 logger = logging.getLogger(__name__)
 
 
-class EventType(str, Enum):
-    USER_CREATED = "user.created"
-    USER_UPDATED = "user.updated"
-    USER_DELETED = "user.deleted"
-    USER_LOGIN = "user.login"
-
-
-class BaseEvent(BaseModel):
-    event_type: EventType
-    timestamp: datetime
-    service: str
-    data: Dict[str, Any]
-
-
-class UserCreatedEvent(BaseEvent):
-    event_type: EventType = EventType.USER_CREATED
-    
-    def __init__(self, user_data: dict, **kwargs):
-        super().__init__(
-            timestamp=datetime.utcnow(),
-            service="user_service",
-            data=user_data,
-            **kwargs
-        )
-
-
-class UserUpdatedEvent(BaseEvent):
-    event_type: EventType = EventType.USER_UPDATED
-    
-    def __init__(self, user_data: dict, **kwargs):
-        super().__init__(
-            timestamp=datetime.utcnow(),
-            service="user_service",
-            data=user_data,
-            **kwargs
-        )
-
-
-class UserDeletedEvent(BaseEvent):
-    event_type: EventType = EventType.USER_DELETED
-    
-    def __init__(self, user_id: int, **kwargs):
-        super().__init__(
-            timestamp=datetime.utcnow(),
-            service="user_service",
-            data={"user_id": user_id},
-            **kwargs
-        )
-
-
-class UserLoginEvent(BaseEvent):
-    event_type: EventType = EventType.USER_LOGIN
-    
-    def __init__(self, user_data: dict, **kwargs):
-        super().__init__(
-            timestamp=datetime.utcnow(),
-            service="user_service",
-            data=user_data,
-            **kwargs
-        )
-
-
 class RedisClient:
     def __init__(self, redis_url: str):
         self.redis_url = redis_url
@@ -85,7 +30,7 @@ class RedisClient:
             await self.redis_client.ping()
             logger.info("Connected to Redis successfully")
         except Exception as e:
-            logger.error(f"Failed to connect to Redis: {e}")
+            logger.error("Failed to connect to Redis: %s", e)
             raise
     
     async def disconnect(self):
@@ -102,54 +47,103 @@ class RedisClient:
         try:
             message_str = json.dumps(message, default=str)
             await self.redis_client.publish(channel, message_str)
-            logger.info(f"Published message to channel {channel}")
+            logger.info("Published message to channel %s", channel)
         except Exception as e:
-            logger.error(f"Failed to publish message: {e}")
+            logger.error("Failed to publish message: %s", e)
             raise
 
+    async def subscribe(self, channel: str):
+        """Subscribe to a channel"""
+        if not self.redis_client:
+            raise RuntimeError("Redis client not connected")
+
+        pubsub = self.redis_client.pubsub()
+        await pubsub.subscribe(channel)
+        return pubsub
+
 
 # Global Redis client instance
 redis_client = RedisClient(settings.redis_url)
 
+# User events stream (Redis Streams; consumed by budget_service and by every
+# user_service worker for principal cache invalidation)
+USER_EVENTS_STREAM = "user_events"
+event_bus = EventBus(
+    RedisStreamsBackend(lambda: redis_client.redis_client),
+    maxlen=settings.event_stream_maxlen,
+    codec=event_codec
+)
+
 
 async def publish_user_created(user_data: dict):
     """Publish user created event"""
     try:
         event = UserCreatedEvent(user_data=user_data)
-        await redis_client.publish("user_events", event.model_dump())
-        logger.info(f"Published user created event for user {user_data.get('id')}")
+        await event_bus.publish(USER_EVENTS_STREAM, event.model_dump())
+        logger.info("Published user created event for user %s", user_data.get('id'))
     except Exception as e:
-        logger.error(f"Failed to publish user created event: {e}")
+        logger.error("Failed to publish user created event: %s", e)
 
 
 async def publish_user_updated(user_data: dict):
     """Publish user updated event"""
     try:
         event = UserUpdatedEvent(user_data=user_data)
-        await redis_client.publish("user_events", event.model_dump())
-        logger.info(f"Published user updated event for user {user_data.get('id')}")
+        await event_bus.publish(USER_EVENTS_STREAM, event.model_dump())
+        logger.info("Published user updated event for user %s", user_data.get('id'))
     except Exception as e:
-        logger.error(f"Failed to publish user updated event: {e}")
+        logger.error("Failed to publish user updated event: %s", e)
 
 
 async def publish_user_deleted(user_id: int):
     """Publish user deleted event"""
     try:
         event = UserDeletedEvent(user_id=user_id)
-        await redis_client.publish("user_events", event.model_dump())
-        logger.info(f"Published user deleted event for user {user_id}")
+        await event_bus.publish(USER_EVENTS_STREAM, event.model_dump())
+        logger.info("Published user deleted event for user %s", user_id)
     except Exception as e:
-        logger.error(f"Failed to publish user deleted event: {e}")
+        logger.error("Failed to publish user deleted event: %s", e)
 
 
 async def publish_user_login(user_data: dict):
     """Publish user login event"""
     try:
         event = UserLoginEvent(user_data=user_data)
-        await redis_client.publish("user_events", event.model_dump())
-        logger.info(f"Published user login event for user {user_data.get('id')}")
+        await event_bus.publish(USER_EVENTS_STREAM, event.model_dump())
+        logger.info("Published user login event for user %s", user_data.get('id'))
     except Exception as e:
-        logger.error(f"Failed to publish user login event: {e}")
+        logger.error("Failed to publish user login event: %s", e)
+
+
+async def listen_user_events(
+    handler: Callable[[dict], Any],
+    on_subscribe: Optional[Callable[[], Any]] = None
+):
+    """
+    Follow the user events stream (including this worker's own events) and pass
+    each event to `handler`. Reconnects with backoff and resumes from the last
+    id seen; `on_subscribe` runs at start and after every error so callers can
+    drop state that may be stale.
+    """
+    last_id: Optional[str] = None
+    backoff = 1.0
+    while True:
+        try:
+            if on_subscribe is not None:
+                on_subscribe()
+            if last_id is None:
+                last_id = await event_bus.latest_id(USER_EVENTS_STREAM)
+            while True:
+                for message_id, event in await event_bus.read(USER_EVENTS_STREAM, last_id, block_ms=5000):
+                    last_id = message_id
+                    handler(event)
+                backoff = 1.0
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("User events listener error, retrying in %.0fs: %s", backoff, e)
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 60.0)
 
 
 async def initialize_messaging():
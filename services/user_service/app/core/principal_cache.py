@@ -0,0 +1,110 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from threading import Lock
+from typing import Any, Dict, Optional, Tuple
+from app.core.config import settings
+from app.models.user import User, UserRole
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Authenticated user as seen by request handlers (no password hash)"""
+    id: int
+    email: str
+    username: str
+    full_name: str
+    role: UserRole
+    is_active: bool
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id,
+            email=user.email,
+            username=user.username,
+            full_name=user.full_name,
+            role=user.role,
+            is_active=user.is_active,
+            created_at=user.created_at,
+            updated_at=user.updated_at,
+        )
+
+
+class PrincipalCache:
+    """
+    TTL cache of resolved principals keyed by username
+
+    Entries are dropped as soon as the user is updated or deleted (locally via
+    user_service, and on other workers via the `user_events` channel), so role
+    changes and deactivations take effect immediately. A ttl of 0 disables it.
+    """
+
+    def __init__(self, maxsize: int = 4096, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[str, Tuple[float, Principal]]" = OrderedDict()
+        self._username_by_id: Dict[int, str] = {}
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, username: str) -> Optional[Principal]:
+        with self._lock:
+            entry = self._data.get(username)
+            if entry is None or entry[0] < time.monotonic():
+                self.misses += 1
+                return None
+            self._data.move_to_end(username)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, principal: Principal) -> None:
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._data[principal.username] = (time.monotonic() + self.ttl, principal)
+            self._data.move_to_end(principal.username)
+            self._username_by_id[principal.id] = principal.username
+            while len(self._data) > self.maxsize:
+                _, (_, evicted) = self._data.popitem(last=False)
+                self._username_by_id.pop(evicted.id, None)
+
+    def invalidate(self, username: Optional[str] = None, user_id: Optional[int] = None) -> None:
+        """Drop the entry for a username and/or user id"""
+        with self._lock:
+            if user_id is not None:
+                cached_username = self._username_by_id.pop(user_id, None)
+                if cached_username is not None:
+                    self._data.pop(cached_username, None)
+            if username is not None:
+                entry = self._data.pop(username, None)
+                if entry is not None:
+                    self._username_by_id.pop(entry[1].id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._username_by_id.clear()
+
+    def apply_event(self, event: Dict[str, Any]) -> None:
+        """Invalidate entries affected by a `user_events` message"""
+        data = event.get("data") or {}
+        event_type = event.get("event_type")
+        if event_type == "user.updated":
+            self.invalidate(username=data.get("username"), user_id=data.get("id"))
+        elif event_type == "user.deleted":
+            self.invalidate(user_id=data.get("user_id"))
+
+
+# Global principal cache
+principal_cache = PrincipalCache(
+    maxsize=settings.principal_cache_maxsize,
+    ttl=settings.principal_cache_ttl
+)
@@ -0,0 +1,179 @@
+import logging
+import time
+from collections import Counter, OrderedDict
+from threading import Lock
+from typing import Dict, List, Optional, Sequence, Tuple
+from app.core.config import settings
+from app.core.messaging import redis_client
+
+logger = logging.getLogger(__name__)
+
+
+# Atomic multi-bucket take: refill every bucket by elapsed time, then take `cost`
+# tokens from all of them only if every bucket has enough (all or nothing), so a
+# rejected attempt does not drain the buckets that still had tokens.
+# KEYS = bucket keys; ARGV = cost, now (s), then capacity and refill per second per key
+# Returns {allowed (0/1), {seconds until a token is available, per key}}
+TOKEN_BUCKET_SCRIPT = """
+local cost = tonumber(ARGV[1])
+local now = tonumber(ARGV[2])
+local tokens, capacities, rates, waits = {}, {}, {}, {}
+local allowed = 1
+for i = 1, #KEYS do
+    local capacity = tonumber(ARGV[1 + 2 * i])
+    local rate = tonumber(ARGV[2 + 2 * i])
+    local state = redis.call('HMGET', KEYS[i], 'tokens', 'ts')
+    local t = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    t = math.min(capacity, t + math.max(0, now - ts) * rate)
+    tokens[i], capacities[i], rates[i] = t, capacity, rate
+    if t >= cost then
+        waits[i] = '0'
+    else
+        allowed = 0
+        waits[i] = tostring((cost - t) / rate)
+    end
+end
+for i = 1, #KEYS do
+    local t = tokens[i]
+    if allowed == 1 then
+        t = t - cost
+    end
+    redis.call('HSET', KEYS[i], 'tokens', math.min(capacities[i], t), 'ts', now)
+    redis.call('PEXPIRE', KEYS[i], math.ceil(capacities[i] / rates[i] * 1000))
+end
+return {allowed, waits}
+"""
+
+
+class Bucket:
+    """Token bucket parameters: `capacity` tokens, refilled at `refill_per_second`"""
+
+    def __init__(self, name: str, capacity: int, refill_per_second: float):
+        self.name = name
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+
+
+class LocalTokenBuckets:
+    """In-process token buckets, used when Redis is unavailable"""
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._state: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = Lock()
+
+    def take(self, key: str, bucket: Bucket, cost: float, now: float) -> Tuple[bool, float]:
+        allowed, waits = self.take_all([(key, bucket)], cost, now)
+        return allowed, waits[0]
+
+    def take_all(self, entries: Sequence[Tuple[str, Bucket]], cost: float, now: float) -> Tuple[bool, List[float]]:
+        """Same all-or-nothing semantics as TOKEN_BUCKET_SCRIPT"""
+        with self._lock:
+            refilled = []
+            for key, bucket in entries:
+                tokens, ts = self._state.get(key, (bucket.capacity, now))
+                refilled.append(min(bucket.capacity, tokens + max(0.0, now - ts) * bucket.refill_per_second))
+            waits = [
+                0.0 if tokens >= cost else (cost - tokens) / bucket.refill_per_second
+                for tokens, (_, bucket) in zip(refilled, entries)
+            ]
+            allowed = all(wait == 0.0 for wait in waits)
+            for tokens, (key, bucket) in zip(refilled, entries):
+                if allowed:
+                    tokens -= cost
+                self._state[key] = (min(bucket.capacity, tokens), now)
+                self._state.move_to_end(key)
+            while len(self._state) > self.maxsize:
+                self._state.popitem(last=False)
+        return allowed, waits
+
+
+class LoginThrottle:
+    """
+    Token-bucket throttling of login attempts, per username and per client IP
+
+    Every attempt takes one token from both buckets before the password is
+    verified, atomically: if either bucket is empty, neither is debited (an
+    IP that is already blocked cannot keep draining a user's bucket). A
+    successful login gives the tokens back, so only failed attempts count
+    against the limit. State lives in Redis (shared by all workers) and
+    falls back to in-process buckets if Redis is unavailable.
+    """
+
+    def __init__(self, username_bucket: Bucket, ip_bucket: Bucket, enabled: bool = True, prefix: str = "login_throttle"):
+        self.username_bucket = username_bucket
+        self.ip_bucket = ip_bucket
+        self.enabled = enabled
+        self.prefix = prefix
+        self.local = LocalTokenBuckets()
+        self.counters: Counter = Counter()
+        self._script = None
+
+    def _keys(self, username: str, client_ip: Optional[str]) -> Sequence[Tuple[str, Bucket]]:
+        keys = [(f"{self.prefix}:user:{username.lower()}", self.username_bucket)]
+        if client_ip:
+            keys.append((f"{self.prefix}:ip:{client_ip}", self.ip_bucket))
+        return keys
+
+    async def _take(self, entries: Sequence[Tuple[str, Bucket]], cost: float) -> Tuple[bool, List[float]]:
+        now = time.time()
+        redis = redis_client.redis_client
+        if redis is not None:
+            try:
+                if self._script is None:
+                    self._script = redis.register_script(TOKEN_BUCKET_SCRIPT)
+                args = [cost, now]
+                for _, bucket in entries:
+                    args += [bucket.capacity, bucket.refill_per_second]
+                allowed, waits = await self._script(keys=[key for key, _ in entries], args=args)
+                return bool(int(allowed)), [float(wait) for wait in waits]
+            except Exception as e:
+                logger.warning("Login throttle falling back to local buckets: %s", e)
+                self.counters["fallback"] += 1
+        return self.local.take_all(entries, cost, now)
+
+    async def acquire(self, username: str, client_ip: Optional[str]) -> Tuple[bool, float]:
+        """
+        Take one token per bucket for this attempt
+
+        Returns:
+            (allowed, retry_after_seconds)
+        """
+        if not self.enabled:
+            return True, 0.0
+
+        entries = self._keys(username, client_ip)
+        allowed, waits = await self._take(entries, 1)
+        for (_, bucket), wait in zip(entries, waits):
+            if wait > 0:
+                self.counters[f"rejected_{bucket.name}"] += 1
+        self.counters["allowed" if allowed else "rejected"] += 1
+        return allowed, max(waits)
+
+    async def release(self, username: str, client_ip: Optional[str]) -> None:
+        """Give back the tokens taken by a successful attempt"""
+        if not self.enabled:
+            return
+        await self._take(self._keys(username, client_ip), -1)
+
+    def record_result(self, verified: bool) -> None:
+        self.counters["verified" if verified else "failed"] += 1
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self.counters)
+
+
+login_throttle = LoginThrottle(
+    username_bucket=Bucket(
+        "username",
+        capacity=settings.login_username_burst,
+        refill_per_second=settings.login_username_per_minute / 60.0,
+    ),
+    ip_bucket=Bucket(
+        "ip",
+        capacity=settings.login_ip_burst,
+        refill_per_second=settings.login_ip_per_minute / 60.0,
+    ),
+    enabled=settings.login_throttle_enabled,
+)
@@ -6,8 +6,9 @@ from jose import JWTError, jwt
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.config import settings
 from app.core.database import get_db
+from app.core.principal_cache import Principal, principal_cache
 from app.services import user_service
-from app.models.user import User, UserRole
+from app.models.user import UserRole
 
 
 security = HTTPBearer()
@@ -43,8 +44,12 @@ async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(secur
 async def get_current_user(
     username: str = Depends(verify_token),
     db: AsyncSession = Depends(get_db)
-) -> User:
-    """Get current authenticated user"""
+) -> Principal:
+    """Get current authenticated user (cached, see app.core.principal_cache)"""
+    principal = principal_cache.get(username)
+    if principal is not None:
+        return principal
+
     user = await user_service.get_user_by_username(db, username=username)
     if user is None:
         raise HTTPException(
@@ -52,10 +57,12 @@ async def get_current_user(
             detail="Usuário não encontrado",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    return user
+    principal = Principal.from_user(user)
+    principal_cache.set(principal)
+    return principal
 
 
-async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+async def get_current_active_user(current_user: Principal = Depends(get_current_user)) -> Principal:
     """Get current active user"""
     if not current_user.is_active:
         raise HTTPException(
@@ -69,7 +76,7 @@ class RoleChecker:
     def __init__(self, allowed_roles: list[UserRole]):
         self.allowed_roles = allowed_roles
 
-    def __call__(self, current_user: User = Depends(get_current_active_user)):
+    def __call__(self, current_user: Principal = Depends(get_current_active_user)):
         if current_user.role not in self.allowed_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -85,7 +92,7 @@ require_admin_or_vendas = RoleChecker([UserRole.ADMIN, UserRole.VENDAS])
 
 class PermissionChecker:
     @staticmethod
-    def can_modify_user(current_user: User, target_user_id: int) -> bool:
+    def can_modify_user(current_user: Principal, target_user_id: int) -> bool:
         """Check if user can modify another user"""
         # Admin can modify anyone
         if current_user.role == UserRole.ADMIN:
@@ -95,7 +102,7 @@ class PermissionChecker:
         return current_user.id == target_user_id
     
     @staticmethod
-    def can_view_user(current_user: User, target_user_id: int) -> bool:
+    def can_view_user(current_user: Principal, target_user_id: int) -> bool:
         """Check if user can view another user"""
         # Admin can view anyone
         if current_user.role == UserRole.ADMIN:
@@ -105,7 +112,7 @@ class PermissionChecker:
         return current_user.id == target_user_id
     
     @staticmethod
-    def can_delete_user(current_user: User, target_user_id: int) -> bool:
+    def can_delete_user(current_user: Principal, target_user_id: int) -> bool:
         """Check if user can delete another user"""
         # Only admin can delete users
         if current_user.role != UserRole.ADMIN:
@@ -117,7 +124,7 @@ class PermissionChecker:
 
 def check_user_permission(target_user_id: int):
     """Check if current user has permission to access target user"""
-    async def _check_permission(current_user: User = Depends(get_current_active_user)):
+    async def _check_permission(current_user: Principal = Depends(get_current_active_user)):
         if not PermissionChecker.can_view_user(current_user, target_user_id):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -129,7 +136,7 @@ def check_user_permission(target_user_id: int):
 
 def check_modify_permission(target_user_id: int):
     """Check if current user has permission to modify target user"""
-    async def _check_permission(current_user: User = Depends(get_current_active_user)):
+    async def _check_permission(current_user: Principal = Depends(get_current_active_user)):
         if not PermissionChecker.can_modify_user(current_user, target_user_id):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -141,7 +148,7 @@ def check_modify_permission(target_user_id: int):
 
 def check_delete_permission(target_user_id: int):
     """Check if current user has permission to delete target user"""
-    async def _check_permission(current_user: User = Depends(get_current_active_user)):
+    async def _check_permission(current_user: Principal = Depends(get_current_active_user)):
         if not PermissionChecker.can_delete_user(current_user, target_user_id):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -0,0 +1,142 @@
+"""
+Production ASGI runner
+
+`run("app.main:app", default_port)` starts uvicorn the way the services run
+in containers (`python -m app.server`):
+
+- workers: WEB_CONCURRENCY, else the CPUs this process can actually use
+  (scheduler affinity and the cgroup CPU quota, so a container limited to
+  2 CPUs on a 32-core host gets 2 workers), capped by MAX_WORKERS
+- uvloop and httptools when installed, asyncio/h11 otherwise
+- each worker restarts after MAX_REQUESTS requests plus a random
+  0..MAX_REQUESTS_JITTER, so memory growth is capped and workers don't all
+  recycle at once. A supervisor process always runs, even with a single
+  worker, and keeps the listening socket open while a worker is replaced
+- SIGTERM stops accepting connections and drains in-flight requests for up
+  to GRACEFUL_TIMEOUT seconds before the app's shutdown hooks run
+- KEEPALIVE_TIMEOUT is kept above nginx's upstream keepalive_timeout so the
+  proxy never reuses a connection the worker is about to close; BACKLOG
+  sizes the listen queue (the kernel caps it at net.core.somaxconn)
+- `warmup_env` supplies defaults (e.g. PDF_WARMUP=true) that turn on the
+  per-worker warm-up done by each service's startup hooks
+
+Every setting can be overridden by its environment variable; HOST and PORT
+choose the bind address.
+"""
+
+import importlib.util
+import logging
+import math
+import os
+import random
+from typing import Mapping, Optional
+
+import uvicorn
+from uvicorn.supervisors import Multiprocess
+
+logger = logging.getLogger("uvicorn.error")
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_MAX_REQUESTS = 20000
+DEFAULT_GRACEFUL_TIMEOUT = 25
+# nginx closes idle upstream connections after 60s (keepalive_timeout)
+DEFAULT_KEEPALIVE_TIMEOUT = 75
+DEFAULT_BACKLOG = 2048
+
+
+def _cgroup_cpu_limit() -> Optional[float]:
+    """CPU quota of the container in CPUs, None when unlimited"""
+    try:  # cgroup v2: "<quota> <period>" or "max <period>"
+        with open("/sys/fs/cgroup/cpu.max") as file:
+            quota, period = file.read().split()[:2]
+        return None if quota == "max" else int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:  # cgroup v1: quota -1 means unlimited
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as file:
+            quota = int(file.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as file:
+            period = int(file.read())
+        return None if quota <= 0 else quota / period
+    except (OSError, ValueError):
+        return None
+
+
+def available_cpus() -> int:
+    """CPUs this process can use (affinity mask and cgroup quota)"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS
+        cpus = os.cpu_count() or 1
+    limit = _cgroup_cpu_limit()
+    if limit is not None:
+        cpus = min(cpus, math.ceil(limit))
+    return max(1, cpus)
+
+
+def default_workers() -> int:
+    """One event loop per usable CPU, at most MAX_WORKERS"""
+    return max(1, min(available_cpus(), int(os.getenv("MAX_WORKERS", str(DEFAULT_MAX_WORKERS)))))
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def server_config(app: str, default_port: int) -> uvicorn.Config:
+    """uvicorn settings for production, from the environment"""
+    return uvicorn.Config(
+        app,
+        host=os.getenv("HOST", "0.0.0.0"),
+        port=int(os.getenv("PORT", str(default_port))),
+        workers=int(os.getenv("WEB_CONCURRENCY", "0")) or default_workers(),
+        loop=os.getenv("SERVER_LOOP", "uvloop" if _installed("uvloop") else "asyncio"),
+        http=os.getenv("SERVER_HTTP", "httptools" if _installed("httptools") else "h11"),
+        backlog=int(os.getenv("BACKLOG", str(DEFAULT_BACKLOG))),
+        timeout_keep_alive=int(os.getenv("KEEPALIVE_TIMEOUT", str(DEFAULT_KEEPALIVE_TIMEOUT))),
+        timeout_graceful_shutdown=int(os.getenv("GRACEFUL_TIMEOUT", str(DEFAULT_GRACEFUL_TIMEOUT))),
+        limit_max_requests=int(os.getenv("MAX_REQUESTS", str(DEFAULT_MAX_REQUESTS))) or None,
+        access_log=os.getenv("ACCESS_LOG", "true").lower() == "true",
+        proxy_headers=True,
+    )
+
+
+class WorkerServer(uvicorn.Server):
+    """uvicorn server whose request limit gets a per-worker random jitter"""
+
+    def __init__(self, config: uvicorn.Config, max_requests_jitter: int = 0):
+        super().__init__(config)
+        self.max_requests_jitter = max_requests_jitter
+
+    def run(self, sockets=None) -> None:
+        # Runs in the worker process, so every worker (and every replacement)
+        # draws its own limit.
+        if self.config.limit_max_requests and self.max_requests_jitter > 0:
+            self.config.limit_max_requests += random.randint(0, self.max_requests_jitter)
+        super().run(sockets=sockets)
+
+
+def run(app: str, default_port: int, warmup_env: Optional[Mapping[str, str]] = None) -> None:
+    """Serve `app` ("module:attribute") with supervised, recycled workers"""
+    for name, value in (warmup_env or {}).items():
+        os.environ.setdefault(name, value)
+
+    config = server_config(app, default_port)
+    max_requests = config.limit_max_requests or 0
+    jitter = int(os.getenv("MAX_REQUESTS_JITTER", str(max_requests // 10)))
+    server = WorkerServer(config, jitter)
+    logger.info(
+        "Serving %s on %s:%d: %d workers (%d CPUs usable), loop=%s, http=%s, "
+        "max_requests=%s+%d, keep-alive=%ds, graceful shutdown=%ds, backlog=%d",
+        app, config.host, config.port, config.workers, available_cpus(), config.loop, config.http,
+        max_requests or "unlimited", jitter, config.timeout_keep_alive,
+        config.timeout_graceful_shutdown, config.backlog,
+    )
+
+    sock = config.bind_socket()
+    try:
+        Multiprocess(config, target=server.run, sockets=[sock]).run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sock.close()
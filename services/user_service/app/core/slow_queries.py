@@ -0,0 +1,380 @@
+"""
+Slow-query log with EXPLAIN capture
+
+`SlowQueryLog.instrument(engine)` times every statement with two cursor
+events; statements faster than `threshold_ms` cost a `perf_counter()` call
+and a comparison, so the hook can stay enabled in production. Slow ones are
+kept in a bounded in-memory log (per worker) with:
+
+- the statement (whitespace collapsed) and a fingerprint that ignores the
+  length of expanded `IN (...)` lists
+- the shapes of the bind parameters (types and lengths, never values)
+- the endpoint (route template) and request id that ran it
+
+Each fingerprint is also EXPLAINed, at most once per `explain_interval`
+seconds, by a background task on its own connection, so the request that
+hit the slow query never waits for it. On PostgreSQL SELECTs get
+`EXPLAIN (ANALYZE, BUFFERS)` under a `statement_timeout`; writes get a
+plain EXPLAIN, as ANALYZE would execute them. The transaction is always
+rolled back. SQLite gets `EXPLAIN QUERY PLAN`.
+
+`SlowQueryMiddleware` only remembers the ASGI scope of the request so the
+listener can name the endpoint; the route is read when a slow statement is
+recorded, never on the fast path.
+"""
+
+import asyncio
+import hashlib
+import itertools
+import json
+import logging
+import re
+import time
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Any, Deque, Dict, List, Mapping, Optional, Tuple
+
+from .logging_config import get_request_id
+
+logger = logging.getLogger(__name__)
+
+MAX_STATEMENT_LENGTH = 4000
+MAX_FINGERPRINTS = 1000
+EXPLAIN_QUEUE_SIZE = 100
+
+# "(?, ?, ?)", "($1, $2)", "(%(id_1)s, ...)": expanded IN lists vary in length
+_PLACEHOLDER = r"(?:\?|\$\d+|%\(\w+\)s|%s|:\w+)"
+_PLACEHOLDER_LIST_RE = re.compile(rf"\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})+\s*\)")
+_WHITESPACE_RE = re.compile(r"\s+")
+_EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+_request_scope: ContextVar[Optional[Mapping[str, Any]]] = ContextVar("slow_query_scope", default=None)
+# Set inside the EXPLAIN worker so its own statements are never recorded
+_explaining: ContextVar[bool] = ContextVar("slow_query_explaining", default=False)
+
+
+def normalize_statement(statement: str) -> str:
+    """Statement with whitespace collapsed and IN lists folded to `(...)`"""
+    return _PLACEHOLDER_LIST_RE.sub("(...)", _WHITESPACE_RE.sub(" ", statement).strip())
+
+
+def statement_fingerprint(statement: str) -> str:
+    """Stable id of a statement, shared by executions that differ only in IN list length"""
+    return hashlib.sha1(normalize_statement(statement).encode("utf-8")).hexdigest()[:16]
+
+
+def _type_name(value: Any) -> str:
+    if value is None:
+        return "null"
+    name = type(value).__name__
+    if isinstance(value, (str, bytes, list, tuple)):
+        return f"{name}[{len(value)}]"
+    return name
+
+
+def _shape(parameters: Any) -> Any:
+    if isinstance(parameters, Mapping):
+        return {key: _type_name(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_type_name(value) for value in parameters]
+    return _type_name(parameters)
+
+
+def parameter_shape(parameters: Any, executemany: bool = False) -> Any:
+    """Types (and lengths) of the bind parameters, without their values"""
+    if executemany and isinstance(parameters, (list, tuple)):
+        return {"rows": len(parameters), "row": _shape(parameters[0]) if parameters else None}
+    return _shape(parameters)
+
+
+def _current_endpoint() -> Optional[str]:
+    scope = _request_scope.get()
+    if scope is None:
+        return None
+    route = getattr(scope.get("route"), "path", None) or "unmatched"
+    return f"{scope.get('method', '')} {route}"
+
+
+class _StatementStats:
+    __slots__ = ("fingerprint", "statement", "count", "total_ms", "max_ms", "last_seen", "endpoints")
+
+    def __init__(self, fingerprint: str, statement: str):
+        self.fingerprint = fingerprint
+        self.statement = statement
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_seen = ""
+        self.endpoints: Dict[str, int] = {}
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "fingerprint": self.fingerprint,
+            "statement": self.statement,
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "last_seen": self.last_seen,
+            "endpoints": dict(self.endpoints),
+        }
+
+
+class SlowQueryLog:
+    """Bounded log of statements slower than `threshold_ms`, with sampled plans"""
+
+    def __init__(
+        self,
+        threshold_ms: float = 200.0,
+        keep: int = 500,
+        explain: bool = True,
+        explain_interval: float = 300.0,
+        explain_timeout_ms: int = 5000,
+    ):
+        self.engine: Any = None
+        self.total = 0
+        self.entries: Deque[Dict[str, Any]] = deque(maxlen=keep)
+        self._statements: "OrderedDict[str, _StatementStats]" = OrderedDict()
+        self._plans: Dict[str, Dict[str, Any]] = {}
+        self._explained_at: Dict[str, float] = {}
+        self._ids = itertools.count(1)
+        self._lock = Lock()
+        self._queue: Optional["asyncio.Queue[Tuple[str, str, Any, bool]]"] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional["asyncio.Task[None]"] = None
+        self.configure(threshold_ms, keep, explain, explain_interval, explain_timeout_ms)
+
+    def configure(
+        self,
+        threshold_ms: float = 200.0,
+        keep: int = 500,
+        explain: bool = True,
+        explain_interval: float = 300.0,
+        explain_timeout_ms: int = 5000,
+    ) -> None:
+        self.threshold_ms = threshold_ms
+        self.explain = explain
+        self.explain_interval = explain_interval
+        self.explain_timeout_ms = explain_timeout_ms
+        if keep != self.entries.maxlen:
+            self.entries = deque(self.entries, maxlen=keep)
+
+    def instrument(self, engine: Any) -> None:
+        """Time the statements of an (async) SQLAlchemy engine; its plans are taken on it too"""
+        from sqlalchemy import event
+
+        self.engine = engine
+        sync_engine = getattr(engine, "sync_engine", engine)
+
+        @event.listens_for(sync_engine, "before_cursor_execute")
+        def _before(conn, cursor, statement, parameters, context, executemany):
+            context._slow_query_start = time.perf_counter()
+
+        @event.listens_for(sync_engine, "after_cursor_execute")
+        def _after(conn, cursor, statement, parameters, context, executemany):
+            started = getattr(context, "_slow_query_start", None)
+            if started is None:
+                return
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if elapsed_ms >= self.threshold_ms and not _explaining.get():
+                self.record(statement, parameters, elapsed_ms, executemany)
+
+    def record(self, statement: str, parameters: Any, duration_ms: float, executemany: bool = False) -> Dict[str, Any]:
+        """Add a slow execution to the log and queue its fingerprint for EXPLAIN"""
+        fingerprint = statement_fingerprint(statement)
+        endpoint = _current_endpoint()
+        now = datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+        entry = {
+            "id": next(self._ids),
+            "ts": now,
+            "duration_ms": round(duration_ms, 3),
+            "fingerprint": fingerprint,
+            "statement": _WHITESPACE_RE.sub(" ", statement).strip()[:MAX_STATEMENT_LENGTH],
+            "parameters": parameter_shape(parameters, executemany),
+            "executemany": executemany,
+            "endpoint": endpoint,
+            "request_id": get_request_id(),
+        }
+        with self._lock:
+            self.total += 1
+            self.entries.append(entry)
+            stats = self._statements.get(fingerprint)
+            if stats is None:
+                if len(self._statements) >= MAX_FINGERPRINTS:
+                    evicted, _ = self._statements.popitem(last=False)
+                    self._plans.pop(evicted, None)
+                    self._explained_at.pop(evicted, None)
+                stats = self._statements[fingerprint] = _StatementStats(
+                    fingerprint, normalize_statement(statement)[:MAX_STATEMENT_LENGTH]
+                )
+            else:
+                self._statements.move_to_end(fingerprint)
+            stats.count += 1
+            stats.total_ms += duration_ms
+            stats.max_ms = max(stats.max_ms, duration_ms)
+            stats.last_seen = now
+            key = endpoint or "background"
+            stats.endpoints[key] = stats.endpoints.get(key, 0) + 1
+            explain = self._claim_explain(fingerprint, statement)
+
+        logger.warning(
+            "Slow query (%.1f ms) in %s [%s]: %s",
+            duration_ms, endpoint or "background", fingerprint, entry["statement"][:200]
+        )
+        if explain:
+            row = parameters[0] if executemany and parameters else parameters
+            analyze = statement.lstrip()[:6].upper() == "SELECT"
+            try:
+                self._loop.call_soon_threadsafe(self._enqueue, (fingerprint, statement, row, analyze))
+            except RuntimeError:  # loop closed while shutting down
+                pass
+        return entry
+
+    def _claim_explain(self, fingerprint: str, statement: str) -> bool:
+        if not self.explain or self._task is None or self._loop is None:
+            return False
+        if not statement.lstrip()[:6].upper().startswith(_EXPLAINABLE):
+            return False
+        now = time.monotonic()
+        last = self._explained_at.get(fingerprint)
+        if last is not None and now - last < self.explain_interval:
+            return False
+        self._explained_at[fingerprint] = now
+        return True
+
+    def _enqueue(self, job: Tuple[str, str, Any, bool]) -> None:
+        if self._queue is None:
+            return
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            with self._lock:
+                self._explained_at.pop(job[0], None)
+
+    def start(self) -> None:
+        """Start the EXPLAIN worker (call from the running event loop)"""
+        if self._task is not None or self.engine is None or not self.explain:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(EXPLAIN_QUEUE_SIZE)
+        self._task = self._loop.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the EXPLAIN worker, dropping plans still queued"""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._queue = self._loop = None
+
+    async def _run(self) -> None:
+        _explaining.set(True)
+        while True:
+            fingerprint, statement, parameters, analyze = await self._queue.get()
+            started = time.perf_counter()
+            try:
+                plan = await self._explain(statement, parameters, analyze)
+                error = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning("EXPLAIN failed for slow query %s: %s", fingerprint, exc)
+                plan, error = None, str(exc)
+            with self._lock:
+                if fingerprint in self._statements:
+                    self._plans[fingerprint] = {
+                        "captured_at": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+                        "analyze": analyze and error is None and self.engine.dialect.name == "postgresql",
+                        "explain_ms": round((time.perf_counter() - started) * 1000, 3),
+                        "plan": plan,
+                        "error": error,
+                    }
+            self._queue.task_done()
+
+    async def _explain(self, statement: str, parameters: Any, analyze: bool) -> Any:
+        dialect = self.engine.dialect.name
+        async with self.engine.connect() as conn:
+            try:
+                if dialect == "postgresql":
+                    await conn.exec_driver_sql(f"SET LOCAL statement_timeout = {int(self.explain_timeout_ms)}")
+                    options = "ANALYZE, BUFFERS, FORMAT JSON" if analyze else "FORMAT JSON"
+                    result = await conn.exec_driver_sql(f"EXPLAIN ({options}) {statement}", parameters)
+                    plan = result.scalar()
+                    return json.loads(plan) if isinstance(plan, str) else plan
+                prefix = "EXPLAIN QUERY PLAN" if dialect == "sqlite" else "EXPLAIN"
+                result = await conn.exec_driver_sql(f"{prefix} {statement}", parameters)
+                return [list(row) for row in result.fetchall()]
+            finally:
+                await conn.rollback()
+
+    async def wait_for_plans(self) -> None:
+        """Wait until every queued EXPLAIN has run (tests, graceful shutdown)"""
+        if self._queue is not None:
+            await self._queue.join()
+
+    def recent(self, limit: int = 50, endpoint: Optional[str] = None, min_ms: float = 0.0) -> List[Dict[str, Any]]:
+        """Most recent slow executions first, optionally filtered"""
+        with self._lock:
+            entries = list(self.entries)
+        selected = []
+        for entry in reversed(entries):
+            if entry["duration_ms"] < min_ms or (endpoint and entry["endpoint"] != endpoint):
+                continue
+            selected.append({**entry, "has_plan": entry["fingerprint"] in self._plans})
+            if len(selected) >= limit:
+                break
+        return selected
+
+    def top(self, limit: int = 20, order: str = "total_ms") -> List[Dict[str, Any]]:
+        """Slow statements aggregated by fingerprint, worst first"""
+        with self._lock:
+            rows = [stats.as_dict() for stats in self._statements.values()]
+            planned = set(self._plans)
+        rows.sort(key=lambda row: row[order], reverse=True)
+        for row in rows:
+            row["has_plan"] = row["fingerprint"] in planned
+        return rows[:limit]
+
+    def statement(self, fingerprint: str, samples: int = 20) -> Optional[Dict[str, Any]]:
+        """Aggregate, captured plan and latest executions of one fingerprint"""
+        with self._lock:
+            stats = self._statements.get(fingerprint)
+            if stats is None:
+                return None
+            detail = stats.as_dict()
+            detail["plan"] = self._plans.get(fingerprint)
+            entries = [entry for entry in self.entries if entry["fingerprint"] == fingerprint]
+        detail["samples"] = entries[::-1][:samples]
+        return detail
+
+    def clear(self) -> None:
+        with self._lock:
+            self.entries.clear()
+            self._statements.clear()
+            self._plans.clear()
+            self._explained_at.clear()
+
+
+slow_query_log = SlowQueryLog()
+
+
+class SlowQueryMiddleware:
+    """ASGI middleware that lets the slow-query log attribute statements to an endpoint"""
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _request_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_scope.reset(token)
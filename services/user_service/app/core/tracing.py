@@ -0,0 +1,572 @@
+"""
+Distributed tracing with W3C trace-context, without external dependencies
+
+`TracingMiddleware` continues the trace of an incoming `traceparent` header
+(or starts one, reusing a 32-hex `X-Request-ID` from nginx as the trace id
+so access logs and traces line up) and opens a server span per request.
+Inside the request, `start_span` / `@traced` add child spans, `trace_engine`
+adds one span per SQL statement and `TracingTransport` wraps outgoing httpx
+calls in client spans and injects `traceparent`, so the next service joins
+the same trace.
+
+Finished spans go to a pluggable exporter, from a background thread when
+`background=True` so export I/O never runs on the event loop:
+
+- `InMemoryExporter`: keeps spans in a list (tests)
+- `JsonFileExporter`: one JSON object per span per line
+- `OtlpHttpExporter`: OTLP/HTTP JSON to a collector (Jaeger, Tempo, ...)
+
+Sampling is decided once at the root (`sample_rate`) and carried in the
+`traceparent` flags; downstream services follow it. While tracing is not
+configured every entry point returns immediately.
+"""
+
+import functools
+import inspect
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+TRACEPARENT = "traceparent"
+TRACESTATE = "tracestate"
+_TRACEPARENT_RE = re.compile(r"^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+_TRACE_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+_INVALID_TRACE_ID = "0" * 32
+_INVALID_SPAN_ID = "0" * 16
+
+SPAN_KINDS = {"internal": 1, "server": 2, "client": 3}
+MAX_STATEMENT_LENGTH = 1000
+
+
+def _new_trace_id() -> str:
+    return f"{random.getrandbits(128):032x}"
+
+
+def _new_span_id() -> str:
+    return f"{random.getrandbits(64):016x}"
+
+
+class SpanContext:
+    """Identity of a span as carried in `traceparent`"""
+
+    __slots__ = ("trace_id", "span_id", "sampled", "tracestate")
+
+    def __init__(self, trace_id: str, span_id: str, sampled: bool, tracestate: Optional[str] = None):
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.sampled = sampled
+        self.tracestate = tracestate
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+
+def parse_traceparent(value: str, tracestate: Optional[str] = None) -> Optional[SpanContext]:
+    """Parse a `traceparent` header (None if malformed)"""
+    match = _TRACEPARENT_RE.match(value.strip().lower())
+    if match is None:
+        return None
+    version, trace_id, span_id, flags = match.groups()
+    if version == "ff" or trace_id == _INVALID_TRACE_ID or span_id == _INVALID_SPAN_ID:
+        return None
+    return SpanContext(trace_id, span_id, bool(int(flags, 16) & 1), tracestate)
+
+
+class Span:
+    """A timed operation; use through `start_span`"""
+
+    __slots__ = ("name", "kind", "context", "parent_id", "service", "start_ns", "end_ns",
+                 "attributes", "status", "status_message", "_tracer")
+
+    def __init__(self, tracer: "Tracer", name: str, context: SpanContext, parent_id: Optional[str],
+                 kind: str = "internal", attributes: Optional[Dict[str, Any]] = None):
+        self._tracer = tracer
+        self.name = name
+        self.kind = kind
+        self.context = context
+        self.parent_id = parent_id
+        self.service = tracer.service
+        self.attributes: Dict[str, Any] = dict(attributes) if attributes else {}
+        self.status = "unset"
+        self.status_message: Optional[str] = None
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+
+    @property
+    def trace_id(self) -> str:
+        return self.context.trace_id
+
+    @property
+    def span_id(self) -> str:
+        return self.context.span_id
+
+    @property
+    def sampled(self) -> bool:
+        return self.context.sampled
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_exception(self, exc: BaseException) -> None:
+        self.status = "error"
+        self.status_message = f"{type(exc).__name__}: {exc}"
+
+    def end(self) -> None:
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            if self.context.sampled:
+                self._tracer._on_end(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "service": self.service,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "status": self.status,
+            "status_message": self.status_message,
+        }
+
+
+class _NoopSpan:
+    """Returned while tracing is off or the trace is not sampled"""
+
+    sampled = False
+    attributes: Dict[str, Any] = {}
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def record_exception(self, exc: BaseException) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    """Span active in this context (sampled or not), if any"""
+    return _current_span.get()
+
+
+# Exporters -----------------------------------------------------------------
+
+
+class SpanExporter:
+    """Receives batches of finished, sampled spans"""
+
+    def export(self, spans: Sequence[Span]) -> None:
+        raise NotImplementedError
+
+    def shutdown(self) -> None:
+        pass
+
+
+class InMemoryExporter(SpanExporter):
+    """Keeps finished spans in `spans` (for tests)"""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[Span]) -> None:
+        with self._lock:
+            self.spans.extend(spans)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.spans.clear()
+
+    def by_name(self, name: str) -> List[Span]:
+        return [span for span in self.spans if span.name == name]
+
+
+class JsonFileExporter(SpanExporter):
+    """Appends one JSON object per span to `path`"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def export(self, spans: Sequence[Span]) -> None:
+        lines = "".join(json.dumps(span.to_dict(), default=str) + "\n" for span in spans)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class OtlpHttpExporter(SpanExporter):
+    """Sends spans to an OTLP/HTTP collector using the JSON encoding"""
+
+    def __init__(self, endpoint: str, timeout: float = 5.0):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.timeout = timeout
+
+    def encode(self, spans: Sequence[Span]) -> bytes:
+        by_service: Dict[str, List[Dict[str, Any]]] = {}
+        for span in spans:
+            entry = {
+                "traceId": span.trace_id,
+                "spanId": span.span_id,
+                "name": span.name,
+                "kind": SPAN_KINDS.get(span.kind, 1),
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(span.end_ns),
+                "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in span.attributes.items()],
+                "status": {"code": 2 if span.status == "error" else 0},
+            }
+            if span.parent_id:
+                entry["parentSpanId"] = span.parent_id
+            if span.status_message:
+                entry["status"]["message"] = span.status_message
+            by_service.setdefault(span.service, []).append(entry)
+        return json.dumps({"resourceSpans": [
+            {
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service}}]},
+                "scopeSpans": [{"scope": {"name": "crm-ditual"}, "spans": entries}],
+            }
+            for service, entries in by_service.items()
+        ]}).encode()
+
+    def export(self, spans: Sequence[Span]) -> None:
+        request = urllib.request.Request(
+            self.url, data=self.encode(spans), headers={"Content-Type": "application/json"}, method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+class _BackgroundExport:
+    """Batches spans on a queue and exports them from a daemon thread"""
+
+    def __init__(self, exporter: SpanExporter, max_batch: int = 512, interval: float = 1.0):
+        self.exporter = exporter
+        self.max_batch = max_batch
+        self.interval = interval
+        self._queue: "queue.SimpleQueue[Optional[Span]]" = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._thread.start()
+
+    def submit(self, span: Span) -> None:
+        self._queue.put(span)
+
+    def _run(self) -> None:
+        running = True
+        while running:
+            batch: List[Span] = []
+            deadline = time.monotonic() + self.interval
+            while len(batch) < self.max_batch:
+                try:
+                    span = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if span is None:
+                    running = False
+                    break
+                batch.append(span)
+            if batch:
+                try:
+                    self.exporter.export(batch)
+                except Exception as e:
+                    logger.warning("Failed to export %s spans: %s", len(batch), e)
+
+    def shutdown(self) -> None:
+        self._queue.put(None)
+        self._thread.join(timeout=self.interval + 5)
+        self.exporter.shutdown()
+
+
+# Tracer --------------------------------------------------------------------
+
+
+class Tracer:
+    """Process-wide tracer; disabled until `configure` is called with an exporter"""
+
+    def __init__(self):
+        self.service = "unknown"
+        self.sample_rate = 1.0
+        self.exporter: Optional[SpanExporter] = None
+        self._background: Optional[_BackgroundExport] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def configure(self, service: str, exporter: Optional[SpanExporter], sample_rate: float = 1.0,
+                  background: bool = True) -> None:
+        self.shutdown()
+        self.service = service
+        self.sample_rate = sample_rate
+        self.exporter = exporter
+        if exporter is not None and background:
+            self._background = _BackgroundExport(exporter)
+
+    def shutdown(self) -> None:
+        """Export pending spans and disable tracing"""
+        if self._background is not None:
+            self._background.shutdown()
+        elif self.exporter is not None:
+            self.exporter.shutdown()
+        self.exporter = None
+        self._background = None
+
+    def _on_end(self, span: Span) -> None:
+        if self._background is not None:
+            self._background.submit(span)
+        elif self.exporter is not None:
+            try:
+                self.exporter.export([span])
+            except Exception as e:
+                logger.warning("Failed to export span %s: %s", span.name, e)
+
+    def new_span(self, name: str, kind: str = "internal", attributes: Optional[Dict[str, Any]] = None,
+                 parent: Optional[SpanContext] = None, trace_id: Optional[str] = None) -> Span:
+        """
+        Create (but do not activate) a span
+
+        The parent is `parent` if given, else the current span; without
+        either a new trace starts and the sampling decision is made here.
+        """
+        if parent is None:
+            current = _current_span.get()
+            parent = current.context if current is not None else None
+        if parent is not None:
+            context = SpanContext(parent.trace_id, _new_span_id(), parent.sampled, parent.tracestate)
+            return Span(self, name, context, parent.span_id, kind, attributes)
+        sampled = self.sample_rate >= 1.0 or random.random() < self.sample_rate
+        context = SpanContext(trace_id or _new_trace_id(), _new_span_id(), sampled)
+        return Span(self, name, context, None, kind, attributes)
+
+
+tracer = Tracer()
+
+
+def configure_tracing(service: str, exporter: Optional[str] = None, sample_rate: Optional[float] = None,
+                      file_path: Optional[str] = None, otlp_endpoint: Optional[str] = None) -> None:
+    """
+    Configure the process tracer from settings or environment variables
+
+    TRACING_EXPORTER: none (default) | file | otlp | memory
+    TRACING_SAMPLE_RATE (1.0), TRACING_FILE, OTLP_ENDPOINT
+    """
+    kind = (exporter or os.getenv("TRACING_EXPORTER", "none")).lower()
+    if sample_rate is None:
+        sample_rate = float(os.getenv("TRACING_SAMPLE_RATE", "1.0"))
+    if kind == "file":
+        path = file_path or os.getenv("TRACING_FILE", f"/tmp/{service}-spans.jsonl")
+        tracer.configure(service, JsonFileExporter(path), sample_rate)
+    elif kind == "otlp":
+        endpoint = otlp_endpoint or os.getenv("OTLP_ENDPOINT", "http://otel-collector:4318")
+        tracer.configure(service, OtlpHttpExporter(endpoint), sample_rate)
+    elif kind == "memory":
+        tracer.configure(service, InMemoryExporter(), sample_rate, background=False)
+    else:
+        tracer.configure(service, None)
+
+
+def shutdown_tracing() -> None:
+    tracer.shutdown()
+
+
+@contextmanager
+def start_span(name: str, kind: str = "internal", attributes: Optional[Dict[str, Any]] = None,
+               parent: Optional[SpanContext] = None, trace_id: Optional[str] = None) -> Iterator[Any]:
+    """Run the block in a child span of the current one (a no-op span when off)"""
+    if not tracer.enabled:
+        yield NOOP_SPAN
+        return
+    span = tracer.new_span(name, kind, attributes, parent, trace_id)
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as exc:
+        span.record_exception(exc)
+        raise
+    finally:
+        _current_span.reset(token)
+        span.end()
+
+
+def traced(name: str, attributes: Optional[Dict[str, Any]] = None) -> Callable:
+    """Decorator that runs a sync or async function inside `start_span(name)`"""
+    def decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not tracer.enabled:
+                    return await func(*args, **kwargs)
+                with start_span(name, attributes=attributes):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with start_span(name, attributes=attributes):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def inject(headers: Any) -> None:
+    """Add `traceparent`/`tracestate` for the current span to a header mapping"""
+    span = _current_span.get()
+    if span is None:
+        return
+    headers[TRACEPARENT] = span.context.traceparent
+    if span.context.tracestate:
+        headers[TRACESTATE] = span.context.tracestate
+
+
+# Integrations --------------------------------------------------------------
+
+
+class TracingMiddleware:
+    """ASGI middleware that opens a server span per HTTP request"""
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or not tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = tracestate = request_id = None
+        for name, value in scope["headers"]:
+            if name == b"traceparent":
+                traceparent = value.decode("latin-1")
+            elif name == b"tracestate":
+                tracestate = value.decode("latin-1")
+            elif name == b"x-request-id":
+                request_id = value.decode("latin-1")
+        parent = parse_traceparent(traceparent, tracestate) if traceparent else None
+        trace_id = request_id if parent is None and request_id and _TRACE_ID_RE.match(request_id) else None
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        method = scope["method"]
+        attributes = {"http.method": method, "http.target": scope["path"]}
+        with start_span(f"{method} {scope['path']}", "server", attributes, parent, trace_id) as span:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = scope.get("route")
+                route_path = getattr(route, "path", None)
+                if route_path:
+                    span.name = f"{method} {route_path}"
+                    span.set_attribute("http.route", route_path)
+                span.set_attribute("http.status_code", status_code)
+                if status_code >= 500:
+                    span.status = "error"
+
+
+def trace_engine(engine: Any) -> None:
+    """One client span per SQL statement executed inside a traced context"""
+    from sqlalchemy import event
+
+    sync_engine = getattr(engine, "sync_engine", engine)
+    system = sync_engine.dialect.name
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if not tracer.enabled:
+            return
+        parent = _current_span.get()
+        if parent is None or not parent.sampled:
+            return
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "SQL"
+        context._trace_span = tracer.new_span(f"db.{operation.lower()}", "client", {
+            "db.system": system,
+            "db.statement": statement[:MAX_STATEMENT_LENGTH],
+            "db.operation": operation,
+        })
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        span = getattr(context, "_trace_span", None)
+        if span is not None:
+            span.set_attribute("db.rows", cursor.rowcount)
+            span.end()
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(exception_context):
+        context = exception_context.execution_context
+        span = getattr(context, "_trace_span", None) if context is not None else None
+        if span is not None:
+            span.record_exception(exception_context.original_exception)
+            span.end()
+
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - httpx is a dependency of both services
+    httpx = None
+
+if httpx is not None:
+    class TracingTransport(httpx.AsyncBaseTransport):
+        """httpx transport that wraps each request in a client span and injects `traceparent`"""
+
+        def __init__(self, transport: httpx.AsyncBaseTransport):
+            self.transport = transport
+
+        async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+            if not tracer.enabled or _current_span.get() is None:
+                return await self.transport.handle_async_request(request)
+            attributes = {
+                "http.method": request.method,
+                "http.url": str(request.url.copy_with(query=None)),
+                "peer.service": request.url.host,
+            }
+            with start_span(f"HTTP {request.method} {request.url.path}", "client", attributes) as span:
+                inject(request.headers)
+                response = await self.transport.handle_async_request(request)
+                span.set_attribute("http.status_code", response.status_code)
+                if response.status_code >= 500:
+                    span.status = "error"
+                return response
+
+        async def aclose(self) -> None:
+            await self.transport.aclose()
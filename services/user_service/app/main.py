@@ -1,19 +1,63 @@
+import asyncio
 import os
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.v1.api import api_router
 from app.core.config import settings
-from app.services.messaging import initialize_messaging, close_messaging
+from app.core.database import warm_up_pool
+from app.core.logging_config import RequestIdMiddleware, setup_logging, shutdown_logging
+from app.core.tracing import TracingMiddleware, configure_tracing, shutdown_tracing
+from app.core.metrics import REGISTRY, MetricsMiddleware, metrics_response
+from app.core.principal_cache import principal_cache
+from app.core.slow_queries import SlowQueryMiddleware, slow_query_log
+from app.core.rate_limit import login_throttle
+from app.services.auth import initialize_password_hasher, password_hasher
+from app.services.messaging import initialize_messaging, close_messaging, listen_user_events
+from app.services.outbox import outbox_relay
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    setup_logging(
+        "user_service",
+        settings.environment,
+        level=settings.log_level,
+        fmt=settings.log_format,
+        debug_sample_rate=settings.log_debug_sample_rate,
+    )
+    configure_tracing(
+        "user_service",
+        settings.tracing_exporter,
+        settings.tracing_sample_rate,
+        settings.tracing_file,
+        settings.otlp_endpoint,
+    )
+    await initialize_password_hasher()
+    if settings.db_pool_warmup:
+        await warm_up_pool(settings.db_pool_warmup)
     await initialize_messaging()
+    # Invalidar o cache de principals quando outros workers alterarem usuários
+    listener = asyncio.create_task(
+        listen_user_events(principal_cache.apply_event, on_subscribe=principal_cache.clear)
+    )
+    # Publicar eventos do outbox fora do caminho das requisições
+    outbox_relay.start()
+    slow_query_log.start()
     yield
     # Shutdown
+    await slow_query_log.stop()
+    await outbox_relay.stop()
+    listener.cancel()
+    try:
+        await listener
+    except asyncio.CancelledError:
+        pass
     await close_messaging()
+    password_hasher.shutdown()
+    shutdown_tracing()
+    shutdown_logging()
 
 
 def create_application() -> FastAPI:
@@ -41,6 +85,32 @@ def create_application() -> FastAPI:
         allow_headers=["*"],
     )
     
+    if settings.metrics_enabled:
+        application.add_middleware(
+            MetricsMiddleware,
+            server_timing=settings.server_timing_enabled,
+            repeated_statement_threshold=settings.n_plus_one_threshold
+        )
+        REGISTRY.add_cache_collector({"principal": principal_cache})
+        REGISTRY.add_collector(
+            "login_throttle_total", "counter", "Login throttle decisions and results",
+            lambda: [({"outcome": outcome}, count) for outcome, count in login_throttle.counters.items()]
+        )
+        REGISTRY.add_collector(
+            "db_slow_queries_total", "counter", "SQL statements slower than SLOW_QUERY_THRESHOLD_MS",
+            lambda: [({}, slow_query_log.total)]
+        )
+    
+    # Endpoint attribution for the slow-query log
+    if settings.slow_query_log_enabled:
+        application.add_middleware(SlowQueryMiddleware)
+    
+    # W3C trace-context (traceparent); exporter chosen by TRACING_EXPORTER
+    application.add_middleware(TracingMiddleware)
+    
+    # Log correlation via X-Request-ID (added last so it wraps the other middleware)
+    application.add_middleware(RequestIdMiddleware)
+    
     # Include API router
     application.include_router(api_router, prefix=settings.api_v1_prefix)
     
@@ -57,4 +127,11 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "service": "user_service"}
\ No newline at end of file
+    return {"status": "healthy", "service": "user_service"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return metrics_response()
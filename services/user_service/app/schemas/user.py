@@ -1,7 +1,8 @@
 from pydantic import BaseModel, EmailStr, validator
-from typing import Optional
+from typing import Optional, List, Dict
 from datetime import datetime
 from app.models.user import UserRole
+from app.core.config import settings
 
 
 class UserBase(BaseModel):
@@ -101,4 +102,39 @@ class UserMe(BaseModel):
     updated_at: datetime
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class UserSummary(BaseModel):
+    """Dados públicos mínimos de um usuário (lookup em lote)"""
+    id: int
+    email: str
+    username: str
+    full_name: str
+    role: UserRole
+    is_active: bool
+
+    class Config:
+        from_attributes = True
+
+
+class UserBatchRequest(BaseModel):
+    """Lookup de vários usuários por username e/ou id em uma única chamada"""
+    usernames: List[str] = []
+    ids: List[int] = []
+
+    @validator('ids', always=True)
+    def validate_batch_size(cls, v, values):
+        total = len(values.get('usernames') or []) + len(v)
+        if total == 0:
+            raise ValueError('Informe ao menos um username ou id')
+        if total > settings.user_batch_max_size:
+            raise ValueError(f'Máximo de {settings.user_batch_max_size} usuários por consulta')
+        return v
+
+
+class UserBatchResponse(BaseModel):
+    """Mapa username -> usuário, mais as chaves não encontradas"""
+    users: Dict[str, UserSummary]
+    missing_usernames: List[str] = []
+    missing_ids: List[int] = []
@@ -0,0 +1,11 @@
+"""
+Production entry point for user_service: `python -m app.server`
+
+Core-aware workers, uvloop/httptools, worker recycling and graceful
+shutdown (see app.core.server). Each worker opens pool connections at
+startup.
+"""
+from app.core.server import run
+
+if __name__ == "__main__":
+    run("app.main:app", default_port=8000, warmup_env={"DB_POOL_WARMUP": "2"})
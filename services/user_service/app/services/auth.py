@@ -1,15 +1,29 @@
+import asyncio
+import logging
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from threading import Lock
+from typing import Any, Callable, Optional
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from app.core.config import settings
+from app.core.metrics import REGISTRY
 import bcrypt
 
+logger = logging.getLogger(__name__)
+
+BCRYPT_QUEUE_WAIT_SECONDS = REGISTRY.histogram(
+    "bcrypt_queue_wait_seconds", "Time bcrypt jobs waited for a free worker thread",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+
 
 # Configuração personalizada do bcrypt para evitar erros de truncamento
 class SafeBcryptContext:
-    def __init__(self):
-        self.rounds = 12
+    def __init__(self, rounds: int = 12):
+        self.rounds = rounds
     
     def hash(self, password: str) -> str:
         """Hash a password with automatic truncation"""
@@ -31,20 +45,132 @@ class SafeBcryptContext:
         except Exception:
             return False
 
+    def needs_rehash(self, hashed: str) -> bool:
+        """True if the hash was made with a lower cost than the current one"""
+        try:
+            return int(hashed.split('$')[2]) < self.rounds
+        except (IndexError, ValueError):
+            return False
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a bounded thread pool so hashing never blocks the event loop
+
+    bcrypt releases the GIL while hashing, so threads run in parallel up to
+    `max_workers`; further calls wait in the executor queue. The time spent
+    waiting there is recorded (`queue_wait_*`) to show when the pool is
+    saturated.
+    """
+
+    def __init__(self, context: SafeBcryptContext, max_workers: int):
+        self.context = context
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = Lock()
+        self.queue_wait_count = 0
+        self.queue_wait_seconds_total = 0.0
+        self.queue_wait_seconds_max = 0.0
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    def _record_queue_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.queue_wait_count += 1
+            self.queue_wait_seconds_total += seconds
+            self.queue_wait_seconds_max = max(self.queue_wait_seconds_max, seconds)
+        BCRYPT_QUEUE_WAIT_SECONDS.observe(seconds)
+
+    async def _run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        submitted_at = time.perf_counter()
+
+        def _call():
+            self._record_queue_wait(time.perf_counter() - submitted_at)
+            return fn(*args)
+
+        return await asyncio.get_running_loop().run_in_executor(self.executor, _call)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
 
-pwd_context = SafeBcryptContext()
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await self._run(self.context.verify, password, hashed)
+
+    def calibrate(self, target_ms: float, min_rounds: int, max_rounds: int) -> int:
+        """
+        Pick the highest bcrypt cost whose hash time stays within `target_ms`
+
+        Cost doubles per round, so one timing at `min_rounds` is enough to
+        extrapolate; the best of two runs is used to discount warm-up noise.
+        """
+        salt = bcrypt.gensalt(rounds=min_rounds)
+        elapsed = float("inf")
+        for _ in range(2):
+            start = time.perf_counter()
+            bcrypt.hashpw(b"calibration", salt)
+            elapsed = min(elapsed, time.perf_counter() - start)
+
+        extra_rounds = int(math.floor(math.log2(target_ms / 1000.0 / elapsed))) if elapsed > 0 else 0
+        rounds = max(min_rounds, min(max_rounds, min_rounds + extra_rounds))
+        self.context.rounds = rounds
+        logger.info(
+            f"bcrypt calibrated to {rounds} rounds "
+            f"({elapsed * 1000:.0f} ms at {min_rounds} rounds, target {target_ms:.0f} ms)"
+        )
+        return rounds
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+pwd_context = SafeBcryptContext(rounds=settings.bcrypt_rounds or 12)
+password_hasher = PasswordHasher(pwd_context, max_workers=settings.bcrypt_max_workers)
+
+
+async def initialize_password_hasher():
+    """Calibrate the bcrypt cost off the event loop (skipped when BCRYPT_ROUNDS is set)"""
+    if settings.bcrypt_rounds:
+        return
+    await asyncio.get_running_loop().run_in_executor(
+        password_hasher.executor,
+        password_hasher.calibrate,
+        settings.bcrypt_target_ms,
+        settings.bcrypt_min_rounds,
+        settings.bcrypt_max_rounds,
+    )
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a plaintext password against its hash"""
+    """Verify a plaintext password against its hash (blocking; for scripts)"""
     return pwd_context.verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    """Hash a password for storage"""
+    """Hash a password for storage (blocking; for scripts)"""
     return pwd_context.hash(password)
 
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a plaintext password against its hash without blocking the event loop"""
+    return await password_hasher.verify(plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password for storage without blocking the event loop"""
+    return await password_hasher.hash(password)
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True if the stored hash uses a lower bcrypt cost than the current one"""
+    return pwd_context.needs_rehash(hashed_password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create JWT access token"""
     to_encode = data.copy()
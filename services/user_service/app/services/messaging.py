@@ -1,8 +1,13 @@
 from app.core.messaging import (
+    UserCreatedEvent,
+    UserUpdatedEvent,
+    UserDeletedEvent,
+    UserLoginEvent,
     publish_user_created,
     publish_user_updated, 
     publish_user_deleted,
     publish_user_login,
+    listen_user_events,
     initialize_messaging,
     close_messaging
 )
\ No newline at end of file
@@ -0,0 +1,114 @@
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.events import BaseEvent
+from app.core.messaging import USER_EVENTS_STREAM, event_bus
+from app.models.outbox import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+
+def add_event(db: AsyncSession, event: BaseEvent, stream: str = USER_EVENTS_STREAM) -> None:
+    """Stage an event in the outbox; it is committed with the caller's transaction"""
+    db.add(OutboxEvent(stream=stream, payload=json.dumps(event.model_dump(), default=str)))
+
+
+class OutboxRelay:
+    """
+    Drains the outbox to the event bus in batches (at-least-once)
+
+    Rows are locked with SKIP LOCKED so several workers can relay in parallel,
+    published, then deleted in the same transaction. If the process dies after
+    publishing but before the delete commits, the batch is published again, so
+    consumers must tolerate duplicates.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+        batch_size: int = 100,
+        poll_interval: float = 1.0,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def notify(self) -> None:
+        """Wake the relay after a commit that wrote outbox rows"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def drain_once(self) -> int:
+        """Publish and delete one batch; returns the number of events relayed"""
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(OutboxEvent)
+                .order_by(OutboxEvent.id)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            rows = result.scalars().all()
+            if not rows:
+                return 0
+
+            by_stream: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+            for row in rows:
+                by_stream[row.stream].append(json.loads(row.payload))
+            for stream, events in by_stream.items():
+                await event_bus.publish_many(stream, events)
+
+            await db.execute(delete(OutboxEvent).where(OutboxEvent.id.in_([row.id for row in rows])))
+            await db.commit()
+            return len(rows)
+
+    async def run(self) -> None:
+        self._wakeup = asyncio.Event()
+        backoff = 1.0
+        while True:
+            # Cleared before draining so a notify() during the drain is not lost
+            self._wakeup.clear()
+            try:
+                relayed = await self.drain_once()
+                backoff = 1.0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Outbox relay error, retrying in %.0fs: %s", backoff, e)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 60.0)
+                continue
+
+            if relayed < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._wakeup = None
+
+
+# Global outbox relay
+outbox_relay = OutboxRelay(
+    batch_size=settings.outbox_batch_size,
+    poll_interval=settings.outbox_poll_interval
+)
@@ -1,14 +1,33 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from typing import Optional, List
+from sqlalchemy import select, or_
+from typing import Any, Dict, Optional, List, Sequence
+from app.core.events import UserCreatedEvent, UserDeletedEvent, UserUpdatedEvent
+from app.core.principal_cache import principal_cache
 from app.models.user import User, UserRole
 from app.schemas.user import UserCreate, UserUpdate
-from app.services.auth import get_password_hash, verify_password
-
-
-async def create_user(db: AsyncSession, user_data: UserCreate) -> User:
-    """Create a new user"""
-    hashed_password = get_password_hash(user_data.password)
+from app.services.auth import get_password_hash_async, verify_password_async, password_needs_rehash
+from app.services.outbox import add_event, outbox_relay
+
+
+def user_event_data(user: User, **extra: Any) -> Dict[str, Any]:
+    """Payload of user.created / user.updated events"""
+    data = {
+        "id": user.id,
+        "email": user.email,
+        "username": user.username,
+        "full_name": user.full_name,
+        "role": user.role.value,
+        "is_active": user.is_active,
+    }
+    data.update(extra)
+    return data
+
+
+async def create_user(
+    db: AsyncSession, user_data: UserCreate, event_context: Optional[Dict[str, Any]] = None
+) -> User:
+    """Create a new user and stage its user.created event in the same transaction"""
+    hashed_password = await get_password_hash_async(user_data.password)
     role_input = user_data.role
     role_enum = UserRole(role_input.lower()) if isinstance(role_input, str) else role_input
     
@@ -22,7 +41,10 @@ async def create_user(db: AsyncSession, user_data: UserCreate) -> User:
     )
     
     db.add(db_user)
+    await db.flush()
+    add_event(db, UserCreatedEvent(user_data=user_event_data(db_user, **(event_context or {}))))
     await db.commit()
+    outbox_relay.notify()
     await db.refresh(db_user)
     return db_user
 
@@ -45,6 +67,21 @@ async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
     return result.scalar_one_or_none()
 
 
+async def get_users_by_usernames_or_ids(
+    db: AsyncSession, usernames: Sequence[str] = (), ids: Sequence[int] = ()
+) -> List[User]:
+    """Get users matching any of the given usernames or ids in a single query"""
+    conditions = []
+    if usernames:
+        conditions.append(User.username.in_(set(usernames)))
+    if ids:
+        conditions.append(User.id.in_(set(ids)))
+    if not conditions:
+        return []
+    result = await db.execute(select(User).where(or_(*conditions)))
+    return list(result.scalars().all())
+
+
 async def get_users(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[User]:
     """Get list of users with pagination"""
     result = await db.execute(
@@ -53,26 +90,32 @@ async def get_users(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[U
     return result.scalars().all()
 
 
-async def update_user(db: AsyncSession, user_id: int, user_data: UserUpdate) -> Optional[User]:
-    """Update user"""
+async def update_user(
+    db: AsyncSession, user_id: int, user_data: UserUpdate, event_context: Optional[Dict[str, Any]] = None
+) -> Optional[User]:
+    """Update user and stage its user.updated event in the same transaction"""
     result = await db.execute(select(User).where(User.id == user_id))
     db_user = result.scalar_one_or_none()
     
     if not db_user:
         return None
     
+    previous_username = db_user.username
     update_data = user_data.model_dump(exclude_unset=True)
     
     for field, value in update_data.items():
         setattr(db_user, field, value)
     
+    add_event(db, UserUpdatedEvent(user_data=user_event_data(db_user, **(event_context or {}))))
     await db.commit()
+    outbox_relay.notify()
+    principal_cache.invalidate(username=previous_username, user_id=user_id)
     await db.refresh(db_user)
     return db_user
 
 
 async def delete_user(db: AsyncSession, user_id: int) -> bool:
-    """Delete user (soft delete by setting is_active=False)"""
+    """Delete user (soft delete by setting is_active=False) and stage user.deleted"""
     result = await db.execute(select(User).where(User.id == user_id))
     db_user = result.scalar_one_or_none()
     
@@ -80,7 +123,10 @@ async def delete_user(db: AsyncSession, user_id: int) -> bool:
         return False
     
     db_user.is_active = False
+    add_event(db, UserDeletedEvent(user_id=user_id))
     await db.commit()
+    outbox_relay.notify()
+    principal_cache.invalidate(username=db_user.username, user_id=user_id)
     return True
 
 
@@ -89,6 +135,10 @@ async def authenticate_user(db: AsyncSession, username: str, password: str) -> O
     user = await get_user_by_username(db, username)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    if not await verify_password_async(password, user.hashed_password):
         return None
+    if password_needs_rehash(user.hashed_password):
+        # Hash com custo antigo: regravar com o custo atual enquanto temos a senha
+        user.hashed_password = await get_password_hash_async(password)
+        await db.commit()
     return user
\ No newline at end of file
@@ -0,0 +1,27 @@
+from contextlib import contextmanager
+
+import pytest
+
+from app.core.metrics import QueryCounter
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Query budget for an operation or endpoint:
+
+        with query_budget(2):
+            client.get("/api/v1/users/")
+
+    Fails, listing the statements, when the block runs more SQL than
+    budgeted, so N+1 regressions break the tests.
+    """
+    @contextmanager
+    def _budget(max_queries: int):
+        with QueryCounter() as queries:
+            yield queries
+        assert queries.count <= max_queries, (
+            f"{queries.count} queries (budget: {max_queries}):\n" + "\n".join(queries.statements)
+        )
+
+    return _budget
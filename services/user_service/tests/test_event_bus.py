@@ -0,0 +1,108 @@
+import asyncio
+from app.core.event_bus import EventBus, InMemoryStreamsBackend
+
+
+def _bus(**kwargs) -> EventBus:
+    return EventBus(InMemoryStreamsBackend(), **kwargs)
+
+
+def _event(n: int) -> dict:
+    return {"event_type": "user.updated", "service": "user_service", "data": {"id": n}}
+
+
+def test_publish_many_and_replay():
+    bus = _bus()
+
+    async def _run():
+        ids = await bus.publish_many("user_events", [_event(n) for n in range(5)])
+        everything = await bus.replay("user_events")
+        tail = await bus.replay("user_events", from_id=ids[3])
+        return ids, everything, tail
+
+    ids, everything, tail = asyncio.run(_run())
+    assert len(set(ids)) == 5
+    assert [message_id for message_id, _ in everything] == ids
+    assert [event["data"]["id"] for _, event in tail] == [3, 4]
+
+
+def test_maxlen_trims_oldest_events():
+    bus = _bus(maxlen=3)
+
+    async def _run():
+        await bus.publish_many("user_events", [_event(n) for n in range(5)])
+        return await bus.replay("user_events")
+
+    assert [event["data"]["id"] for _, event in asyncio.run(_run())] == [2, 3, 4]
+
+
+def test_read_resumes_from_last_id():
+    bus = _bus()
+
+    async def _run():
+        await bus.publish("user_events", _event(0))
+        last_id = await bus.latest_id("user_events")
+        await bus.publish_many("user_events", [_event(1), _event(2)])
+        first = await bus.read("user_events", last_id, count=1)
+        second = await bus.read("user_events", first[-1][0])
+        return first, second
+
+    first, second = asyncio.run(_run())
+    assert [event["data"]["id"] for _, event in first] == [1]
+    assert [event["data"]["id"] for _, event in second] == [2]
+
+
+def test_consumer_group_acks_and_retries():
+    bus = _bus(retry_idle_ms=0, max_deliveries=3)
+    seen = []
+    failures = {"left": 1}
+
+    async def handler(event):
+        if event["data"]["id"] == 1 and failures["left"]:
+            failures["left"] -= 1
+            raise RuntimeError("temporary failure")
+        seen.append(event["data"]["id"])
+
+    async def _run():
+        await bus.ensure_group("user_events", "projector")
+        await bus.publish_many("user_events", [_event(0), _event(1)])
+        first = await bus.consume_once("user_events", "projector", "worker-1", handler)
+        # A mensagem que falhou continua pendente e é reentregue
+        second = await bus.consume_once("user_events", "projector", "worker-2", handler)
+        third = await bus.consume_once("user_events", "projector", "worker-2", handler)
+        return first, second, third
+
+    assert asyncio.run(_run()) == (1, 1, 0)
+    assert seen == [0, 1]
+    assert bus.backend.groups[("user_events", "projector")]["pending"] == {}
+
+
+def test_poison_message_goes_to_dead_letter_stream():
+    bus = _bus(retry_idle_ms=0, max_deliveries=2)
+
+    def handler(event):
+        raise ValueError("cannot handle")
+
+    async def _run():
+        await bus.ensure_group("user_events", "projector")
+        await bus.publish("user_events", _event(7))
+        for _ in range(3):
+            await bus.consume_once("user_events", "projector", "worker-1", handler)
+        return await bus.replay("user_events:dead")
+
+    dead = asyncio.run(_run())
+    assert [event["data"]["id"] for _, event in dead] == [7]
+    assert bus.backend.groups[("user_events", "projector")]["pending"] == {}
+
+
+def test_group_created_at_end_skips_history():
+    bus = _bus()
+    seen = []
+
+    async def _run():
+        await bus.publish("user_events", _event(0))
+        await bus.ensure_group("user_events", "late", start_id="$")
+        await bus.publish("user_events", _event(1))
+        await bus.consume_once("user_events", "late", "worker-1", lambda e: seen.append(e["data"]["id"]))
+
+    asyncio.run(_run())
+    assert seen == [1]
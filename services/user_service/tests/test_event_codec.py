@@ -0,0 +1,137 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+import pytest
+from app.core.codec import EventCodec, pack, unpack
+from app.core.event_bus import EventBus, InMemoryStreamsBackend
+from app.core.events import (
+    UserCreatedEvent,
+    UserDeletedEvent,
+    BudgetUpdatedEvent,
+    event_codec,
+)
+
+
+def _json(event: dict) -> bytes:
+    return json.dumps(event, default=str, separators=(",", ":")).encode()
+
+
+def _user_created() -> dict:
+    return UserCreatedEvent(user_data={
+        "id": 42,
+        "email": "codec@example.com",
+        "username": "codecuser",
+        "full_name": "Codec User",
+        "role": "vendedor",
+        "is_active": True,
+        "created_by": "admin",
+    }).model_dump()
+
+
+def _budget_updated() -> dict:
+    totals = {"total_sale_value": 1520.75, "total_commission": 22.81}
+    return BudgetUpdatedEvent(budget_data={
+        "budget_id": 7,
+        "order_number": "PED-0007",
+        "created_by": "vendedor",
+        "status": "draft",
+        "totals": totals,
+        "previous": {"total_sale_value": 1400.0, "total_commission": 21.0},
+    }).model_dump()
+
+
+@pytest.mark.parametrize("value", [
+    None, True, False, 0, 127, 128, 255, 65535, 2 ** 32, 2 ** 63, -1, -32, -33, -200, -40000, -2 ** 40,
+    1.5, -0.25, "", "ação", "x" * 40, "y" * 300, "z" * 70000, b"\x00\x01",
+    [1, [2, "três"], {"a": None}], {"nested": {"k": [1.0, 2.0]}}, list(range(20)), {str(i): i for i in range(20)},
+])
+def test_primitives_round_trip(value):
+    assert unpack(pack(value)) == value
+
+
+def test_timestamps_round_trip_as_naive_utc():
+    values = [
+        datetime(2026, 10, 19, 12, 30, 45, 123456),
+        datetime(1969, 7, 20, 20, 17, 40, 500000),
+        datetime(2600, 1, 1),
+    ]
+    assert [unpack(pack(value)) for value in values] == values
+    aware = datetime(2026, 10, 19, 9, 0, tzinfo=timezone(timedelta(hours=-3)))
+    assert unpack(pack(aware)) == datetime(2026, 10, 19, 12, 0)
+
+
+def test_events_round_trip():
+    for event in (_user_created(), _budget_updated(), UserDeletedEvent(user_id=3).model_dump()):
+        decoded = event_codec.decode(event_codec.encode(event))
+        assert decoded == {**event, "event_type": event["event_type"].value}
+
+
+def test_binary_payload_is_smaller_than_json():
+    for event in (_user_created(), _budget_updated()):
+        assert len(event_codec.encode(event)) < len(_json(event)) * 0.6
+
+
+def test_keys_outside_schema_are_kept():
+    event = _user_created()
+    event["data"]["last_login_ip"] = "10.0.0.1"
+    event["data"]["email"] = None
+    event["correlation_id"] = "abc"
+
+    decoded = event_codec.decode(event_codec.encode(event))
+    assert decoded["data"]["last_login_ip"] == "10.0.0.1"
+    assert decoded["data"]["email"] is None
+    assert decoded["correlation_id"] == "abc"
+
+
+def test_timestamp_from_json_string_is_restored():
+    event = json.loads(_json(_user_created()))
+    decoded = event_codec.decode(event_codec.encode(event))
+    assert isinstance(decoded["timestamp"], datetime)
+    assert decoded["timestamp"].isoformat(sep=" ") == event["timestamp"]
+
+
+def test_json_payloads_are_still_decoded():
+    event = json.loads(_json(_user_created()))
+    assert event_codec.decode(_json(event)) == event
+
+
+def test_unregistered_event_types_fall_back_to_json():
+    event = {"event_type": "report.generated", "timestamp": "2026-10-19T00:00:00", "service": "x", "data": {}}
+    payload = event_codec.encode(event)
+    assert payload.startswith(b"{")
+    assert event_codec.decode(payload) == event
+
+
+def test_old_schema_versions_stay_decodable():
+    v1 = EventCodec({"user.deleted": {1: ("user_id",)}}, {"user.deleted": 3})
+    v2 = EventCodec({"user.deleted": {1: ("user_id",), 2: ("user_id", "deleted_by")}}, {"user.deleted": 3})
+    event = {"event_type": "user.deleted", "timestamp": datetime(2026, 1, 1), "service": "user_service",
+             "data": {"user_id": 9, "deleted_by": "admin"}}
+
+    assert v2.decode(v1.encode(event))["data"] == {"user_id": 9, "deleted_by": "admin"}
+    assert v2.decode(v2.encode(event))["data"] == {"user_id": 9, "deleted_by": "admin"}
+    with pytest.raises(ValueError):
+        v1.decode(v2.encode(event))
+
+
+def test_corrupted_payloads_raise_value_error():
+    payload = event_codec.encode(_budget_updated())
+    with pytest.raises(ValueError):
+        event_codec.decode(payload[:-5])
+    with pytest.raises(ValueError):
+        event_codec.decode(payload + b"\x00")
+
+
+def test_event_bus_reads_mixed_json_and_binary_streams():
+    backend = InMemoryStreamsBackend()
+    legacy = EventBus(backend)
+    bus = EventBus(backend, codec=event_codec)
+
+    async def _run():
+        await legacy.publish("user_events", _user_created())
+        await bus.publish("user_events", _user_created())
+        return await bus.replay("user_events")
+
+    events = asyncio.run(_run())
+    assert [event["data"]["username"] for _, event in events] == ["codecuser", "codecuser"]
+    assert backend.streams["user_events"][1][1].startswith(b"\xc1")
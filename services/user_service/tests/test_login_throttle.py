@@ -0,0 +1,78 @@
+import asyncio
+from app.core.rate_limit import Bucket, LocalTokenBuckets, LoginThrottle
+
+
+def _throttle(**kwargs) -> LoginThrottle:
+    return LoginThrottle(
+        username_bucket=Bucket("username", capacity=2, refill_per_second=1.0),
+        ip_bucket=Bucket("ip", capacity=3, refill_per_second=1.0),
+        **kwargs
+    )
+
+
+def test_local_bucket_refills_over_time():
+    buckets = LocalTokenBuckets()
+    bucket = Bucket("username", capacity=2, refill_per_second=0.5)
+
+    assert buckets.take("k", bucket, 1, now=100.0) == (True, 0.0)
+    assert buckets.take("k", bucket, 1, now=100.0) == (True, 0.0)
+    allowed, wait = buckets.take("k", bucket, 1, now=100.0)
+    assert not allowed
+    assert wait == 2.0
+    assert buckets.take("k", bucket, 1, now=102.0)[0]
+
+
+def test_username_and_ip_buckets():
+    throttle = _throttle()
+
+    async def _run():
+        results = [await throttle.acquire("ana", "10.0.0.1") for _ in range(3)]
+        # A 3ª tentativa de ana foi recusada pelo username sem gastar o token de IP
+        results.append(await throttle.acquire("bia", "10.0.0.1"))
+        results.append(await throttle.acquire("bia", "10.0.0.1"))
+        return results
+
+    results = asyncio.run(_run())
+    assert [allowed for allowed, _ in results] == [True, True, False, True, False]
+    assert throttle.stats()["rejected_username"] == 1
+    assert throttle.stats()["rejected_ip"] == 1
+
+
+def test_blocked_ip_does_not_drain_username_bucket():
+    throttle = _throttle()
+
+    async def _run():
+        # IP do atacante esgotado (3 tentativas com outros usernames)
+        for username in ("x", "y", "z"):
+            await throttle.acquire(username, "10.6.6.6")
+        blocked = [await throttle.acquire("ana", "10.6.6.6") for _ in range(5)]
+        # O usuário legítimo, de outro IP, ainda tem todos os tokens
+        own = [await throttle.acquire("ana", "10.0.0.1") for _ in range(2)]
+        return blocked, own
+
+    blocked, own = asyncio.run(_run())
+    assert not any(allowed for allowed, _ in blocked)
+    assert all(allowed for allowed, _ in own)
+
+
+def test_successful_login_releases_tokens():
+    throttle = _throttle()
+
+    async def _run():
+        for _ in range(5):
+            allowed, _ = await throttle.acquire("ana", "10.0.0.1")
+            assert allowed
+            await throttle.release("ana", "10.0.0.1")
+
+    asyncio.run(_run())
+    assert throttle.stats().get("rejected", 0) == 0
+
+
+def test_disabled_throttle_allows_everything():
+    throttle = _throttle(enabled=False)
+
+    async def _run():
+        return [await throttle.acquire("ana", None) for _ in range(10)]
+
+    results = asyncio.run(_run())
+    assert all(allowed for allowed, _ in results)
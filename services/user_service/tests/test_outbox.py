@@ -0,0 +1,93 @@
+import asyncio
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from app.core.database import Base
+from app.core.event_bus import EventBus, InMemoryStreamsBackend
+from app.models.outbox import OutboxEvent
+from app.schemas.user import UserCreate, UserUpdate
+from app.services import outbox, user_service
+from app.services.outbox import OutboxRelay
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'outbox.db'}")
+
+    async def _create_all():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    asyncio.run(_create_all())
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    asyncio.run(engine.dispose())
+
+
+@pytest.fixture
+def bus(monkeypatch):
+    bus = EventBus(InMemoryStreamsBackend())
+    monkeypatch.setattr(outbox, "event_bus", bus)
+    return bus
+
+
+def _new_user() -> UserCreate:
+    return UserCreate(
+        email="outbox@example.com",
+        username="outboxuser",
+        full_name="Outbox User",
+        password="outboxpassword123",
+    )
+
+
+async def _outbox_count(session_factory) -> int:
+    async with session_factory() as db:
+        return (await db.execute(select(func.count(OutboxEvent.id)))).scalar_one()
+
+
+def test_user_changes_stage_events_in_same_transaction(session_factory, bus):
+    async def _run():
+        async with session_factory() as db:
+            user = await user_service.create_user(db, _new_user(), {"created_by": "admin"})
+            await user_service.update_user(db, user.id, UserUpdate(full_name="Renamed"))
+            await user_service.delete_user(db, user.id)
+        return await _outbox_count(session_factory)
+
+    assert asyncio.run(_run()) == 3
+    # Nada é publicado no caminho da requisição
+    assert bus.backend.streams == {}
+
+
+def test_relay_publishes_in_order_and_clears_outbox(session_factory, bus):
+    relay = OutboxRelay(session_factory=session_factory, batch_size=2)
+
+    async def _run():
+        async with session_factory() as db:
+            user = await user_service.create_user(db, _new_user(), {"created_by": "admin"})
+            await user_service.update_user(db, user.id, UserUpdate(full_name="Renamed"))
+            await user_service.delete_user(db, user.id)
+        drained = [await relay.drain_once() for _ in range(3)]
+        return drained, await bus.replay("user_events"), await _outbox_count(session_factory)
+
+    drained, events, remaining = asyncio.run(_run())
+    assert drained == [2, 1, 0]
+    assert [event["event_type"] for _, event in events] == ["user.created", "user.updated", "user.deleted"]
+    assert events[0][1]["data"]["created_by"] == "admin"
+    assert events[1][1]["data"]["full_name"] == "Renamed"
+    assert remaining == 0
+
+
+def test_failed_publish_keeps_events_for_retry(session_factory, bus, monkeypatch):
+    relay = OutboxRelay(session_factory=session_factory)
+
+    async def failing_publish_many(stream, events):
+        raise ConnectionError("redis down")
+
+    async def _run():
+        async with session_factory() as db:
+            await user_service.create_user(db, _new_user())
+        monkeypatch.setattr(bus, "publish_many", failing_publish_many)
+        with pytest.raises(ConnectionError):
+            await relay.drain_once()
+        return await _outbox_count(session_factory)
+
+    assert asyncio.run(_run()) == 1
@@ -0,0 +1,62 @@
+import asyncio
+from types import SimpleNamespace
+from app.services import user_service
+from app.services.auth import PasswordHasher, SafeBcryptContext
+
+
+def test_hash_and_verify_run_on_executor():
+    hasher = PasswordHasher(SafeBcryptContext(rounds=4), max_workers=2)
+
+    async def _run():
+        hashed = await hasher.hash("senha-segura")
+        results = await asyncio.gather(*(hasher.verify("senha-segura", hashed) for _ in range(4)))
+        wrong = await hasher.verify("errada", hashed)
+        return hashed, results, wrong
+
+    hashed, results, wrong = asyncio.run(_run())
+    hasher.shutdown()
+
+    assert hashed.startswith("$2b$04$")
+    assert all(results)
+    assert wrong is False
+    assert hasher.queue_wait_count == 6
+    assert hasher.queue_wait_seconds_max >= 0
+
+
+def test_needs_rehash_only_for_lower_cost():
+    context = SafeBcryptContext(rounds=5)
+    assert context.needs_rehash(SafeBcryptContext(rounds=4).hash("x"))
+    assert not context.needs_rehash(context.hash("x"))
+    assert not context.needs_rehash(SafeBcryptContext(rounds=6).hash("x"))
+    assert not context.needs_rehash("not-a-bcrypt-hash")
+
+
+def test_calibrate_stays_within_bounds():
+    hasher = PasswordHasher(SafeBcryptContext(rounds=12), max_workers=1)
+
+    assert hasher.calibrate(target_ms=0.001, min_rounds=4, max_rounds=6) == 4
+    assert hasher.calibrate(target_ms=60_000, min_rounds=4, max_rounds=6) == 6
+    assert hasher.context.rounds == 6
+
+
+def test_login_rehashes_old_cost(monkeypatch):
+    old_hash = SafeBcryptContext(rounds=4).hash("senha-segura")
+    user = SimpleNamespace(username="antigo", hashed_password=old_hash)
+    commits = []
+
+    class FakeSession:
+        async def commit(self):
+            commits.append(True)
+
+    async def fake_get_user_by_username(db, username):
+        return user
+
+    monkeypatch.setattr(user_service, "get_user_by_username", fake_get_user_by_username)
+    monkeypatch.setattr(user_service, "password_needs_rehash", SafeBcryptContext(rounds=5).needs_rehash)
+
+    result = asyncio.run(user_service.authenticate_user(FakeSession(), "antigo", "senha-segura"))
+
+    assert result is user
+    assert user.hashed_password != old_hash
+    assert SafeBcryptContext().verify("senha-segura", user.hashed_password)
+    assert commits == [True]
@@ -0,0 +1,105 @@
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+import pytest
+from fastapi import HTTPException
+from app.core import security
+from app.core.principal_cache import Principal, PrincipalCache, principal_cache
+from app.models.user import UserRole
+
+
+def _user(**overrides):
+    data = dict(
+        id=10,
+        email="cache@example.com",
+        username="cacheuser",
+        full_name="Cache User",
+        hashed_password="not-exposed",
+        role=UserRole.VENDAS,
+        is_active=True,
+        created_at=datetime(2025, 1, 1),
+        updated_at=datetime(2025, 1, 1),
+    )
+    data.update(overrides)
+    return SimpleNamespace(**data)
+
+
+def _principal(**overrides) -> Principal:
+    return Principal.from_user(_user(**overrides))
+
+
+def test_principal_does_not_carry_password_hash():
+    principal = _principal()
+    assert principal.username == "cacheuser"
+    assert not hasattr(principal, "hashed_password")
+
+
+def test_get_current_user_hits_database_once(monkeypatch):
+    calls = []
+
+    async def fake_get_user_by_username(db, username):
+        calls.append(username)
+        return _user()
+
+    monkeypatch.setattr(security.user_service, "get_user_by_username", fake_get_user_by_username)
+    principal_cache.clear()
+
+    async def _run():
+        first = await security.get_current_user(username="cacheuser", db=None)
+        second = await security.get_current_user(username="cacheuser", db=None)
+        return first, second
+
+    first, second = asyncio.run(_run())
+    assert first == second
+    assert first.role == UserRole.VENDAS
+    assert calls == ["cacheuser"]
+    principal_cache.clear()
+
+
+def test_unknown_user_is_not_cached(monkeypatch):
+    async def fake_get_user_by_username(db, username):
+        return None
+
+    monkeypatch.setattr(security.user_service, "get_user_by_username", fake_get_user_by_username)
+    principal_cache.clear()
+
+    with pytest.raises(HTTPException):
+        asyncio.run(security.get_current_user(username="ghost", db=None))
+    assert len(principal_cache) == 0
+
+
+def test_events_invalidate_entries():
+    cache = PrincipalCache()
+    cache.set(_principal())
+    cache.set(_principal(id=11, username="other"))
+
+    cache.apply_event({"event_type": "user.updated", "data": {"id": 10, "username": "renamed"}})
+    assert cache.get("cacheuser") is None
+    assert cache.get("other") is not None
+
+    cache.apply_event({"event_type": "user.deleted", "data": {"user_id": 11}})
+    assert cache.get("other") is None
+
+    cache.set(_principal())
+    cache.apply_event({"event_type": "user.login", "data": {"id": 10}})
+    assert cache.get("cacheuser") is not None
+
+
+def test_zero_ttl_disables_cache():
+    cache = PrincipalCache(ttl=0)
+    cache.set(_principal())
+    assert cache.get("cacheuser") is None
+    assert len(cache) == 0
+
+
+def test_maxsize_evicts_least_recently_used():
+    cache = PrincipalCache(maxsize=2)
+    cache.set(_principal(id=1, username="a"))
+    cache.set(_principal(id=2, username="b"))
+    cache.get("a")
+    cache.set(_principal(id=3, username="c"))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    cache.invalidate(user_id=2)
+    assert len(cache) == 2
@@ -0,0 +1,28 @@
+"""
+The copies in app/core must stay byte-identical to shared/messaging and shared/utils
+"""
+import filecmp
+from pathlib import Path
+
+import pytest
+
+SERVICE_ROOT = Path(__file__).resolve().parents[1]
+SHARED_MESSAGING = SERVICE_ROOT.parents[1] / "shared" / "messaging"
+SHARED_UTILS = SERVICE_ROOT.parents[1] / "shared" / "utils"
+
+
+@pytest.mark.skipif(not SHARED_MESSAGING.is_dir(), reason="shared/ is outside the service build context")
+@pytest.mark.parametrize("module", ["codec.py", "events.py", "event_bus.py"])
+def test_event_modules_match_shared(module):
+    # Producer and consumer must share one codec: any drift corrupts decoding
+    assert filecmp.cmp(SERVICE_ROOT / "app" / "core" / module, SHARED_MESSAGING / module, shallow=False), (
+        f"app/core/{module} differs from shared/messaging/{module}: copy the shared version"
+    )
+
+
+@pytest.mark.skipif(not SHARED_UTILS.is_dir(), reason="shared/ is outside the service build context")
+@pytest.mark.parametrize("module", ["metrics.py", "logging_config.py", "tracing.py", "slow_queries.py", "server.py"])
+def test_core_modules_match_shared(module):
+    assert filecmp.cmp(SERVICE_ROOT / "app" / "core" / module, SHARED_UTILS / module, shallow=False), (
+        f"app/core/{module} differs from shared/utils/{module}: copy the shared version"
+    )
@@ -141,6 +141,24 @@ def test_login_invalid_credentials(setup_database):
     assert "Credenciais inválidas" in response.json()["detail"]
 
 
+def test_login_throttled_after_failed_attempts(setup_database, monkeypatch):
+    """Test bloqueio de tentativas de login excedentes (antes do bcrypt)"""
+    from app.core.rate_limit import login_throttle
+    monkeypatch.setattr(login_throttle.username_bucket, "capacity", 2)
+    login_data = {
+        "username": "throttled",
+        "password": "wrongpassword"
+    }
+
+    statuses = [client.post("/api/v1/users/login", json=login_data).status_code for _ in range(3)]
+    assert statuses == [401, 401, 429]
+
+    response = client.post("/api/v1/users/login", json=login_data)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert login_throttle.stats()["rejected_username"] >= 2
+
+
 def test_get_users(setup_database):
     """Test listar usuários"""
     response = client.get("/api/v1/users/")
@@ -148,6 +166,60 @@ def test_get_users(setup_database):
     assert isinstance(response.json(), list)
 
 
+def test_endpoint_query_budgets(setup_database, query_budget):
+    """Test orçamento de queries por endpoint (falha em regressões N+1)"""
+    with query_budget(1):
+        response = client.get("/api/v1/users/")
+    assert response.status_code == 200
+
+    with query_budget(1):
+        response = client.post("/api/v1/users/batch", json={"usernames": ["admin", "loginuser", "testuser"]})
+    assert response.status_code == 200
+
+    # Busca do usuário + outbox do evento de login (+ rehash se o custo mudou)
+    with query_budget(3):
+        response = client.post("/api/v1/users/login", json={"username": "loginuser", "password": "loginpassword123"})
+    assert response.status_code == 200
+    # Fora de produção o header expõe as queries da requisição
+    assert 'desc="' in response.headers["server-timing"]
+
+
+def test_get_users_batch(setup_database):
+    """Test lookup de usuários em lote"""
+    for username in ("batch1", "batch2"):
+        response = client.post("/api/v1/users/", json={
+            "email": f"{username}@example.com",
+            "username": username,
+            "full_name": f"User {username}",
+            "password": "password123",
+            "role": UserRole.VENDAS.value
+        })
+        assert response.status_code == 201
+    batch2_id = response.json()["id"]
+
+    response = client.post("/api/v1/users/batch", json={
+        "usernames": ["batch1", "batch1", "naoexiste"],
+        "ids": [batch2_id, 99999]
+    })
+    assert response.status_code == 200
+
+    data = response.json()
+    assert set(data["users"]) == {"batch1", "batch2"}
+    assert data["users"]["batch1"]["full_name"] == "User batch1"
+    assert "hashed_password" not in data["users"]["batch1"]
+    assert data["missing_usernames"] == ["naoexiste"]
+    assert data["missing_ids"] == [99999]
+
+
+def test_get_users_batch_limits(setup_database):
+    """Test limites do lookup em lote"""
+    response = client.post("/api/v1/users/batch", json={"usernames": []})
+    assert response.status_code == 422
+
+    response = client.post("/api/v1/users/batch", json={"ids": list(range(1000))})
+    assert response.status_code == 422
+
+
 def test_health_check():
     """Test health check endpoint"""
     response = client.get("/health")
@@ -160,3 +232,41 @@ def test_root_endpoint():
     response = client.get("/")
     assert response.status_code == 200
     assert "CRM User Service is running!" in response.json()["message"]
+
+
+def test_metrics_endpoint(setup_database):
+    """Test Prometheus metrics endpoint"""
+    client.post("/api/v1/users/login", json={"username": "metricsuser", "password": "wrongpassword"})
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert 'http_requests_total{method="POST",route="/api/v1/users/login",status="401"}' in body
+    assert "# TYPE http_request_duration_seconds histogram" in body
+    assert 'cache_hits_total{cache="principal"}' in body
+    assert "# TYPE bcrypt_queue_wait_seconds histogram" in body
+    assert 'login_throttle_total{outcome="allowed"}' in body
+
+
+def test_request_id_header(setup_database):
+    """Test that request ids are propagated for log correlation"""
+    response = client.get("/health", headers={"X-Request-ID": "req-abc"})
+    assert response.headers["x-request-id"] == "req-abc"
+    assert len(client.get("/health").headers["x-request-id"]) == 32
+
+
+def test_slow_query_log_endpoint(setup_database):
+    """Test consulta do log de queries lentas"""
+    from app.core.slow_queries import slow_query_log
+    slow_query_log.clear()
+    entry = slow_query_log.record("SELECT * FROM users WHERE username = $1", ("loginuser",), 350.0)
+
+    response = client.get("/api/v1/slow-queries/")
+    assert response.status_code == 200
+    assert response.json()["entries"][0]["parameters"] == ["str[9]"]
+
+    response = client.get(f"/api/v1/slow-queries/{entry['fingerprint']}")
+    assert response.status_code == 200
+    assert response.json()["count"] == 1
+    assert client.get("/api/v1/slow-queries/top").json()[0]["max_ms"] == 350.0
+    slow_query_log.clear()
@@ -0,0 +1,9 @@
+"""
+Canonical event definitions, codec and bus shared by all services
+
+Each service image only ships its own directory, so services/*/app/core keeps
+byte-identical copies of codec.py, events.py and event_bus.py. Edit them here
+and copy to both services: tests/test_shared_modules.py in each service fails
+if a copy drifts (a producer/consumer codec mismatch would corrupt decoding
+silently).
+"""
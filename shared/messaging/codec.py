@@ -0,0 +1,483 @@
+"""
+Compact binary event codec (msgpack-compatible encoding)
+
+A payload is HEADER (0xc1, a byte msgpack never emits, plus a format byte)
+followed by one msgpack array:
+
+    [type_code, schema_version, timestamp, service, data, extras]
+
+`data` is written positionally against the fields registered for the event
+type and version: [presence_mask, extras, value, ...]. Bit i of the mask marks
+field i as present, values follow in schema order and keys outside the schema
+go to `extras` (a map, or nil). A field declared as ("name", (fields...)) is a
+nested record encoded the same way, so field names never go on the wire.
+Datetimes use the msgpack timestamp extension (-1); naive values are taken as
+UTC and decoded as naive UTC. Values of other types are written as str(),
+like the JSON path (default=str).
+
+Encoders and decoders are compiled once per (event type, version): encoding
+is a constant prefix plus per-field packing. Published versions must never
+change; to alter a payload register a new version. Decoders keep every
+registered version, so consumers must know a version before producers write
+it. Payloads without the header are decoded as JSON, so streams written
+before the codec was introduced stay readable, and events of unregistered
+types are encoded as JSON.
+"""
+
+import json
+import struct
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+from typing import Any, Callable, Dict, Mapping, Tuple, Union
+
+HEADER = b"\xc1\x01"
+
+Field = Union[str, Tuple[str, "Fields"]]
+Fields = Tuple[Field, ...]
+RecordEncoder = Callable[[Mapping[str, Any], bytearray], None]
+RecordDecoder = Callable[[bytes, int], Tuple[Dict[str, Any], int]]
+
+_EPOCH = datetime(1970, 1, 1)
+_MISSING = object()
+
+_DOUBLE = struct.Struct(">d")
+_FLOAT = struct.Struct(">f")
+_UINT16 = struct.Struct(">H")
+_UINT32 = struct.Struct(">I")
+_UINT64 = struct.Struct(">Q")
+_INT8 = struct.Struct(">b")
+_INT16 = struct.Struct(">h")
+_INT32 = struct.Struct(">i")
+_INT64 = struct.Struct(">q")
+_TIMESTAMP96 = struct.Struct(">Iq")
+
+
+# --- msgpack primitives -----------------------------------------------------
+
+def _pack_int(value: int, out: bytearray) -> None:
+    if 0 <= value < 0x80:
+        out.append(value)
+    elif -0x20 <= value < 0:
+        out.append(value & 0xff)
+    elif value > 0:
+        if value < 0x100:
+            out += b"\xcc" + bytes((value,))
+        elif value < 0x10000:
+            out += b"\xcd" + _UINT16.pack(value)
+        elif value < 0x100000000:
+            out += b"\xce" + _UINT32.pack(value)
+        else:
+            out += b"\xcf" + _UINT64.pack(value)
+    elif value >= -0x80:
+        out += b"\xd0" + _INT8.pack(value)
+    elif value >= -0x8000:
+        out += b"\xd1" + _INT16.pack(value)
+    elif value >= -0x80000000:
+        out += b"\xd2" + _INT32.pack(value)
+    else:
+        out += b"\xd3" + _INT64.pack(value)
+
+
+def _pack_str(value: str, out: bytearray) -> None:
+    raw = value.encode("utf-8")
+    size = len(raw)
+    if size < 0x20:
+        out.append(0xa0 | size)
+    elif size < 0x100:
+        out += b"\xd9" + bytes((size,))
+    elif size < 0x10000:
+        out += b"\xda" + _UINT16.pack(size)
+    else:
+        out += b"\xdb" + _UINT32.pack(size)
+    out += raw
+
+
+def _pack_bin(value: bytes, out: bytearray) -> None:
+    size = len(value)
+    if size < 0x100:
+        out += b"\xc4" + bytes((size,))
+    elif size < 0x10000:
+        out += b"\xc5" + _UINT16.pack(size)
+    else:
+        out += b"\xc6" + _UINT32.pack(size)
+    out += value
+
+
+def _pack_array_header(size: int, out: bytearray) -> None:
+    if size < 0x10:
+        out.append(0x90 | size)
+    elif size < 0x10000:
+        out += b"\xdc" + _UINT16.pack(size)
+    else:
+        out += b"\xdd" + _UINT32.pack(size)
+
+
+def _pack_map_header(size: int, out: bytearray) -> None:
+    if size < 0x10:
+        out.append(0x80 | size)
+    elif size < 0x10000:
+        out += b"\xde" + _UINT16.pack(size)
+    else:
+        out += b"\xdf" + _UINT32.pack(size)
+
+
+def _pack_timestamp(value: datetime, out: bytearray) -> None:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    delta = value - _EPOCH
+    seconds = delta.days * 86400 + delta.seconds
+    nanoseconds = delta.microseconds * 1000
+    if 0 <= seconds < 1 << 34:
+        out += b"\xd7\xff" + _UINT64.pack(nanoseconds << 34 | seconds)
+    else:
+        out += b"\xc7\x0c\xff" + _TIMESTAMP96.pack(nanoseconds, seconds)
+
+
+def _pack(value: Any, out: bytearray) -> None:
+    kind = type(value)
+    if kind is str:
+        _pack_str(value, out)
+    elif kind is int:
+        _pack_int(value, out)
+    elif kind is float:
+        out += b"\xcb" + _DOUBLE.pack(value)
+    elif value is None:
+        out.append(0xc0)
+    elif kind is bool:
+        out.append(0xc3 if value else 0xc2)
+    elif kind is dict:
+        _pack_map_header(len(value), out)
+        for key, item in value.items():
+            _pack(key, out)
+            _pack(item, out)
+    elif kind is list or kind is tuple:
+        _pack_array_header(len(value), out)
+        for item in value:
+            _pack(item, out)
+    elif kind is datetime:
+        _pack_timestamp(value, out)
+    elif isinstance(value, Enum):
+        _pack(value.value, out)
+    elif isinstance(value, str):
+        _pack_str(value, out)
+    elif isinstance(value, int):
+        _pack_int(int(value), out)
+    elif isinstance(value, float):
+        out += b"\xcb" + _DOUBLE.pack(value)
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        _pack_bin(bytes(value), out)
+    elif isinstance(value, datetime):
+        _pack_timestamp(value, out)
+    elif isinstance(value, Mapping):
+        _pack(dict(value), out)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        _pack(list(value), out)
+    else:
+        _pack_str(str(value), out)
+
+
+def _unpack_array(data: bytes, pos: int, size: int) -> Tuple[list, int]:
+    items = []
+    for _ in range(size):
+        item, pos = _unpack(data, pos)
+        items.append(item)
+    return items, pos
+
+
+def _unpack_map(data: bytes, pos: int, size: int) -> Tuple[dict, int]:
+    items = {}
+    for _ in range(size):
+        key, pos = _unpack(data, pos)
+        items[key], pos = _unpack(data, pos)
+    return items, pos
+
+
+def _unpack_timestamp(seconds: int, nanoseconds: int) -> datetime:
+    return _EPOCH + timedelta(seconds=seconds, microseconds=nanoseconds // 1000)
+
+
+def _unpack(data: bytes, pos: int) -> Tuple[Any, int]:
+    byte = data[pos]
+    pos += 1
+    if byte < 0x80:
+        return byte, pos
+    if byte >= 0xe0:
+        return byte - 0x100, pos
+    if byte >= 0xa0 and byte < 0xc0:
+        end = pos + (byte & 0x1f)
+        if end > len(data):
+            raise ValueError("Truncated payload")
+        return data[pos:end].decode("utf-8"), end
+    if byte >= 0x90 and byte < 0xa0:
+        return _unpack_array(data, pos, byte & 0x0f)
+    if byte < 0x90:
+        return _unpack_map(data, pos, byte & 0x0f)
+    if byte == 0xc0:
+        return None, pos
+    if byte == 0xc2:
+        return False, pos
+    if byte == 0xc3:
+        return True, pos
+    if byte == 0xcb:
+        return _DOUBLE.unpack_from(data, pos)[0], pos + 8
+    if byte == 0xca:
+        return _FLOAT.unpack_from(data, pos)[0], pos + 4
+    if byte == 0xcc:
+        return data[pos], pos + 1
+    if byte == 0xcd:
+        return _UINT16.unpack_from(data, pos)[0], pos + 2
+    if byte == 0xce:
+        return _UINT32.unpack_from(data, pos)[0], pos + 4
+    if byte == 0xcf:
+        return _UINT64.unpack_from(data, pos)[0], pos + 8
+    if byte == 0xd0:
+        return _INT8.unpack_from(data, pos)[0], pos + 1
+    if byte == 0xd1:
+        return _INT16.unpack_from(data, pos)[0], pos + 2
+    if byte == 0xd2:
+        return _INT32.unpack_from(data, pos)[0], pos + 4
+    if byte == 0xd3:
+        return _INT64.unpack_from(data, pos)[0], pos + 8
+    if byte in (0xd9, 0xda, 0xdb, 0xc4, 0xc5, 0xc6):
+        if byte in (0xd9, 0xc4):
+            size, pos = data[pos], pos + 1
+        elif byte in (0xda, 0xc5):
+            size, pos = _UINT16.unpack_from(data, pos)[0], pos + 2
+        else:
+            size, pos = _UINT32.unpack_from(data, pos)[0], pos + 4
+        end = pos + size
+        if end > len(data):
+            raise ValueError("Truncated payload")
+        raw = data[pos:end]
+        return (raw.decode("utf-8") if byte in (0xd9, 0xda, 0xdb) else bytes(raw)), end
+    if byte == 0xdc:
+        return _unpack_array(data, pos + 2, _UINT16.unpack_from(data, pos)[0])
+    if byte == 0xdd:
+        return _unpack_array(data, pos + 4, _UINT32.unpack_from(data, pos)[0])
+    if byte == 0xde:
+        return _unpack_map(data, pos + 2, _UINT16.unpack_from(data, pos)[0])
+    if byte == 0xdf:
+        return _unpack_map(data, pos + 4, _UINT32.unpack_from(data, pos)[0])
+    if byte == 0xd7 and data[pos] == 0xff:
+        packed = _UINT64.unpack_from(data, pos + 1)[0]
+        return _unpack_timestamp(packed & 0x3ffffffff, packed >> 34), pos + 9
+    if byte == 0xc7 and data[pos] == 12 and data[pos + 1] == 0xff:
+        nanoseconds, seconds = _TIMESTAMP96.unpack_from(data, pos + 2)
+        return _unpack_timestamp(seconds, nanoseconds), pos + 14
+    raise ValueError(f"Unsupported msgpack type 0x{byte:02x}")
+
+
+def _unpack_array_header(data: bytes, pos: int) -> Tuple[int, int]:
+    byte = data[pos]
+    if byte >= 0x90 and byte < 0xa0:
+        return byte & 0x0f, pos + 1
+    if byte == 0xdc:
+        return _UINT16.unpack_from(data, pos + 1)[0], pos + 3
+    if byte == 0xdd:
+        return _UINT32.unpack_from(data, pos + 1)[0], pos + 5
+    raise ValueError(f"Expected an array, got 0x{byte:02x}")
+
+
+def pack(value: Any) -> bytes:
+    """Encode one value as msgpack"""
+    out = bytearray()
+    _pack(value, out)
+    return bytes(out)
+
+
+def unpack(data: bytes) -> Any:
+    """Decode one msgpack value"""
+    try:
+        value, pos = _unpack(data, 0)
+    except (IndexError, struct.error) as e:
+        raise ValueError(f"Truncated payload: {e}") from e
+    if pos != len(data):
+        raise ValueError("Trailing bytes after msgpack value")
+    return value
+
+
+# --- schema-driven records --------------------------------------------------
+
+def compile_record(fields: Fields) -> Tuple[RecordEncoder, RecordDecoder]:
+    """Build the positional encoder/decoder for a record schema"""
+    if len(fields) > 63:
+        raise ValueError("A record schema supports at most 63 fields")
+
+    spec = []
+    for bit, field in enumerate(fields):
+        if isinstance(field, str):
+            spec.append((1 << bit, field, None, None))
+        else:
+            name, subfields = field
+            sub_encode, sub_decode = compile_record(tuple(subfields))
+            spec.append((1 << bit, name, sub_encode, sub_decode))
+    names = frozenset(name for _, name, _, _ in spec)
+    if len(names) != len(spec):
+        raise ValueError("Duplicate field in record schema")
+    spec = tuple(spec)
+    known_mask = (1 << len(spec)) - 1
+
+    def encode(record: Mapping[str, Any], out: bytearray) -> None:
+        mask = 0
+        present = 0
+        body = bytearray()
+        extras = None
+        for bit, name, sub_encode, _ in spec:
+            value = record.get(name, _MISSING)
+            if value is _MISSING:
+                continue
+            if sub_encode is None:
+                _pack(value, body)
+            elif isinstance(value, Mapping):
+                sub_encode(value, body)
+            else:
+                # Nested field without a record value: keep it by name
+                if extras is None:
+                    extras = {}
+                extras[name] = value
+                continue
+            mask |= bit
+            present += 1
+        if len(record) != present + (len(extras) if extras else 0):
+            if extras is None:
+                extras = {}
+            for key, value in record.items():
+                if key not in names:
+                    extras[key] = value
+
+        _pack_array_header(2 + present, out)
+        _pack_int(mask, out)
+        _pack(extras, out)
+        out += body
+
+    def decode(data: bytes, pos: int) -> Tuple[Dict[str, Any], int]:
+        size, pos = _unpack_array_header(data, pos)
+        mask, pos = _unpack(data, pos)
+        if type(mask) is not int or mask & ~known_mask or size != 2 + bin(mask).count("1"):
+            raise ValueError("Record does not match its schema")
+        extras, pos = _unpack(data, pos)
+        record = {}
+        for bit, name, _, sub_decode in spec:
+            if not mask & bit:
+                continue
+            if sub_decode is not None:
+                record[name], pos = sub_decode(data, pos)
+                continue
+            # Fast paths for the common scalar encodings, then the general case
+            byte = data[pos]
+            if byte < 0x80:
+                record[name] = byte
+                pos += 1
+            elif 0xa0 <= byte < 0xc0:
+                end = pos + 1 + (byte & 0x1f)
+                record[name] = data[pos + 1:end].decode("utf-8")
+                pos = end
+            elif byte == 0xcb:
+                record[name] = _DOUBLE.unpack_from(data, pos + 1)[0]
+                pos += 9
+            else:
+                record[name], pos = _unpack(data, pos)
+        if extras:
+            record.update(extras)
+        return record, pos
+
+    return encode, decode
+
+
+# --- events -----------------------------------------------------------------
+
+def _key(value: Any) -> Any:
+    return value.value if isinstance(value, Enum) else value
+
+
+class EventCodec:
+    """
+    Encode/decode event dicts ({event_type, timestamp, service, data}) with
+    the schemas registered per event type: {event_type: {version: fields}}
+    """
+
+    def __init__(self, schemas: Mapping[Any, Mapping[int, Fields]], type_codes: Mapping[Any, int]):
+        self._encoders: Dict[str, Callable[[Mapping[str, Any]], bytes]] = {}
+        self._decoders: Dict[Tuple[int, int], Tuple[str, RecordDecoder]] = {}
+        self.versions: Dict[str, int] = {}
+
+        codes = {_key(event_type): code for event_type, code in type_codes.items()}
+        if len(set(codes.values())) != len(codes):
+            raise ValueError("Event type codes must be unique")
+
+        for event_type, versions in schemas.items():
+            event_type = _key(event_type)
+            code = codes[event_type]
+            for version, fields in versions.items():
+                encode_record, decode_record = compile_record(tuple(fields))
+                self._decoders[(code, version)] = (event_type, decode_record)
+            latest = max(versions)
+            self.versions[event_type] = latest
+            self._encoders[event_type] = self._compile_encoder(code, latest, compile_record(tuple(versions[latest]))[0])
+
+    @staticmethod
+    def _compile_encoder(code: int, version: int, encode_record: RecordEncoder) -> Callable[[Mapping[str, Any]], bytes]:
+        prefix = bytearray(HEADER)
+        _pack_array_header(6, prefix)
+        _pack_int(code, prefix)
+        _pack_int(version, prefix)
+        prefix = bytes(prefix)
+
+        def encode(event: Mapping[str, Any]) -> bytes:
+            out = bytearray(prefix)
+            timestamp = event.get("timestamp")
+            if isinstance(timestamp, str):
+                # Events that went through JSON (e.g. the outbox) carry ISO strings
+                try:
+                    timestamp = datetime.fromisoformat(timestamp)
+                except ValueError:
+                    pass
+            _pack(timestamp, out)
+            _pack(event.get("service"), out)
+            data = event.get("data")
+            if not isinstance(data, Mapping):
+                raise TypeError("Event data must be a mapping")
+            encode_record(data, out)
+            extras = None
+            if len(event) > 4:
+                extras = {
+                    key: value for key, value in event.items()
+                    if key not in ("event_type", "timestamp", "service", "data")
+                }
+            _pack(extras, out)
+            return bytes(out)
+
+        return encode
+
+    def encode(self, event: Mapping[str, Any]) -> bytes:
+        encoder = self._encoders.get(_key(event.get("event_type")))
+        if encoder is None:
+            return json.dumps(event, default=str, separators=(",", ":")).encode()
+        return encoder(event)
+
+    def decode(self, payload: Union[bytes, str]) -> Dict[str, Any]:
+        if isinstance(payload, str) or not payload.startswith(HEADER):
+            return json.loads(payload)
+        try:
+            size, pos = _unpack_array_header(payload, len(HEADER))
+            if size != 6:
+                raise ValueError("Invalid event envelope")
+            code, pos = _unpack(payload, pos)
+            version, pos = _unpack(payload, pos)
+            schema = self._decoders.get((code, version))
+            if schema is None:
+                raise ValueError(f"Unknown event schema: type {code} version {version}")
+            event_type, decode_record = schema
+            timestamp, pos = _unpack(payload, pos)
+            service, pos = _unpack(payload, pos)
+            data, pos = decode_record(payload, pos)
+            extras, pos = _unpack(payload, pos)
+        except (IndexError, struct.error) as e:
+            raise ValueError(f"Truncated event payload: {e}") from e
+        if pos != len(payload):
+            raise ValueError("Trailing bytes after event payload")
+
+        event = {"event_type": event_type, "timestamp": timestamp, "service": service, "data": data}
+        if extras:
+            event.update(extras)
+        return event
@@ -0,0 +1,7 @@
+"""
+Canonical copies of the observability and server modules used by all services
+
+Each service image only ships its own directory, so services/*/app/core keeps
+byte-identical copies of the modules here. Edit them here and copy to both
+services: tests/test_shared_modules.py in each service fails if a copy drifts.
+"""
@@ -0,0 +1,254 @@
+"""
+Structured, non-blocking logging
+
+`setup_logging` puts a single `QueueHandler` on the root logger; a
+`QueueListener` thread drains the queue and does the actual formatting and
+I/O, so a slow stdout/log collector never stalls the event loop. Records
+are passed to the listener unformatted: `logger.debug("item %s", item)`
+costs nothing beyond a level check when DEBUG is off, and the `%` message
+is only rendered on the listener thread.
+
+Every record carries the `service` name and the `request_id` of the request
+that produced it (`RequestIdMiddleware` takes it from `X-Request-ID` or
+generates one and echoes it in the response). DEBUG records can be sampled:
+with `debug_sample_rate=0.1` only 1 in 10 records of each call site (file +
+line) is kept, so per-item debug lines stay usable without flooding the
+output. Records at INFO and above are never sampled.
+
+Defaults depend on the environment and can be overridden with LOG_LEVEL,
+LOG_FORMAT (json|text) and LOG_DEBUG_SAMPLE_RATE:
+
+    production   INFO   json  0.01
+    staging      INFO   json  0.1
+    development  DEBUG  text  1.0
+"""
+
+import json
+import logging
+import os
+import queue
+import sys
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from threading import Lock
+from typing import Any, Dict, Optional, Tuple
+
+REQUEST_ID_HEADER = b"x-request-id"
+
+ENVIRONMENT_DEFAULTS = {
+    "production": ("INFO", "json", 0.01),
+    "staging": ("INFO", "json", 0.1),
+    "development": ("DEBUG", "text", 1.0),
+}
+
+# Chatty library loggers kept at WARNING even when the root is at DEBUG/INFO
+# (SQL echo is still available through the engine's `echo` flag).
+QUIET_LOGGERS = ("sqlalchemy", "httpx", "httpcore", "aiosqlite", "asyncio")
+
+TEXT_FORMAT = "%(asctime)s %(levelname)-7s [%(request_id)s] %(name)s: %(message)s"
+
+# Attributes every LogRecord has; anything else came from `extra=` and is
+# emitted as a structured field by JsonFormatter.
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {
+    "message", "asctime", "service", "request_id",
+}
+
+_request_id: ContextVar[str] = ContextVar("request_id", default="-")
+
+
+def get_request_id() -> str:
+    """Id of the request being handled ("-" outside a request)"""
+    return _request_id.get()
+
+
+def set_request_id(request_id: str):
+    """Set the request id for the current context; returns a reset token"""
+    return _request_id.set(request_id)
+
+
+def reset_request_id(token) -> None:
+    """Restore the request id that was current before `set_request_id`"""
+    _request_id.reset(token)
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamps records with the service name and current request id"""
+
+    def __init__(self, service: str):
+        super().__init__()
+        self.service = service
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.service = self.service
+        record.request_id = _request_id.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps 1 in every round(1 / rate) DEBUG records per call site"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.every = max(1, round(1 / rate)) if rate > 0 else 0
+        self._seen: Dict[Tuple[str, int], int] = {}
+        self._lock = Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.every == 1:
+            return True
+        if self.every == 0:
+            return False
+        key = (record.pathname, record.lineno)
+        with self._lock:
+            seen = self._seen.get(key, 0)
+            if len(self._seen) >= 10000 and key not in self._seen:
+                self._seen.clear()
+            self._seen[key] = seen + 1
+        return seen % self.every == 0
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with `extra=` fields kept as keys"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "service": getattr(record, "service", None),
+            "request_id": getattr(record, "request_id", None),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The listener lives in this process, so the record (args and
+        # exc_info included) can be handed over as is.
+        return record
+
+
+class _LoggingState:
+    listener: Optional[QueueListener] = None
+    handler: Optional[QueueHandler] = None
+
+
+_state = _LoggingState()
+
+
+def logging_settings(environment: str) -> Tuple[str, str, float]:
+    """(level, format, debug sample rate) for the environment, env vars first"""
+    level, fmt, rate = ENVIRONMENT_DEFAULTS.get(environment, ENVIRONMENT_DEFAULTS["development"])
+    return (
+        os.getenv("LOG_LEVEL", level).upper(),
+        os.getenv("LOG_FORMAT", fmt).lower(),
+        float(os.getenv("LOG_DEBUG_SAMPLE_RATE", str(rate))),
+    )
+
+
+def setup_logging(
+    service: str,
+    environment: str = "development",
+    level: Optional[str] = None,
+    fmt: Optional[str] = None,
+    debug_sample_rate: Optional[float] = None,
+    stream: Any = None,
+) -> QueueListener:
+    """
+    Route all logging through a queue drained by a background thread
+
+    Safe to call again (e.g. on reload): the previous handler and listener
+    are replaced. Uvicorn's loggers are pointed at the same handler so
+    access logs get the same format and request ids.
+    """
+    shutdown_logging()
+    default_level, default_fmt, default_rate = logging_settings(environment)
+    level = (level or default_level).upper()
+    fmt = fmt or default_fmt
+    debug_sample_rate = default_rate if debug_sample_rate is None else debug_sample_rate
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT))
+
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    handler = _DeferredQueueHandler(log_queue)
+    handler.addFilter(RequestContextFilter(service))
+    handler.addFilter(SamplingFilter(debug_sample_rate))
+
+    root = logging.getLogger()
+    root.addHandler(handler)
+    root.setLevel(level)
+    for name in QUIET_LOGGERS:
+        logging.getLogger(name).setLevel(max(logging.WARNING, root.level))
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers = []
+        uvicorn_logger.propagate = True
+
+    listener = QueueListener(log_queue, output, respect_handler_level=True)
+    listener.start()
+    _state.listener, _state.handler = listener, handler
+    return listener
+
+
+def shutdown_logging() -> None:
+    """Flush pending records and stop the listener thread"""
+    if _state.handler is not None:
+        logging.getLogger().removeHandler(_state.handler)
+    if _state.listener is not None:
+        _state.listener.stop()
+    _state.listener = _state.handler = None
+
+
+class RequestIdMiddleware:
+    """
+    ASGI middleware that assigns each request an id for log correlation
+
+    Reuses a well-formed incoming `X-Request-ID` (set by nginx or another
+    service) and otherwise generates one; the id is returned in the
+    response's `X-Request-ID` header.
+    """
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == REQUEST_ID_HEADER:
+                candidate = value.decode("latin-1")
+                if 0 < len(candidate) <= 128 and candidate.isprintable():
+                    request_id = candidate
+                break
+        if request_id is None:
+            request_id = uuid.uuid4().hex
+        header = request_id.encode("latin-1")
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (REQUEST_ID_HEADER, header)]
+            await send(message)
+
+        token = _request_id.set(request_id)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_id.reset(token)
@@ -67,6 +67,7 @@ def test_error_reproduction():
 def test_business_rules_calculator():
     """Testar com o BusinessRulesCalculator"""
     try:
+        from app.services.budget_validation import validate_budget_items
         from app.services.business_rules_calculator import BusinessRulesCalculator
         
         print("\n🔍 Testando BusinessRulesCalculator...")
@@ -79,13 +80,14 @@ def test_business_rules_calculator():
             "percentual_icms_compra": 0.18,
             "outras_despesas_item": 0.0,
             "valor_com_icms_venda": 1500.0,
-            "percentual_icms_venda": 0.18
+            "percentual_icms_venda": 0.18,
+            "percentual_ipi": 0.0
         }
         
         print(f"📤 Dados do item: {item_data}")
         
         # Validar item
-        errors = BusinessRulesCalculator.validate_item_data(item_data)
+        errors = [str(error) for error in validate_budget_items([item_data])]
         if errors:
             print(f"❌ Erros na validação do BusinessRules: {errors}")
             return False
@@ -109,6 +111,7 @@ def test_business_rules_calculator():
 def test_api_simulation():
     """Simular o que acontece no endpoint da API"""
     try:
+        from app.services.budget_validation import validate_budget_items
         from app.services.business_rules_calculator import BusinessRulesCalculator
         from app.schemas.budget import BudgetCalculation
         
@@ -149,12 +152,11 @@ def test_api_simulation():
         print(f"✅ Items convertidos: {items_data}")
         print(f"✅ Total peso pedido: {total_peso_pedido}")
         
-        # Validar dados usando business rules
-        for i, item_data in enumerate(items_data):
-            errors = BusinessRulesCalculator.validate_item_data(item_data)
-            if errors:
-                print(f"❌ Erro na validação do item {i+1}: {errors}")
-                return False
+        # Validar dados usando business rules (todos os itens em uma passada)
+        errors = validate_budget_items(items_data)
+        if errors:
+            print(f"❌ Erros na validação dos itens: {[str(error) for error in errors]}")
+            return False
         
         print("✅ Todos os itens passaram na validação")
         
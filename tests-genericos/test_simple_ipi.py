@@ -8,6 +8,7 @@ import os
 # Add the budget service to the path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'services', 'budget_service'))
 
+from app.services.budget_validation import validate_budget_items
 from app.services.business_rules_calculator import BusinessRulesCalculator
 
 def test_simple_ipi():
@@ -32,7 +33,7 @@ def test_simple_ipi():
     try:
         # Test validation
         print("Testing validation...")
-        errors = BusinessRulesCalculator.validate_item_data(test_item)
+        errors = [str(error) for error in validate_budget_items([test_item])]
         if errors:
             print(f"Validation errors: {errors}")
             return False